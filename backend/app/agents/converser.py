@@ -9,13 +9,14 @@ import logging
 logger = logging.getLogger(__name__)
 
 async def converser(state: ConversationState, config: RunnableConfig, *, store: BaseStore) -> ConversationState:
-    llm_service = LLMService()
+    llm_service = LLMService.for_config(config)
     current_message = state.get("current_message", "").strip()
     try:
         conversational_response = await llm_service.generate_conversational_response(
             current_message,
             context={
                 "design_plan": state.get("design_plan"),
+                "plan_digest": state.get("plan_digest"),
                 "generated_screens": state.get("generated_screens"),
             }
         )
@@ -5,23 +5,65 @@ from langchain_core.runnables import RunnableConfig
 from langgraph.store.base import BaseStore
 from app.models.conversation_state import ConversationState, ConversationPhase
 from app.services.llm_service import LLMService
+from app.services.screen_prefetch import screen_prefetcher
 import logging
 from app.agents.image_enhancer import image_enhancer
-from typing import Any, Dict, List, Tuple
+from app.services.image_processor import PlaceholderScanner
+from app.services.code_parser import CodeParser, FencedCodeStreamParser
+from app.services.image_resolver import ImageResolver
+from app.services.tailwind_compiler import tailwind_compiler
+from app.services.icon_sprite import icon_inliner
+from app.services.html_minifier import minify_html
+from app.services.markup_validator import findings_report, validate_markup
+from app.services.perf_lint import audit_page
+from app.services.asset_bundle import asset_bundler
+from app.services.dom_diff import diff_documents
+from app.core.config import settings
+from typing import Any, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
-def _strip_md_fences(s: str) -> str:
-    s = s.strip()
-    if s.startswith("```"):
-        s = s.split("\n", 1)[-1]
-        if s.endswith("```"):
-            s = s[:-3]
-    return s.strip()
+def max_screen_concurrency(config: RunnableConfig) -> int:
+    """Screens generated at once: config.configurable.max_concurrency, else GEN_MAX_CONCURRENCY."""
+    cfg_conc = config.get("configurable", {}).get("max_concurrency")
+    return int(cfg_conc or os.getenv("GEN_MAX_CONCURRENCY", "4"))
+
+async def render_screen_html(
+    llm_service: LLMService,
+    screen_config: Dict[str, Any],
+    design_system: Dict[str, Any],
+    image_resolver: Optional[ImageResolver] = None,
+) -> str:
+    """
+    LLM code generation for one screen (also used by the planner to prefetch).
+
+    The document is split from the surrounding prose as it streams and fed to a
+    PlaceholderScanner, so image searches start as soon as each placeholder's query
+    is known, not after the document is complete. Raises if the LLM call failed.
+    """
+    scanner = PlaceholderScanner()
+    parser = FencedCodeStreamParser()
+    html = ""
+    async for event in llm_service.generate_screen_streaming(screen_config, design_system):
+        if event["type"] == "content_delta":
+            # only the document itself is scanned, not the prose around it
+            ready = scanner.feed(parser.feed(event["content"]))
+        elif event["type"] == "generation_complete":
+            if event.get("error"):
+                # the event carries a placeholder page; surface the failure so the screen is a fallback
+                raise RuntimeError(f"Screen generation failed: {event['error']}")
+            ready = scanner.feed(parser.close()) + scanner.close()
+            html = event.get("html") or CodeParser().parse_generated_code(event["content"])["html"]
+        else:
+            continue
+        if image_resolver is not None:
+            for req in ready:
+                image_resolver.prefetch(req)
+    return html
 
 async def generator(state: ConversationState, config: RunnableConfig, *, store: BaseStore) -> ConversationState:
     """LLM-powered screen generation with parallelism, Unsplash injection, and progress tracking."""
-    llm_service = LLMService()
+    llm_service = LLMService.for_config(config)
 
     try:
         plan: Dict[str, Any] = state.get("design_plan") or {}
@@ -53,10 +95,13 @@ async def generator(state: ConversationState, config: RunnableConfig, *, store:
             await store.aput(("generation_progress", thread_id), "current", generation_progress)
 
         # ---- concurrency controls ----
-        # configurable via config.configurable.max_concurrency or env with sane default
-        cfg_conc = config.get("configurable", {}).get("max_concurrency")
-        max_concurrency = int(cfg_conc or os.getenv("GEN_MAX_CONCURRENCY", "4"))
-        sem = asyncio.Semaphore(max_concurrency)
+        # configurable via config.configurable.max_concurrency or env with sane default;
+        # shared with the generations the planner prefetched, which already hold their slots
+        max_concurrency = max_screen_concurrency(config)
+        sem = screen_prefetcher.semaphore(thread_id, max_concurrency)
+        # one resolver per generation so screens share image searches
+        # (the planner's prefetched screens may already have started some)
+        image_resolver = screen_prefetcher.image_resolver(thread_id)
 
         # track completed count to compute overall %
         completed = 0
@@ -76,27 +121,62 @@ async def generator(state: ConversationState, config: RunnableConfig, *, store:
             if store:
                 await store.aput(("generation_progress", thread_id), "current", progress_payload)
 
-        async def _generate_one(idx: int, screen_config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        async def _generate_one(
+            idx: int, screen_config: Dict[str, Any], prefetched: Optional[asyncio.Task]
+        ) -> Tuple[int, Dict[str, Any]]:
             screen_title = screen_config.get("title", f"Screen {idx+1}")
             screen_id = screen_config.get("id", f"screen_{idx+1}")
 
             await _broadcast_progress(screen_title)
 
             try:
-                async with sem:
-                    # step 1: code
-                    raw_html = await llm_service.generate_screen_code(screen_config, design_system)
-                    html_content = _strip_md_fences(raw_html)
+                # step 1: code (reuse the generation the planner started while streaming, if any;
+                # it acquires `sem` itself, so waiting for it must not take a second slot)
+                html_content = None
+                if prefetched is not None and not prefetched.cancelled():
+                    try:
+                        html_content = await prefetched
+                    except Exception as prefetch_error:
+                        logger.warning(f"Prefetched generation failed for {screen_title}: {prefetch_error}")
+                if html_content is None:
+                    async with sem:
+                        html_content = await render_screen_html(llm_service, screen_config, design_system, image_resolver)
 
                 # step 2: enhance (kept outside the same semaphore on purpose in case it hits a different backend;
                 # if both hit same rate limit, move this inside the `async with sem:` block)
                 enhanced = await image_enhancer({
                     "thread_id": thread_id,
                     "html_code": html_content,
+                    "image_resolver": image_resolver,
                 })
                 html_content = enhanced.get("html_code", html_content)
                 images = enhanced.get("images", []) or []
 
+                # step 3: inline an SVG sprite of the lucide icons the page uses instead of the runtime
+                icon_stats = None
+                if settings.ICON_INLINE_ENABLED:
+                    html_content, icon_stats = icon_inliner.process(html_content)
+
+                # step 4: inline the Tailwind utilities the page uses instead of the CDN JIT
+                html_content, tailwind_stats = tailwind_compiler.process(html_content)
+
+                # step 5: minify what gets stored and streamed (optionally keeping the formatted source)
+                pretty_html = html_content
+                minify_stats = None
+                if settings.HTML_MINIFY:
+                    html_content = minify_html(pretty_html)
+                    bytes_in, bytes_out = len(pretty_html.encode("utf-8")), len(html_content.encode("utf-8"))
+                    minify_stats = {
+                        "bytes_in": bytes_in,
+                        "bytes_out": bytes_out,
+                        "saved_pct": round(100 * (bytes_in - bytes_out) / max(1, bytes_in), 1),
+                    }
+
+                # step 6: performance audit (applying the safe fixes), then lint what ships,
+                # so finding offsets point into the stored html
+                html_content, performance = audit_page(html_content, fix=settings.PERF_LINT_FIX)
+                validation = findings_report(validate_markup(html_content))
+
                 credits = [{
                     "photographer": getattr(img, "author", None),
                     "alt": getattr(img, "alt_description", None),
@@ -113,8 +193,16 @@ async def generator(state: ConversationState, config: RunnableConfig, *, store:
                     "description": screen_config.get("description", ""),
                     "components": screen_config.get("components", []),
                     "credits": credits,
+                    "image_latency_ms": enhanced.get("image_latency_ms", 0),
+                    "icons": icon_stats,
+                    "tailwind": tailwind_stats,
+                    "minify": minify_stats,
+                    "validation": validation,
+                    "performance": performance,
                     "generated_at": datetime.utcnow().isoformat(),
                 }
+                if settings.HTML_MINIFY and settings.HTML_KEEP_PRETTY:
+                    result["html_pretty"] = pretty_html
 
             except Exception as e:
                 logger.error(f"Error generating {screen_title}: {e}")
@@ -140,17 +228,43 @@ async def generator(state: ConversationState, config: RunnableConfig, *, store:
 
             return idx, result
 
+        # claim generations the planner started while the plan was streaming;
+        # anything left over is not in the final plan and is stale
+        prefetched = [screen_prefetcher.claim(thread_id, sc, design_system) for sc in screens]
+        screen_prefetcher.discard(thread_id)
+
         # fan-out
         tasks = [
-            asyncio.create_task(_generate_one(i, sc))
+            asyncio.create_task(_generate_one(i, sc, prefetched[i]))
             for i, sc in enumerate(screens)
         ]
 
-        # fan-in (keep order by index)
-        gathered = await asyncio.gather(*tasks, return_exceptions=False)
+        # fan-in (keep order by index); if this run is cancelled, stop the generations it owns
+        # (cancelling finished tasks is a no-op)
+        try:
+            gathered = await asyncio.gather(*tasks, return_exceptions=False)
+        finally:
+            for task in [*tasks, *(p for p in prefetched if p is not None)]:
+                task.cancel()
         gathered.sort(key=lambda t: t[0])
         generated_screens = [item[1] for item in gathered]
 
+        # store CSS/JS the screens repeat as shared, content-hashed files; the screens' html stays
+        # self-contained, only delivery to clients that ask for it references the files
+        asset_bundle = {"assets": [], "bytes_saved": 0}
+        if settings.ASSET_BUNDLE_ENABLED:
+            try:
+                asset_bundle = await asset_bundler.bundle([s for s in generated_screens if not s.get("fallback")])
+            except Exception as bundle_error:
+                logger.warning(f"Asset bundling failed, screens are delivered self-contained: {bundle_error}")
+
+        # edits: patch ops against the version of each screen the client already has
+        prior_screens = state.get("generated_screens") or state.get("previous_screens") or []
+        previous = {s.get("id"): s.get("html") for s in prior_screens if s.get("html")}
+        for s in generated_screens:
+            if not s.get("fallback") and previous.get(s["id"]):
+                s["patch"] = diff_documents(previous[s["id"]], s["html"])
+
         # finalize progress
         generation_progress.update({
             "current_screen": total_screens,
@@ -172,6 +286,7 @@ async def generator(state: ConversationState, config: RunnableConfig, *, store:
         return {
             **state,
             "generated_screens": generated_screens,
+            "previous_screens": None,
             "generation_progress": generation_progress,
             "phase": ConversationPhase.COMPLETE,
             "progress": 100,
@@ -182,6 +297,26 @@ async def generator(state: ConversationState, config: RunnableConfig, *, store:
                 "fallback_screens": len(fallback_screens),
                 "completion_time": datetime.utcnow().isoformat(),
                 "max_concurrency": max_concurrency,
+                "image_latency_ms": [s.get("image_latency_ms", 0) for s in generated_screens],
+                "image_searches": image_resolver.searches,
+                "image_searches_prefetched": image_resolver.prefetched,
+                "image_searches_pooled": image_resolver.pooled,
+                "html_bytes_saved": sum(
+                    (s.get("minify") or {}).get("bytes_in", 0) - (s.get("minify") or {}).get("bytes_out", 0)
+                    for s in generated_screens
+                ),
+                "asset_bundle": asset_bundle,
+                "patched_screens": sum(1 for s in generated_screens if (s.get("patch") or {}).get("mode") == "patch"),
+                "validation_errors": sum((s.get("validation") or {}).get("errors", 0) for s in generated_screens),
+                "validation_warnings": sum((s.get("validation") or {}).get("warnings", 0) for s in generated_screens),
+                "performance_scores": [(s.get("performance") or {}).get("score") for s in generated_screens],
+                "performance_fixes": sum((s.get("performance") or {}).get("fixes", 0) for s in generated_screens),
+                "icon_runtime_removed_screens": sum(
+                    1 for s in generated_screens if (s.get("icons") or {}).get("runtime_removed")
+                ),
+                "tailwind_compiled_screens": sum(
+                    1 for s in generated_screens if (s.get("tailwind") or {}).get("mode") == "compiled"
+                ),
             },
             "updated_at": datetime.utcnow().isoformat(),
         }
@@ -1,12 +1,18 @@
+import time
 from app.models.design_state import DesignState
-from app.services.unsplash_service import UnsplashService
+from app.services.unsplash_service import download_tracker
 from app.services.image_processor import ImageProcessor
+from app.services.image_resolver import ImageResolver
+from app.services.lqip import lqip_service
 
 async def image_enhancer(state: DesignState) -> DesignState:
     """
     Image enhancement agent - finds and replaces placeholder images with Unsplash (or robust fallbacks).
+
+    Pass a shared `image_resolver` in the state to de-duplicate searches across screens.
     """
     print(f"🖼️ Image Enhancement Agent: Processing images for {state.get('thread_id','unknown')}")
+    started = time.perf_counter()
     
     try:
         html_code = state["html_code"]
@@ -14,44 +20,28 @@ async def image_enhancer(state: DesignState) -> DesignState:
         requirements = image_processor.extract_image_requirements(html_code)
 
         if not requirements:
-            return {**state, "images": [], "status": "complete", "progress": 75}
-
-        unsplash = UnsplashService()
-        fetched = []
+            return {**state, "images": [], "status": "complete", "progress": 75, "image_latency_ms": 0}
 
-        # Fetch per requirement to improve topical match (hero vs cards, etc.)
-        for req in requirements:
-            try:
-                imgs = await unsplash.search_images(
-                    query=req.get("query") or "modern ui hero",
-                    count=1,
-                    width=req.get("width"),
-                    height=req.get("height"),
-                    orientation="landscape" if req.get("type") == "background" else "landscape"
-                )
-                if imgs:
-                    fetched.extend(imgs)
-            except Exception as img_error:
-                print(f"⚠️ Image search failed for '{req.get('query')}': {img_error}")
-                continue
+        # Concurrent, de-duplicated search; one image per requirement, in order
+        resolver = state.get("image_resolver") or ImageResolver()
+        fetched = await resolver.resolve(requirements)
 
-        # Replace placeholders with actual image URLs (now supports multi-replace)
-        enhanced_html = image_processor.inject_images(html_code, fetched)
+        # Replace placeholders with actual image URLs, painted over a cached LQIP
+        placeholders = await lqip_service.for_images(fetched)
+        enhanced_html = image_processor.inject_images(html_code, fetched, placeholders)
 
-        # Fire-and-forget download tracking for Unsplash images
+        # Download tracking runs on a background queue, off the critical path
         for img in fetched:
             if getattr(img, "download_location", ""):
-                try:
-                    await unsplash.track_download(img.download_location)
-                except Exception:
-                    pass
+                download_tracker.enqueue(img.download_location)
 
         return {
             **state,
             "html_code": enhanced_html,
             "images": fetched,
             "status": "complete",
-            "progress": 90
+            "progress": 90,
+            "image_latency_ms": int((time.perf_counter() - started) * 1000),
         }
         
     except Exception as e:
@@ -61,5 +51,6 @@ async def image_enhancer(state: DesignState) -> DesignState:
             "images": [],
             "status": "complete",
             "progress": 75,
+            "image_latency_ms": int((time.perf_counter() - started) * 1000),
             "error_message": f"Image enhancement failed: {str(e)} (proceeding without images)"
         }
@@ -1,14 +1,21 @@
 from datetime import datetime
+from typing import Any, Dict, List, Optional
+from langchain_core.callbacks.manager import adispatch_custom_event
 from langchain_core.runnables import RunnableConfig
 from langgraph.store.base import BaseStore
 from app.models.conversation_state import ConversationState, ConversationPhase
+from app.core.config import settings
 from app.services.llm_service import LLMService
+from app.services.screen_prefetch import screen_prefetcher
+from app.agents.generator import max_screen_concurrency, render_screen_html
+from app.services.context_compactor import build_plan_digest
 import logging
 
 logger = logging.getLogger(__name__)
 
 def _create_fallback_plan(requirements: str) -> dict:
     return {
+        "fallback": True,
         "estimated_complexity": "simple",
         "design_system": {"color_scheme": "modern", "primary_color": "blue-500"},
         "screens": [{
@@ -21,15 +28,84 @@ def _create_fallback_plan(requirements: str) -> dict:
         }]
     }
 
+async def _stream_plan(
+    llm_service: LLMService,
+    requirements: str,
+    context: Dict[str, Any],
+    thread_id: str,
+    config: RunnableConfig,
+) -> Dict[str, Any]:
+    """
+    Consume the streamed plan; every screen that closes is forwarded to the client
+    as a `plan_partial` event and (when pipelining is on) its generation is started
+    right away so it overlaps with the rest of planning.
+    """
+    design_system: Optional[Dict[str, Any]] = None
+    pending: List[Dict[str, Any]] = []  # screens that closed before design_system
+
+    def _prefetch(screen: Dict[str, Any]) -> None:
+        if not settings.PLAN_PIPELINING:
+            return
+        # the generator's limit applies while the plan streams too; both are taken now, as the
+        # generator's discard() forgets them while a claimed prefetch may still be waiting
+        sem = screen_prefetcher.semaphore(thread_id, max_screen_concurrency(config))
+        resolver = screen_prefetcher.image_resolver(thread_id)
+        ds = design_system
+
+        async def _render() -> str:
+            async with sem:
+                return await render_screen_html(llm_service, screen, ds, resolver)
+
+        screen_prefetcher.start(thread_id, screen, design_system, _render)
+
+    plan: Dict[str, Any] = {}
+    handed_off = False
+    try:
+        async for event in llm_service.generate_design_plan_streaming(requirements, context=context):
+            kind = event.get("type")
+            if kind == "design_system":
+                design_system = event["design_system"]
+                for screen in pending:
+                    _prefetch(screen)
+                pending.clear()
+            elif kind == "screen":
+                screen = event["screen"]
+                try:
+                    await adispatch_custom_event(
+                        "plan_partial",
+                        {"screen_index": event["index"], "screen": screen, "design_system": design_system},
+                        config=config,
+                    )
+                except Exception as e:  # no parent run (e.g. invoked outside the graph)
+                    logger.debug(f"plan_partial not dispatched: {e}")
+                if design_system is None:
+                    pending.append(screen)
+                else:
+                    _prefetch(screen)
+            elif kind == "plan_complete":
+                plan = event["plan"]
+        handed_off = True
+        return plan
+    finally:
+        # failed or cancelled mid-stream (CancelledError included): nobody will claim the prefetches
+        if not handed_off:
+            screen_prefetcher.discard(thread_id)
+
 async def planner(state: ConversationState, config: RunnableConfig, *, store: BaseStore) -> ConversationState:
-    llm_service = LLMService()
+    llm_service = LLMService.for_config(config)
     try:
         requirements = state.get("design_requirements", "Create a simple website")
         prior_plan = state.get("design_plan")  # may be None for new designs
         logger.info(f"Generating design plan. Prior plan exists? {bool(prior_plan)}")
 
         # NEW: pass prior plan to help with incremental edits
-        plan = await llm_service.generate_design_plan(requirements, context={"prior_plan": prior_plan})
+        plan = await _stream_plan(
+            llm_service,
+            requirements,
+            context={"prior_plan": prior_plan},
+            thread_id=config.get("configurable", {}).get("thread_id", "default"),
+            config=config,
+        )
         if not isinstance(plan, dict) or not plan.get("screens"):
             logger.warning("Invalid plan structure, using fallback")
             plan = _create_fallback_plan(requirements)
@@ -47,19 +123,24 @@ async def planner(state: ConversationState, config: RunnableConfig, *, store: Ba
         return {
             **state,
             "design_plan": plan,                # ← updated plan replaces old one
+            "plan_digest": build_plan_digest(plan),  # ← cached for router/converser prompts
             "phase": ConversationPhase.GENERATING,
             "progress": max(25, state.get("progress", 0)),
             "last_response": response_text,
             # Optional: drop stale generated_screens so UI shows fresh output only
+            # (kept aside until the generator has diffed the new versions against them)
             "generated_screens": None,
+            "previous_screens": state.get("generated_screens") or state.get("previous_screens"),
             "updated_at": datetime.utcnow().isoformat(),
         }
     except Exception as e:
         logger.error(f"Planning error: {e}")
+        screen_prefetcher.discard(config.get("configurable", {}).get("thread_id", "default"))
         fallback_plan = _create_fallback_plan(state.get("design_requirements", "simple website"))
         return {
             **state,
             "design_plan": fallback_plan,
+            "plan_digest": build_plan_digest(fallback_plan),
             "phase": ConversationPhase.GENERATING,
             "progress": 20,
             "last_response": "Planned a basic design (fallback). Generating now…",
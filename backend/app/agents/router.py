@@ -3,6 +3,7 @@ from langchain_core.runnables import RunnableConfig
 from langgraph.store.base import BaseStore
 from app.models.conversation_state import ConversationState, ConversationPhase
 from app.services.llm_service import LLMService
+from app.services.context_compactor import get_plan_digest
 import logging, hashlib
 
 logger = logging.getLogger(__name__)
@@ -13,7 +14,7 @@ DESIGN_KEYWORDS = [
     "login", "signup", "form", "portal", "platform", "site"
 ]
 async def router(state: ConversationState, config: RunnableConfig, *, store: BaseStore) -> ConversationState:
-    llm_service = LLMService()
+    llm_service = LLMService.for_config(config)
     current_message = (state.get("current_message") or "").strip()
     current_phase = state.get("phase", ConversationPhase.INITIAL)
 
@@ -30,6 +31,11 @@ async def router(state: ConversationState, config: RunnableConfig, *, store: Bas
     last_sig = state.get("_last_routed_sig")
     is_new_message = sig != last_sig
 
+    # Build (or reuse) the compact plan digest once; it rides along on the state
+    plan_digest = get_plan_digest(state.get("design_plan"), state.get("plan_digest"))
+    if plan_digest:
+        state = {**state, "plan_digest": plan_digest}
+
     try:
         if is_new_message:
             routing_result = await llm_service.route_request(
@@ -37,6 +43,7 @@ async def router(state: ConversationState, config: RunnableConfig, *, store: Bas
                 current_phase=current_phase,
                 context={
                     "design_plan": state.get("design_plan"),
+                    "plan_digest": plan_digest,
                     "generated_screens": state.get("generated_screens"),
                     "last_requirements": state.get("design_requirements"),
                 }
@@ -65,15 +72,13 @@ async def router(state: ConversationState, config: RunnableConfig, *, store: Bas
 
             # EDIT the existing plan → replan with prior context
             if action == "modification_request" and state.get("design_plan"):
-                # Build a requirements brief that includes prior plan + concrete edits
-                from json import dumps
-                prior_plan = state.get("design_plan")
+                # Requirements brief with the concrete edits; the planner gets the full
+                # current plan as PRIOR_PLAN (a digest here would drop untouched fields)
                 edit_brief = (
                     "Please update the existing design based on these changes:\n"
                     + "\n".join(f"- {m}" for m in mods) + "\n\n"
                     "Maintain overall style unless edits conflict.\n"
-                    "Here is the current plan JSON:\n"
-                    + dumps(prior_plan) + "\n"
+                    "The current plan is given in full as PRIOR_PLAN; keep everything these changes don't touch.\n"
                 )
                 return {
                     **state,
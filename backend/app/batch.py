@@ -0,0 +1,298 @@
+"""
+Offline bulk generation.
+
+    python -m app.batch generate briefs.jsonl --user-clerk-id user_123 --concurrency 6
+
+Each line of the input is a JSON object: {"id": "...", "brief": "...", "title": "...", "tags": [...]}.
+`id` defaults to the line number, `title` to the first plan screen. Finished briefs are
+appended to a checkpoint file, so re-running the same command resumes where it stopped.
+A brief's design row and S3 keys are derived from its id, so a retried brief replaces
+what an interrupted run saved instead of adding a copy.
+Briefs whose plan or screens fell back are recorded as "partial", not saved, and retried
+on the next run.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set
+
+from app.agents.generator import generator
+from app.agents.planner import planner
+from app.core.config import settings
+from app.models.conversation_state import ConversationPhase
+from app.models.design_state import DesignMetadata, GeneratedScreen, ScreenType
+from app.services.http_clients import http_clients
+from app.services.model_router import request_model_allowed
+from app.services.token_tracker import TokenTracker
+from app.services.unsplash_service import download_tracker
+
+logger = logging.getLogger("app.batch")
+
+# design ids are uuid5(BATCH_NAMESPACE, "<owner clerk id>/<brief id>")
+BATCH_NAMESPACE = uuid.UUID("5d0c4a3e-8f1b-4c52-9a5e-2b7d3f0e6c19")
+
+
+def load_briefs(path: str) -> List[Dict[str, Any]]:
+    briefs = []
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"brief": item}
+            item.setdefault("id", f"line-{lineno}")
+            item["id"] = str(item["id"])
+            briefs.append(item)
+    return briefs
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """Ids of briefs that already completed successfully."""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # torn last line after a crash
+            if rec.get("status") == "ok":
+                done.add(str(rec.get("id")))
+    return done
+
+
+class BatchRunner:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.tracker = TokenTracker()  # shared by every brief for the final cost report
+        self.checkpoint_lock = asyncio.Lock()
+        self.stats = {"ok": 0, "partial": 0, "failed": 0, "skipped": 0, "screens": 0}
+        self.user_id: Optional[uuid.UUID] = None
+
+    # ---- persistence ----
+    async def _resolve_user(self) -> Optional[uuid.UUID]:
+        if self.args.no_db:
+            return None
+        from app.core.database import AsyncSessionLocal
+        from app.services.user_service import UserService
+
+        async with AsyncSessionLocal() as db:
+            user = await UserService(db).get_or_create_user(
+                clerk_id=self.args.user_clerk_id,
+                email=self.args.user_email or f"{self.args.user_clerk_id}@batch.local",
+            )
+            return user.id
+
+    def _design_id(self, item: Dict[str, Any]) -> uuid.UUID:
+        return uuid.uuid5(BATCH_NAMESPACE, f"{self.args.user_clerk_id}/{item['id']}")
+
+    async def _save_design(self, item: Dict[str, Any], plan: Dict[str, Any], screens: List[Dict[str, Any]]) -> str:
+        from app.core.database import AsyncSessionLocal
+        from app.schemas.design import DesignCreate, DesignUpdate
+        from app.services.design_service import DesignService
+
+        async with AsyncSessionLocal() as db:
+            first = screens[0] if screens else {}
+            # html_code holds the first screen (what the gallery previews); every screen is kept here
+            all_screens = [
+                {k: s.get(k) for k in ("id", "title", "screen_type", "html", "css", "js")} for s in screens
+            ]
+            design = await DesignService(db).save_design(self._design_id(item), self.user_id, DesignCreate(
+                title=item.get("title") or first.get("title") or "Untitled design",
+                description=item["brief"][:2000],
+                prompt_config={
+                    "source": "batch", "brief_id": item["id"], "brief": item["brief"],
+                    "design_plan": plan, "screens": all_screens,
+                },
+                is_public=bool(item.get("is_public", self.args.public)),
+                tags=item.get("tags") or [],
+            ), DesignUpdate(
+                html_code=first.get("html") or "",
+                images=[c for s in screens for c in (s.get("credits") or [])],
+                status="completed",
+            ))
+            return str(design.id)
+
+    async def _upload_screens(self, item: Dict[str, Any], screens: List[Dict[str, Any]]) -> List[str]:
+        from app.services.s3_service import S3Service
+
+        s3 = S3Service()
+        urls = []
+        for i, s in enumerate(screens):
+            screen_type = s.get("screen_type", "landing")
+            screen_type = ScreenType(screen_type) if screen_type in ScreenType._value2member_map_ else ScreenType.LANDING
+            screen = GeneratedScreen(
+                screen_id=s["id"],
+                metadata=DesignMetadata(
+                    screen_id=s["id"], screen_type=screen_type, title=s.get("title", ""),
+                    description=s.get("description", ""), estimated_tokens=0, generation_order=i + 1,
+                ),
+                html_code=s.get("html") or "",
+                css_classes=s.get("css") or "",
+                javascript=s.get("js") or "",
+                images=s.get("credits") or [],
+                generation_time_ms=0,
+                token_usage=0,
+            )
+            # same keys on every run of the brief: a retry overwrites, it does not add copies
+            urls.append(await s3.store_generated_screen(f"batch-{item['id']}", self._design_id(item).hex, screen))
+        return urls
+
+    async def _write_checkpoint(self, record: Dict[str, Any]) -> None:
+        async with self.checkpoint_lock:
+            with open(self.args.checkpoint, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+
+    # ---- pipeline ----
+    async def run_one(self, item: Dict[str, Any]) -> None:
+        started = time.time()
+        cost_before = self.tracker.session_usage["total_cost"]
+        thread_id = f"batch-{item['id']}"
+        config = {"configurable": {
+            "thread_id": thread_id,
+            "model": item.get("model") or self.args.model,
+            "user_tier": self.args.user_tier,
+            "max_concurrency": self.args.screen_concurrency,
+            "token_tracker": self.tracker,
+        }}
+        record: Dict[str, Any] = {"id": item["id"]}
+        try:
+            state: Dict[str, Any] = {"thread_id": thread_id, "design_requirements": item["brief"]}
+            state = await planner(state, config, store=None)
+            state = await generator(state, config, store=None)
+            if state.get("phase") != ConversationPhase.COMPLETE:
+                raise RuntimeError(state.get("error_message") or "generation did not complete")
+
+            screens = state.get("generated_screens") or []
+            fallback_plan = bool(state["design_plan"].get("fallback"))
+            fallback_screens = state.get("generation_summary", {}).get("fallback_screens", 0)
+            if fallback_plan or fallback_screens:
+                # a degraded run is neither saved nor checkpointed as done, so --resume retries it
+                record.update({
+                    "status": "partial",
+                    "fallback_plan": fallback_plan,
+                    "fallback_screens": fallback_screens,
+                    "error": state.get("error_message") or f"{fallback_screens} screens fell back",
+                })
+                logger.warning(f"Brief {item['id']} fell back: {record['error']}")
+                self.stats["partial"] += 1
+            else:
+                if not self.args.no_s3:
+                    record["s3_urls"] = await self._upload_screens(item, screens)
+                if not self.args.no_db:
+                    record["design_id"] = await self._save_design(item, state["design_plan"], screens)
+                if self.args.out_dir:
+                    path = os.path.join(self.args.out_dir, f"{item['id']}.json")
+                    with open(path, "w", encoding="utf-8") as f:
+                        json.dump({"plan": state["design_plan"], "screens": screens}, f, ensure_ascii=False)
+
+                record.update({"status": "ok", "screens": len(screens)})
+                self.stats["ok"] += 1
+                self.stats["screens"] += len(screens)
+        except Exception as e:
+            logger.error(f"Brief {item['id']} failed: {e}")
+            record.update({"status": "failed", "error": str(e)})
+            self.stats["failed"] += 1
+
+        record["duration_ms"] = int((time.time() - started) * 1000)
+        record["cost"] = round(self.tracker.session_usage["total_cost"] - cost_before, 6)
+        await self._write_checkpoint(record)
+        print(f"[{record['status']}] {item['id']} in {record['duration_ms']}ms")
+
+    async def run(self) -> Dict[str, Any]:
+        briefs = load_briefs(self.args.briefs)
+        done = load_checkpoint(self.args.checkpoint)
+        todo = [b for b in briefs if b["id"] not in done]
+        self.stats["skipped"] = len(briefs) - len(todo)
+        print(f"📦 {len(briefs)} briefs, {self.stats['skipped']} already done, {len(todo)} to generate")
+
+        if self.args.out_dir:
+            os.makedirs(self.args.out_dir, exist_ok=True)
+        if todo and not self.args.no_db:
+            self.user_id = await self._resolve_user()
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in todo:
+            queue.put_nowait(item)
+
+        async def worker() -> None:
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self.run_one(item)
+
+        started = time.time()
+        await asyncio.gather(*(worker() for _ in range(max(1, self.args.concurrency))))
+        await download_tracker.drain()
+        await http_clients.aclose()
+        return self.report(time.time() - started)
+
+    def report(self, elapsed_s: float) -> Dict[str, Any]:
+        usage = self.tracker.get_session_summary()
+        minutes = max(elapsed_s / 60, 1e-9)
+        report = {
+            **self.stats,
+            "elapsed_s": round(elapsed_s, 1),
+            "designs_per_min": round(self.stats["ok"] / minutes, 2),
+            "screens_per_min": round(self.stats["screens"] / minutes, 2),
+            "total_tokens": usage["total_tokens"],
+            "total_cost": round(usage["total_cost"], 4),
+            "cost_per_design": round(usage["total_cost"] / max(1, self.stats["ok"]), 4),
+            "model_breakdown": usage["model_breakdown"],
+        }
+        print("\n📊 Batch report")
+        for key in ("ok", "partial", "failed", "skipped", "screens", "elapsed_s", "designs_per_min",
+                    "screens_per_min", "total_tokens", "total_cost", "cost_per_design"):
+            print(f"  {key:>16}: {report[key]}")
+        return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.batch", description="Offline bulk design generation")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="Plan and generate designs for every brief in a JSONL file")
+    gen.add_argument("briefs", help="JSONL file of briefs")
+    gen.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "4")),
+                     help="Briefs processed in parallel")
+    gen.add_argument("--screen-concurrency", type=int, default=3, help="Screens generated in parallel per brief")
+    gen.add_argument("--checkpoint", help="Progress file (default: <briefs>.checkpoint.jsonl)")
+    gen.add_argument("--out-dir", help="Also write plan + screens JSON per brief to this directory")
+    gen.add_argument("--model", help="Force one model for every operation (must be allowed for --user-tier)")
+    gen.add_argument("--user-tier", default="user", help="User tier for the model routing table")
+    gen.add_argument("--user-clerk-id", default="batch-generator", help="Owner of the created designs")
+    gen.add_argument("--user-email", help="Owner email (created if the user does not exist)")
+    gen.add_argument("--public", action="store_true", help="Mark designs as public (gallery)")
+    gen.add_argument("--no-db", action="store_true", help="Do not write to the designs table")
+    gen.add_argument("--no-s3", action="store_true", help="Do not upload screens to S3")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO))
+    args = build_parser().parse_args(argv)
+    args.checkpoint = args.checkpoint or f"{args.briefs}.checkpoint.jsonl"
+    if args.model and not request_model_allowed(args.model, args.user_tier):
+        print(f"❌ --model {args.model} is not in REQUEST_MODELS_BY_TIER for --user-tier {args.user_tier}")
+        return 2
+    if not settings.AWS_ACCESS_KEY_ID and not args.no_s3:
+        print("⚠️ AWS credentials not configured; skipping S3 upload")
+        args.no_s3 = True
+
+    report = asyncio.run(BatchRunner(args).run())
+    return 0 if report["failed"] == 0 and report["partial"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,13 @@
+import asyncio
 import os
+import time
 import jwt
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import httpx
-from functools import lru_cache
+from app.services.http_clients import http_clients
 
 security = HTTPBearer()
 
@@ -23,41 +26,104 @@ def get_issuer_from_token(token: str) -> str:
     except Exception:
         return None
 
-@lru_cache(maxsize=8)
-def get_jwks_for_issuer(issuer: str) -> Dict[str, Any]:
-    """Fetch JWKS for a specific issuer with multiple URL attempts"""
+# issuer -> (fetched_at, jwks), least recently used first; refreshed after JWKS_TTL_SECONDS
+# or on an unknown kid. Issuers come from unverified tokens, so both maps are bounded.
+_jwks_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+# issuer -> last failed fetch; no new fetch for that issuer until the cooldown has passed
+_jwks_failures: "OrderedDict[str, float]" = OrderedDict()
+# issuer -> the fetch in flight, shared by every request that needs it meanwhile
+_jwks_inflight: Dict[str, "asyncio.Task[Optional[Dict[str, Any]]]"] = {}
+JWKS_TTL_SECONDS = 3600
+JWKS_CACHE_MAX_ISSUERS = 8
+JWKS_REFRESH_COOLDOWN_SECONDS = 60
+JWKS_MAX_TRACKED_ISSUERS = 256
+# keys fetched this recently already include any rotation an unknown kid could point to
+JWKS_MIN_REFRESH_SECONDS = 5
+
+def _remember(cache: OrderedDict, key: str, value: Any, limit: int) -> None:
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > limit:
+        cache.popitem(last=False)
+
+async def _fetch_jwks(issuer: str) -> Optional[Dict[str, Any]]:
+    """Fetch JWKS for a specific issuer with multiple URL attempts; None if all fail"""
     # Try multiple possible JWKS URLs
     possible_urls = [
         f"{issuer.rstrip('/')}/.well-known/jwks.json",
         f"{issuer.rstrip('/')}/v1/jwks",
         "https://api.clerk.dev/v1/jwks"  # Global endpoint (requires auth)
     ]
-    
-    for url in possible_urls:
-        try:
-            print(f"🔍 Trying JWKS URL: {url}")
-            
-            # For the API endpoint, we need authorization
-            headers = {}
-            if "api.clerk.dev" in url:
-                headers["Authorization"] = f"Bearer {CLERK_SECRET_KEY}"
-            
-            response = httpx.get(url, headers=headers, timeout=10.0, follow_redirects=True)
-            response.raise_for_status()
-            jwks_data = response.json()
-            print(f"✅ Successfully fetched JWKS from: {url}")
-            return jwks_data
-            
-        except Exception as e:
-            print(f"❌ Failed to fetch from {url}: {str(e)}")
-            continue
-    
+    client = http_clients.get("jwks")
+    try:
+        for url in possible_urls:
+            try:
+                print(f"🔍 Trying JWKS URL: {url}")
+
+                # For the API endpoint, we need authorization
+                headers = {}
+                if "api.clerk.dev" in url:
+                    headers["Authorization"] = f"Bearer {CLERK_SECRET_KEY}"
+
+                response = await client.get(url, headers=headers)
+                response.raise_for_status()
+                jwks_data = response.json()
+                print(f"✅ Successfully fetched JWKS from: {url}")
+                _remember(_jwks_cache, issuer, (time.time(), jwks_data), JWKS_CACHE_MAX_ISSUERS)
+                _jwks_failures.pop(issuer, None)
+                return jwks_data
+
+            except Exception as e:
+                print(f"❌ Failed to fetch from {url}: {str(e)}")
+                continue
+
+        _remember(_jwks_failures, issuer, time.time(), JWKS_MAX_TRACKED_ISSUERS)
+        return None
+    finally:
+        _jwks_inflight.pop(issuer, None)
+
+async def get_jwks_for_issuer(issuer: str, force_refresh: bool = False) -> Dict[str, Any]:
+    """JWKS for an issuer: cached, or fetched once however many requests need it at the same time"""
+    now = time.time()
+    cached = _jwks_cache.get(issuer)
+    if cached:
+        _jwks_cache.move_to_end(issuer)
+        max_age = JWKS_MIN_REFRESH_SECONDS if force_refresh else JWKS_TTL_SECONDS
+        if now - cached[0] < max_age:
+            return cached[1]
+
+    fetch = _jwks_inflight.get(issuer)
+    if fetch is None:
+        failed_at = _jwks_failures.get(issuer)
+        if failed_at is not None and now - failed_at < JWKS_REFRESH_COOLDOWN_SECONDS:
+            if cached:
+                return cached[1]
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to fetch JWKS for issuer: {issuer} (retrying after cooldown)"
+            )
+        fetch = _jwks_inflight[issuer] = asyncio.create_task(_fetch_jwks(issuer))
+
+    # shielded: one caller going away must not cancel the fetch for the others
+    jwks_data = await asyncio.shield(fetch)
+    if jwks_data is not None:
+        return jwks_data
+    if cached:
+        # Keep verifying with the last known keys if the issuer is briefly unreachable
+        return cached[1]
+
     raise HTTPException(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         detail=f"Failed to fetch JWKS from all attempted URLs for issuer: {issuer}"
     )
 
-def verify_jwt_with_jwks(token: str) -> Dict[str, Any]:
+def _find_jwk(jwks: Dict[str, Any], kid: Optional[str]):
+    for jwk in jwks.get("keys", []):
+        if jwk.get("kid") == kid:
+            return jwt.algorithms.RSAAlgorithm.from_jwk(jwk)
+    return None
+
+async def verify_jwt_with_jwks(token: str) -> Dict[str, Any]:
     """Verify JWT using JWKS"""
     try:
         # Get unverified header and payload
@@ -75,18 +141,19 @@ def verify_jwt_with_jwks(token: str) -> Dict[str, Any]:
         print(f"🔍 Token issuer: {issuer}")
         
         # Get JWKS for this issuer
-        jwks = get_jwks_for_issuer(issuer)
+        jwks = await get_jwks_for_issuer(issuer)
         
         # Find the correct key
-        key = None
         kid = unverified_header.get("kid")
         print(f"🔍 Looking for key ID: {kid}")
         
-        for jwk in jwks.get("keys", []):
-            if jwk.get("kid") == kid:
-                key = jwt.algorithms.RSAAlgorithm.from_jwk(jwk)
-                print(f"✅ Found matching key for kid: {kid}")
-                break
+        key = _find_jwk(jwks, kid)
+        if not key:
+            # Keys may have rotated since we cached them
+            jwks = await get_jwks_for_issuer(issuer, force_refresh=True)
+            key = _find_jwk(jwks, kid)
+        if key:
+            print(f"✅ Found matching key for kid: {kid}")
         
         if not key:
             available_kids = [jwk.get("kid") for jwk in jwks.get("keys", [])]
@@ -140,7 +207,7 @@ def verify_jwt_with_jwks(token: str) -> Dict[str, Any]:
 async def verify_clerk_token(token: str) -> Dict[str, Any]:
     """Main verification method"""
     try:
-        return verify_jwt_with_jwks(token)
+        return await verify_jwt_with_jwks(token)
     except HTTPException:
         raise
     except Exception as e:
@@ -156,8 +223,7 @@ async def fetch_user(user_id: str) -> Dict[str, Any]:
     headers = {"Authorization": f"Bearer {CLERK_SECRET_KEY}"}
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, headers=headers)
+        response = await http_clients.get("clerk").get(url, headers=headers)
         
         if response.status_code != 200:
             raise HTTPException(
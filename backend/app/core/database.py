@@ -1,18 +1,203 @@
-from sqlalchemy import create_engine, MetaData
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import create_engine, MetaData, text
+from sqlalchemy import exc as sa_exc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
 
-# Async SQLAlchemy setup for LangGraph
-async_engine = create_async_engine(
-    settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"),
-    echo=settings.DEBUG
-)
+
+class _PoolWaits:
+    """How long checkouts waited for a pooled connection."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def record(self, wait_ms: float) -> None:
+        self.checkouts += 1
+        self.wait_ms_total += wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 2) if self.checkouts else 0.0,
+            "wait_ms_max": round(self.wait_ms_max, 2),
+        }
+
+
+class _TimedPoolMixin:
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.waits = _PoolWaits()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            self.waits.timeouts += 1
+            raise
+        self.waits.record((time.perf_counter() - started) * 1000)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _driver_url(url: str, driver: Optional[str]) -> str:
+    """DATABASE_URL with the given SQLAlchemy driver (None = plain libpq URL for psycopg)."""
+    base = url.split("://", 1)[1]
+    return f"postgresql+{driver}://{base}" if driver else f"postgresql://{base}"
+
+
+class PostgresConnections:
+    """
+    Owns every Postgres connection the backend opens: the async engine
+    (routers, services), the sync engine (blocking callers), the psycopg pool the
+    LangGraph checkpointer/store share, and the health check.
+
+    DATABASE_URL normally points at a transaction pooler (pgbouncer /
+    Supavisor on :6543), where a server connection is ours for a single
+    transaction only. With DB_TRANSACTION_POOLER every driver runs without
+    named prepared statements, and pools stay small because the pooler
+    multiplexes them onto a few server connections.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        pooler = settings.DB_TRANSACTION_POOLER
+        pool_args = {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+            "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+            "pool_pre_ping": True,
+        }
+        asyncpg_args: Dict[str, Any] = {}
+        if pooler:
+            # asyncpg caches (and names) prepared statements per connection; behind a transaction pooler
+            # the next transaction may land on a server connection that never saw them
+            asyncpg_args = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            }
+        self.async_engine = create_async_engine(
+            _driver_url(url, "asyncpg"),
+            echo=settings.DEBUG,
+            poolclass=TimedAsyncQueuePool,
+            connect_args=asyncpg_args,
+            **pool_args,
+        )
+        # psycopg2 never prepares server-side, nothing to switch off
+        self.sync_engine = create_engine(
+            _driver_url(url, "psycopg2"), echo=settings.DEBUG, poolclass=TimedQueuePool, **pool_args
+        )
+        self._langgraph_pool = None
+        self._langgraph: Optional[Tuple[Any, Any]] = None
+        self._lock = asyncio.Lock()
+
+    async def langgraph(self) -> Tuple[Any, Any]:
+        """(AsyncPostgresSaver, AsyncPostgresStore) on one shared psycopg pool, set up on first use."""
+        if self._langgraph is None:
+            async with self._lock:
+                if self._langgraph is None:
+                    from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+                    from langgraph.store.postgres.aio import AsyncPostgresStore
+                    from psycopg.rows import dict_row
+                    from psycopg_pool import AsyncConnectionPool
+
+                    pool = AsyncConnectionPool(
+                        _driver_url(self.url, None),
+                        min_size=1,
+                        max_size=settings.DB_LANGGRAPH_POOL_SIZE,
+                        timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+                        max_lifetime=settings.DB_POOL_RECYCLE_SECONDS,
+                        check=AsyncConnectionPool.check_connection,
+                        # LangGraph's from_conn_string uses prepare_threshold=0 (prepare everything)
+                        kwargs={
+                            "autocommit": True,
+                            "row_factory": dict_row,
+                            "prepare_threshold": None if settings.DB_TRANSACTION_POOLER else 0,
+                        },
+                        open=False,
+                    )
+                    try:
+                        await pool.open(wait=True, timeout=settings.DB_POOL_TIMEOUT_SECONDS)
+                        saver, store = AsyncPostgresSaver(conn=pool), AsyncPostgresStore(conn=pool)
+                        await saver.setup()
+                        await store.setup()
+                    except BaseException:
+                        await pool.close()
+                        raise
+                    self._langgraph_pool, self._langgraph = pool, (saver, store)
+        return self._langgraph
+
+    async def ping(self) -> None:
+        """Round trip through the async pool (raises when Postgres is unreachable)."""
+        async with self.async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    def stats(self) -> Dict[str, Any]:
+        """Checked-out connections, overflow and checkout waits per pool."""
+        result: Dict[str, Any] = {}
+        for name, engine in (("async", self.async_engine.sync_engine), ("sync", self.sync_engine)):
+            pool = engine.pool
+            result[name] = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                **pool.waits.as_dict(),
+            }
+        if self._langgraph_pool is not None:
+            s = self._langgraph_pool.get_stats()
+            requests = s.get("requests_num", 0)
+            result["langgraph"] = {
+                "size": s.get("pool_size", 0),
+                "checked_out": s.get("pool_size", 0) - s.get("pool_available", 0),
+                "idle": s.get("pool_available", 0),
+                "overflow": max(0, s.get("pool_size", 0) - s.get("pool_min", 0)),
+                "max_size": s.get("pool_max", 0),
+                "waiting": s.get("requests_waiting", 0),
+                "checkouts": requests,
+                "timeouts": s.get("requests_errors", 0),
+                "wait_ms_avg": round(s.get("requests_wait_ms", 0) / requests, 2) if requests else 0.0,
+            }
+        return result
+
+    async def aclose(self) -> None:
+        if self._langgraph_pool is not None:
+            await self._langgraph_pool.close()
+            self._langgraph_pool = self._langgraph = None
+        await self.async_engine.dispose()
+        self.sync_engine.dispose()
+
+
+postgres = PostgresConnections(settings.DATABASE_URL)
+
+# Async SQLAlchemy setup (routers, services)
+async_engine = postgres.async_engine
 
 AsyncSessionLocal = sessionmaker(
-    async_engine, 
-    class_=AsyncSession, 
+    async_engine,
+    class_=AsyncSession,
     expire_on_commit=False
 )
 
@@ -26,8 +211,8 @@ async def get_async_db():
         finally:
             await session.close()
 
-# Regular connection for non-LangGraph operations
-sync_engine = create_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+# Regular connection for non-async callers
+sync_engine = postgres.sync_engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
 
 def get_db():
@@ -36,4 +221,3 @@ def get_db():
         yield db
     finally:
         db.close()
-
@@ -0,0 +1,340 @@
+"""
+Local OpenAI-compatible stand-in for load and latency testing.
+
+    python -m app.devtools.mock_llm --port 8100 --first-token-ms 400 --tokens-per-sec 80
+    OPENAI_BASE_URL=http://localhost:8100/v1 OPENAI_API_KEY=mock uvicorn app.main:app
+
+Speaks the subset of /v1/chat/completions that LLMService uses (json_object responses,
+stream=True with optional usage chunk) plus /v1/models for the health check.
+
+Modes:
+  synthetic  canned router / plan / screen / chat responses shaped by the system prompt
+  record     forward to the real API (--upstream), save each response into --fixtures
+  replay     serve responses from --fixtures (falls back to synthetic unless --strict)
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.context_compactor import estimate_tokens
+
+
+@dataclass
+class MockConfig:
+    mode: str = "synthetic"
+    fixtures_dir: str = "fixtures/llm"
+    upstream_base_url: str = "https://api.openai.com/v1"
+    upstream_api_key: str = ""
+    first_token_ms: int = 300
+    tokens_per_sec: float = 120.0
+    error_rate: float = 0.0       # fraction of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0  # fraction of requests answered with HTTP 429
+    retry_after_s: int = 1
+    strict: bool = False          # replay: 404 on fixture miss instead of synthetic
+    seed: int = 0
+    stats: Dict[str, int] = field(default_factory=lambda: {
+        "requests": 0, "streamed": 0, "errors": 0, "rate_limited": 0,
+        "replayed": 0, "recorded": 0, "synthetic": 0,
+    })
+
+    @classmethod
+    def from_env(cls) -> "MockConfig":
+        env = os.getenv
+        return cls(
+            mode=env("MOCK_LLM_MODE", "synthetic"),
+            fixtures_dir=env("MOCK_LLM_FIXTURES", "fixtures/llm"),
+            upstream_base_url=env("MOCK_LLM_UPSTREAM", "https://api.openai.com/v1"),
+            upstream_api_key=env("MOCK_LLM_UPSTREAM_KEY", env("OPENAI_API_KEY", "")),
+            first_token_ms=int(env("MOCK_LLM_FIRST_TOKEN_MS", "300")),
+            tokens_per_sec=float(env("MOCK_LLM_TOKENS_PER_SEC", "120")),
+            error_rate=float(env("MOCK_LLM_ERROR_RATE", "0")),
+            rate_limit_rate=float(env("MOCK_LLM_RATE_LIMIT_RATE", "0")),
+            strict=env("MOCK_LLM_STRICT", "false").lower() == "true",
+            seed=int(env("MOCK_LLM_SEED", "0")),
+        )
+
+
+# ---- fixtures ----
+def fixture_key(body: Dict[str, Any]) -> str:
+    """Stable key over what determines the answer (model excluded so tiers can be swapped)."""
+    canonical = json.dumps({
+        "messages": body.get("messages"),
+        "response_format": body.get("response_format"),
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:24]
+
+
+def _fixture_path(cfg: MockConfig, key: str) -> str:
+    return os.path.join(cfg.fixtures_dir, f"{key}.json")
+
+
+def load_fixture(cfg: MockConfig, key: str) -> Optional[Dict[str, Any]]:
+    path = _fixture_path(cfg, key)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_fixture(cfg: MockConfig, key: str, body: Dict[str, Any], content: str, usage: Dict[str, int]) -> None:
+    os.makedirs(cfg.fixtures_dir, exist_ok=True)
+    with open(_fixture_path(cfg, key), "w", encoding="utf-8") as f:
+        json.dump({
+            "key": key,
+            "model": body.get("model"),
+            "response_format": body.get("response_format"),
+            "system_prompt_head": _system_prompt(body)[:200],
+            "content": content,
+            "usage": usage,
+            "recorded_at": time.time(),
+        }, f, ensure_ascii=False, indent=2)
+
+
+# ---- synthetic responses ----
+SYNTHETIC_PLAN = {
+    "design_system": {"color_scheme": "light", "primary_color": "indigo", "typography": "modern", "spacing": "comfortable"},
+    "screens": [
+        {
+            "id": "landing_01", "screen_type": "landing", "title": "Landing Page",
+            "description": "Hero with gradient background, feature grid and testimonials.",
+            "priority": 1, "order": 1,
+            "components": ["Hero with full-bleed image (data-ai-bg=\"hero\")", "Feature cards (data-ai-img=\"card\")", "Testimonials (data-ai-img=\"avatar\")"],
+            "interactions": ["staggered fade-in on scroll", "hover-lift on cards"],
+            "data_requirements": ["hero_image", "card_images[]"],
+        },
+        {
+            "id": "dashboard_01", "screen_type": "dashboard", "title": "Dashboard",
+            "description": "KPI cards and a chart inside a wrapping div.",
+            "priority": 2, "order": 2,
+            "components": ["Sidebar navigation", "KPI cards", "Revenue chart"],
+            "interactions": ["hover states on rows"],
+            "data_requirements": ["kpis", "revenue_series"],
+        },
+    ],
+    "generation_strategy": "Build hero first, then cards; gradients on hero; lazy-load images.",
+    "estimated_complexity": "medium",
+    "target_devices": ["desktop", "tablet", "mobile"],
+}
+
+SYNTHETIC_ROUTE = {
+    "action": "design_request", "confidence": 0.9, "reason": "new brief",
+    "extracted_requirements": "", "approval_type": "", "modifications": [],
+}
+
+SYNTHETIC_HTML = """Here is your screen.
+
+```html
+<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>Mock Screen</title>
+  <script src="https://cdn.tailwindcss.com"></script>
+</head>
+<body class="min-h-screen bg-white text-gray-900">
+  <header class="px-6 py-4 border-b"><h1 class="text-2xl font-semibold tracking-tight">Acme</h1></header>
+  <section class="relative px-6 py-24" data-ai-bg="hero" style="background-image:url('#')">
+    <h2 class="text-4xl font-semibold tracking-tight">Build faster with Acme</h2>
+    <img src="#" data-ai-img="hero" width="1200" height="600" alt="Team collaborating in a modern office">
+  </section>
+  <section class="grid grid-cols-1 md:grid-cols-3 gap-6 px-6 py-16">
+    <article class="rounded-xl border p-6"><h3 class="font-medium">Fast</h3>
+      <img src="#" data-ai-img="card" width="400" height="300" alt="Laptop with analytics dashboard"></article>
+    <article class="rounded-xl border p-6"><h3 class="font-medium">Secure</h3>
+      <img src="#" data-ai-img="card" width="400" height="300" alt="Server room with blue lights"></article>
+    <article class="rounded-xl border p-6"><h3 class="font-medium">Friendly</h3>
+      <img src="#" data-ai-img="avatar" width="96" height="96" alt="Smiling customer portrait"></article>
+  </section>
+</body>
+</html>
+```
+
+Let me know what you would like to tweak."""
+
+
+def _system_prompt(body: Dict[str, Any]) -> str:
+    for m in body.get("messages") or []:
+        if m.get("role") == "system":
+            return str(m.get("content") or "")
+    return ""
+
+
+def synthetic_content(body: Dict[str, Any]) -> str:
+    system = _system_prompt(body)
+    wants_json = (body.get("response_format") or {}).get("type") == "json_object"
+    if wants_json:
+        if "router" in system:
+            return json.dumps(SYNTHETIC_ROUTE)
+        if "design plan modifier" in system:
+            return json.dumps({"action": "approve", "modified_plan": SYNTHETIC_PLAN, "changes_made": [], "reasoning": "mock"})
+        if "design plans" in system:
+            return json.dumps(SYNTHETIC_PLAN)
+        return "{}"
+    if "frontend developer" in system:
+        return SYNTHETIC_HTML
+    return "Happy to help — what would you like to change next?"
+
+
+def split_tokens(content: str) -> List[str]:
+    """~4 chars per token, matching estimate_tokens()."""
+    return [content[i:i + 4] for i in range(0, len(content), 4)] or [""]
+
+
+# ---- app ----
+def create_app(cfg: Optional[MockConfig] = None) -> FastAPI:
+    cfg = cfg or MockConfig.from_env()
+    rng = random.Random(cfg.seed)
+    app = FastAPI(title="Mock LLM")
+    app.state.mock_config = cfg
+
+    def _usage(body: Dict[str, Any], content: str) -> Dict[str, int]:
+        prompt = estimate_tokens("".join(str(m.get("content") or "") for m in body.get("messages") or []))
+        completion = len(split_tokens(content))
+        return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+    async def _upstream(body: Dict[str, Any]) -> Dict[str, Any]:
+        import openai
+
+        client = openai.AsyncOpenAI(api_key=cfg.upstream_api_key, base_url=cfg.upstream_base_url)
+        kwargs = {k: v for k, v in body.items() if k not in ("stream", "stream_options")}
+        resp = await client.chat.completions.create(**kwargs)
+        usage = resp.usage.model_dump() if resp.usage else {}
+        return {"content": resp.choices[0].message.content or "", "usage": {
+            k: usage.get(k, 0) for k in ("prompt_tokens", "completion_tokens", "total_tokens")
+        }}
+
+    async def _resolve(body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        key = fixture_key(body)
+        if cfg.mode == "replay":
+            fixture = load_fixture(cfg, key)
+            if fixture:
+                cfg.stats["replayed"] += 1
+                return {"content": fixture["content"], "usage": fixture.get("usage") or _usage(body, fixture["content"])}
+            if cfg.strict:
+                return None
+        elif cfg.mode == "record":
+            result = await _upstream(body)
+            save_fixture(cfg, key, body, result["content"], result["usage"])
+            cfg.stats["recorded"] += 1
+            return result
+        content = synthetic_content(body)
+        cfg.stats["synthetic"] += 1
+        return {"content": content, "usage": _usage(body, content)}
+
+    def _error(status: int, message: str, err_type: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"message": message, "type": err_type, "param": None, "code": err_type}},
+            headers=headers,
+        )
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "mock-model", "object": "model", "created": 0, "owned_by": "mock"}]}
+
+    @app.get("/mock/stats")
+    async def stats():
+        return {"config": {k: v for k, v in cfg.__dict__.items() if k not in ("stats", "upstream_api_key")}, "stats": cfg.stats}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        cfg.stats["requests"] += 1
+
+        # Fault injection is decided up front, before any latency is spent
+        roll = rng.random()
+        if roll < cfg.rate_limit_rate:
+            cfg.stats["rate_limited"] += 1
+            return _error(429, "Rate limit reached (mock)", "rate_limit_exceeded",
+                          headers={"retry-after": str(cfg.retry_after_s)})
+        if roll < cfg.rate_limit_rate + cfg.error_rate:
+            cfg.stats["errors"] += 1
+            return _error(500, "Injected server error (mock)", "server_error")
+
+        result = await _resolve(body)
+        if result is None:
+            return _error(404, "No fixture recorded for this request", "fixture_not_found")
+
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = body.get("model") or "mock-model"
+        content, usage = result["content"], result["usage"]
+
+        if not body.get("stream"):
+            await asyncio.sleep(cfg.first_token_ms / 1000 + len(split_tokens(content)) / max(cfg.tokens_per_sec, 1e-6))
+            return {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            }
+
+        cfg.stats["streamed"] += 1
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        def _chunk(delta: Dict[str, Any], finish: Optional[str] = None, with_usage: bool = False) -> bytes:
+            payload: Dict[str, Any] = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [] if with_usage else [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            if with_usage:
+                payload["usage"] = usage
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        async def stream() -> AsyncGenerator[bytes, None]:
+            await asyncio.sleep(cfg.first_token_ms / 1000)
+            yield _chunk({"role": "assistant", "content": ""})
+            interval = 1 / max(cfg.tokens_per_sec, 1e-6)
+            for piece in split_tokens(content):
+                yield _chunk({"content": piece})
+                await asyncio.sleep(interval)
+            yield _chunk({}, finish="stop")
+            if include_usage:
+                yield _chunk({}, with_usage=True)
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    env = MockConfig.from_env()
+    parser = argparse.ArgumentParser(prog="python -m app.devtools.mock_llm", description="Local OpenAI-compatible mock")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--mode", choices=["synthetic", "record", "replay"], default=env.mode)
+    parser.add_argument("--fixtures", default=env.fixtures_dir)
+    parser.add_argument("--upstream", default=env.upstream_base_url)
+    parser.add_argument("--first-token-ms", type=int, default=env.first_token_ms)
+    parser.add_argument("--tokens-per-sec", type=float, default=env.tokens_per_sec)
+    parser.add_argument("--error-rate", type=float, default=env.error_rate)
+    parser.add_argument("--rate-limit-rate", type=float, default=env.rate_limit_rate)
+    parser.add_argument("--strict", action="store_true", default=env.strict)
+    parser.add_argument("--seed", type=int, default=env.seed)
+    args = parser.parse_args(argv)
+
+    cfg = MockConfig(
+        mode=args.mode, fixtures_dir=args.fixtures, upstream_base_url=args.upstream,
+        upstream_api_key=env.upstream_api_key, first_token_ms=args.first_token_ms,
+        tokens_per_sec=args.tokens_per_sec, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, strict=args.strict, seed=args.seed,
+    )
+    print(f"🧪 Mock LLM ({cfg.mode}) on http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(cfg), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from datetime import datetime
+from app.core.auth import require_role
 from app.core.config import settings
-from app.routers import images, auth, designs, chat
+from app.core.database import postgres
+from app.routers import images, auth, designs, chat, assets
 from app.middleware.rate_limit_middleware import limiter
+from app.services.unsplash_service import download_tracker
+from app.services.image_cache import image_search_cache
+from app.services.http_clients import http_clients
+from app.services.image_pool import image_pool
+from app.services.trending_images import trending_images
 from app.utils.health_utils import ( health_status, perform_health_checks, print_connection_status )
 
 @asynccontextmanager
@@ -37,6 +44,13 @@ async def lifespan(app: FastAPI):
         print(f"❌ Failed to complete startup: {str(e)}")
         raise
 
+    # Long-lived outbound HTTP clients (Unsplash, Clerk, JWKS)
+    await http_clients.start()
+    # Keep per-category image pools warm so common queries skip live search
+    if image_pool is not None:
+        image_pool.start()
+    trending_images.start()
+
     # Rate limiter and health flag
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
@@ -48,6 +62,14 @@ async def lifespan(app: FastAPI):
 
     # ---- shutdown ----
     print("🛑 AI Design Platform Backend Shutting Down...")
+    if image_pool is not None:
+        await image_pool.stop()
+    await trending_images.stop()
+    await download_tracker.drain()
+    if image_search_cache is not None:
+        await image_search_cache.close()
+    await http_clients.aclose()
+    await postgres.aclose()
       
 app = FastAPI(
     title="AI Design Platform API",
@@ -68,6 +90,7 @@ app.add_middleware(
 # Include routers
 app.include_router(chat.router, prefix="/api/v1", tags=["chat"])
 app.include_router(images.router, prefix="/api/v1", tags=["images"])
+app.include_router(assets.router, prefix="/api/v1", tags=["assets"])
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
 app.include_router(designs.router, prefix="/api/v1/designs", tags=["designs"])
 
@@ -166,6 +189,17 @@ async def health_check(request: Request):
             "response_time_ms": round((datetime.utcnow() - start_time).total_seconds() * 1000, 2)
         }
 
+# pool and infrastructure stats: admins only
+@app.get("/metrics/http", dependencies=[Depends(require_role("admin"))])
+async def http_client_metrics():
+    """Connection reuse and latency per outbound HTTP client."""
+    return http_clients.stats()
+
+@app.get("/metrics/db", dependencies=[Depends(require_role("admin"))])
+async def db_pool_metrics():
+    """Checked-out connections, overflow and checkout wait time per Postgres pool."""
+    return postgres.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
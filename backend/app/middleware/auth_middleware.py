@@ -4,7 +4,7 @@ from clerk_backend_api import Clerk
 from app.core.config import settings
 from typing import Optional, Dict, Any
 import jwt
-import httpx
+from app.services.http_clients import http_clients
 
 security = HTTPBearer(auto_error=False)
 
@@ -30,22 +30,21 @@ class ClerkAuth:
             )
             
             # Validate with Clerk API
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"https://api.clerk.com/v1/users/{decoded['sub']}",
-                    headers={"Authorization": f"Bearer {settings.CLERK_SECRET_KEY}"}
-                )
-                
-                if response.status_code == 200:
-                    user_data = response.json()
-                    return {
-                        "user_id": user_data["id"],
-                        "email": user_data.get("email_addresses", [{}])[0].get("email_address"),
-                        "first_name": user_data.get("first_name"),
-                        "last_name": user_data.get("last_name")
-                    }
-                else:
-                    return None
+            response = await http_clients.get("clerk").get(
+                f"https://api.clerk.com/v1/users/{decoded['sub']}",
+                headers={"Authorization": f"Bearer {settings.CLERK_SECRET_KEY}"}
+            )
+            
+            if response.status_code == 200:
+                user_data = response.json()
+                return {
+                    "user_id": user_data["id"],
+                    "email": user_data.get("email_addresses", [{}])[0].get("email_address"),
+                    "first_name": user_data.get("first_name"),
+                    "last_name": user_data.get("last_name")
+                }
+            else:
+                return None
                     
         except Exception as e:
             print(f"⚠️ Auth verification error: {e}")
@@ -22,11 +22,13 @@ class ConversationState(TypedDict, total=False):
     # Design process
     design_requirements: str
     design_plan: Dict[str, Any]
+    plan_digest: Dict[str, Any]  # compact digest, cached per plan version
     plan_changes: List[str]
     human_feedback: Dict[str, Any]
     
     # Generation process
     generated_screens: List[Dict[str, Any]]
+    previous_screens: List[Dict[str, Any]]  # prior versions while an edit regenerates (for patches)
     generation_progress: Dict[str, Any]
     generation_summary: Dict[str, Any]
     
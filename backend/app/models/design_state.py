@@ -14,6 +14,8 @@ class UnsplashImage(BaseModel):
     author_profile: str   # with UTM
     unsplash_link: str    # with UTM
     download_location: str
+    raw_url: str = ""     # base URL that accepts size params (responsive variants)
+    color: str = ""       # dominant colour (#rrggbb) when the source provides one
 
 
 
@@ -31,6 +33,9 @@ class ScreenType(str, Enum):
     PROFILE = "profile"
     SETTINGS = "settings"
     MOBILE_APP = "mobile_app"
+    ECOMMERCE = "ecommerce"
+    BLOG = "blog"
+    PORTFOLIO = "portfolio"
 
 class DesignMetadata(BaseModel):
     screen_id: str
@@ -0,0 +1,23 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Response
+from app.services.asset_bundle import ASSET_NAME_RE, CONTENT_TYPES, asset_bundler
+
+router = APIRouter()
+
+@router.get("/assets/{name}")
+async def get_shared_asset(name: str):
+    """
+    Shared CSS/JS factored out of generated screens (content-hashed, so immutable)
+    """
+
+    match = ASSET_NAME_RE.match(name)
+    if match is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    data = await asyncio.to_thread(asset_bundler.store.read, name)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return Response(
+        content=data,
+        media_type=CONTENT_TYPES[match.group(1)],
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
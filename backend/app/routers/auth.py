@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.auth import get_current_user
 from app.models.user import User
 from app.schemas.user import User as UserSchema, UserCreate, UserUpdate
@@ -21,30 +21,30 @@ async def get_me(current_user = Depends(get_current_user)):
 async def update_user_profile(
     user_update: UserUpdate,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user profile"""
     user_service = UserService(db)
     
-    user = user_service.get_user_by_clerk_id(current_user['id'])
+    user = await user_service.get_user_by_clerk_id(current_user['id'])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    updated_user = user_service.update_user(user.id, user_update)
+    updated_user = await user_service.update_user(user.id, user_update)
     return updated_user
 
 @router.delete("/me")
 async def delete_user_account(
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete current user account"""
     user_service = UserService(db)
     
-    user = user_service.get_user_by_clerk_id(current_user['id'])
+    user = await user_service.get_user_by_clerk_id(current_user['id'])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -52,7 +52,7 @@ async def delete_user_account(
         )
     
     # Soft delete or hard delete based on requirements
-    user_service.delete_user(user.id)
+    await user_service.delete_user(user.id)
     
     return {"message": "Account deleted successfully"}
 
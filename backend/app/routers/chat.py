@@ -4,19 +4,20 @@ import time
 import json
 import asyncio
 import logging
-from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi import APIRouter, Depends, Request, HTTPException, Query
 from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
 
 from langchain_core.runnables import RunnableConfig
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
-from langgraph.store.postgres.aio import AsyncPostgresStore
 
 from app.core.config import settings
+from app.core.database import postgres
 from app.core.auth import get_current_user
 from app.agents.agent import build_conversational_agent
 from app.models.conversation_state import ConversationPhase
 from app.services.llm_service import LLMService
+from app.services.dom_diff import content_hash
+from app.services.asset_bundle import asset_bundler
 
 router = APIRouter()
 
@@ -26,9 +27,16 @@ logger = logging.getLogger(__name__)
 class ChatRequest(BaseModel):
     message: str
     thread_id: Optional[str] = None
-    model: str = "gpt-4o-mini"
+    # both honoured only for models the user's tier may pick (REQUEST_MODELS_BY_TIER)
+    model: Optional[str] = None  # overrides the model routing table for every operation
+    model_overrides: Optional[Dict[str, str]] = None  # per operation, e.g. {"generation": "gpt-4o"}
     stream: bool = True
     include_token_usage: bool = False
+    # send edited screens as patch ops against the previous version (html via GET .../screens/{id})
+    screen_patches: bool = False
+    # deliver CSS/JS repeated across screens as shared cached files (view-only copies: the stored
+    # screens stay self-contained, don't persist what is delivered this way)
+    shared_assets: bool = False
 
 class ChatResponse(BaseModel):
     thread_id: str
@@ -97,7 +105,26 @@ def _human_response_from_state(state: dict) -> str:
         return f"Sorry, there was an error: {state.get('error_message','Something went wrong')}. Please try again."
     return "I’m ready to build. What would you like to create?"
 
-def _state_to_response(thread_id: str, state: Dict[str, Any], include_token_usage: bool = False) -> Dict[str, Any]:
+def _screen_payload(screen: Dict[str, Any], screen_patches: bool, delivery_html: Optional[str] = None) -> Dict[str, Any]:
+    """
+    A screen as sent to the client: without its html when a patch against the previous version covers it,
+    with `delivery_html` (its shared_assets copy) when given.
+    """
+    if delivery_html is not None:
+        # patch ops are against the self-contained html, never this copy: send it whole
+        delivered = {k: v for k, v in screen.items() if k != "patch"}
+        delivered["html"] = delivery_html
+        return delivered
+    if not screen_patches or (screen.get("patch") or {}).get("mode") not in ("patch", "same"):
+        return screen
+    compact = {k: v for k, v in screen.items() if k not in ("html", "html_pretty")}
+    compact["html_omitted"] = True
+    return compact
+
+async def _state_to_response(
+    thread_id: str, state: Dict[str, Any], include_token_usage: bool = False, screen_patches: bool = False,
+    shared_assets: bool = False,
+) -> Dict[str, Any]:
     phase = state.get("phase", ConversationPhase.INITIAL)
     response_text = _human_response_from_state(state)
 
@@ -107,7 +134,13 @@ def _state_to_response(thread_id: str, state: Dict[str, Any], include_token_usag
     if progress := state.get("generation_progress"):
         data["generation_progress"] = progress
     if screens := state.get("generated_screens"):
-        data["generated_screens"] = screens
+        delivered: Dict[int, str] = {}
+        bundled = [s for s in screens if s.get("shared_assets")] if shared_assets else []
+        if bundled:
+            # delivery_html checks (and may rewrite) the shared files: keep that off the event loop
+            htmls = await asyncio.to_thread(lambda: [asset_bundler.delivery_html(s) for s in bundled])
+            delivered = {id(s): html for s, html in zip(bundled, htmls)}
+        data["generated_screens"] = [_screen_payload(s, screen_patches, delivered.get(id(s))) for s in screens]
     if summary := state.get("generation_summary"):
         data["generation_summary"] = summary
     if changes := state.get("plan_changes"):
@@ -130,27 +163,15 @@ def _state_to_response(thread_id: str, state: Dict[str, Any], include_token_usag
         resp["token_usage"] = llm_service.token_tracker.get_session_summary()
     return resp
 
-async def _make_checkpointer_and_store():
-    """Create database connections for checkpointing and storage"""
-    saver_cm = AsyncPostgresSaver.from_conn_string(settings.DATABASE_URL)
-    store_cm = AsyncPostgresStore.from_conn_string(settings.DATABASE_URL)
-    
-    saver = await saver_cm.__aenter__()
-    store = await store_cm.__aenter__()
-    
-    await saver.setup()
-    await store.setup()
-    
-    return saver_cm, store_cm, saver, store
+def _user_key(current_user: Dict[str, Any]) -> str:
+    return str(current_user.get("id") or current_user.get("sub") or "anonymous")
 
-async def _close_checkpointer_and_store(saver_cm, store_cm):
-    """Clean up database connections"""
-    try:
-        if saver_cm:
-            await saver_cm.__aexit__(None, None, None)
-    finally:
-        if store_cm:
-            await store_cm.__aexit__(None, None, None)
+async def _owns_thread(store, user_id: str, thread_id: str) -> bool:
+    """Whether `thread_id` was started by this user (threads predating the owner record: by its final state)"""
+    for namespace in (("threads", user_id), ("final_states", user_id)):
+        if await store.aget(namespace, thread_id) is not None:
+            return True
+    return False
 
 def _safe_str(value) -> str:
     """Safely convert any value to string, handling enums and complex types"""
@@ -168,19 +189,14 @@ async def chat(
     current_user: Dict[str, Any] = Depends(get_current_user),
 ):
     thread_id = chat_request.thread_id or f"t_{int(datetime.utcnow().timestamp()*1000)}"
-    user_id = str(current_user.get("id") or current_user.get("sub") or "anonymous")
+    user_id = _user_key(current_user)
     
     logger.info(f"Starting chat for thread_id: {thread_id}, user_id: {user_id}")
     
-    saver_cm = store_cm = saver = store = None
-    
     try:
-        # Database setup (same as before)
+        # Checkpointer and store on the shared LangGraph pool (set up by the first request)
         start_time = time.time()
-        saver_cm, store_cm, saver, store = await asyncio.wait_for(
-            _make_checkpointer_and_store(), 
-            timeout=10.0
-        )
+        saver, store = await asyncio.wait_for(postgres.langgraph(), timeout=10.0)
         logger.info(f"Database connections established in {time.time() - start_time:.2f}s")
         
         # Store request audit
@@ -191,6 +207,7 @@ async def chat(
                 {
                     "message": chat_request.message,
                     "model": chat_request.model,
+                    "model_overrides": chat_request.model_overrides,
                     "timestamp": datetime.utcnow().isoformat(),
                     "ip": request.client.host if request.client else None,
                     "user_agent": request.headers.get("user-agent", ""),
@@ -204,6 +221,8 @@ async def chat(
                 "user_id": user_id,
                 "thread_id": thread_id,
                 "model": chat_request.model,
+                "model_overrides": chat_request.model_overrides,
+                "user_tier": (current_user.get("metadata") or {}).get("role", "user"),
             },
             "thread_id": thread_id,
         }
@@ -211,6 +230,9 @@ async def chat(
         graph = build_conversational_agent(checkpointer=saver, store=store)
         prior = await graph.aget_state(config)
         base_values = (prior.values if prior and prior.values else {})
+        if not base_values:
+            # Owner record for a new thread, checked before its screens are served
+            await store.aput(("threads", user_id), thread_id, {"created_at": datetime.utcnow().isoformat()})
         
         initial_state = {
             **base_values,
@@ -324,10 +346,12 @@ async def chat(
                                         if current_response != last_response:
                                             last_response = current_response
                                             
-                                            payload = _state_to_response(
+                                            payload = await _state_to_response(
                                                 thread_id, 
                                                 output, 
-                                                chat_request.include_token_usage
+                                                chat_request.include_token_usage,
+                                                chat_request.screen_patches,
+                                                chat_request.shared_assets,
                                             )
                                             
                                             payload.update({
@@ -351,6 +375,17 @@ async def chat(
                                     }
                                     await event_queue.put(chunk_data)
                             
+                            # Plan screens as they close in the planner stream
+                            elif event_type == "on_custom_event" and event_name == "plan_partial":
+                                await event_queue.put({
+                                    "thread_id": thread_id,
+                                    "type": "plan_partial",
+                                    "screen_index": event_data.get("screen_index"),
+                                    "screen": event_data.get("screen"),
+                                    "design_system": event_data.get("design_system"),
+                                    "timestamp": datetime.utcnow().isoformat()
+                                })
+                            
                             # Timeout check
                             if current_time - connection_start > 300:  # 5 minutes
                                 logger.warning(f"Stream timeout for thread {thread_id}")
@@ -475,13 +510,6 @@ async def chat(
                             await task
                         except asyncio.CancelledError:
                             pass
-                    
-                    # Clean up resources
-                    try:
-                        await _close_checkpointer_and_store(saver_cm, store_cm)
-                        logger.info(f"Resources cleaned up for thread {thread_id}")
-                    except Exception as cleanup_error:
-                        logger.error(f"Cleanup error for thread {thread_id}: {cleanup_error}")
             
             return StreamingResponse(
                 event_stream(),
@@ -497,34 +525,31 @@ async def chat(
         
         else:
             # Non-streaming response (same as before)
-            try:
-                final_state = await asyncio.wait_for(
-                    graph.ainvoke(initial_state, config=config),
-                    timeout=180.0
-                )
-                
-                await store.aput(
-                    ("final_states", user_id),
-                    thread_id,
-                    {
-                        "state": final_state,
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "token_usage": llm_service.token_tracker.get_session_summary() if chat_request.include_token_usage else None,
-                    }
-                )
-                
-                return JSONResponse(_state_to_response(
-                    thread_id, 
-                    final_state, 
-                    chat_request.include_token_usage
-                ))
-                
-            finally:
-                await _close_checkpointer_and_store(saver_cm, store_cm)
+            final_state = await asyncio.wait_for(
+                graph.ainvoke(initial_state, config=config),
+                timeout=180.0
+            )
+            
+            await store.aput(
+                ("final_states", user_id),
+                thread_id,
+                {
+                    "state": final_state,
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "token_usage": llm_service.token_tracker.get_session_summary() if chat_request.include_token_usage else None,
+                }
+            )
+            
+            return JSONResponse(await _state_to_response(
+                thread_id, 
+                final_state, 
+                chat_request.include_token_usage,
+                chat_request.screen_patches,
+                chat_request.shared_assets,
+            ))
     
     except asyncio.TimeoutError:
         logger.error(f"Request timeout for thread {thread_id}")
-        await _close_checkpointer_and_store(saver_cm, store_cm)
         raise HTTPException(
             status_code=408,
             detail={
@@ -536,7 +561,6 @@ async def chat(
     
     except Exception as e:
         logger.error(f"Chat endpoint error for thread {thread_id}: {str(e)}", exc_info=True)
-        await _close_checkpointer_and_store(saver_cm, store_cm)
         
         raise HTTPException(
             status_code=500,
@@ -546,3 +570,32 @@ async def chat(
                 "thread_id": thread_id,
             }
         )
+
+@router.get("/chat/{thread_id}/screens/{screen_id}")
+async def get_screen(
+    thread_id: str,
+    screen_id: str,
+    base: Optional[str] = Query(default=None, description="Hash of the version the client has; a patch is returned when it matches"),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
+    """
+    Latest version of a generated screen: patch ops from `base` when possible, else the full document
+    """
+
+    saver, store = await asyncio.wait_for(postgres.langgraph(), timeout=10.0)
+    if not await _owns_thread(store, _user_key(current_user), thread_id):
+        raise HTTPException(status_code=404, detail="Screen not found")
+    graph = build_conversational_agent(checkpointer=saver, store=store)
+    snapshot = await graph.aget_state({"configurable": {"thread_id": thread_id}})
+
+    values = (snapshot.values if snapshot else None) or {}
+    screens = values.get("generated_screens") or []
+    screen = next((s for s in screens if s.get("id") == screen_id), None)
+    if screen is None:
+        raise HTTPException(status_code=404, detail="Screen not found")
+
+    html = screen.get("html") or ""
+    patch = screen.get("patch") or {}
+    if base and patch.get("base") == base and patch.get("mode") in ("patch", "same"):
+        return {"id": screen_id, **patch}
+    return {"id": screen_id, "mode": "full", "target": content_hash(html), "html": html}
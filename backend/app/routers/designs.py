@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, List, Optional
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.auth import get_current_user, require_premium
 from app.models.user import User
 from app.schemas.design import Design as DesignSchema, DesignCreate, DesignUpdate
@@ -15,20 +15,20 @@ router = APIRouter()
 async def create_design(
     design_create: DesignCreate,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new design"""
     user_service = UserService(db)
     design_service = DesignService(db)
     
     # Get or create user
-    user = user_service.get_or_create_user(
+    user = await user_service.get_or_create_user(
         clerk_id=current_user['id'],
         email=current_user['email']
     )
     
     # Create design
-    design = design_service.create_design(user.id, design_create)
+    design = await design_service.create_design(user.id, design_create)
     return design
 
 @router.get("/", response_model=List[DesignSchema])
@@ -37,20 +37,20 @@ async def get_user_designs(
     limit: int = Query(100, ge=1, le=100),
     status: Optional[str] = Query(None),
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user's designs"""
     user_service = UserService(db)
     design_service = DesignService(db)
     
-    user = user_service.get_user_by_clerk_id(current_user['id'])
+    user = await user_service.get_user_by_clerk_id(current_user['id'])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    designs = design_service.get_user_designs(
+    designs = await design_service.get_user_designs(
         user_id=user.id,
         skip=skip,
         limit=limit,
@@ -62,20 +62,20 @@ async def get_user_designs(
 async def get_design(
     design_id: uuid.UUID,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific design"""
     design_service = DesignService(db)
     user_service = UserService(db)
     
-    user = user_service.get_user_by_clerk_id(current_user['id'])
+    user = await user_service.get_user_by_clerk_id(current_user['id'])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    design = design_service.get_design(design_id)
+    design = await design_service.get_design(design_id)
     if not design:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -96,20 +96,20 @@ async def update_design(
     design_id: uuid.UUID,
     design_update: DesignUpdate,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a design"""
     design_service = DesignService(db)
     user_service = UserService(db)
     
-    user = user_service.get_user_by_clerk_id(current_user['id'])
+    user = await user_service.get_user_by_clerk_id(current_user['id'])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    design = design_service.get_design(design_id)
+    design = await design_service.get_design(design_id)
     if not design:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -123,27 +123,27 @@ async def update_design(
             detail="Access denied"
         )
     
-    updated_design = design_service.update_design(design_id, design_update)
+    updated_design = await design_service.update_design(design_id, design_update)
     return updated_design
 
 @router.delete("/{design_id}")
 async def delete_design(
     design_id: uuid.UUID,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a design"""
     design_service = DesignService(db)
     user_service = UserService(db)
     
-    user = user_service.get_user_by_clerk_id(current_user['id'])
+    user = await user_service.get_user_by_clerk_id(current_user['id'])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    design = design_service.get_design(design_id)
+    design = await design_service.get_design(design_id)
     if not design:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -157,7 +157,7 @@ async def delete_design(
             detail="Access denied"
         )
     
-    design_service.delete_design(design_id)
+    await design_service.delete_design(design_id)
     return {"message": "Design deleted successfully"}
 
 # Premium features
@@ -165,7 +165,7 @@ async def delete_design(
 async def export_to_figma(
     design_id: uuid.UUID,
     current_user: Dict[str, Any] = Depends(require_premium),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Export design to Figma (Premium feature)"""
     # Implementation for Figma export
@@ -1,6 +1,12 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import Optional, List
 from app.services.unsplash_service import UnsplashService
+from app.services.image_cache import image_search_cache
+from app.services.image_pool import image_pool, ui_categories
+from app.services.trending_images import trending_images
+from app.services.unsplash_quota import unsplash_quota
+from app.services.image_proxy import ImageProxyError, image_proxy, negotiate_format
+from app.core.config import settings
 from app.models.design_state import UnsplashImage
 
 router = APIRouter()
@@ -34,59 +40,83 @@ async def search_images(
 
 @router.get("/images/trending", response_model=List[UnsplashImage])
 async def get_trending_images(
+    request: Request,
     count: int = Query(default=12, ge=1, le=30, description="Number of trending images to return")
 ):
     """
-    Get trending/popular images from Unsplash
+    Get trending/popular images from Unsplash (served from a periodically rebuilt snapshot)
     """
     
     try:
-        # Use popular/trending search terms
-        trending_queries = [
-            "abstract", "technology", "business", "nature", "minimal",
-            "architecture", "design", "lifestyle", "workspace", "creative"
-        ]
-        
-        unsplash_service = UnsplashService()
-        all_images = []
-        
-        # Get a few images from each trending category
-        images_per_category = max(1, count // len(trending_queries))
-        
-        for query in trending_queries[:count]:
-            category_images = await unsplash_service.search_images(
-                query=query,
-                count=images_per_category,
-                orientation="landscape"
-            )
-            all_images.extend(category_images)
-            
-            if len(all_images) >= count:
-                break
-        
-        return all_images[:count]
-        
+        snapshot = await trending_images.snapshot()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get trending images: {str(e)}")
 
+    body, etag = snapshot.body(count)
+    max_age = settings.IMAGE_TRENDING_REFRESH_SECONDS
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={max_age}"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/images/cache/stats")
+async def get_image_cache_stats():
+    """
+    Hit rates and size of the image search cache
+    """
+
+    if image_search_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **image_search_cache.stats()}
+
+@router.get("/images/quota")
+async def get_unsplash_quota():
+    """
+    Unsplash quota consumption: bucket level, server-reported remaining calls,
+    calls per 5 minutes over the last hour and how searches were routed
+    """
+
+    return unsplash_quota.stats()
+
+@router.get("/images/pool/stats")
+async def get_image_pool_stats():
+    """
+    Per-category pool sizes and draw/miss counts of the image pool warmer
+    """
+
+    if image_pool is None:
+        return {"enabled": False}
+    return {"enabled": True, **image_pool.stats()}
+
+@router.get("/images/proxy")
+async def proxy_image(
+    request: Request,
+    url: str = Query(..., description="Allow-listed image URL (Unsplash / picsum)"),
+    w: Optional[int] = Query(default=None, ge=16, le=2400, description="Resize to this width"),
+    fmt: str = Query(default="auto", regex="^(auto|webp|avif|original)$"),
+):
+    """
+    Resized, WebP/AVIF-transcoded variants used by generated srcsets (IMAGE_PROXY_ENABLED)
+    """
+
+    if not settings.IMAGE_PROXY_ENABLED:
+        raise HTTPException(status_code=404, detail="Image proxy disabled")
+
+    target = negotiate_format(fmt, request.headers.get("accept", ""))
+    try:
+        data, content_type = await image_proxy.get(url, w, target)
+    except ImageProxyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    headers = {"Cache-Control": "public, max-age=31536000, immutable"}
+    if fmt == "auto":
+        headers["Vary"] = "Accept"
+    return Response(content=data, media_type=content_type, headers=headers)
+
 @router.get("/images/categories")
 async def get_image_categories():
     """
     Get available image categories for the UI
     """
     
-    return {
-        "categories": [
-            {"name": "Abstract", "query": "abstract", "icon": "palette"},
-            {"name": "Business", "query": "business professional", "icon": "briefcase"},
-            {"name": "Technology", "query": "technology digital", "icon": "cpu"},
-            {"name": "Nature", "query": "nature landscape", "icon": "tree-pine"},
-            {"name": "Architecture", "query": "architecture building", "icon": "building"},
-            {"name": "Lifestyle", "query": "lifestyle people", "icon": "users"},
-            {"name": "Food", "query": "food cooking", "icon": "chef-hat"},
-            {"name": "Travel", "query": "travel destination", "icon": "plane"},
-            {"name": "Creative", "query": "creative art design", "icon": "palette"},
-            {"name": "Workspace", "query": "workspace office", "icon": "monitor"}
-        ]
-    }
-
+    return {"categories": ui_categories()}
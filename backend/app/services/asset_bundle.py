@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.html_tokens import parse_attrs
+
+logger = logging.getLogger(__name__)
+
+_BLOCK_RE = re.compile(r'<(style|script)\b((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>(.*?)</\1\s*>', re.I | re.S)
+ASSET_NAME_RE = re.compile(r'^[0-9a-f]{20}\.(css|js)$')
+CONTENT_TYPES = {"css": "text/css; charset=utf-8", "js": "text/javascript; charset=utf-8"}
+# script types that run as code (json, importmaps and templates stay inline)
+SCRIPT_TYPES = {"": "", "text/javascript": "", "application/javascript": "", "module": "module"}
+MIN_SCREENS = 2  # a block is shared when this many screens of the plan carry it
+
+
+def _asset_for(match: "re.Match[str]") -> Optional[Tuple[str, str, str]]:
+    """(asset name, content, replacement tag) for a bundleable inline block, else None."""
+    tag, content = match.group(1).lower(), match.group(3).strip()
+    attrs = parse_attrs(match.group(2))
+    if not content or len(content) < settings.ASSET_BUNDLE_MIN_BYTES:
+        return None
+    if tag == "style":
+        if set(attrs) - {"media"}:
+            return None
+        ext = "css"
+    else:
+        kind = SCRIPT_TYPES.get(attrs.get("type", "").strip().lower())
+        if kind is None or set(attrs) - {"type"}:
+            return None
+        ext = "js"
+    digest = hashlib.sha256(f"{ext}\n{content}".encode("utf-8")).hexdigest()
+    name = f"{digest[:20]}.{ext}"
+    url = f"{settings.ASSET_BUNDLE_BASE_URL}/{name}"
+    if ext == "css":
+        media = f' media="{attrs["media"]}"' if attrs.get("media") else ""
+        replacement = f'<link rel="stylesheet" href="{url}"{media}>'
+    else:
+        # a classic external script without async/defer runs at the same point as the inline one did
+        replacement = f'<script type="module" src="{url}"></script>' if kind else f'<script src="{url}"></script>'
+    return name, content, replacement
+
+
+class AssetStore:
+    """Content-addressed files for assets shared by generated screens (never rewritten, so cached forever)."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.ASSET_BUNDLE_DIR
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name[:2], name)
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self.path(name))
+
+    def read(self, name: str) -> Optional[bytes]:
+        try:
+            with open(self.path(name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, name: str, content: str) -> None:
+        path = self.path(name)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp, path)
+
+
+class AssetBundler:
+    """
+    Finds inline <style>/<script> blocks that several screens of a plan
+    repeat (keyframes, Tailwind preflight, lucide/Chart.js setup...) and
+    stores them as content-hashed files. A block an earlier design already
+    stored is shared as well, so designs using the same design system hit
+    the same cached files.
+
+    Screens themselves stay self-contained: `html` is what gets persisted
+    (checkpoints, S3, saved designs) and must not depend on this instance's
+    files. Only the copy delivered to a client that asks for it references
+    the shared files (`delivery_html`).
+    """
+
+    def __init__(self, store: Optional[AssetStore] = None):
+        self.store = store or AssetStore()
+
+    async def bundle(self, screens: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Store the blocks the screens share and list them in each screen's `shared_assets`; returns the manifest."""
+        found: List[List[Tuple["re.Match[str]", Tuple[str, str, str]]]] = []
+        carriers: Dict[str, int] = {}
+        for screen in screens:
+            blocks = []
+            for m in _BLOCK_RE.finditer(screen.get("html") or ""):
+                asset = _asset_for(m)
+                if asset is not None:
+                    blocks.append((m, asset))
+            for name in {asset[0] for _, asset in blocks}:
+                carriers[name] = carriers.get(name, 0) + 1
+            found.append(blocks)
+
+        known = await asyncio.to_thread(
+            lambda: {name for name, count in carriers.items() if count < MIN_SCREENS and self.store.exists(name)}
+        )
+        shared = {name for name, count in carriers.items() if count >= MIN_SCREENS} | known
+        if not shared:
+            return {"assets": [], "bytes_saved": 0}
+
+        contents: Dict[str, str] = {}
+        carried: List[Tuple[Dict[str, Any], List[str]]] = []
+        bytes_saved = 0  # per delivery of every screen with its shared blocks as references
+        for screen, blocks in zip(screens, found):
+            names = []
+            for m, (name, content, replacement) in blocks:
+                if name not in shared:
+                    continue
+                contents[name] = content
+                names.append(name)
+                bytes_saved += len(m.group(0).encode("utf-8")) - len(replacement)
+            if names:
+                carried.append((screen, names))
+
+        try:
+            await asyncio.to_thread(lambda: [self.store.write(n, c) for n, c in contents.items() if n not in known])
+        except OSError as e:
+            logger.warning(f"Asset bundle not written, screens are delivered with their inline blocks: {e}")
+            return {"assets": [], "bytes_saved": 0, "error": str(e)}
+        for screen, names in carried:
+            screen["shared_assets"] = names
+
+        return {
+            "assets": [
+                {
+                    "name": name,
+                    "url": f"{settings.ASSET_BUNDLE_BASE_URL}/{name}",
+                    "bytes": len(content.encode("utf-8")),
+                    "screens": carriers[name],
+                    "reused": name in known,
+                }
+                for name, content in contents.items()
+            ],
+            "bytes_saved": bytes_saved,
+        }
+
+    def delivery_html(self, screen: Dict[str, Any]) -> str:
+        """
+        The screen's html with its `shared_assets` blocks swapped for references
+        to the shared files. The inline blocks are the source of truth: a file
+        missing here (cache wiped, another replica stored it) is written back
+        from them first, and the block stays inline if that fails.
+        """
+        html = screen.get("html") or ""
+        shared = set(screen.get("shared_assets") or ())
+        if not shared:
+            return html
+        parts, pos = [], 0
+        for m in _BLOCK_RE.finditer(html):
+            asset = _asset_for(m)
+            if asset is None or asset[0] not in shared:
+                continue
+            name, content, replacement = asset
+            try:
+                self.store.write(name, content)  # a stat when the file is there
+            except OSError as e:
+                logger.warning(f"Shared asset {name} not available, delivered inline: {e}")
+                continue
+            parts.append(html[pos:m.start()])
+            parts.append(replacement)
+            pos = m.end()
+        return "".join(parts) + html[pos:]
+
+
+asset_bundler = AssetBundler()
@@ -1,5 +1,180 @@
 import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+
+from app.services.markup_validator import validate_markup
+
+_FENCE_RE = re.compile(r'^[ \t]*```', re.M)
+_HTML_START_RE = re.compile(r'<!doctype\s+html|<html[\s>]', re.I)
+# </html> ends an unfenced document, unless it is inside a script (e.g. a string literal)
+_SCRIPT_OR_END_RE = re.compile(
+    r'(<script\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*>)|(</script\s*>)|</html\s*>', re.I
+)
+HTML_LANGUAGES = ("html", "htm", "")
+_HOLD_BACK = 12  # a split "</html>" or closing fence may still complete
+
+
+class FencedCodeStreamParser:
+    """
+    Incremental parser for LLM output shaped "lead prose, ```html block```,
+    trailing prose" (also unfenced documents and extra css/js blocks).
+
+    `feed()` returns the part of the HTML document that became known with
+    this chunk, so it can be scanned while the model is still writing.
+    `done` turns True once the document is complete (the closing fence of
+    a fenced block, `</html>` outside any script for an unfenced one):
+    everything after it is closing prose the caller may choose not to wait for.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.state = "outside"            # outside | code
+        self.done = False
+        self.blocks: List[Tuple[str, str]] = []
+        self._lead: List[str] = []
+        self._trail: List[str] = []
+        self._html: List[str] = []
+        self._code: List[str] = []
+        self._lang = ""
+        self._fenced = False
+        self._html_block = False          # the block being read is the HTML document
+        self._bol = True                  # the buffer starts at the beginning of a line
+        self._in_script = False           # unfenced document: the text taken so far ends inside <script>
+
+    @property
+    def lead(self) -> str:
+        return "".join(self._lead).strip()
+
+    @property
+    def trail(self) -> str:
+        return "".join(self._trail).strip()
+
+    @property
+    def html(self) -> str:
+        return "".join(self._html).strip()
+
+    @property
+    def found_html(self) -> bool:
+        return bool(self._html) or self._html_block
+
+    def feed(self, chunk: str) -> str:
+        self.buffer += chunk
+        return self._advance(final=False)
+
+    def close(self) -> str:
+        return self._advance(final=True)
+
+    def _open_block(self, lang: str, fenced: bool) -> None:
+        self.state = "code"
+        self._lang = lang
+        self._fenced = fenced
+        self._code = []
+        self._html_block = not self.found_html and lang in HTML_LANGUAGES
+
+    def _document_end(self, buf: str) -> Optional["re.Match[str]"]:
+        """The `</html>` ending an unfenced document in `buf` (None if not there yet)."""
+        in_script = self._in_script
+        for m in _SCRIPT_OR_END_RE.finditer(buf):
+            if m.group(1):
+                in_script = True
+            elif m.group(2):
+                in_script = False
+            elif not in_script:
+                return m
+        return None
+
+    def _code_text(self, text: str) -> str:
+        if self._html_block and not self._fenced:
+            for m in _SCRIPT_OR_END_RE.finditer(text):
+                if m.group(1) or m.group(2):
+                    self._in_script = bool(m.group(1))
+        self._code.append(text)
+        if self._html_block:
+            self._html.append(text)
+            return text
+        return ""
+
+    def _close_block(self) -> None:
+        self.blocks.append((self._lang, "".join(self._code).strip()))
+        self._html_block = False
+        self.state = "outside"
+
+    def _take(self, n: int) -> str:
+        text, self.buffer = self.buffer[:n], self.buffer[n:]
+        if text:
+            self._bol = text[-1] == "\n"
+        return text
+
+    def _fence(self, buf: str) -> Optional["re.Match[str]"]:
+        # a fence only counts at the start of a line
+        for m in _FENCE_RE.finditer(buf):
+            if m.start() > 0 or self._bol:
+                return m
+        return None
+
+    def _skip_fence_line(self, fence: "re.Match[str]") -> None:
+        nl = self.buffer.find("\n", fence.end())
+        self._take(len(self.buffer) if nl == -1 else nl + 1)
+
+    def _advance(self, final: bool) -> str:
+        delta: List[str] = []
+        while self.buffer:
+            buf = self.buffer
+            if self.state == "outside":
+                prose = self._trail if self.found_html else self._lead
+                if not self.found_html:
+                    start = _HTML_START_RE.search(buf)
+                    fence = self._fence(buf)
+                    if start and (fence is None or start.start() < fence.start()):
+                        # unfenced document: the model skipped the code block
+                        prose.append(self._take(start.start()))
+                        self._open_block("html", fenced=False)
+                        continue
+                nl = buf.find("\n")
+                if nl == -1 and not final:
+                    break
+                line = self._take(len(buf) if nl == -1 else nl + 1)
+                if line.lstrip().startswith("```"):
+                    self._open_block(line.strip()[3:].strip().lower(), fenced=True)
+                else:
+                    prose.append(line)
+                continue
+
+            # a fenced block ends at its closing fence, whatever it contains; an unfenced one at </html>
+            unfenced_html = self._html_block and not self._fenced
+            end = self._document_end(buf) if unfenced_html else None
+            fence = self._fence(buf) if self._fenced else None
+            if end:
+                delta.append(self._code_text(self._take(end.end())))
+                self._close_block()
+                self.done = True
+                continue
+            if fence:
+                code = buf[:fence.start()]
+                if not final and buf.find("\n", fence.end()) == -1:
+                    # the rest of the fence line is still to come; skipping it now would
+                    # leave its tail to be read as prose
+                    delta.append(self._code_text(self._take(fence.start())))
+                    break
+                self._skip_fence_line(fence)
+                delta.append(self._code_text(code))
+                self.done = self.done or self._html_block
+                self._close_block()
+                continue
+            if final:
+                delta.append(self._code_text(self._take(len(buf))))
+                self._close_block()
+                break
+            safe = len(buf) - _HOLD_BACK
+            if unfenced_html:
+                # never split a tag: a <script ...> cut in half would go unnoticed
+                lt = buf.rfind("<", 0, safe)
+                if lt != -1 and safe - lt < 1024 and not 0 <= buf.find(">", lt) < safe:
+                    safe = lt
+            if safe > 0:
+                delta.append(self._code_text(self._take(safe)))
+            break
+        return "".join(delta)
+
 
 class CodeParser:
     """Parse generated LLM code into HTML, CSS, and JavaScript components"""
@@ -9,17 +184,16 @@ class CodeParser:
         Parse the LLM-generated code into separate HTML, CSS, and JS components
         """
         
-        # Extract HTML
-        html_match = re.search(r'```html\n(.*?)\n```', generated_code, re.DOTALL | re.IGNORECASE)
-        html_code = html_match.group(1).strip() if html_match else ""
-        
-        # Extract CSS
-        css_match = re.search(r'```css\n(.*?)\n```', generated_code, re.DOTALL | re.IGNORECASE)
-        css_code = css_match.group(1).strip() if css_match else ""
-        
-        # Extract JavaScript
-        js_match = re.search(r'```javascript\n(.*?)\n```', generated_code, re.DOTALL | re.IGNORECASE)
-        js_code = js_match.group(1).strip() if js_match else ""
+        parser = FencedCodeStreamParser()
+        parser.feed(generated_code)
+        parser.close()
+        blocks: Dict[str, str] = {}
+        for lang, code in parser.blocks:
+            blocks.setdefault(lang, code)
+
+        html_code = parser.html
+        css_code = blocks.get("css", "")
+        js_code = blocks.get("javascript") or blocks.get("js", "")
         
         # Fallback: if no code blocks found, assume it's all HTML
         if not html_code and not css_code and not js_code:
@@ -36,19 +210,5 @@ class CodeParser:
         Validate that only Tailwind utility classes are used (no shadcn)
         """
         
-        # List of shadcn/ui component class prefixes to detect
-        shadcn_patterns = [
-            r'cn\(',
-            r'className.*=.*{',
-            r'Button(?!.*[a-z])',  # Button component (not button element)
-            r'Card(?!.*[a-z])',
-            r'Input(?!.*[a-z])', 
-            r'Dialog(?!.*[a-z])',
-            r'Sheet(?!.*[a-z])'
-        ]
-        
-        for pattern in shadcn_patterns:
-            if re.search(pattern, html, re.IGNORECASE):
-                return False
-        
-        return True
\ No newline at end of file
+        # component markup, className and cn() are the error-severity rules
+        return not any(f.severity == "error" for f in validate_markup(html))
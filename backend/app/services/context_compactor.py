@@ -0,0 +1,124 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+# Per-field budgets for the plan digest (characters, not tokens)
+SUMMARY_CHARS = 160
+COMPONENT_CHARS = 70
+STRATEGY_CHARS = 400
+MAX_COMPONENTS = 8
+MAX_INTERACTIONS = 4
+
+
+def compact_json(obj: Any) -> str:
+    """Minified JSON (no indent, no spaces) — always valid, never sliced."""
+    try:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+    except Exception:
+        return ""
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars/token for English + JSON)."""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def plan_fingerprint(plan: Optional[Dict[str, Any]]) -> str:
+    """Stable version id for a plan; changes whenever any field changes."""
+    if not plan:
+        return ""
+    raw = json.dumps(plan, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _summarise(value: Any, limit: int) -> str:
+    s = " ".join(str(value or "").split())
+    if len(s) <= limit:
+        return s
+    cut = s[:limit].rsplit(" ", 1)[0] or s[:limit]
+    return cut.rstrip(",.;:") + "…"
+
+
+def _summarise_list(items: Any, limit: int, max_items: int) -> List[str]:
+    if not isinstance(items, list):
+        return []
+    out = [_summarise(i, limit) for i in items[:max_items] if i]
+    if len(items) > max_items:
+        out.append(f"+{len(items) - max_items} more")
+    return out
+
+
+def build_plan_digest(plan: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build a compact, structure-preserving digest of a design plan.
+    Keeps ids/titles/types/key components; long prose fields are summarised.
+    """
+    if not plan:
+        return {}
+    screens = []
+    for s in plan.get("screens") or []:
+        if not isinstance(s, dict):
+            continue
+        screens.append({
+            "id": s.get("id"),
+            "type": s.get("screen_type"),
+            "title": s.get("title"),
+            "order": s.get("order"),
+            "summary": _summarise(s.get("description"), SUMMARY_CHARS),
+            "components": _summarise_list(s.get("components"), COMPONENT_CHARS, MAX_COMPONENTS),
+            "interactions": _summarise_list(s.get("interactions"), COMPONENT_CHARS, MAX_INTERACTIONS),
+        })
+
+    digest = {
+        "screens": screens,
+        "design_system": plan.get("design_system") or {},
+        "complexity": plan.get("estimated_complexity"),
+        "strategy": _summarise(plan.get("generation_strategy"), STRATEGY_CHARS),
+    }
+    return {
+        "version": plan_fingerprint(plan),
+        "digest": digest,
+        "text": compact_json(digest),
+    }
+
+
+def screens_meta(screens: Optional[List[Dict[str, Any]]]) -> str:
+    """Lightweight id/title/type listing for already generated screens."""
+    if not screens:
+        return ""
+    meta = [
+        {"id": s.get("id"), "title": s.get("title"), "type": s.get("screen_type")}
+        for s in screens if isinstance(s, dict)
+    ]
+    return compact_json(meta)
+
+
+def get_plan_digest(plan: Optional[Dict[str, Any]], cached: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Return `cached` if it matches the plan's current version, else rebuild."""
+    if not plan:
+        return {}
+    if cached and cached.get("version") == plan_fingerprint(plan):
+        return cached
+    return build_plan_digest(plan)
+
+
+def legacy_context(obj: Any, limit: Optional[int] = None, indent: Optional[int] = None) -> str:
+    """The JSON snippet a prompt carried for `obj` before compaction (sliced at `limit`, as the old clip helpers did)."""
+    if not obj:
+        return ""
+    try:
+        text = json.dumps(obj, ensure_ascii=False, indent=indent, default=str)
+    except Exception:
+        return ""
+    return text[:limit] + "…" if limit is not None and len(text) > limit else text
+
+
+def compaction_stats(raw_text: str, compact_text: str) -> Dict[str, int]:
+    """Token estimates for the context as sent before compaction (see legacy_context) vs now."""
+    raw_tokens = estimate_tokens(raw_text)
+    compact_tokens = estimate_tokens(compact_text)
+    return {
+        "context_tokens_raw": raw_tokens,
+        "context_tokens_compact": compact_tokens,
+        "context_tokens_saved": max(0, raw_tokens - compact_tokens),
+    }
@@ -1,18 +1,19 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from app.models.design import Design
 from app.schemas.design import DesignCreate, DesignUpdate
 import uuid
 
 class DesignService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def get_design(self, design_id: uuid.UUID) -> Optional[Design]:
+    async def get_design(self, design_id: uuid.UUID) -> Optional[Design]:
         """Get design by ID"""
-        return self.db.query(Design).filter(Design.id == design_id).first()
+        return await self.db.scalar(select(Design).where(Design.id == design_id).limit(1))
     
-    def get_user_designs(
+    async def get_user_designs(
         self, 
         user_id: uuid.UUID, 
         skip: int = 0, 
@@ -20,25 +21,24 @@ class DesignService:
         status: Optional[str] = None
     ) -> List[Design]:
         """Get designs for a user"""
-        query = self.db.query(Design).filter(Design.user_id == user_id)
+        query = select(Design).where(Design.user_id == user_id)
         
         if status:
-            query = query.filter(Design.status == status)
+            query = query.where(Design.status == status)
         
-        return query.offset(skip).limit(limit).all()
+        return list(await self.db.scalars(query.offset(skip).limit(limit)))
     
-    def get_public_designs(self, skip: int = 0, limit: int = 100) -> List[Design]:
+    async def get_public_designs(self, skip: int = 0, limit: int = 100) -> List[Design]:
         """Get public designs"""
-        return (
-            self.db.query(Design)
-            .filter(Design.is_public == True)
-            .filter(Design.status == "published")
+        return list(await self.db.scalars(
+            select(Design)
+            .where(Design.is_public == True)
+            .where(Design.status == "published")
             .offset(skip)
             .limit(limit)
-            .all()
-        )
+        ))
     
-    def create_design(self, user_id: uuid.UUID, design_create: DesignCreate) -> Design:
+    async def create_design(self, user_id: uuid.UUID, design_create: DesignCreate) -> Design:
         """Create a new design"""
         db_design = Design(
             user_id=user_id,
@@ -49,13 +49,28 @@ class DesignService:
             tags=design_create.tags
         )
         self.db.add(db_design)
-        self.db.commit()
-        self.db.refresh(db_design)
+        await self.db.commit()
+        await self.db.refresh(db_design)
         return db_design
     
-    def update_design(self, design_id: uuid.UUID, design_update: DesignUpdate) -> Design:
+    async def save_design(
+        self, design_id: uuid.UUID, user_id: uuid.UUID, design_create: DesignCreate, design_update: DesignUpdate
+    ) -> Design:
+        """Create the design with this id, or replace an existing one, in a single commit (safe to retry)"""
+        design = await self.get_design(design_id)
+        if design is None:
+            design = Design(id=design_id, user_id=user_id)
+            self.db.add(design)
+        for field, value in {**design_create.dict(), **design_update.dict(exclude_unset=True)}.items():
+            setattr(design, field, value)
+
+        await self.db.commit()
+        await self.db.refresh(design)
+        return design
+
+    async def update_design(self, design_id: uuid.UUID, design_update: DesignUpdate) -> Design:
         """Update design"""
-        design = self.get_design(design_id)
+        design = await self.get_design(design_id)
         if not design:
             raise ValueError("Design not found")
         
@@ -63,25 +78,28 @@ class DesignService:
         for field, value in update_data.items():
             setattr(design, field, value)
         
-        self.db.commit()
-        self.db.refresh(design)
+        await self.db.commit()
+        # server-side updated_at: load it now, lazy loads cannot happen outside the session's greenlet
+        await self.db.refresh(design)
         return design
     
-    def delete_design(self, design_id: uuid.UUID) -> bool:
+    async def delete_design(self, design_id: uuid.UUID) -> bool:
         """Delete design"""
-        design = self.get_design(design_id)
+        design = await self.get_design(design_id)
         if not design:
             return False
         
-        self.db.delete(design)
-        self.db.commit()
+        await self.db.delete(design)
+        await self.db.commit()
         return True
     
-    def count_user_designs(self, user_id: uuid.UUID) -> int:
+    async def count_user_designs(self, user_id: uuid.UUID) -> int:
         """Count user's designs"""
-        return self.db.query(Design).filter(Design.user_id == user_id).count()
+        return await self.db.scalar(
+            select(func.count()).select_from(Design).where(Design.user_id == user_id)
+        )
     
-    def search_designs(
+    async def search_designs(
         self, 
         query: str, 
         user_id: Optional[uuid.UUID] = None,
@@ -90,16 +108,16 @@ class DesignService:
         limit: int = 100
     ) -> List[Design]:
         """Search designs by title or description"""
-        db_query = self.db.query(Design)
+        db_query = select(Design)
         
         if user_id:
-            db_query = db_query.filter(Design.user_id == user_id)
+            db_query = db_query.where(Design.user_id == user_id)
         elif is_public:
-            db_query = db_query.filter(Design.is_public == True)
+            db_query = db_query.where(Design.is_public == True)
         
-        db_query = db_query.filter(
+        db_query = db_query.where(
             (Design.title.ilike(f"%{query}%")) | 
             (Design.description.ilike(f"%{query}%"))
         )
         
-        return db_query.offset(skip).limit(limit).all()
\ No newline at end of file
+        return list(await self.db.scalars(db_query.offset(skip).limit(limit)))
\ No newline at end of file
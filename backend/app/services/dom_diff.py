@@ -0,0 +1,242 @@
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.html_tokens import ATTR_RE, RAW_TEXT_CLOSE, TOKEN_RE, Node, parse_document
+
+_TAG_TAIL_RE = re.compile(r'\s*/?\s*$')
+
+MAX_OPS = 200
+MAX_PATCH_RATIO = 0.6  # a patch bigger than this share of the document is sent as the full document
+MAX_ALIGN = 400        # children per element aligned pairwise; larger lists are replaced wholesale
+
+
+def _render_attr(name: str, value: str, quote: str = '"') -> str:
+    if quote == "" and value and not re.search(r'[\s"\'=<>`]', value):
+        return f"{name}={value}"
+    quote = quote or '"'
+    if quote in value:
+        quote = "'" if quote == '"' else '"'
+    return f"{name}={quote}{value}{quote}"
+
+
+def edit_start_tag(start_tag: str, set_attrs: Dict[str, str], remove: List[str]) -> str:
+    """
+    `start_tag` with attributes removed and set in place, keeping the order,
+    spacing and quoting of the others; new attributes go at the end.
+    """
+    m = TOKEN_RE.match(start_tag)
+    if m is None or m.group(2) is None:
+        return start_tag
+    begin, end = m.start(3), m.end(3)
+    edits: List[Tuple[int, int, str]] = []
+    seen = set()
+    for a in ATTR_RE.finditer(start_tag, begin, end):
+        name = a.group(1).lower()
+        if name == "/" or name in seen:
+            continue
+        seen.add(name)
+        if name in remove:
+            cut = a.start()
+            while cut > begin and start_tag[cut - 1].isspace():
+                cut -= 1
+            edits.append((cut, a.end(), ""))
+        elif name in set_attrs:
+            quote = '"' if a.group(2) is not None else "'" if a.group(3) is not None else ""
+            edits.append((a.start(), a.end(), _render_attr(a.group(1), set_attrs[name], quote)))
+    added = "".join(f" {_render_attr(k, v)}" for k, v in set_attrs.items() if k not in seen)
+    if added:
+        tail = _TAG_TAIL_RE.search(start_tag, begin, end)
+        edits.append((tail.start(), tail.start(), added))
+    for s, e, replacement in sorted(edits, reverse=True):
+        start_tag = start_tag[:s] + replacement + start_tag[e:]
+    return start_tag
+
+
+def _document_element(root: Node) -> Optional[Node]:
+    return next((child for child in root.children if child.tag == "html"), None)
+
+
+def _align(a: List[Node], b: List[Node], old: str, new: str) -> List[Tuple[int, int]]:
+    """
+    Index pairs matching old to new children in order: same (tag, id) pairs
+    score 1, unchanged subtrees 2, so an inserted sibling does not shift
+    every following match onto its neighbour.
+    """
+    ka, kb = [c.key() for c in a], [c.key() for c in b]
+    sa, sb = [old[c.start:c.end] for c in a], [new[c.start:c.end] for c in b]
+    rows, cols = len(a), len(b)
+
+    def weight(i: int, j: int) -> int:
+        return 0 if ka[i] != kb[j] else 2 if sa[i] == sb[j] else 1
+
+    table = [[0] * (cols + 1) for _ in range(rows + 1)]
+    for i in range(rows - 1, -1, -1):
+        for j in range(cols - 1, -1, -1):
+            w = weight(i, j)
+            table[i][j] = max(table[i + 1][j], table[i][j + 1], table[i + 1][j + 1] + w if w else 0)
+    pairs, i, j = [], 0, 0
+    while i < rows and j < cols:
+        w = weight(i, j)
+        if w and table[i][j] == table[i + 1][j + 1] + w:
+            pairs.append((i, j))
+            i, j = i + 1, j + 1
+        elif table[i + 1][j] >= table[i][j + 1]:
+            i += 1
+        else:
+            j += 1
+    return pairs
+
+
+class _Differ:
+    def __init__(self, old: str, new: str):
+        self.old, self.new = old, new
+        self.ops: List[Dict[str, Any]] = []
+        self.scripts_changed = False
+
+    def _old_src(self, node: Node) -> str:
+        return self.old[node.start:node.end]
+
+    def _new_src(self, node: Node) -> str:
+        return self.new[node.start:node.end]
+
+    def _op(self, op: str, path: List[int], node: Node, **fields: Any) -> None:
+        self.ops.append({"op": op, "path": path, "tag": node.tag, **fields})
+
+    def _replace(self, path: List[int], a: Node, b: Node) -> None:
+        # browsers do not run scripts inserted as markup: the client has to reload
+        self.scripts_changed |= "script" in (a.tag, b.tag) or "<script" in self._new_src(b).lower()
+        self._op("replace", path, a, html=self._new_src(b))
+
+    def _inner(self, path: List[int], a: Node, b: Node) -> None:
+        html = self.new[b.inner_start:b.inner_end]
+        self.scripts_changed |= "<script" in html.lower()
+        self._op("html", path, a, html=html)
+
+    def diff(self, a: Node, b: Node, path: List[int]) -> None:
+        if self._old_src(a) == self._new_src(b):
+            return
+        if a.tag != b.tag or a.tag in RAW_TEXT_CLOSE:
+            self._replace(path, a, b)
+            return
+
+        old_tag, new_tag = self.old[a.start:a.inner_start], self.new[b.start:b.inner_start]
+        if old_tag != new_tag:
+            changed = {k: v for k, v in b.attrs.items() if a.attrs.get(k) != v}
+            removed = [k for k in a.attrs if k not in b.attrs]
+            if edit_start_tag(old_tag, changed, removed) != new_tag:
+                self._replace(path, a, b)  # reordered or requoted attributes
+                return
+            self._op("attrs", path, a, set=changed, remove=removed)
+
+        inner = self.new[b.inner_start:b.inner_end]
+        if self.old[a.inner_start:a.inner_end] == inner:
+            return
+        gaps_a, gaps_b = a.gaps(self.old), b.gaps(self.new)
+        if [c.key() for c in a.children] == [c.key() for c in b.children]:
+            if gaps_a != gaps_b:
+                # text between the elements changed: paths only address elements, so swap the contents
+                self._inner(path, a, b)
+                return
+            for i, (x, y) in enumerate(zip(a.children, b.children)):
+                self.diff(x, y, path + [i])
+            return
+        if len(a.children) * len(b.children) > MAX_ALIGN ** 2:
+            self._inner(path, a, b)
+            return
+
+        pairs = _align(a.children, b.children, self.old, self.new)
+        kept_old = {i: j for i, j in pairs}
+        kept_new = {j for _, j in pairs}
+        # replay the removes and inserts on the text between the children; unless that
+        # reproduces the new contents exactly, swap the contents instead
+        gaps, slots = list(gaps_a), [self._new_src(b.children[kept_old[i]]) if i in kept_old else "" for i in range(len(a.children))]
+        removes, inserts = [], []
+        for i in range(len(a.children) - 1, -1, -1):
+            if i not in kept_old:
+                gaps[i:i + 2] = [gaps[i] + gaps[i + 1]]
+                del slots[i]
+                removes.append(i)
+        for j, child in enumerate(b.children):
+            if j not in kept_new:
+                html = self._new_src(child) + gaps_b[j + 1]
+                slots.insert(j, html)
+                gaps.insert(j + 1, "")
+                inserts.append((j, child, html))
+        if "".join(g + s for g, s in zip(gaps, slots + [""])) != inner:
+            self._inner(path, a, b)
+            return
+        for i in removes:
+            self.scripts_changed |= a.children[i].tag == "script"
+            self._op("remove", path + [i], a.children[i])
+        for j, child, html in inserts:
+            self.scripts_changed |= "<script" in html.lower()
+            self.ops.append({"op": "insert", "path": path, "tag": b.tag, "index": j, "html": html})
+        for i, j in pairs:
+            self.diff(a.children[i], b.children[j], path + [j])
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha1((html or "").encode("utf-8")).hexdigest()[:16]
+
+
+def diff_documents(old: str, new: str) -> Dict[str, Any]:
+    """
+    Patch turning `old` into `new`, as ops on element paths below <html>
+    (element children only, so [1, 0] is the first element in <body>):
+
+        {"op": "replace", "path", "tag", "html"}   outerHTML of the element
+        {"op": "html", "path", "tag", "html"}      innerHTML of the element
+        {"op": "attrs", "path", "tag", "set", "remove"}
+        {"op": "remove", "path", "tag"}
+        {"op": "insert", "path", "tag", "index", "html"}  new child at index
+
+    Ops apply in order; each names the tag it expects at its path so the
+    client can detect a DOM that drifted from the base and reload instead.
+    `mode` is "same", "patch", or "full" when a patch would not help (no
+    common structure, changed scripts, or a patch nearly as big as the page).
+    """
+    result: Dict[str, Any] = {
+        "base": content_hash(old), "target": content_hash(new), "full_bytes": len(new.encode("utf-8")),
+    }
+    if old == new:
+        return {**result, "mode": "same", "ops": [], "bytes": 0}
+
+    a, b = _document_element(parse_document(old)), _document_element(parse_document(new))
+    if a is None or b is None:
+        return {**result, "mode": "full", "reason": "not a full document"}
+    differ = _Differ(old, new)
+    differ.diff(a, b, [])
+    size = sum(len(op.get("html", "").encode("utf-8")) for op in differ.ops) + 32 * len(differ.ops)
+    if differ.scripts_changed:
+        return {**result, "mode": "full", "reason": "scripts changed"}
+    if len(differ.ops) > MAX_OPS or size > MAX_PATCH_RATIO * result["full_bytes"]:
+        return {**result, "mode": "full", "reason": "patch too large"}
+    return {**result, "mode": "patch", "ops": differ.ops, "bytes": size}
+
+
+def apply_patch(old: str, patch: Dict[str, Any]) -> str:
+    """Server-side reference implementation of the client patcher (source-level, for checks)."""
+    if patch.get("mode") == "same":
+        return old
+    html = old
+    for op in patch["ops"]:
+        root = _document_element(parse_document(html))
+        node = root
+        path = op["path"]
+        for index in path:
+            node = node.children[index]
+        if node.tag != op["tag"]:
+            raise ValueError(f"expected <{op['tag']}> at {path}, found <{node.tag}>")
+        kind = op["op"]
+        if kind == "replace" or kind == "remove":
+            html = html[:node.start] + (op.get("html") or "") + html[node.end:]
+        elif kind == "html":
+            html = html[:node.inner_start] + op["html"] + html[node.inner_end:]
+        elif kind == "insert":
+            at = node.children[op["index"]].start if op["index"] < len(node.children) else node.inner_end
+            html = html[:at] + op["html"] + html[at:]
+        elif kind == "attrs":
+            start_tag = edit_start_tag(html[node.start:node.inner_start], op["set"], op["remove"])
+            html = html[:node.start] + start_tag + html[node.inner_start:]
+    return html
@@ -0,0 +1,333 @@
+import re
+from typing import Dict, List, Optional
+
+from app.services.html_tokens import ATTR_RE, RAW_TEXT_CLOSE, TOKEN_RE
+
+_WS_RE = re.compile(r'\s+')
+# comments go; strings are set aside so nothing below touches their content
+_CSS_COMMENT_OR_STRING_RE = re.compile(r'/\*.*?\*/|"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'', re.S)
+_CSS_STRING_SLOT_RE = re.compile(r'\x00(\d+)\x00')
+_CSS_PUNCT_RE = re.compile(r'\s*([{};,>])\s*')
+_CSS_BLOCK_RE = re.compile(r'\{([^{}]*)\}')
+_CSS_COLON_RE = re.compile(r'\s*:\s*')
+_DECL_SPLIT_RE = re.compile(r';(?![^(]*\))')
+
+# whitespace between two of these never renders, so it can go entirely
+# (inline and replaced elements such as video/canvas/iframe are not in it; script/style are invisible and
+# leave the surrounding whitespace to the text around them)
+BLOCK_TAGS = frozenset({
+    "html", "head", "body", "title", "meta", "link", "noscript", "base", "template",
+    "div", "section", "header", "footer", "main", "nav", "article", "aside", "address", "ul", "ol", "li", "dl",
+    "dt", "dd", "p", "h1", "h2", "h3", "h4", "h5", "h6", "table", "thead", "tbody", "tfoot", "tr", "td", "th",
+    "caption", "colgroup", "col", "form", "fieldset", "legend", "figure", "figcaption", "blockquote", "hr", "br",
+    "pre", "details", "dialog", "menu",
+})
+VERBATIM_TAGS = frozenset({"pre", "textarea"})
+
+
+def minify_css(css: str) -> str:
+    strings: List[str] = []
+
+    def set_aside(m: "re.Match[str]") -> str:
+        if m.group(0).startswith("/*"):
+            return ""
+        strings.append(m.group(0))
+        return f"\x00{len(strings) - 1}\x00"
+
+    css = _CSS_COMMENT_OR_STRING_RE.sub(set_aside, css)
+    css = _WS_RE.sub(" ", css)
+    css = _CSS_PUNCT_RE.sub(r"\1", css)
+    # "prop : value" only inside declaration blocks; in selectors "a :hover" differs from "a:hover"
+    css = _CSS_BLOCK_RE.sub(lambda m: "{" + _CSS_COLON_RE.sub(":", m.group(1)) + "}", css)
+    css = css.replace(";}", "}").strip()
+    return _CSS_STRING_SLOT_RE.sub(lambda m: strings[int(m.group(1))], css) if strings else css
+
+
+def _js_literal_lines(js: str) -> List[bool]:
+    """
+    For each newline in `js`: whether it sits inside a template literal or a
+    line-continued string (where indentation is part of the value).
+    Regex literals are not recognised; a quote in one ends at the line end.
+    """
+    inside: List[bool] = []
+    stack: List[List] = []  # ["tpl"] / ["expr", brace depth] for template literals and their ${}
+    quote = ""              # open ' or " string
+    comment = ""            # "//" or "/*"
+    i, n = 0, len(js)
+    while i < n:
+        ch = js[i]
+        if ch == "\n":
+            if comment == "//":
+                comment = ""
+            # an unescaped newline ends a broken ' / " string
+            inside.append(bool(stack) and stack[-1][0] == "tpl")
+            quote = ""
+        elif comment:
+            if comment == "/*" and js.startswith("*/", i):
+                comment, i = "", i + 1
+        elif quote:
+            if ch == "\\":
+                if js[i + 1:i + 2] == "\n":
+                    inside.append(True)
+                i += 1
+            elif ch == quote:
+                quote = ""
+        elif stack and stack[-1][0] == "tpl":
+            if ch == "\\":
+                if js[i + 1:i + 2] == "\n":
+                    inside.append(True)
+                i += 1
+            elif ch == "`":
+                stack.pop()
+            elif js.startswith("${", i):
+                stack.append(["expr", 0])
+                i += 1
+        elif ch in "'\"":
+            quote = ch
+        elif ch == "`":
+            stack.append(["tpl"])
+        elif js.startswith("//", i) or js.startswith("/*", i):
+            comment, i = js[i:i + 2], i + 1
+        elif stack and ch == "{":
+            stack[-1][1] += 1
+        elif stack and ch == "}":
+            if stack[-1][1]:
+                stack[-1][1] -= 1
+            else:
+                stack.pop()
+        i += 1
+    return inside
+
+
+def _minify_js(js: str) -> str:
+    # indentation and blank lines only (anything more needs a real JS parser), and never inside template
+    # literals or continued strings, where the whitespace is part of the value
+    lines = js.split("\n")
+    literal = _js_literal_lines(js)
+    out: List[str] = []
+    for i, line in enumerate(lines):
+        starts_inside = i > 0 and literal[i - 1]
+        ends_inside = i < len(literal) and literal[i]
+        if not starts_inside:
+            line = line.lstrip()
+        if not ends_inside:
+            line = line.rstrip()
+        if line or starts_inside or ends_inside:
+            out.append(line)
+    return "\n".join(out)
+
+
+def dedupe_declarations(style: str) -> str:
+    """Drop declarations overridden later in the same style attribute."""
+    decls = [d.strip() for d in _DECL_SPLIT_RE.split(style) if d.strip()]
+    keep: List[str] = []
+    seen: Dict[str, bool] = {}  # property -> a later declaration is !important
+    for decl in reversed(decls):
+        prop, _, value = decl.partition(":")
+        prop = prop.strip().lower()
+        important = "!important" in value
+        if prop in seen and (seen[prop] or not important):
+            continue
+        seen[prop] = seen.get(prop, False) or important
+        keep.append(f"{prop}:{value.strip()}" if value else decl)
+    return ";".join(reversed(keep))
+
+
+def _render_tag(closing: str, name: str, attrs: str) -> str:
+    if closing:
+        return f"</{name}>"
+    parts = [name]
+    for m in ATTR_RE.finditer(attrs):
+        attr = m.group(1)
+        if m.group(2) is not None:
+            value, quote = m.group(2), '"'
+        elif m.group(3) is not None:
+            value, quote = m.group(3), "'"
+        elif m.group(4) is not None:
+            parts.append(f"{attr}={m.group(4)}")
+            continue
+        else:
+            parts.append(attr)
+            continue
+        lowered = attr.lower()
+        if lowered == "class":
+            value = " ".join(value.split())
+        elif lowered == "style":
+            value = dedupe_declarations(value)
+        parts.append(f"{attr}={quote}{value}{quote}")
+    self_closing = "/" if attrs.rstrip().endswith("/") else ""
+    return f"<{' '.join(parts)}{self_closing}>"
+
+
+class HTMLMinifier:
+    """
+    Streaming HTML minifier: collapses whitespace outside <pre>/<textarea>,
+    drops comments (not conditional ones), compacts inline CSS/JS, merges
+    back-to-back identical <style> blocks and removes overridden declarations
+    in style attributes.
+
+    `feed()` returns the minified output for the complete tokens received so
+    far; `close()` flushes the rest. Output is identical however the input
+    is chunked.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._raw: Optional[str] = None        # inside <script>/<style>
+        self._raw_open = ""                    # rendered opening tag, held until the content is known
+        self._drop_close = False               # skip the closing tag of a duplicate <style>
+        self._verbatim = 0                     # <pre>/<textarea> depth
+        self._prev_block = True                # last tag emitted was block-level (or start of document)
+        self._pending_ws = False               # trailing whitespace waiting for the next tag
+        self._last_space = True
+        self._last_style: Optional[str] = None  # the previous token was this <style> block (tag + CSS)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def feed(self, chunk: str) -> str:
+        self.buffer += chunk
+        self.bytes_in += len(chunk.encode("utf-8"))
+        return self._emit(self._advance(final=False))
+
+    def close(self) -> str:
+        out = self._advance(final=True)
+        self.buffer = ""
+        return self._emit(out)
+
+    def _emit(self, parts: List[str]) -> str:
+        out = "".join(parts)
+        self.bytes_out += len(out.encode("utf-8"))
+        # drop consumed input so long streams do not grow the buffer
+        self.buffer = self.buffer[self._pos:]
+        self._pos = 0
+        return out
+
+    def _text(self, text: str, out: List[str]) -> None:
+        if not text:
+            return
+        if self._verbatim:
+            out.append(text)
+            self._last_space = text[-1:].isspace()
+            return
+        collapsed = _WS_RE.sub(" ", text)
+        if collapsed == " ":
+            self._pending_ws = True
+            return
+        if collapsed[0] == " " or self._pending_ws:
+            if not self._prev_block and not self._last_space:
+                out.append(" ")
+        self._pending_ws = collapsed[-1] == " "
+        out.append(collapsed.strip(" "))
+        self._prev_block = False
+        self._last_space = False
+        self._last_style = None
+
+    def _flush_ws(self, next_is_block: bool, out: List[str]) -> None:
+        # whitespace next to a block boundary never renders
+        if self._pending_ws and not next_is_block and not self._prev_block and not self._last_space:
+            out.append(" ")
+            self._last_space = True
+        self._pending_ws = False
+
+    def _raw_content(self, content: str, out: List[str]) -> None:
+        if self._raw == "style":
+            # only a repeat right after the same block is redundant; a later one re-applies
+            # its rules over whatever came in between, so it has to stay
+            block = self._raw_open + minify_css(content)
+            if block == self._last_style:
+                self._drop_close = True
+                return
+            self._last_style = block
+            out.append(block)
+        else:
+            out.append(self._raw_open + _minify_js(content))
+
+    def _advance(self, final: bool) -> List[str]:
+        buf = self.buffer
+        n = len(buf)
+        pos = self._pos
+        out: List[str] = []
+        while pos < n:
+            if self._raw is not None:
+                close = RAW_TEXT_CLOSE[self._raw].search(buf, pos)
+                if close is None:
+                    if final:
+                        self._raw_content(buf[pos:], out)
+                        pos = n
+                    break
+                self._raw_content(buf[pos:close.start()], out)
+                pos = close.end()
+                if self._drop_close:
+                    self._drop_close = False
+                else:
+                    out.append(f"</{self._raw}>")
+                self._raw = None
+                continue
+
+            lt = buf.find("<", pos)
+            if lt == -1:
+                if not final:
+                    break  # the text may continue in the next chunk
+                self._text(buf[pos:], out)
+                pos = n
+                break
+            self._text(buf[pos:lt], out)
+            pos = lt
+
+            m = TOKEN_RE.match(buf, lt)
+            if m is None:
+                if final:
+                    self._text(buf[lt:], out)
+                    pos = n
+                elif lt + 1 < n and not (buf[lt + 1].isalpha() or buf[lt + 1] in "/!"):
+                    self._text("<", out)  # a stray "<" that starts no tag
+                    pos = lt + 1
+                    continue
+                break
+            token = m.group(0)
+            pos = m.end()
+
+            if token.startswith("<!--"):
+                if token.startswith("<!--[if"):
+                    out.append(token)
+                continue
+            if token.startswith("<!"):
+                self._flush_ws(True, out)
+                out.append(_WS_RE.sub(" ", token))
+                self._prev_block = True
+                continue
+
+            closing, name = m.group(1), m.group(2).lower()
+            rendered = _render_tag(closing, name, m.group(3))
+            if name in RAW_TEXT_CLOSE:
+                # renders nothing: pending whitespace and the block/inline context carry over to what follows
+                if not closing and not rendered.endswith("/>"):
+                    self._raw = name
+                    self._raw_open = rendered
+                else:
+                    out.append(rendered)
+                if name != "style":
+                    self._last_style = None
+                continue
+            self._last_style = None
+            is_block = name in BLOCK_TAGS
+            if self._verbatim:
+                self._pending_ws = False
+            else:
+                self._flush_ws(is_block, out)
+            if name in VERBATIM_TAGS:
+                self._verbatim = max(0, self._verbatim + (-1 if closing else 1))
+            out.append(rendered)
+            self._prev_block = is_block
+            self._last_space = False
+
+        if final:
+            self._pending_ws = False
+        self._pos = pos
+        return out
+
+
+def minify_html(html: str) -> str:
+    minifier = HTMLMinifier()
+    return minifier.feed(html) + minifier.close()
@@ -0,0 +1,113 @@
+import re
+from typing import Dict, List, Tuple
+
+TOKEN_RE = re.compile(
+    r'<!--.*?-->|<!(?!--)[^>]*>'                                   # comment / doctype
+    r'|<(/?)([a-zA-Z][a-zA-Z0-9-]*)'                               # tag name
+    r'((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>',                         # attrs (quoted values may hold '>')
+    re.S,
+)
+ATTR_RE = re.compile(r'([^\s=/>"\']+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+)))?')
+RAW_TEXT_CLOSE = {"script": re.compile(r'</script\s*>', re.I), "style": re.compile(r'</style\s*>', re.I)}
+_WS_RE = re.compile(r'\s+')
+
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr",
+})
+PREFORMATTED_TAGS = frozenset({"pre", "textarea", "listing", "plaintext"})
+
+
+class Node:
+    """An element of the parsed document, as offsets into the source (see parse_document)."""
+
+    __slots__ = ("tag", "attrs", "start", "end", "inner_start", "inner_end", "children", "texts")
+
+    def __init__(self, tag: str, attrs: Dict[str, str], start: int, inner_start: int):
+        self.tag = tag
+        self.attrs = attrs
+        self.start = start
+        self.inner_start = inner_start
+        self.end = inner_start
+        self.inner_end = inner_start
+        self.children: List["Node"] = []
+        self.texts: List[str] = []        # non-blank direct text, whitespace collapsed outside <pre>
+
+    def key(self) -> Tuple[str, str]:
+        return self.tag, self.attrs.get("id", "")
+
+    def gaps(self, html: str) -> List[str]:
+        """Raw source between the element children: before the first, between each, after the last."""
+        bounds = [self.inner_start]
+        for child in self.children:
+            bounds += [child.start, child.end]
+        bounds.append(self.inner_end)
+        return [html[bounds[k]:bounds[k + 1]] for k in range(0, len(bounds), 2)]
+
+
+def parse_attrs(raw: str) -> Dict[str, str]:
+    """Attributes of a start tag's attribute text, names lowercased; the first of duplicates wins."""
+    attrs: Dict[str, str] = {}
+    for m in ATTR_RE.finditer(raw):
+        name = m.group(1).lower()
+        if name == "/" or name in attrs:
+            continue
+        value = m.group(2)
+        if value is None:
+            value = m.group(3) if m.group(3) is not None else (m.group(4) or "")
+        attrs[name] = value
+    return attrs
+
+
+def parse_document(html: str) -> Node:
+    """Element tree of `html` (a synthetic "#document" root; comments and doctype dropped)."""
+    root = Node("#document", {}, 0, 0)
+    stack = [root]
+    pos, n = 0, len(html)
+
+    def text(chunk: str) -> None:
+        if not any(node.tag in PREFORMATTED_TAGS for node in stack):
+            chunk = _WS_RE.sub(" ", chunk).strip()
+        if chunk:
+            stack[-1].texts.append(chunk)
+
+    while pos < n:
+        lt = html.find("<", pos)
+        if lt == -1:
+            text(html[pos:])
+            break
+        text(html[pos:lt])
+        m = TOKEN_RE.match(html, lt)
+        if m is None:
+            text("<")
+            pos = lt + 1
+            continue
+        pos = m.end()
+        if m.group(2) is None:
+            continue  # comment / doctype
+        closing, name = m.group(1), m.group(2).lower()
+        if closing:
+            # close the matching element and anything left open inside it; ignore strays
+            for i in range(len(stack) - 1, 0, -1):
+                if stack[i].tag == name:
+                    for node in stack[i + 1:]:
+                        node.inner_end = node.end = lt
+                    stack[i].inner_end, stack[i].end = lt, m.end()
+                    del stack[i:]
+                    break
+            continue
+        node = Node(name, parse_attrs(m.group(3)), lt, m.end())
+        stack[-1].children.append(node)
+        if name in VOID_TAGS or m.group(3).rstrip().endswith("/"):
+            continue
+        if name in RAW_TEXT_CLOSE:
+            close = RAW_TEXT_CLOSE[name].search(html, pos)
+            node.inner_end = close.start() if close else n
+            node.end = close.end() if close else n
+            node.texts.append(html[node.inner_start:node.inner_end])
+            pos = node.end
+            continue
+        stack.append(node)
+    for node in stack[1:]:
+        node.inner_end = node.end = n
+    root.end = root.inner_end = n
+    return root
@@ -0,0 +1,134 @@
+import importlib.util
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Per-host tuning: one long-lived keep-alive client per upstream
+HTTP_CLIENT_PROFILES: Dict[str, Dict[str, Any]] = {
+    "unsplash": {
+        "base_url": "https://api.unsplash.com",
+        "timeout": httpx.Timeout(20.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+    },
+    "clerk": {
+        "base_url": "https://api.clerk.com",
+        "timeout": httpx.Timeout(10.0, connect=3.0),
+        "limits": httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=120),
+    },
+    # JWKS lives on each Clerk instance domain, so no base_url
+    "jwks": {
+        "timeout": httpx.Timeout(10.0, connect=3.0),
+        "limits": httpx.Limits(max_connections=5, max_keepalive_connections=2, keepalive_expiry=300),
+        "follow_redirects": True,
+    },
+    # image proxy origins; redirects are followed by hand so each hop is allow-listed
+    "images": {
+        "timeout": httpx.Timeout(20.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+    },
+    "default": {
+        "timeout": httpx.Timeout(15.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=20, max_keepalive_connections=5),
+    },
+}
+
+
+class _ClientMetrics:
+    """Connection reuse counters fed by httpcore trace events."""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.http2_responses = 0
+        self.server_errors = 0
+        self.total_ms = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        reused = max(0, self.requests - self.new_connections)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_rate": round(reused / self.requests, 4) if self.requests else 0.0,
+            "http2_responses": self.http2_responses,
+            "server_errors": self.server_errors,
+            "avg_ms": round(self.total_ms / self.requests, 1) if self.requests else 0.0,
+        }
+
+
+class HTTPClientRegistry:
+    """
+    Named, long-lived httpx.AsyncClients. Started and closed by the app lifespan;
+    clients are also created lazily so CLIs (app.batch) can use them without it.
+    """
+
+    def __init__(self, profiles: Dict[str, Dict[str, Any]]):
+        self.profiles = profiles
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._metrics: Dict[str, _ClientMetrics] = {}
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create(name)
+            self._clients[name] = client
+        return client
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        profile = dict(self.profiles.get(name) or self.profiles["default"])
+        metrics = self._metrics.setdefault(name, _ClientMetrics())
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                metrics.new_connections += 1
+
+        async def on_request(request: httpx.Request) -> None:
+            request.extensions["trace"] = trace
+            request.extensions["started_at"] = time.perf_counter()
+            metrics.requests += 1
+
+        async def on_response(response: httpx.Response) -> None:
+            started = response.request.extensions.get("started_at")
+            if started is not None:
+                metrics.total_ms += (time.perf_counter() - started) * 1000
+            if response.http_version == "HTTP/2":
+                metrics.http2_responses += 1
+            if response.status_code >= 500:
+                metrics.server_errors += 1
+
+        return httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE and settings.HTTP2_ENABLED,
+            event_hooks={"request": [on_request], "response": [on_response]},
+            **profile,
+        )
+
+    async def start(self) -> None:
+        for name in self.profiles:
+            self.get(name)
+        logger.info(f"HTTP clients ready: {', '.join(self._clients)} (http2={HTTP2_AVAILABLE and settings.HTTP2_ENABLED})")
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+    def stats(self, name: Optional[str] = None) -> Dict[str, Any]:
+        if name is not None:
+            return self._metrics.get(name, _ClientMetrics()).as_dict()
+        return {
+            "http2_available": HTTP2_AVAILABLE,
+            "clients": {n: m.as_dict() for n, m in self._metrics.items()},
+        }
+
+
+# Shared per-process registry
+http_clients = HTTPClientRegistry(HTTP_CLIENT_PROFILES)
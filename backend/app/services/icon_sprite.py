@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from app.services.html_tokens import parse_attrs
+from app.services.perf_lint import library_name
+
+logger = logging.getLogger(__name__)
+
+ICONS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "lucide-icons.json")
+
+_PLACEHOLDER_RE = re.compile(
+    r'<(i|span)\b((?:[^>"\']|"[^"]*"|\'[^\']*\')*?)(?:/>|>\s*</\1\s*>)', re.I
+)
+_SCRIPT_RE = re.compile(r'<script\b((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>(.*?)</script\s*>', re.I | re.S)
+_RAW_BLOCK_RE = re.compile(r'<(script|style|template)\b.*?</\1\s*>', re.I | re.S)
+_BODY_RE = re.compile(r'<body\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*>', re.I)
+_CREATE_ICONS_RE = re.compile(r'(?:window\.)?lucide\s*\??\.\s*createIcons\s*(?:\?\.)?\s*\(')
+_OPTION_ATTRS_RE = re.compile(r'\battrs\s*:\s*\{([^{}]*)\}')
+_OPTION_PAIR_RE = re.compile(r'["\']?([\w-]+)["\']?\s*:\s*(?:"([^"]*)"|\'([^\']*)\'|([\w.#%-]+))')
+# what is left of a script after the runtime is gone; `window.lucide`/`typeof lucide` guards just go falsy
+_GUARD_RE = re.compile(r'window\.lucide\b|typeof\s+lucide\b')
+_RUNTIME_REF_RE = re.compile(r'(?<![\w.$-])lucide\b(?!-)|data-lucide')
+_EMPTY_SCRIPT_RE = re.compile(r'^(?:\s*void 0\s*;?)*\s*$')
+_CAMEL_RE = re.compile(r'(?<=[a-z0-9])([A-Z])')
+_DIGITS_RE = re.compile(r'(?<=[a-z])(?=\d)')
+
+# lucide's createIcons() defaults; placeholder attributes override them
+DEFAULT_ATTRS: Dict[str, str] = {
+    "xmlns": "http://www.w3.org/2000/svg",
+    "width": "24",
+    "height": "24",
+    "viewBox": "0 0 24 24",
+    "fill": "none",
+    "stroke": "currentColor",
+    "stroke-width": "2",
+    "stroke-linecap": "round",
+    "stroke-linejoin": "round",
+}
+SYMBOL_PREFIX = "lucide-icon-"
+
+
+def _render_attrs(attrs: Dict[str, str]) -> str:
+    return "".join(
+        f" {k}" if v == "" and k != "class" else f" {k}='{v}'" if '"' in v else f' {k}="{v}"'
+        for k, v in attrs.items()
+    )
+
+
+def _call_end(source: str, open_paren: int) -> int:
+    """Index just past the parenthesis closing the one at `open_paren` (-1 if unbalanced)."""
+    depth, quote, i = 0, "", open_paren
+    while i < len(source):
+        ch = source[i]
+        if quote:
+            if ch == "\\":
+                i += 1
+            elif ch == quote:
+                quote = ""
+        elif ch in "\"'`":
+            quote = ch
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return -1
+
+
+def _option_attrs(args: str) -> Dict[str, str]:
+    """`attrs` passed to createIcons({attrs: {...}}) (simple literals only)."""
+    m = _OPTION_ATTRS_RE.search(args)
+    if not m:
+        return {}
+    attrs = {}
+    for pair in _OPTION_PAIR_RE.finditer(m.group(1)):
+        value = next(v for v in pair.group(2, 3, 4) if v is not None)
+        attrs[_CAMEL_RE.sub(lambda c: "-" + c.group(1).lower(), pair.group(1))] = value
+    return attrs
+
+
+class IconSet:
+    """The vendored lucide icon set (app/data/lucide-icons.json), loaded on first use."""
+
+    def __init__(self, path: str = ICONS_PATH):
+        self.path = path
+        self._icons: Optional[Dict[str, str]] = None
+        self._aliases: Dict[str, str] = {}
+
+    def _load(self) -> Dict[str, str]:
+        if self._icons is None:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._icons, self._aliases = data["icons"], data.get("aliases", {})
+        return self._icons
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Canonical icon name (PascalCase and renamed icons accepted), None if unknown."""
+        icons = self._load()
+        name = _CAMEL_RE.sub(r"-\1", name.strip()).lower()
+        for candidate in (name, _DIGITS_RE.sub("-", name)):  # BarChart3 -> bar-chart-3
+            candidate = self._aliases.get(candidate, candidate)
+            if candidate in icons:
+                return candidate
+        return None
+
+    def body(self, name: str) -> str:
+        return self._load()[name]
+
+
+class IconInliner:
+    """
+    Replaces the lucide runtime (the full icon bundle, swapping
+    <i data-lucide> placeholders after load) with an inline SVG sprite of
+    the icons the page uses: each placeholder becomes <svg><use>, the
+    script and its createIcons() calls go. Pages whose scripts still need
+    the runtime (icons added from JS, unknown icon names) keep it for those.
+    """
+
+    def __init__(self, icons: Optional[IconSet] = None):
+        self.icons = icons or IconSet()
+
+    def process(self, html: str) -> Tuple[str, Dict[str, object]]:
+        """Inline the page's lucide icons; returns (html, stats)."""
+        if not html or "data-lucide" not in html:
+            return html, {"icons": 0}
+        body = _BODY_RE.search(html)
+        if body is None:
+            return html, {"icons": 0, "reason": "no <body>"}
+
+        raw_blocks = [(m.start(), m.end()) for m in _RAW_BLOCK_RE.finditer(html)]
+        scripts = list(_SCRIPT_RE.finditer(html))
+        runtime = [m for m in scripts if "src" in parse_attrs(m.group(1))
+                   and library_name(parse_attrs(m.group(1))["src"]) == "lucide"]
+
+        # createIcons() calls: their attrs apply to every icon; the calls go with the runtime
+        option_attrs: Dict[str, str] = {}
+        calls: List[Tuple[int, int]] = []
+        for script in scripts:
+            for call in _CREATE_ICONS_RE.finditer(html, script.start(2), script.end(2)):
+                end = _call_end(html, call.end() - 1)
+                if end == -1:
+                    continue
+                option_attrs.update(_option_attrs(html[call.end():end - 1]))
+                calls.append((call.start(), end))
+
+        edits: List[Tuple[int, int, str]] = []
+        used: List[str] = []
+        unknown: List[str] = []
+        placeholders = 0
+        block = 0
+        for m in _PLACEHOLDER_RE.finditer(html):
+            while block < len(raw_blocks) and raw_blocks[block][1] <= m.start():
+                block += 1
+            if block < len(raw_blocks) and raw_blocks[block][0] <= m.start():
+                continue  # markup inside a script/template string
+            attrs = parse_attrs(m.group(2))
+            raw_name = attrs.pop("data-lucide", None)
+            if raw_name is None:
+                continue
+            name = self.icons.resolve(raw_name)
+            if name is None:
+                unknown.append(raw_name)
+                continue
+            placeholders += 1
+            if name not in used:
+                used.append(name)
+            classes = " ".join(c for c in ("lucide", f"lucide-{name}", option_attrs.get("class", ""), attrs.pop("class", "")) if c)
+            svg_attrs = {**DEFAULT_ATTRS, **{k: v for k, v in option_attrs.items() if k != "class"}, **attrs, "class": classes}
+            if not {"aria-label", "aria-labelledby", "role"} & set(attrs):
+                svg_attrs.setdefault("aria-hidden", "true")
+            edits.append((m.start(), m.end(), f'<svg{_render_attrs(svg_attrs)}><use href="#{SYMBOL_PREFIX}{name}"/></svg>'))
+
+        if not used:
+            return html, {"icons": 0, "unknown": unknown[:20]}
+
+        def without_calls(script: "re.Match[str]") -> Tuple[str, List[Tuple[int, int]]]:
+            inner = [c for c in calls if script.start(2) <= c[0] < script.end(2)]
+            source = html[script.start(2):script.end(2)]
+            for start, end in reversed(inner):
+                source = source[:start - script.start(2)] + "void 0" + source[end - script.start(2):]
+            return source, inner
+
+        # the runtime can only go if nothing else needs it once the calls are gone
+        keep_runtime = bool(unknown) or any(
+            _RUNTIME_REF_RE.search(_GUARD_RE.sub("", without_calls(script)[0])) for script in scripts if script not in runtime
+        )
+        if not keep_runtime:
+            edits.extend((m.start(), m.end(), "") for m in runtime)
+            for script in scripts:
+                source, inner = without_calls(script)
+                if inner and _EMPTY_SCRIPT_RE.match(source) and not script.group(1).strip():
+                    edits.append((script.start(), script.end(), ""))
+                else:
+                    edits.extend((start, end, "void 0") for start, end in inner)
+
+        symbols = "".join(
+            f'<symbol id="{SYMBOL_PREFIX}{name}" viewBox="0 0 24 24">{self.icons.body(name)}</symbol>' for name in used
+        )
+        sprite = (
+            '<svg xmlns="http://www.w3.org/2000/svg" aria-hidden="true" '
+            f'style="position:absolute;width:0;height:0;overflow:hidden">{symbols}</svg>'
+        )
+        edits.append((body.end(), body.end(), sprite))
+
+        out = html
+        for start, end, replacement in sorted(edits, key=lambda e: (e[0], e[1]), reverse=True):
+            out = out[:start] + replacement + out[end:]
+        if unknown:
+            logger.info(f"Keeping lucide runtime, icons not in the vendored set: {unknown[:10]}")
+        return out, {
+            "icons": placeholders,
+            "symbols": len(used),
+            "sprite_bytes": len(sprite),
+            "runtime_removed": not keep_runtime and bool(runtime),
+            "unknown": unknown[:20],
+        }
+
+
+icon_inliner = IconInliner()
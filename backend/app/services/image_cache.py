@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.design_state import UnsplashImage
+
+logger = logging.getLogger(__name__)
+
+# (stored_at, images as plain dicts)
+Entry = Tuple[float, List[Dict[str, Any]]]
+
+
+def search_cache_key(
+    query: str, count: int, width: Optional[int], height: Optional[int], orientation: str
+) -> str:
+    norm = " ".join((query or "").lower().split())
+    return f"{norm}|{count}|{width or ''}|{height or ''}|{orientation}"
+
+
+class MemoryTier:
+    """In-process LRU."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Entry]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Entry]:
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: Entry) -> None:
+        self._data[key] = entry
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisTier:
+    """Shared tier in Redis; keys expire once they are past the stale window."""
+
+    name = "redis"
+
+    def __init__(self, url: str, expire_seconds: int, prefix: str = "imgcache:"):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+        self.expire_seconds = expire_seconds
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Entry]:
+        raw = await self._client.get(self.prefix + key)
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return data["stored_at"], data["images"]
+
+    async def set(self, key: str, entry: Entry) -> None:
+        payload = json.dumps({"stored_at": entry[0], "images": entry[1]})
+        await self._client.set(self.prefix + key, payload, ex=self.expire_seconds)
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+class PostgresTier:
+    """Shared tier in the LangGraph store table (no extra migration needed), on the shared LangGraph pool."""
+
+    name = "postgres"
+    namespace = ("image_search_cache",)
+
+    async def _get_store(self):
+        from app.core.database import postgres
+
+        _, store = await postgres.langgraph()
+        return store
+
+    @staticmethod
+    def _item_key(key: str) -> str:
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Entry]:
+        store = await self._get_store()
+        item = await store.aget(self.namespace, self._item_key(key))
+        if item is None:
+            return None
+        return item.value["stored_at"], item.value["images"]
+
+    async def set(self, key: str, entry: Entry) -> None:
+        store = await self._get_store()
+        await store.aput(self.namespace, self._item_key(key), {"key": key, "stored_at": entry[0], "images": entry[1]})
+
+    async def close(self) -> None:
+        pass  # the pool belongs to app.core.database.postgres (closed by the app lifespan)
+
+
+class ImageSearchCache:
+    """
+    Two-tier cache for image search results with TTL and stale-while-revalidate.
+
+    Fresh entries are returned as-is; entries past `ttl` but within `stale_ttl` are
+    returned immediately while one background refresh runs. Concurrent misses for the
+    same key share a single fetch.
+    """
+
+    def __init__(self, max_entries: int, ttl: int, stale_ttl: int, shared: Optional[Any] = None):
+        self.memory = MemoryTier(max_entries)
+        self.shared = shared
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.metrics = {
+            "lookups": 0, "memory_hits": 0, "shared_hits": 0, "stale_hits": 0,
+            "misses": 0, "coalesced": 0, "refreshes": 0, "fetch_errors": 0, "shared_errors": 0,
+        }
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[List[UnsplashImage]]],
+        cacheable: Callable[[List[UnsplashImage]], bool] = bool,
+    ) -> List[UnsplashImage]:
+        self.metrics["lookups"] += 1
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.metrics["memory_hits"] += 1
+        else:
+            entry = await self._shared_get(key)
+            if entry is not None:
+                self.metrics["shared_hits"] += 1
+                self.memory.set(key, entry)
+
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age <= self.ttl + self.stale_ttl:
+                if age > self.ttl:
+                    self.metrics["stale_hits"] += 1
+                    if key not in self._inflight:
+                        self.metrics["refreshes"] += 1
+                        self._start_fetch(key, fetch, cacheable)
+                return [UnsplashImage(**d) for d in entry[1]]
+
+        self.metrics["misses"] += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.metrics["coalesced"] += 1
+        else:
+            task = self._start_fetch(key, fetch, cacheable)
+        return list(await asyncio.shield(task))
+
+    def _start_fetch(self, key, fetch, cacheable) -> asyncio.Task:
+        task = asyncio.ensure_future(self._fetch_and_store(key, fetch, cacheable))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        return task
+
+    async def _fetch_and_store(self, key, fetch, cacheable) -> List[UnsplashImage]:
+        try:
+            images = await fetch()
+        except Exception:
+            self.metrics["fetch_errors"] += 1
+            raise
+        if cacheable(images):
+            entry: Entry = (time.time(), [img.model_dump() for img in images])
+            self.memory.set(key, entry)
+            if self.shared is not None:
+                try:
+                    await self.shared.set(key, entry)
+                except Exception as e:
+                    self.metrics["shared_errors"] += 1
+                    logger.warning(f"Image cache write to {self.shared.name} failed: {e}")
+        return images
+
+    async def _shared_get(self, key: str) -> Optional[Entry]:
+        if self.shared is None:
+            return None
+        try:
+            return await self.shared.get(key)
+        except Exception as e:
+            self.metrics["shared_errors"] += 1
+            logger.warning(f"Image cache read from {self.shared.name} failed: {e}")
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        m = self.metrics
+        hits = m["memory_hits"] + m["shared_hits"]
+        return {
+            **m,
+            "hit_rate": round(hits / m["lookups"], 4) if m["lookups"] else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_max_entries": self.memory.max_entries,
+            "shared_backend": getattr(self.shared, "name", None),
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale_ttl,
+        }
+
+    async def close(self) -> None:
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self.shared is not None:
+            await self.shared.close()
+
+
+def _build_cache() -> Optional[ImageSearchCache]:
+    if not settings.IMAGE_CACHE_ENABLED:
+        return None
+    backend = settings.IMAGE_CACHE_BACKEND.lower()
+    shared = None
+    if backend == "redis":
+        shared = RedisTier(settings.REDIS_URL, settings.IMAGE_CACHE_TTL_SECONDS + settings.IMAGE_CACHE_STALE_SECONDS)
+    elif backend == "postgres":
+        shared = PostgresTier()
+    elif backend != "memory":
+        logger.warning(f"Unknown IMAGE_CACHE_BACKEND '{backend}', using memory only")
+    return ImageSearchCache(
+        max_entries=settings.IMAGE_CACHE_MAX_ENTRIES,
+        ttl=settings.IMAGE_CACHE_TTL_SECONDS,
+        stale_ttl=settings.IMAGE_CACHE_STALE_SECONDS,
+        shared=shared,
+    )
+
+
+# Shared per-process cache (None when disabled)
+image_search_cache = _build_cache()
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import re
+from typing import Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.models.design_state import UnsplashImage
+from app.services.unsplash_service import UnsplashService
+
+logger = logging.getLogger(__name__)
+
+# Shared by /images/categories, the pool warmer and trending. `icon` entries are
+# shown in the UI; `keywords` decide which requirement queries a pool can serve.
+IMAGE_CATEGORIES: List[Dict[str, object]] = [
+    {"name": "Abstract", "query": "abstract", "icon": "palette",
+     "keywords": ["abstract", "gradient", "shapes", "pattern", "texture", "colorful"]},
+    {"name": "Business", "query": "business professional", "icon": "briefcase",
+     "keywords": ["business", "professional", "corporate", "meeting", "startup", "finance", "consulting"]},
+    {"name": "Technology", "query": "technology digital", "icon": "cpu",
+     "keywords": ["technology", "tech", "digital", "laptop", "computer", "code", "software", "ai", "data", "cloud",
+                  "dashboard", "analytics", "app", "saas", "server"]},
+    {"name": "Nature", "query": "nature landscape", "icon": "tree-pine",
+     "keywords": ["nature", "landscape", "mountain", "mountains", "forest", "outdoors", "sky", "sea", "ocean"]},
+    {"name": "Architecture", "query": "architecture building", "icon": "building",
+     "keywords": ["architecture", "building", "buildings", "city", "urban", "skyline", "interior"]},
+    {"name": "Lifestyle", "query": "lifestyle people", "icon": "users",
+     "keywords": ["lifestyle", "people", "person", "portrait", "smiling", "customer", "customers", "happy"]},
+    {"name": "Food", "query": "food cooking", "icon": "chef-hat",
+     "keywords": ["food", "cooking", "restaurant", "meal", "kitchen", "dish", "chef"]},
+    {"name": "Travel", "query": "travel destination", "icon": "plane",
+     "keywords": ["travel", "destination", "vacation", "trip", "beach", "hotel", "adventure"]},
+    {"name": "Creative", "query": "creative art design", "icon": "palette",
+     "keywords": ["creative", "art", "design", "designer", "studio", "illustration", "portfolio"]},
+    {"name": "Workspace", "query": "workspace office", "icon": "monitor",
+     "keywords": ["workspace", "office", "desk", "workplace", "coworking"]},
+    # themes from generated pages that the UI does not list
+    {"name": "Team", "query": "team collaboration", "icon": None,
+     "keywords": ["team", "collaboration", "collaborating", "teamwork", "colleagues", "working", "together"]},
+    {"name": "Hero", "query": "modern ui hero", "icon": None,
+     "keywords": ["ui", "hero", "landing", "banner", "website", "product"]},
+]
+
+# words that carry no topic ("Modern website hero" -> Hero pool)
+_GENERIC = {"modern", "new", "best", "our", "your", "with", "in", "on", "at", "to", "&", "-", "section", "background"}
+_WORD_RE = re.compile(r"[a-z0-9&-]+")
+# each refresh asks for the next result page (then the next ordering), so the pool rotates
+POOL_PAGES = 5
+POOL_ORDERINGS = ("relevant", "latest")
+
+
+def ui_categories() -> List[Dict[str, object]]:
+    return [{k: c[k] for k in ("name", "query", "icon")} for c in IMAGE_CATEGORIES if c["icon"]]
+
+
+class ImagePool:
+    """
+    Rotating pool of resolved images per category, refreshed by a background
+    warmer. `draw()` serves a requirement query instantly when all of its topic
+    words belong to one category and it wants the pool's orientation; anything
+    else goes to live search. (Sizes don't matter: variants are cut from raw_url.)
+    """
+
+    orientation = "landscape"
+
+    def __init__(self, size: int, refresh_seconds: int, unsplash: Optional[UnsplashService] = None):
+        self.size = size
+        self.refresh_seconds = refresh_seconds
+        self.unsplash = unsplash or UnsplashService()
+        self._pools: Dict[str, List[UnsplashImage]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._vocab: Dict[str, Set[str]] = {
+            str(c["name"]): set(c["keywords"]) | set(str(c["query"]).split()) for c in IMAGE_CATEGORIES
+        }
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {"draws": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def category_for(self, query: str) -> Optional[str]:
+        words = [w for w in _WORD_RE.findall((query or "").lower()) if w not in _GENERIC]
+        if not words:
+            return "Hero"
+        for name, vocab in self._vocab.items():
+            if all(w in vocab for w in words):
+                return name
+        return None
+
+    def draw(self, query: str, count: int, orientation: str = "landscape") -> Optional[List[UnsplashImage]]:
+        """`count` distinct images for the query's category, rotating through the pool."""
+        name = self.category_for(query) if orientation == self.orientation else None
+        pool = self._pools.get(name) if name else None
+        if not pool or count > len(pool):
+            self.metrics["misses"] += 1
+            return None
+        start = self._cursor.get(name, 0)
+        self._cursor[name] = (start + count) % len(pool)
+        self.metrics["draws"] += 1
+        return [pool[(start + i) % len(pool)] for i in range(count)]
+
+    async def refresh(self) -> None:
+        sem = asyncio.Semaphore(3)
+        step = self.metrics["refreshes"]
+        page = step % POOL_PAGES + 1
+        order_by = POOL_ORDERINGS[step // POOL_PAGES % len(POOL_ORDERINGS)]
+
+        async def _one(category: Dict[str, object]) -> None:
+            async with sem:
+                try:
+                    # past the search cache, which would hand back the same page for hours
+                    images = await self.unsplash.search_images(
+                        str(category["query"]), count=self.size, orientation=self.orientation, background=True,
+                        page=page, order_by=order_by, cached=False,
+                    )
+                except Exception as e:
+                    self.metrics["refresh_errors"] += 1
+                    logger.warning(f"Image pool refresh failed for {category['name']}: {e}")
+                    return
+                name = str(category["name"])
+                # placeholders (no quota left) never replace a pool of real images
+                if images and (name not in self._pools or any(not img.id.startswith("picsum-") for img in images)):
+                    self._pools[name] = images
+
+        await asyncio.gather(*(_one(c) for c in IMAGE_CATEGORIES))
+        self.metrics["refreshes"] += 1
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {**self.metrics, "pools": {name: len(imgs) for name, imgs in self._pools.items()}}
+
+
+image_pool: Optional[ImagePool] = (
+    ImagePool(settings.IMAGE_POOL_SIZE, settings.IMAGE_POOL_REFRESH_SECONDS) if settings.IMAGE_POOL_ENABLED else None
+)
@@ -1,7 +1,9 @@
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from html import escape
 from app.models.design_state import UnsplashImage
+from app.services.html_tokens import ATTR_RE, RAW_TEXT_CLOSE, TOKEN_RE
+from app.services.responsive_images import background_css, declared_height, declared_width, img_variants
 
 # Treat common blanks and ANY data-URI images as placeholders
 IMG_PLACEHOLDER = (
@@ -13,150 +15,386 @@ IMG_PLACEHOLDER = (
     r')'
 )
 
-AI_IMG_SELECTOR = r'\bdata-ai-img\s*=\s*["\']([^"\']+)["\']'
-AI_BG_SELECTOR  = r'\bdata-ai-bg\s*=\s*["\']([^"\']+)["\']'
+# ---- compiled once; the scanner only ever walks the document forwards ----
+_PLACEHOLDER_RE = re.compile(IMG_PLACEHOLDER, re.I)
+_BG_URL_RE = re.compile(
+    rf'(background-image\s*:\s*)url\(\s*["\']?{IMG_PLACEHOLDER}[^)\'"]*["\']?\s*\)', re.I
+)
+_TW_BG_RE = re.compile(rf'bg-\[url\(\s*["\']?{IMG_PLACEHOLDER}[^)\]]*\)\]', re.I)
+_WS_RE = re.compile(r'\s+')
+
+HEADING_TAGS = {"h1", "h2", "h3"}
+CONTEXT_WINDOW = 300  # chars around a placeholder searched for a heading / CTA
+MAX_REQUIREMENTS = 8
+
+# attribute name -> (value, offset of the attribute within the tag, end offset)
+Attrs = Dict[str, Tuple[str, int, int]]
+
+
+class _Slot:
+    """One placeholder found by the scan: where it is, what kind, and its requirement."""
+
+    __slots__ = ("kind", "start", "end", "tag", "attrs", "requirement", "label", "anchor")
+
+    def __init__(self, kind: str, start: int, end: int, tag: str, attrs: Attrs, requirement: Dict[str, Any]):
+        self.kind = kind            # "img" | "background" | "tailwind-bg"
+        self.start = start          # tag span in the document
+        self.end = end
+        self.tag = tag
+        self.attrs = attrs
+        self.requirement = requirement
+        self.label: Optional[Tuple[int, str]] = None  # (distance, text) of nearest heading
+        self.anchor: Optional[str] = None             # link text before it, used without a heading
+
+
+def _parse_attrs(tag: str, offset: int) -> Attrs:
+    attrs: Attrs = {}
+    for m in ATTR_RE.finditer(tag, offset):
+        name = m.group(1).lower()
+        if name in attrs:
+            continue
+        value = m.group(2)
+        if value is None:
+            value = m.group(3) if m.group(3) is not None else (m.group(4) or "")
+        attrs[name] = (value, m.start(), m.end())
+    return attrs
+
+
+def _quote_attr(value: str) -> str:
+    return value.replace('"', "&quot;")
+
+
+def _join_css(style: str, declarations: List[str]) -> str:
+    style = style.strip().rstrip(";")
+    return ";".join([style, *declarations]) if style else ";".join(declarations)
+
+
+def _lqip_css(lqip: Optional[Dict[str, str]]) -> List[str]:
+    if not lqip:
+        return []
+    css = [f"background-color:{lqip['color']}"]
+    if lqip.get("thumbnail"):
+        css.append(f"background-image:url({lqip['thumbnail']});background-size:cover;background-position:center")
+    return css
+
+
+def _is_placeholder(value: str) -> bool:
+    return bool(value) and _PLACEHOLDER_RE.match(value) is not None
+
+
+def _to_query(text: str) -> str:
+    if not text:
+        return "modern ui hero"
+    stop = {"image", "photo", "picture", "of", "the", "a", "an", "for", "and"}
+    words = [w for w in _WS_RE.split(text.lower()) if w and w not in stop]
+    return " ".join(words[:5]) or "modern ui hero"
+
+
+def _match_slot(m: "re.Match", name: str) -> Optional[_Slot]:
+    tag = m.group(0)
+    attrs = _parse_attrs(tag, len(name) + 1)
+
+    if name == "img" and (
+        _is_placeholder(attrs.get("src", ("",))[0]) or _is_placeholder(attrs.get("data-src", ("",))[0])
+    ):
+        kind = (attrs.get("data-ai-img", ("",))[0]).strip() or "image"
+        return _Slot("img", m.start(), m.end(), tag, attrs, {"type": "img", "kind": kind})
+
+    style = attrs.get("style", ("",))[0]
+    if style and _BG_URL_RE.search(style):
+        kind = (attrs.get("data-ai-bg", ("",))[0]).strip() or "background"
+        return _Slot("background", m.start(), m.end(), tag, attrs,
+                     {"type": "background", "kind": kind, "width": 1600, "height": 900})
+
+    cls = attrs.get("class", ("",))[0]
+    if cls and "bg-[" in cls and _TW_BG_RE.search(cls):
+        kind = (attrs.get("data-ai-bg", ("",))[0]).strip() or "tailwind-bg"
+        return _Slot("tailwind-bg", m.start(), m.end(), tag, attrs,
+                     {"type": "background", "kind": kind, "width": 1600, "height": 900})
+    return None
+
+
+class PlaceholderScanner:
+    """
+    Forward-only tokenizer that records image placeholder slots.
+
+    Text can be fed in chunks (e.g. straight from the LLM stream): only complete
+    tags are consumed, and `feed()` returns the requirements whose query is settled,
+    i.e. the img has alt text, or the nearest heading after the slot has closed, or
+    the scan moved more than CONTEXT_WINDOW past it. `close()` settles the rest.
+    Queries are identical to what a one-shot scan of the final document produces.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.slots: List[_Slot] = []
+        self._pos = 0
+        self._pending: List[_Slot] = []                         # waiting for a following heading
+        self._last_heading: Optional[Tuple[int, str]] = None    # (start offset, text)
+        self._last_anchor: Optional[Tuple[int, str]] = None
+        self._capture: Optional[Tuple[str, int, List[str]]] = None  # (tag, start, text parts) for h1-3 / a
+        self._raw: Optional[str] = None                         # inside <script>/<style>
+        self._settled = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.buffer += chunk
+        self._advance(final=False)
+        return self._take_settled()
+
+    def close(self) -> List[Dict[str, Any]]:
+        self._advance(final=True)
+        self._settle(self._pending)
+        self._pending = []
+        return self._take_settled()
+
+    def _advance(self, final: bool) -> None:
+        buf = self.buffer
+        n = len(buf)
+        pos = self._pos
+        while pos < n:
+            if self._raw is not None:
+                close = RAW_TEXT_CLOSE[self._raw].search(buf, pos)
+                if close is None:
+                    if final:
+                        pos = n
+                    else:
+                        pos = max(pos, n - 9)  # a split "</script>" may still complete
+                    break
+                pos = close.end()
+                self._raw = None
+                continue
+
+            lt = buf.find("<", pos)
+            if lt == -1:
+                lt = n
+            if self._capture is not None and lt > pos:
+                self._capture[2].append(buf[pos:lt])
+            if lt == n:
+                pos = n
+                break
+
+            m = TOKEN_RE.match(buf, lt)
+            if m is None:
+                nxt = buf[lt + 1:lt + 2]
+                if not final and (not nxt or nxt.isalpha() or nxt in "/!"):
+                    pos = lt  # tag still streaming in
+                    break
+                if self._capture is not None:
+                    self._capture[2].append("<")
+                pos = lt + 1  # a literal '<' in text
+                continue
+            pos = m.end()
+            self._token(m)
+            self._expire(self._capture[1] if self._capture and self._capture[0] != "a" else pos)
+        self._pos = pos
+
+    def _token(self, m: "re.Match") -> None:
+        name = m.group(2)
+        if name is None:  # comment / doctype
+            return
+        name = name.lower()
+
+        if m.group(1):  # closing tag
+            capture = self._capture
+            if capture is not None and capture[0] == name:
+                text = _WS_RE.sub(" ", "".join(capture[2])).strip()
+                if 3 <= len(text) <= 120:
+                    if name == "a":
+                        self._last_anchor = (capture[1], text)
+                    else:
+                        self._last_heading = (capture[1], text)
+                        for slot in self._pending:
+                            dist = capture[1] - slot.end
+                            if dist <= CONTEXT_WINDOW and (slot.label is None or dist < slot.label[0]):
+                                slot.label = (dist, text)
+                        self._settle(self._pending)
+                        self._pending = []
+                self._capture = None
+            return
+
+        if name in HEADING_TAGS or (name == "a" and self._capture is None):
+            self._capture = (name, m.start(), [])
+        elif name in RAW_TEXT_CLOSE:
+            self._raw = name
+            return
+
+        if len(self.slots) >= MAX_REQUIREMENTS:
+            return
+        slot = _match_slot(m, name)
+        if slot is None:
+            return
+
+        # heading before the placeholder (legacy behaviour) ...
+        if self._last_heading and m.start() - self._last_heading[0] <= CONTEXT_WINDOW:
+            slot.label = (m.start() - self._last_heading[0], self._last_heading[1])
+        # ... or a link label if there is no heading around at all
+        if self._last_anchor and m.start() - self._last_anchor[0] <= CONTEXT_WINDOW:
+            slot.anchor = self._last_anchor[1]
+        self.slots.append(slot)
+        if slot.kind == "img" and slot.attrs.get("alt", ("",))[0].strip():
+            self._settle([slot])  # alt text wins over any heading
+        else:
+            self._pending.append(slot)
+
+    def _expire(self, horizon: int) -> None:
+        """Settle slots no later heading can be close enough to."""
+        while self._pending and self._pending[0].end + CONTEXT_WINDOW < horizon:
+            self._settle([self._pending.pop(0)])
+
+    def _settle(self, slots: List[_Slot]) -> None:
+        for slot in slots:
+            req = slot.requirement
+            context = slot.label[1] if slot.label else (slot.anchor or "website hero")
+            if slot.kind == "img":
+                alt = (slot.attrs.get("alt", ("",))[0]).strip()
+                req["query"] = _to_query(alt or context)
+            else:
+                req["query"] = _to_query(context)
+
+    def _take_settled(self) -> List[Dict[str, Any]]:
+        """Requirements settled since the last call, in document order."""
+        out: List[Dict[str, Any]] = []
+        while self._settled < len(self.slots) and "query" in self.slots[self._settled].requirement:
+            out.append(self.slots[self._settled].requirement)
+            self._settled += 1
+        return out
+
 
 class ImageProcessor:
+    """
+    Finds image placeholders in generated HTML and swaps in real images.
+
+    One forward scan (PlaceholderScanner) records placeholders (<img>, inline
+    background-image, Tailwind bg-[url(...)]), data-ai-img / data-ai-bg hints and
+    the nearest h1-h3 (or link text) for each; `inject_images` then rebuilds the
+    HTML in a single linear pass over the recorded slots.
+    """
+
+    def __init__(self):
+        self._last_scan: Optional[Tuple[str, List[_Slot]]] = None
+
     def extract_image_requirements(self, html: str) -> List[Dict[str, Any]]:
         """
-        Extract what images we need to fetch. We look for:
+        Extract what images we need to fetch, in document order. We look for:
         - <img ... src|data-src=PLACEHOLDER ...> (+ alt | nearest heading)
         - style="background-image:url(PLACEHOLDER)"
         - Tailwind arbitrary background class bg-[url(PLACEHOLDER)]
-        - Explicit hints via data-ai-img / data-ai-bg to craft better queries
+        - Explicit hints via data-ai-img / data-ai-bg (kept as the requirement `kind`)
+        """
+        return [slot.requirement for slot in self._scan(html)]
+
+    def inject_images(
+        self, html: str, images: List[UnsplashImage], placeholders: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> str:
+        """
+        Swap placeholders for `images` (in requirement order). `placeholders` maps
+        image id -> {"color", "thumbnail"} (see LQIPService) and is painted behind
+        each image together with an explicit aspect-ratio.
         """
-        reqs: List[Dict[str, Any]] = []
-
-        # <img src="placeholder|data:" ... alt="...">  (also supports data-ai-img)
-        for m in re.finditer(
-            rf'<img[^>]+(?:src|data-src)=["\']{IMG_PLACEHOLDER}[^"\']*["\'][^>]*>',
-            html, re.I
-        ):
-            tag = m.group(0)
-            kind = self._match_attr(tag, AI_IMG_SELECTOR) or "image"
-            alt  = self._attr(tag, "alt") or self._guess_context_label(html, m.start())
-            q    = self._query(alt or kind)
-            reqs.append({"query": q, "type": "img", "kind": kind})
-
-        # inline style background-image (also supports data-ai-bg on same element)
-        for m in re.finditer(
-            rf'(<[^>]+(?:{AI_BG_SELECTOR})?[^>]*style=["\'][^"\']*background-image\s*:\s*url\(\s*["\']?{IMG_PLACEHOLDER}[^)\'"]*["\']?\s*\)[^"\']*["\'][^>]*>)',
-            html, re.I
-        ):
-            tag = m.group(1)
-            kind = self._match_attr(tag, AI_BG_SELECTOR) or "background"
-            label = self._guess_context_label(html, m.start()) or kind
-            q = self._query(label)
-            reqs.append({"query": q, "type": "background", "kind": kind, "width": 1600, "height": 900})
-
-        # Tailwind arbitrary bg: bg-[url('#'|data:image:...)]
-        # We can’t easily set inline style here without parsing, so we still fetch an image
-        # and later replace the class AND (optionally) add/patch a style attribute via regex.
-        if re.search(r'bg-\[url\(\s*["\']?'+IMG_PLACEHOLDER+r'[^)\']*["\']?\s*\)\]', html, re.I):
-            reqs.append({"query": "modern ui hero", "type": "background", "kind": "tailwind-bg", "width": 1600, "height": 900})
-
-        # Cap to a sane max
-        return reqs[:8]
-
-    def inject_images(self, html: str, images: List[UnsplashImage]) -> str:
         if not images:
             return html
 
-        pool = images[:]  # copy so we can pop
-
-        # Replace <img ... src=placeholder> (ALL matches)
-        def repl_img(m):
-            nonlocal pool
-            tag = m.group(0)
-            if not pool:
-                return tag
-            img = pool.pop(0)
-            tag = re.sub(r'(?:src|data-src)=["\'].*?["\']', f'src="{img.url}"', tag, flags=re.I)
-            # add perf + alt if missing
-            if re.search(r'\bloading=', tag, re.I) is None:
-                tag = tag[:-1] + ' loading="lazy" decoding="async">'
-            if re.search(r'\balt=', tag, re.I) is None:
-                tag = tag[:-1] + f' alt="{escape(img.alt_description or "Image")}">'
-            # widths/heights are optional; we leave user-provided values intact
-            return tag
-
-        html = re.sub(
-            rf'<img[^>]+(?:src|data-src)=["\']{IMG_PLACEHOLDER}[^"\']*["\'][^>]*>',
-            repl_img, html, flags=re.I
-        )
-
-        # Replace ALL inline style background placeholders, cycling through pool
-        def repl_bg_inline(m):
-            nonlocal pool
-            prefix = m.group(1)  # captures `(style="... background-image: `
-            if not pool:
-                return m.group(0)
-            bg = pool.pop(0)
-            return re.sub(
-                rf'url\(\s*["\']?{IMG_PLACEHOLDER}[^)\'"]*["\']?\s*\)',
-                f'url({bg.url})',
-                m.group(0),
-                flags=re.I
-            )
-
-        html = re.sub(
-            rf'((?:style)=["\'][^"\']*background-image\s*:\s*)url\(\s*["\']?{IMG_PLACEHOLDER}[^)\'"]*["\']?\s*\)',
-            repl_bg_inline, html, flags=re.I
-        )
-
-        # Tailwind arbitrary bg: replace class and add inline style if possible
-        # 1) Replace class token with sane defaults
-        html = re.sub(
-            r'(class=["\'][^"\']*)\b(bg-\[url\([^\]]+\)\])',
-            r'\1 bg-cover bg-center',
-            html, flags=re.I
-        )
-        # 2) If pool still has images, add a style="background-image:url(...)" next to class
-        #    For safety, do a light-weight approach: when we see a class=..., if the tag has no style= with background,
-        #    inject one (single best-effort per tag).
-        def add_inline_style(m):
-            nonlocal pool
-            before = m.group(1)
-            rest   = m.group(2)
-            if not pool:
-                return m.group(0)
-            if re.search(r'style=["\'][^"\']*background-image\s*:', rest, re.I):
-                return m.group(0)
-            bg = pool.pop(0)
-            # inject a style attr before closing '>'
-            if 'style=' in rest:
-                return m.group(0)  # already has a style (even if not background); avoid risking breakage
-            return before + ' style="background-image:url(' + bg.url + ')"' + rest
-
-        html = re.sub(
-            r'(<[^>]*class=["\'][^"\']*bg-cover[^"\']*bg-center[^"\']*["\'])([^>]*>)',
-            add_inline_style,
-            html, flags=re.I
-        )
-
-        return html
-
-    # helpers
-    def _attr(self, tag: str, name: str) -> str:
-        m = re.search(rf'\b{name}\s*=\s*["\']([^"\']+)["\']', tag, re.I)
-        return m.group(1).strip() if m else ""
-
-    def _match_attr(self, tag: str, pattern: str) -> str:
-        m = re.search(pattern, tag, re.I)
-        return m.group(1).strip() if m else ""
-
-    def _query(self, alt: str) -> str:
-        if not alt:
-            return "modern ui hero"
-        stop = {"image", "photo", "picture", "of", "the", "a", "an", "for", "and"}
-        words = [w for w in re.split(r'\s+', alt.lower()) if w and w not in stop]
-        return " ".join(words[:5]) or "modern ui hero"
-
-    def _guess_context_label(self, html: str, idx: int) -> str:
-        # look ~200 chars back for a heading or CTA
-        window = html[max(0, idx-300):idx]
-        m = re.search(r'<h[1-3][^>]*>([^<]{3,120})</h[1-3]>', window, re.I)
-        if m:
-            return m.group(1).strip()
-        c = re.search(r'<a[^>]*>([^<]{3,120})</a>', window, re.I)
-        return (c.group(1).strip() if c else "website hero")
+        placeholders = placeholders or {}
+        out: List[str] = []
+        pos = 0
+        for slot, img in zip(self._scan(html), images):
+            out.append(html[pos:slot.start])
+            out.append(self._rewrite(slot, img, placeholders.get(img.id)))
+            pos = slot.end
+        out.append(html[pos:])
+        return "".join(out)
+
+    # ---- pass 1: scan ----
+    def _scan(self, html: str) -> List[_Slot]:
+        if self._last_scan is not None and self._last_scan[0] is html:
+            return self._last_scan[1]
+        scanner = PlaceholderScanner()
+        scanner.feed(html)
+        scanner.close()
+        self._last_scan = (html, scanner.slots)
+        return scanner.slots
+
+    # ---- pass 2: rewrite one tag ----
+    def _rewrite(self, slot: _Slot, img: UnsplashImage, lqip: Optional[Dict[str, str]] = None) -> str:
+        tag, attrs = slot.tag, slot.attrs
+        edits: List[Tuple[int, int, str]] = []  # (start, end, replacement) within the tag
+        extra: List[str] = []
+
+        role = slot.requirement.get("kind", "")
+
+        if slot.kind == "img":
+            variants = img_variants(img, role, declared_width(attrs), declared_height(attrs))
+            placeholder_attrs = [
+                a for a in ("src", "data-src") if a in attrs and _is_placeholder(attrs[a][0])
+            ]
+            first = min(placeholder_attrs, key=lambda a: attrs[a][1])
+            for a in placeholder_attrs:
+                _, start, end = attrs[a]
+                edits.append((start, end, f'src="{variants["src"]}"' if a == first else ""))
+            if "src" in attrs and "src" not in placeholder_attrs:
+                # a real src next to a placeholder data-src: the placeholder wins (lazy-load pattern)
+                _, start, end = attrs["src"]
+                edits.append((start, end, ""))
+            if variants["srcset"] and "srcset" not in attrs:
+                extra.append(f'srcset="{variants["srcset"]}" sizes="{variants["sizes"]}"')
+            if "width" not in attrs and "height" not in attrs:
+                extra.append(f'width="{variants["width"]}" height="{variants["height"]}"')
+            if "loading" not in attrs:
+                extra.append('loading="lazy" decoding="async"')
+            if "alt" not in attrs:
+                extra.append(f'alt="{escape(img.alt_description or "Image")}"')
+            # placeholder paint + reserved box so nothing shifts while the image loads
+            css = _lqip_css(lqip)
+            style = attrs.get("style", ("",))[0]
+            if "aspect-ratio" not in style and "aspect-" not in attrs.get("class", ("",))[0]:
+                w = declared_width(attrs) or variants["width"]
+                h = declared_height(attrs) or (round(w * variants["height"] / variants["width"]) if variants["width"] else 0)
+                if w and h:
+                    css.append(f"aspect-ratio:{w}/{h}")
+            if css:
+                if "style" in attrs:
+                    _, start, end = attrs["style"]
+                    edits.append((start, end, f'style="{_quote_attr(_join_css(style, css))}"'))
+                else:
+                    extra.append(f'style="{_quote_attr(";".join(css))}"')
+        elif slot.kind == "background":
+            value, start, end = attrs["style"]
+            css = background_css(img, role)
+            new_style = _BG_URL_RE.sub(lambda _m: css, value)
+            if lqip and "background-color" not in value:
+                new_style = f"background-color:{lqip['color']};{new_style}"
+            edits.append((start, end, f'style="{_quote_attr(new_style)}"'))
+        else:
+            value, start, end = attrs["class"]
+            new_class = _WS_RE.sub(" ", _TW_BG_RE.sub("bg-cover bg-center", value)).strip()
+            edits.append((start, end, f'class="{new_class}"'))
+            if "style" in attrs:
+                s_value, s_start, s_end = attrs["style"]
+                if "background-image" not in s_value.lower():
+                    css = [background_css(img, role)]
+                    if lqip and "background-color" not in s_value:
+                        css.insert(0, f"background-color:{lqip['color']}")
+                    edits.append((s_start, s_end, f'style="{_quote_attr(_join_css(s_value, css))}"'))
+            else:
+                css = [background_css(img, role)]
+                if lqip:
+                    css.insert(0, f"background-color:{lqip['color']}")
+                extra.append(f'style="{_quote_attr(";".join(css))}"')
+
+        out: List[str] = []
+        pos = 0
+        for start, end, repl in sorted(edits):
+            if not repl:  # dropping an attribute: take its leading whitespace with it
+                while start > pos and tag[start - 1].isspace():
+                    start -= 1
+            out.append(tag[pos:start])
+            out.append(repl)
+            pos = end
+        body = "".join(out) + tag[pos:-1]
+        closing = ">"
+        if body.rstrip().endswith("/"):
+            body = body.rstrip()[:-1]
+            closing = " />"
+        if extra:
+            body = body.rstrip() + " " + " ".join(extra)
+        return body + closing
@@ -0,0 +1,219 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse
+
+from app.core.config import settings
+from app.services.http_clients import http_clients
+from app.services.responsive_images import snap_width
+
+logger = logging.getLogger(__name__)
+
+# Pillow is optional (pip install "backend[images]"); without it images pass through untouched
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - depends on the environment
+    Image = None
+
+MAX_SOURCE_BYTES = 15 * 1024 * 1024
+MAX_REDIRECTS = 3
+FORMATS = {"webp": "image/webp", "avif": "image/avif"}
+# query parameters kept on source URLs (Unsplash/imgix sizing and attribution); anything else is dropped
+SOURCE_QUERY_PARAMS = {"ixid", "ixlib", "auto", "fm", "q", "w", "h", "fit", "crop", "dpr"}
+
+
+class ImageProxyError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def is_allowed(url: str) -> bool:
+    parsed = urlparse(url)
+    return parsed.scheme == "https" and (parsed.hostname or "") in settings.IMAGE_PROXY_ALLOWED_HOSTS
+
+
+def normalize_source(url: str) -> str:
+    """
+    Canonical form of a source URL: only SOURCE_QUERY_PARAMS, in sorted order,
+    no fragment, so query-string noise can't mint new cache entries.
+    """
+    parsed = urlparse(url)
+    params = sorted((k, v) for k, v in parse_qsl(parsed.query) if k in SOURCE_QUERY_PARAMS)
+    return parsed._replace(query=urlencode(params), fragment="").geturl()
+
+
+def negotiate_format(fmt: str, accept: str) -> Optional[str]:
+    """Target format for ?fmt=auto|webp|avif|original given the Accept header (None = keep)."""
+    if fmt in FORMATS:
+        return fmt
+    if fmt != "auto":
+        return None
+    accept = (accept or "").lower()
+    if "image/avif" in accept and _avif_supported():
+        return "avif"
+    if "image/webp" in accept:
+        return "webp"
+    return None
+
+
+def _avif_supported() -> bool:
+    if Image is None:
+        return False
+    from PIL import features
+
+    return bool(features.check("avif"))
+
+
+def _transcode(data: bytes, width: Optional[int], fmt: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """Resize down to `width` and re-encode; returns (bytes, content type or None if untouched)."""
+    if Image is None or (fmt is None and not width):
+        return data, None
+    with Image.open(io.BytesIO(data)) as im:
+        im.load()
+        if width and im.width > width:
+            im = im.resize((width, max(1, round(im.height * width / im.width))), Image.LANCZOS)
+        target = fmt or (im.format or "JPEG").lower()
+        if target in ("jpeg", "jpg") and im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        out = io.BytesIO()
+        save_format = {"webp": "WEBP", "avif": "AVIF", "png": "PNG"}.get(target, "JPEG")
+        im.save(out, save_format, quality=70 if save_format in ("WEBP", "AVIF") else 80)
+        return out.getvalue(), FORMATS.get(target, f"image/{save_format.lower()}")
+
+
+class ImageProxyService:
+    """
+    Fetches allow-listed remote images, resizes/transcodes them and caches the
+    result on disk, keyed by (normalized url, snapped width, format). The cache
+    is bounded by `max_bytes`; least recently used variants are deleted first.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or settings.IMAGE_PROXY_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else settings.IMAGE_PROXY_CACHE_MAX_MB * 1024 * 1024
+        # path -> bytes on disk, least recently used first; loaded from the directory on first use
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._bytes = 0
+
+    def _cache_path(self, url: str, width: Optional[int], fmt: Optional[str]) -> str:
+        digest = hashlib.sha1(f"{url}|{width or ''}|{fmt or ''}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    def _load_index(self) -> "OrderedDict[str, int]":
+        if self._index is None:
+            entries = []
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if name.endswith((".type", ".tmp")):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, path, st.st_size))
+            self._index = OrderedDict((path, size) for _, path, size in sorted(entries))
+            self._bytes = sum(self._index.values())
+        return self._index
+
+    def _evict(self) -> int:
+        """Delete least recently used variants until the cache fits in max_bytes."""
+        index = self._load_index()
+        removed = 0
+        while self._bytes > self.max_bytes and index:
+            path, size = index.popitem(last=False)
+            self._bytes -= size
+            for victim in (path, path + ".type"):
+                try:
+                    os.remove(victim)
+                except OSError:
+                    pass
+            removed += 1
+        return removed
+
+    def _stored(self, path: str, size: int) -> None:
+        index = self._load_index()
+        self._bytes += size - index.pop(path, 0)
+        index[path] = size
+        if self._bytes > self.max_bytes:
+            removed = self._evict()
+            logger.info(f"Image proxy cache over {self.max_bytes} bytes, evicted {removed} variants")
+
+    async def _fetch(self, url: str) -> Tuple[bytes, str]:
+        client = http_clients.get("images")
+        for _ in range(MAX_REDIRECTS + 1):
+            if not is_allowed(url):
+                raise ImageProxyError(400, "Image host not allowed")
+            # streamed, so an oversized source is dropped before (or while) its body arrives
+            async with client.stream("GET", url) as r:
+                if r.is_redirect:
+                    url = urljoin(url, r.headers.get("location", ""))
+                    continue
+                if r.status_code != 200:
+                    raise ImageProxyError(502, f"Upstream returned {r.status_code}")
+                content_type = r.headers.get("content-type", "")
+                if not content_type.startswith("image/"):
+                    raise ImageProxyError(502, "Upstream did not return an image")
+                declared = r.headers.get("content-length", "")
+                if declared.isdigit() and int(declared) > MAX_SOURCE_BYTES:
+                    raise ImageProxyError(502, "Upstream image too large")
+                body = bytearray()
+                async for chunk in r.aiter_bytes():
+                    body += chunk
+                    if len(body) > MAX_SOURCE_BYTES:
+                        raise ImageProxyError(502, "Upstream image too large")
+                return bytes(body), content_type
+        raise ImageProxyError(502, "Too many redirects")
+
+    async def get(self, url: str, width: Optional[int], fmt: Optional[str]) -> Tuple[bytes, str]:
+        """(image bytes, content type) for the requested variant."""
+        if not is_allowed(url):
+            raise ImageProxyError(400, "Image host not allowed")
+        url = normalize_source(url)
+        width = snap_width(width) if width else None
+        if self._index is None:
+            await asyncio.to_thread(self._load_index)
+
+        path = self._cache_path(url, width, fmt)
+        if os.path.exists(path):
+            if path in self._index:
+                self._index.move_to_end(path)
+            return await asyncio.to_thread(_read, path)
+
+        source, source_type = await self._fetch(url)
+        try:
+            data, content_type = await asyncio.to_thread(_transcode, source, width, fmt)
+        except Exception as e:
+            logger.warning(f"Image transcode failed for {url}: {e}")
+            data, content_type = source, None
+        content_type = content_type or source_type
+
+        await asyncio.to_thread(_write, path, data, content_type)
+        self._stored(path, len(data))
+        return data, content_type
+
+
+def _read(path: str) -> Tuple[bytes, str]:
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path + ".type", encoding="utf-8") as f:
+        return data, f.read()
+
+
+def _write(path: str, data: bytes, content_type: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    with open(path + ".type", "w", encoding="utf-8") as f:
+        f.write(content_type)
+    os.replace(tmp, path)
+
+
+image_proxy = ImageProxyService()
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models.design_state import UnsplashImage
+from app.services.image_pool import image_pool
+from app.services.unsplash_service import UnsplashService
+
+logger = logging.getLogger(__name__)
+
+GroupKey = Tuple[str, Optional[int], Optional[int], str]
+
+# Images requested per group when a search starts before the page is complete
+PREFETCH_COUNT = 3
+
+
+class ImageResolver:
+    """
+    Resolves image requirements for every screen of one generation.
+
+    - identical requirements within a screen are batched into one search (per_page=n)
+    - identical searches across screens share a single in-flight request
+    - queries that map to a warm category pool are served from it without a search
+    - searches can start early via `prefetch()` while a screen is still streaming
+    - searches fan out with bounded concurrency
+    """
+
+    def __init__(self, unsplash: Optional[UnsplashService] = None, max_concurrency: int = 4):
+        self.unsplash = unsplash or UnsplashService()
+        self._sem = asyncio.Semaphore(max_concurrency)
+        # group -> [(count, task)]; a search for n images reuses any task asking for >= n
+        self._inflight: Dict[GroupKey, List[Tuple[int, asyncio.Future]]] = {}
+        self.searches = 0    # actual search calls made (after de-duplication)
+        self.prefetched = 0  # searches started from the generation stream
+        self.pooled = 0      # groups served from the category pool
+
+    @staticmethod
+    def _group_key(req: Dict[str, Any]) -> GroupKey:
+        orientation = "landscape"  # all current placements are landscape crops
+        return (req.get("query") or "modern ui hero", req.get("width"), req.get("height"), orientation)
+
+    async def _search(self, key: GroupKey, count: int) -> List[UnsplashImage]:
+        query, width, height, orientation = key
+        async with self._sem:
+            self.searches += 1
+            try:
+                return await self.unsplash.search_images(
+                    query=query, count=count, width=width, height=height, orientation=orientation
+                )
+            except Exception as e:
+                logger.warning(f"Image search failed for '{query}': {e}")
+                return []
+
+    def search(self, key: GroupKey, count: int) -> "asyncio.Future[List[UnsplashImage]]":
+        tasks = self._inflight.setdefault(key, [])
+        for have, task in tasks:
+            if have >= count:
+                return task
+        pooled = image_pool.draw(key[0], count, orientation=key[3]) if image_pool is not None else None
+        if pooled:
+            self.pooled += 1
+            task = asyncio.get_running_loop().create_future()
+            task.set_result(pooled)
+        else:
+            task = asyncio.ensure_future(self._search(key, count))
+        tasks.append((count, task))
+        return task
+
+    def prefetch(self, req: Dict[str, Any]) -> None:
+        """Start the search for a requirement found mid-stream (no-op if one is running)."""
+        key = self._group_key(req)
+        started, pooled = not self._inflight.get(key), self.pooled
+        self.search(key, PREFETCH_COUNT)
+        if started and self.pooled == pooled:
+            self.prefetched += 1
+
+    async def resolve(self, requirements: List[Dict[str, Any]]) -> List[UnsplashImage]:
+        """Return one image per requirement, in requirement order (as inject_images expects)."""
+        groups: Dict[GroupKey, List[int]] = {}
+        for i, req in enumerate(requirements):
+            groups.setdefault(self._group_key(req), []).append(i)
+
+        keys = list(groups)
+        tasks = [self.search(k, len(groups[k])) for k in keys]
+        results = await asyncio.gather(*tasks)
+
+        resolved: List[Optional[UnsplashImage]] = [None] * len(requirements)
+        for key, imgs in zip(keys, results):
+            for slot, idx in enumerate(groups[key]):
+                if slot < len(imgs):
+                    resolved[idx] = imgs[slot]
+
+        # Keep positions aligned: fill misses with working placeholders
+        out: List[UnsplashImage] = []
+        for req, img in zip(requirements, resolved):
+            if img is None:
+                img = self.unsplash._get_placeholder_images(1, req.get("width"), req.get("height"), req.get("query"))[0]
+            out.append(img)
+        return out
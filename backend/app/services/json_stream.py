@@ -0,0 +1,122 @@
+import json
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+PathPart = Union[str, int]
+Path = Tuple[PathPart, ...]
+
+WILDCARD = "*"
+
+
+class _Frame:
+    __slots__ = ("kind", "start", "path", "key", "index", "expect_key")
+
+    def __init__(self, kind: str, start: int, path: Path):
+        self.kind = kind            # "obj" | "arr"
+        self.start = start          # offset of the opening bracket
+        self.path = path            # path of this container from the root
+        self.key: Optional[str] = None
+        self.index = 0
+        self.expect_key = kind == "obj"
+
+
+class IncrementalJSONParser:
+    """
+    Incremental scanner for a streamed JSON document.
+
+    Feed text chunks as they arrive; every time an object/array whose path
+    matches one of `watch` closes, it is parsed and returned from `feed()`.
+    Paths are tuples of keys/indices, e.g. ("screens", "*") matches each
+    element of the top-level "screens" array and ("design_system",) matches
+    that top-level object. Scalar values are never emitted on their own.
+    """
+
+    def __init__(self, watch: Iterable[Path]):
+        self.watch: List[Path] = [tuple(p) for p in watch]
+        self.buffer = ""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._done = False
+
+    @property
+    def done(self) -> bool:
+        """True once the root value has closed."""
+        return self._done
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        self.buffer += chunk
+        out: List[Tuple[Path, Any]] = []
+        buf = self.buffer
+        i = self._pos
+        n = len(buf)
+
+        while i < n:
+            ch = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._close_string(buf, i)
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                self._stack.append(_Frame("obj" if ch == "{" else "arr", i, self._child_path()))
+            elif ch in "}]":
+                if self._stack:
+                    frame = self._stack.pop()
+                    if self._matches(frame.path):
+                        try:
+                            out.append((frame.path, json.loads(buf[frame.start:i + 1])))
+                        except ValueError:
+                            pass
+                    if not self._stack:
+                        self._done = True
+            elif ch == ",":
+                if self._stack:
+                    top = self._stack[-1]
+                    if top.kind == "arr":
+                        top.index += 1
+                    else:
+                        top.expect_key = True
+                        top.key = None
+            i += 1
+
+        self._pos = i
+        return out
+
+    # ---- internals ----
+    def _child_path(self) -> Path:
+        if not self._stack:
+            return ()
+        top = self._stack[-1]
+        part: PathPart = top.index if top.kind == "arr" else (top.key or "")
+        return top.path + (part,)
+
+    def _close_string(self, buf: str, end: int) -> None:
+        if not self._stack:
+            return
+        top = self._stack[-1]
+        if top.kind == "obj" and top.expect_key:
+            try:
+                top.key = json.loads(buf[self._string_start:end + 1])
+            except ValueError:
+                top.key = buf[self._string_start + 1:end]
+            top.expect_key = False
+
+    def _matches(self, path: Path) -> bool:
+        for pattern in self.watch:
+            if len(pattern) != len(path):
+                continue
+            if all(p == WILDCARD or p == q for p, q in zip(pattern, path)):
+                return True
+        return False
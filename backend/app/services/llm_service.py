@@ -2,13 +2,21 @@ from textwrap import dedent
 import openai
 import json
 import time
-from typing import Dict, Any, AsyncGenerator,Optional
+from types import SimpleNamespace
+from typing import Dict, Any, AsyncGenerator, Optional, Tuple
 from enum import Enum
 from app.core.config import settings
 from app.models.conversation_state import ConversationPhase
 import logging
 
 from app.services.token_tracker import TokenTracker
+from app.services.json_stream import IncrementalJSONParser
+from app.services.model_router import ModelSelection
+from app.services.tailwind_compiler import tailwind_compiler
+from app.services.code_parser import FencedCodeStreamParser
+from app.services.context_compactor import (
+    compact_json, compaction_stats, estimate_tokens, get_plan_digest, legacy_context, screens_meta,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,25 +32,41 @@ class ScreenType(Enum):
     PORTFOLIO = "portfolio"
 
 
-def _clip_json(obj: Any, limit: int = 4000) -> str:
-    try:
-        s = json.dumps(obj, ensure_ascii=False)
-        return (s[:limit] + "…") if len(s) > limit else s
-    except Exception:
-        return ""
+_shared_client: Optional[openai.AsyncOpenAI] = None
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """One AsyncOpenAI (and its connection pool) per process, shared by every LLMService."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL or None,
+        )
+    return _shared_client
 
-def _clip(obj: Any, n: int = 3500) -> str:
-    try:
-        s = json.dumps(obj, ensure_ascii=False)
-        return (s[:n] + "…") if len(s) > n else s
-    except Exception:
-        return ""
 
 class LLMService:
-    def __init__(self):
-        self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(
+        self,
+        selection: Optional[ModelSelection] = None,
+        token_tracker: Optional[TokenTracker] = None,
+    ):
+        self.client = get_openai_client()
         self.model = settings.OPENAI_MODEL or "gpt-4o-mini"
-        self.token_tracker = TokenTracker()
+        self.selection = selection or ModelSelection()
+        self.token_tracker = token_tracker or TokenTracker()
+
+    @classmethod
+    def for_config(cls, config: Optional[Dict[str, Any]]) -> "LLMService":
+        """
+        Service honouring the request's model / per-op overrides and the user's tier.
+        A `token_tracker` in config.configurable aggregates usage across nodes.
+        """
+        cfg = (config or {}).get("configurable", {}) or {}
+        return cls(
+            selection=ModelSelection.from_config(config),
+            token_tracker=cfg.get("token_tracker"),
+        )
     
     # in LLMService
     async def route_request(self, message: str, current_phase: ConversationPhase, context: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -52,14 +76,15 @@ class LLMService:
         import json, time, logging
         logger = logging.getLogger(__name__)
         start = time.time()
+        model = self.selection.model_for("routing")
         prior = context or {}
-        plan_snippet = prior.get("design_plan")
+        plan = prior.get("design_plan")
+        digest = get_plan_digest(plan, prior.get("plan_digest"))
         sys_ctx = ""
-        if plan_snippet:
-            import json
+        if digest:
             sys_ctx = "Context: A prior design plan exists. Consider user may be editing it.\n" \
                     "Keep routing concise.\n" \
-                    f"PLAN_SNIPPET={json.dumps(plan_snippet)[:4000]}\n"
+                    f"PLAN_DIGEST={digest['text']}\n"
 
         system_prompt = f"""You are a router for a UI/UX design assistant.
         {sys_ctx}
@@ -85,7 +110,7 @@ class LLMService:
 
         try:
             resp = await self.client.chat.completions.create(
-                model=self.model,
+                model=model,
                 messages=[{"role": "system", "content": system_prompt},
                         {"role": "user", "content": user_prompt}],
                 # max_tokens=180,
@@ -98,9 +123,11 @@ class LLMService:
                 await self.token_tracker.track_usage(
                     prompt_tokens=usage.prompt_tokens,
                     completion_tokens=usage.completion_tokens,
-                    model=self.model,
+                    model=model,
                     operation_type="routing",
+                    tier=self.selection.tier_for("routing"),
                     duration_ms=int((time.time() - start) * 1000),
+                    metadata=compaction_stats(legacy_context(plan, 4000), digest.get("text", "")),
                 )
 
             out = json.loads(resp.choices[0].message.content)
@@ -136,14 +163,8 @@ class LLMService:
 
     
 
-    async def generate_design_plan(self, requirements: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """
-        Generate (or update) a comprehensive design plan using LLM.
-        If `context` includes a prior plan and/or a list of modifications, the LLM is instructed
-        to update the existing plan in-place, preserving screen IDs and overall style.
-        """
-        start_time = time.time()
-        context = context or {}
+    def _build_plan_prompts(self, requirements: str, context: Dict[str, Any]) -> Tuple[str, str, Dict[str, Any]]:
+        """Build (system_prompt, user_prompt, compaction_metadata) for planning calls."""
         prior_plan          = context.get("prior_plan")
         generated_screens   = context.get("generated_screens")
         modifications       = context.get("modifications") or []
@@ -151,8 +172,14 @@ class LLMService:
         # ---- System Prompt with explicit UPDATE behavior when context exists ----
         base_schema_prompt = """You are an expert UI/UX designer and system architect. Create comprehensive, actionable design plans.
 
-Respond with JSON containing exactly:
+Respond with JSON containing exactly (keys in this order):
 {
+  "design_system": {
+    "color_scheme": "light|dark|auto",
+    "primary_color": "tailwind color name",
+    "typography": "modern|classic|minimal",
+    "spacing": "compact|comfortable|spacious"
+  },
   "screens": [
     {
       "id": "unique_id",
@@ -172,12 +199,6 @@ Respond with JSON containing exactly:
       ]
     }
   ],
-  "design_system": {
-    "color_scheme": "light|dark|auto",
-    "primary_color": "tailwind color name",
-    "typography": "modern|classic|minimal",
-    "spacing": "compact|comfortable|spacious"
-  },
   "generation_strategy": "Detailed, step-by-step build plan including: layout rationale; gradient usage (direction, stops) for sections; where to place background images (mark with data-ai-bg); where to place inline images (mark with data-ai-img); exact animation plan (what animates, when, and how via Tailwind classes and small JS hooks if needed); accessibility and performance notes.",
   "estimated_complexity": "low|medium|high",
   "target_devices": ["desktop", "tablet", "mobile"]
@@ -185,7 +206,7 @@ Respond with JSON containing exactly:
 
 Hard Rules:
 - Output must be valid JSON (no comments or trailing text).
-- Keep the schema exactly as specified (no extra top-level keys).
+- Keep the schema exactly as specified (no extra top-level keys), emitting "design_system" before "screens".
 - Produce MIN 1 and MAX 3 screens total. Choose the most impactful screens for the goals.
 - Each screen must call out gradients, background images, and inline images where appropriate.
 - Interactions must be specific (e.g., 'fade-in-up with 80ms stagger', 'parallax bg moves slower on scroll').
@@ -207,14 +228,17 @@ Hard Rules:
 
     """
 
-        # Compact context snippets to avoid token bloat
+        # Compact context snippets to avoid token bloat. The prior plan goes in full (minified):
+        # an update must carry over every field the edit doesn't touch, which the digest drops.
+        plan_ctx = compact_json({k: v for k, v in prior_plan.items() if k != "fallback"}) if prior_plan else ""
+        screens_ctx = screens_meta(generated_screens)
         ctx_snippets = []
-        if prior_plan:
-            ctx_snippets.append("PRIOR_PLAN=" + _clip_json(prior_plan, 5000))
-        if generated_screens:
-            ctx_snippets.append("GENERATED_SCREENS=" + _clip_json(generated_screens, 4000))
+        if plan_ctx:
+            ctx_snippets.append("PRIOR_PLAN=" + plan_ctx)
+        if screens_ctx:
+            ctx_snippets.append("GENERATED_SCREENS=" + screens_ctx)
         if modifications:
-            ctx_snippets.append("MODIFICATIONS=" + _clip_json(modifications, 1500))
+            ctx_snippets.append("MODIFICATIONS=" + compact_json(modifications))
 
         system_prompt = (
             base_schema_prompt
@@ -261,9 +285,51 @@ Also consider:
 - If a prior plan exists in Context, prefer incremental improvements over a full rewrite.
     """
 
+        return system_prompt, user_prompt, compaction_stats(
+            legacy_context(prior_plan, 5000) + legacy_context(generated_screens, 4000),
+            plan_ctx + screens_ctx,
+        )
+
+    @staticmethod
+    def _normalize_plan_screen(screen: Dict[str, Any], index: int) -> Dict[str, Any]:
+        """Fill defaults for one plan screen (shared by streamed and final plans)."""
+        screen.setdefault("id", f"screen_{index+1}")
+        screen.setdefault("order", index + 1)
+        screen.setdefault("priority", 5)
+        screen.setdefault("components", [])
+        screen.setdefault("interactions", [])
+        screen.setdefault("data_requirements", [])
+        return screen
+
+    def _normalize_plan(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        # Defensive normalization: ensure required blocks exist
+        plan.setdefault("screens", [])
+        plan.setdefault("design_system", {})
+        plan.setdefault("generation_strategy", "")
+        plan.setdefault("estimated_complexity", "medium")
+        plan.setdefault("target_devices", ["desktop", "tablet", "mobile"])
+
+        # Ensure IDs exist and sorting is stable
+        for i, s in enumerate(plan["screens"]):
+            self._normalize_plan_screen(s, i)
+
+        # Sort: priority asc, then order asc
+        plan["screens"].sort(key=lambda s: (s.get("priority", 5), s.get("order", 999)))
+        return plan
+
+    async def generate_design_plan(self, requirements: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Generate (or update) a comprehensive design plan using LLM.
+        If `context` includes a prior plan and/or a list of modifications, the LLM is instructed
+        to update the existing plan in-place, preserving screen IDs and overall style.
+        """
+        start_time = time.time()
+        model = self.selection.model_for("planning")
+        system_prompt, user_prompt, ctx_stats = self._build_plan_prompts(requirements, context or {})
+
         try:
             response = await self.client.chat.completions.create(
-                model=self.model,
+                model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt},
@@ -279,42 +345,87 @@ Also consider:
                 await self.token_tracker.track_usage(
                     prompt_tokens=usage.prompt_tokens,
                     completion_tokens=usage.completion_tokens,
-                    model=self.model,
+                    model=model,
                     operation_type="planning",
+                    tier=self.selection.tier_for("planning"),
                     duration_ms=int((time.time() - start_time) * 1000),
+                    metadata=ctx_stats,
                 )
 
             # Parse and normalize
             plan = json.loads(response.choices[0].message.content)
+            return self._normalize_plan(plan)
+
+        except Exception as e:
+            logger.error(f"LLM Planning Error: {e}")
+            return self._fallback_plan()
 
-            # Defensive normalization: ensure required blocks exist
-            plan.setdefault("screens", [])
-            plan.setdefault("design_system", {})
-            plan.setdefault("generation_strategy", "")
-            plan.setdefault("estimated_complexity", "medium")
-            plan.setdefault("target_devices", ["desktop", "tablet", "mobile"])
+    async def generate_design_plan_streaming(
+        self, requirements: str, context: Optional[Dict[str, Any]] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Stream the plan through an incremental JSON parser.
+        Yields {"type": "design_system"} and {"type": "screen"} events as soon as each
+        object closes, then a final {"type": "plan_complete", "plan": ...}.
+        """
+        start_time = time.time()
+        model = self.selection.model_for("planning")
+        system_prompt, user_prompt, ctx_stats = self._build_plan_prompts(requirements, context or {})
+        parser = IncrementalJSONParser(watch=[("design_system",), ("screens", "*")])
 
-            # Ensure IDs exist and sorting is stable
-            for i, s in enumerate(plan["screens"]):
-                s.setdefault("id", f"screen_{i+1}")
-                s.setdefault("order", i + 1)
-                s.setdefault("priority", 5)
-                s.setdefault("components", [])
-                s.setdefault("interactions", [])
-                s.setdefault("data_requirements", [])
+        try:
+            stream = await self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                response_format={"type": "json_object"},
+                stream=True,
+                stream_options={"include_usage": True},
+            )
 
-            # Sort: priority asc, then order asc
-            plan["screens"].sort(key=lambda s: (s.get("priority", 5), s.get("order", 999)))
+            usage = None
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if not chunk.choices or chunk.choices[0].delta.content is None:
+                    continue
+                for path, value in parser.feed(chunk.choices[0].delta.content):
+                    if not isinstance(value, dict):
+                        continue
+                    if path[0] == "design_system":
+                        yield {"type": "design_system", "design_system": value}
+                    else:
+                        yield {
+                            "type": "screen",
+                            "index": path[1],
+                            "screen": self._normalize_plan_screen(value, path[1]),
+                        }
+
+            if usage:
+                await self.token_tracker.track_usage(
+                    prompt_tokens=usage.prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                    model=model,
+                    operation_type="planning",
+                    tier=self.selection.tier_for("planning"),
+                    duration_ms=int((time.time() - start_time) * 1000),
+                    metadata={**ctx_stats, "streamed": True},
+                )
 
-            return plan
+            plan = self._normalize_plan(json.loads(parser.buffer))
 
         except Exception as e:
-            logger.error(f"LLM Planning Error: {e}")
-            return self._fallback_plan()
+            logger.error(f"LLM Planning Error (streaming): {e}")
+            plan = self._fallback_plan()
+
+        yield {"type": "plan_complete", "plan": plan}
     
     async def process_feedback(self, feedback: str, current_plan: Dict[str, Any]) -> Dict[str, Any]:
         """Process user feedback and modify the plan accordingly"""
         start_time = time.time()
+        model = self.selection.model_for("feedback_processing")
         
         system_prompt = """You are a design plan modifier. Take user feedback and update the design plan accordingly.
 
@@ -326,7 +437,7 @@ Respond with JSON containing:
     "reasoning": "explanation of modifications"
 }"""
 
-        user_prompt = f"""Current plan: {json.dumps(current_plan, indent=2)}
+        user_prompt = f"""Current plan: {compact_json(current_plan)}
 
 User feedback: "{feedback}"
 
@@ -334,7 +445,7 @@ Modify the plan based on this feedback."""
 
         try:
             response = await self.client.chat.completions.create(
-                model=self.model,
+                model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
@@ -347,8 +458,9 @@ Modify the plan based on this feedback."""
             await self.token_tracker.track_usage(
                 prompt_tokens=response.usage.prompt_tokens,
                 completion_tokens=response.usage.completion_tokens,
-                model=self.model,
+                model=model,
                 operation_type="feedback_processing",
+                tier=self.selection.tier_for("feedback_processing"),
                 duration_ms=int((time.time() - start_time) * 1000)
             )
             
@@ -358,22 +470,19 @@ Modify the plan based on this feedback."""
             logger.error(f"LLM Feedback Processing Error: {e}")
             return {"action": "approve", "modified_plan": current_plan, "changes_made": [], "reasoning": "Fallback approval"}
     
-    async def generate_screen_code(self, screen_config: Dict[str, Any], design_system: Dict[str, Any]) -> str:
-        """Generate complete HTML/CSS/JS code for a specific screen"""
-        start_time = time.time()
+    def _build_screen_prompts(
+        self, screen_config: Dict[str, Any], design_system: Dict[str, Any]
+    ) -> Tuple[ScreenType, str, str]:
         screen_type = screen_config.get("screen_type", "landing")
         screen_type = ScreenType(screen_type) if screen_type in ScreenType else ScreenType.LANDING
-        max_tokens = self._get_max_tokens_for_screen(screen_type)
-        
         system_prompt = self._get_system_prompt_for_screen(screen_type)
-        
         user_prompt = f"""Generate a complete, production-ready screen with:
 
 Screen Configuration:
-{json.dumps(screen_config, indent=2)}
+{compact_json(screen_config)}
 
 Design System:
-{json.dumps(design_system, indent=2)}
+{compact_json(design_system)}
 
 Requirements:
 - Single HTML file with inline CSS and JavaScript
@@ -382,24 +491,36 @@ Requirements:
 - Ensure responsive design and accessibility
 - Include realistic placeholder content
 - Add smooth animations and micro-interactions"""
+        return screen_type, system_prompt, user_prompt
+
+    async def generate_screen_code(self, screen_config: Dict[str, Any], design_system: Dict[str, Any]) -> str:
+        """Generate complete HTML/CSS/JS code for a specific screen"""
+        start_time = time.time()
+        model = self.selection.model_for("generation")
+        screen_type, system_prompt, user_prompt = self._build_screen_prompts(screen_config, design_system)
 
         try:
             response = await self.client.chat.completions.create(
-                model=self.model,
+                model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
-                # max_tokens=max_tokens,
+                # max_tokens=self._get_max_tokens_for_screen(screen_type),
                 # temperature=0.1
             )
             
             await self.token_tracker.track_usage(
                 prompt_tokens=response.usage.prompt_tokens,
                 completion_tokens=response.usage.completion_tokens,
-                model=self.model,
+                model=model,
                 operation_type=f"generation_{screen_type.value}",
-                duration_ms=int((time.time() - start_time) * 1000)
+                tier=self.selection.tier_for(f"generation_{screen_type.value}"),
+                duration_ms=int((time.time() - start_time) * 1000),
+                metadata=compaction_stats(
+                    legacy_context(screen_config, indent=2) + legacy_context(design_system, indent=2),
+                    compact_json(screen_config) + compact_json(design_system),
+                ),
             )
             
             return response.choices[0].message.content
@@ -413,78 +534,99 @@ Requirements:
         screen_config: Dict[str, Any], 
         design_system: Dict[str, Any]
     ) -> AsyncGenerator[Dict[str, Any], None]:
-        """Generate screen code with streaming support"""
-        start_time = time.time()
-        screen_type = ScreenType(screen_config.get("screen_type", "landing"))
-        max_tokens = self._get_max_tokens_for_screen(screen_type)
-        
-        system_prompt = self._get_system_prompt_for_screen(screen_type)
-        
-        user_prompt = f"""Generate a complete, production-ready screen with:
-
-Screen Configuration:
-{json.dumps(screen_config, indent=2)}
-
-Design System:
-{json.dumps(design_system, indent=2)}
+        """
+        Generate screen code with streaming support.
 
-Requirements:
-- Single HTML file with inline CSS and JavaScript
-- Use only Tailwind CSS utility classes
-- Implement all specified components and interactions
-- Ensure responsive design and accessibility"""
+        Yields `content_delta` events and always ends with `generation_complete`
+        (carrying the fallback screen and an `error` if the call failed).
+        """
+        start_time = time.time()
+        model = self.selection.model_for("generation")
+        screen_type, system_prompt, user_prompt = self._build_screen_prompts(screen_config, design_system)
+        accumulated_content = ""
+        # tracks lead prose / document / closing prose so the stream can stop at </html>
+        parser = FencedCodeStreamParser()
+        early_stop = usage_estimated = False
 
         try:
             stream = await self.client.chat.completions.create(
-                model=self.model,
+                model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
-                # max_tokens=max_tokens,
+                # max_tokens=self._get_max_tokens_for_screen(screen_type),
                 # temperature=0.4,
-                stream=True
+                stream=True,
+                stream_options={"include_usage": True},
             )
             
-            accumulated_content = ""
-            completion_tokens = 0
-            
+            usage = None
             async for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
-                    content = chunk.choices[0].delta.content
-                    accumulated_content += content
-                    completion_tokens += 1
-                    
-                    yield {
-                        "type": "content_delta",
-                        "content": content,
-                        "accumulated_content": accumulated_content,
-                        "screen_id": screen_config.get("id")
-                    }
-            
-            # Estimate tokens for tracking
-            prompt_tokens = len(user_prompt.split()) * 1.3
-            await self.token_tracker.track_usage(
-                prompt_tokens=int(prompt_tokens),
-                completion_tokens=completion_tokens,
-                model=self.model,
-                operation_type=f"streaming_{screen_type.value}",
-                duration_ms=int((time.time() - start_time) * 1000)
-            )
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if not chunk.choices or chunk.choices[0].delta.content is None:
+                    continue
+                content = chunk.choices[0].delta.content
+                accumulated_content += content
+                parser.feed(content)
+                yield {
+                    "type": "content_delta",
+                    "content": content,
+                    "accumulated_content": accumulated_content,
+                    "screen_id": screen_config.get("id")
+                }
+                if parser.done and settings.LLM_STOP_AT_HTML_END:
+                    # only the closing prose line is left: don't wait for (or pay for) it
+                    early_stop = True
+                    await stream.close()
+                    break
+            parser.close()
+
+            if usage is None and early_stop:
+                usage_estimated = True
+                usage = SimpleNamespace(
+                    prompt_tokens=estimate_tokens(system_prompt) + estimate_tokens(user_prompt),
+                    completion_tokens=estimate_tokens(accumulated_content),
+                )
+            if usage:
+                await self.token_tracker.track_usage(
+                    prompt_tokens=usage.prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                    model=model,
+                    operation_type=f"generation_{screen_type.value}",
+                    tier=self.selection.tier_for(f"generation_{screen_type.value}"),
+                    duration_ms=int((time.time() - start_time) * 1000),
+                    metadata={
+                        **compaction_stats(
+                            legacy_context(screen_config, indent=2) + legacy_context(design_system, indent=2),
+                            compact_json(screen_config) + compact_json(design_system),
+                        ),
+                        "streamed": True,
+                        "early_stop": early_stop,
+                        "usage_estimated": usage_estimated,
+                    },
+                )
             
             yield {
                 "type": "generation_complete",
                 "content": accumulated_content,
+                "html": parser.html,
+                "early_stop": early_stop,
                 "screen_id": screen_config.get("id"),
-                "tokens_used": completion_tokens,
+                "tokens_used": usage.completion_tokens if usage else 0,
                 "duration_ms": int((time.time() - start_time) * 1000)
             }
             
         except Exception as e:
+            logger.error(f"LLM Screen Generation Error (streaming): {e}")
             yield {
-                "type": "error",
+                "type": "generation_complete",
+                "content": self._fallback_screen_html(screen_config.get("title", "Screen")),
+                "screen_id": screen_config.get("id"),
                 "error": str(e),
-                "screen_id": screen_config.get("id")
+                "tokens_used": 0,
+                "duration_ms": int((time.time() - start_time) * 1000)
             }
     
     def _get_max_tokens_for_screen(self, screen_type: ScreenType) -> int:
@@ -655,27 +797,23 @@ Requirements:
     async def generate_conversational_response(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
         """Generate a conversational response for general chat, grounded in current design context when available."""
         start_time = time.time()
+        model = self.selection.model_for("conversational")
         ctx = context or {}
         plan      = ctx.get("design_plan")
         screens   = ctx.get("generated_screens")
         brief     = ctx.get("last_requirements")
 
         # Build a compact, non-invasive context hint for the model
+        digest    = get_plan_digest(plan, ctx.get("plan_digest"))
+        screens_ctx = screens_meta(screens)
         ctx_lines = []
         if brief:
             ctx_lines.append("LAST_BRIEF=" + (brief[:600] + "…" if len(brief) > 600 else brief))
-        if plan:
-            ctx_lines.append("DESIGN_PLAN=" + _clip(plan, 3000))
-        if screens:
+        if digest:
+            ctx_lines.append("DESIGN_PLAN=" + digest["text"])
+        if screens_ctx:
             # Only feed lightweight metadata to avoid token bloat
-            try:
-                meta = [
-                    {k: s.get(k) for k in ("id","title","screen_type","description")}
-                    for s in screens if isinstance(s, dict)
-                ]
-                ctx_lines.append("GENERATED_SCREENS_META=" + _clip(meta, 2000))
-            except Exception:
-                pass
+            ctx_lines.append("GENERATED_SCREENS_META=" + screens_ctx)
         context_blob = ("\n".join(ctx_lines)) if ctx_lines else ""
 
         system_prompt = """You are a friendly AI design assistant for web/apps.
@@ -699,7 +837,7 @@ Requirements:
 
         try:
             resp = await self.client.chat.completions.create(
-                model=self.model,
+                model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt},
@@ -713,9 +851,17 @@ Requirements:
                 await self.token_tracker.track_usage(
                     prompt_tokens=usage.prompt_tokens,
                     completion_tokens=usage.completion_tokens,
-                    model=self.model,
+                    model=model,
                     operation_type="conversational",
+                    tier=self.selection.tier_for("conversational"),
                     duration_ms=int((time.time() - start_time) * 1000),
+                    metadata=compaction_stats(
+                        legacy_context(plan, 3000) + legacy_context([
+                            {k: s.get(k) for k in ("id", "title", "screen_type", "description")}
+                            for s in screens or [] if isinstance(s, dict)
+                        ], 2000),
+                        digest.get("text", "") + screens_ctx,
+                    ),
                 )
 
             return (resp.choices[0].message.content or "").strip() or \
@@ -746,6 +892,7 @@ Requirements:
     def _fallback_plan(self) -> Dict[str, Any]:
         """Fallback plan when LLM fails"""
         return {
+            "fallback": True,
             "screens": [
                 {
                     "id": "landing_01",
@@ -771,8 +918,8 @@ Requirements:
         }
     
     def _fallback_screen_html(self, title: str) -> str:
-        """Fallback HTML when LLM generation fails"""
-        return f"""<!DOCTYPE html>
+        """Fallback HTML when LLM generation fails (Tailwind compiled inline, no CDN)"""
+        html = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -794,4 +941,5 @@ Requirements:
         </div>
     </main>
 </body>
-</html>"""
\ No newline at end of file
+</html>"""
+        return tailwind_compiler.process(html)[0]
\ No newline at end of file
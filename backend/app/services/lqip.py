@@ -0,0 +1,72 @@
+import asyncio
+import base64
+import colorsys
+import hashlib
+import logging
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.models.design_state import UnsplashImage
+from app.services.http_clients import http_clients
+from app.services.image_cache import MemoryTier
+from app.services.responsive_images import sized_url
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_WIDTH = 16
+MAX_THUMBNAIL_BYTES = 2048  # anything bigger is not worth inlining
+
+
+def seed_color(key: str) -> str:
+    """Deterministic muted colour for images without one (picsum, offline runs)."""
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    hue = int.from_bytes(digest[:2], "big") / 65535
+    r, g, b = colorsys.hls_to_rgb(hue, 0.62, 0.22)
+    return f"#{int(r * 255):02x}{int(g * 255):02x}{int(b * 255):02x}"
+
+
+class LQIPService:
+    """
+    Low-quality image placeholders, computed once per image id:
+    - "color": the Unsplash dominant colour (or a deterministic one for picsum)
+    - "thumbnail": additionally a ~16px base64 JPEG, falling back to the colour
+    """
+
+    def __init__(self, mode: Optional[str] = None, max_entries: int = 4096):
+        self.mode = (mode or settings.IMAGE_LQIP_MODE).lower()
+        self._cache = MemoryTier(max_entries)
+
+    async def for_images(self, images: List[UnsplashImage]) -> Dict[str, Dict[str, str]]:
+        """image id -> {"color", "thumbnail"} for every image (empty when LQIP is off)."""
+        if self.mode == "off" or not images:
+            return {}
+        unique = {img.id: img for img in images}
+        results = await asyncio.gather(*(self._placeholder(img) for img in unique.values()))
+        return dict(zip(unique, results))
+
+    async def _placeholder(self, img: UnsplashImage) -> Dict[str, str]:
+        cached = self._cache.get(img.id)
+        if cached is not None:
+            return cached
+        placeholder = {"color": img.color or seed_color(img.id), "thumbnail": ""}
+        if self.mode == "thumbnail" and img.raw_url:
+            placeholder["thumbnail"] = await self._thumbnail(img)
+        self._cache.set(img.id, placeholder)
+        return placeholder
+
+    async def _thumbnail(self, img: UnsplashImage) -> str:
+        url = sized_url(img, THUMBNAIL_WIDTH, round(THUMBNAIL_WIDTH * img.height / max(img.width, 1)))
+        if "picsum.photos" not in url:
+            url += "&fm=jpg&q=30&blur=50"
+        try:
+            r = await http_clients.get("images").get(url, follow_redirects=True, timeout=3.0)
+            content_type = r.headers.get("content-type", "")
+            if r.status_code != 200 or not content_type.startswith("image/") or len(r.content) > MAX_THUMBNAIL_BYTES:
+                return ""
+            return f"data:{content_type};base64,{base64.b64encode(r.content).decode('ascii')}"
+        except Exception as e:
+            logger.debug(f"LQIP thumbnail failed for {img.id}: {e}")
+            return ""
+
+
+lqip_service = LQIPService()
@@ -0,0 +1,324 @@
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from app.core.config import settings
+from app.services.html_tokens import VOID_TAGS, parse_attrs
+
+# one "<" branch (so the regex engine can skip text quickly): comment, doctype, start/end tag,
+# or a "<" that may open a tag once more input arrives (a stray "a < b" matches nothing)
+_TOKEN = (
+    r'<(?:(?P<comment>!--.*?-->)|(?P<decl>!(?!--)[^>]*>)'
+    r'|(?P<closing>/?)(?P<name>[a-zA-Z][a-zA-Z0-9-]*)'
+    r'(?P<attrs>[^>"\']*(?:(?:"[^"]*"|\'[^\']*\')[^>"\']*)*)>'   # quoted values may hold '>'
+    r'|(?P<lt>(?![^a-zA-Z/!])))'
+)
+_CSS_URL_RE = re.compile(r'url\(\s*["\']?([^)"\']+)', re.I)
+_BOUNDED_CLASS_RE = re.compile(r'(?:^|\s)(?:[\w-]+:)*(?:h|max-h|size|aspect)-(?!(?:auto|full|fit|min|max)(?:\s|$))\S')
+_BOUNDED_STYLE_RE = re.compile(r'(?:^|;)\s*(?:max-)?height\s*:|aspect-ratio\s*:', re.I)
+
+RAW_TEXT_TAGS = ("script", "style")
+SCOPES = ("text", *RAW_TEXT_TAGS)
+# image hosts the pipeline itself injects; any other absolute image URL is a hotlink
+# image sources the pipeline itself injects; the image proxy's hosts are added from settings
+ALLOWED_IMAGE_HOSTS = frozenset({"images.unsplash.com", "plus.unsplash.com", "picsum.photos", "fastly.picsum.photos"})
+PATTERN_HOLD_BACK = 64  # pattern rules must match within this many characters
+MAX_REPORTED = 25
+
+Attrs = Dict[str, str]
+
+
+@dataclass(frozen=True)
+class Finding:
+    rule: str
+    severity: str       # "error" | "warning"
+    message: str
+    start: int          # offsets in the document
+    end: int
+    excerpt: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    A tag rule (`tags`, optionally narrowed by `trigger` and `check`) or a
+    text rule (`pattern` in `scopes`: "text", "script" or "style" content).
+
+    `trigger` is a regex searched in the raw start tag; a rule on "*" (every
+    tag) should have one, so most tags are passed over without parsing their
+    attributes. `check(validator, name, attrs)` sees the tag name in its
+    original case and lowercased attribute names, and returns a falsy value
+    when the tag is fine, True or a detail string when it is not.
+    """
+    id: str
+    severity: str
+    message: str
+    tags: Tuple[str, ...] = ()
+    trigger: Optional[str] = None
+    check: Optional[Callable[["MarkupValidator", str, Attrs], Union[bool, str, None]]] = None
+    pattern: Optional[str] = None
+    scopes: Tuple[str, ...] = ("text",)
+
+
+class RuleSet:
+    """
+    Rules compiled into one scanner: text rules become named alternatives of
+    the tokenizer regex, tag rules a dispatch table keyed by tag name whose
+    triggers are pre-compiled, so a document is walked once whatever the
+    number of rules.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = list(rules)
+        self.by_group: Dict[str, Rule] = {}
+        by_tag: Dict[str, List[Tuple[Rule, Optional["re.Pattern[str]"]]]] = {}
+        scoped: Dict[str, List[str]] = {scope: [] for scope in SCOPES}
+        for i, rule in enumerate(self.rules):
+            trigger = re.compile(rule.trigger) if rule.trigger else None
+            for tag in rule.tags:
+                by_tag.setdefault(tag.lower(), []).append((rule, trigger))
+            if rule.pattern:
+                group = f"r{i}"
+                self.by_group[group] = rule
+                for scope in rule.scopes:
+                    scoped[scope].append(f"(?P<{group}>{rule.pattern})")
+        any_tag = by_tag.pop("*", [])
+        self.any_tag = any_tag
+        self.by_tag = {name: tag_rules + any_tag for name, tag_rules in by_tag.items()}
+        # one search decides whether any "*" rule can fire on a tag
+        triggers = [rule.trigger for rule, _ in any_tag]
+        self.any_trigger = re.compile("|".join(f"(?:{t})" for t in triggers)) if triggers and all(triggers) else None
+        self.markup_re = re.compile("|".join([_TOKEN, *scoped["text"]]), re.S)
+        self.raw_re = {
+            tag: re.compile("|".join([rf"(?P<close>(?i:</{tag}\s*>))", *scoped[tag]]), re.S)
+            for tag in RAW_TEXT_TAGS
+        }
+
+    def tag_rules(self, name: str, tag: str) -> List[Tuple[Rule, Optional["re.Pattern[str]"]]]:
+        rules = self.by_tag.get(name)
+        if rules is not None:
+            return rules
+        if self.any_tag and (self.any_trigger is None or self.any_trigger.search(tag)):
+            return self.any_tag
+        return []
+
+
+def has_bounded_height(attrs: Attrs) -> bool:
+    """The element has a height of its own (attribute, Tailwind class or inline style)."""
+    return (
+        "height" in attrs
+        or bool(_BOUNDED_CLASS_RE.search(attrs.get("class", "")))
+        or bool(_BOUNDED_STYLE_RE.search(attrs.get("style", "")))
+    )
+
+
+def _external_host(url: str) -> Optional[str]:
+    url = url.strip()
+    if not url.lower().startswith(("http://", "https://", "//")):
+        return None
+    host = (urlsplit(url).hostname or "").lower()
+    return None if host in allowed_image_hosts() else host
+
+
+def allowed_image_hosts() -> frozenset:
+    """ALLOWED_IMAGE_HOSTS plus the image proxy's host and upstreams (IMAGE_PROXY_*)."""
+    proxy_host = urlsplit(settings.IMAGE_PROXY_BASE_URL).hostname if settings.IMAGE_PROXY_ENABLED else None
+    extra = {h.lower() for h in settings.IMAGE_PROXY_ALLOWED_HOSTS}
+    if proxy_host:
+        extra.add(proxy_host.lower())
+    return ALLOWED_IMAGE_HOSTS | extra
+
+
+# ---- default rules ----
+
+def _jsx_classname(v: "MarkupValidator", name: str, attrs: Attrs) -> bool:
+    return "classname" in attrs
+
+
+def _missing_alt(v: "MarkupValidator", name: str, attrs: Attrs) -> bool:
+    return "alt" not in attrs
+
+
+def _missing_dimensions(v: "MarkupValidator", name: str, attrs: Attrs) -> Union[bool, str]:
+    missing = [a for a in ("width", "height") if a not in attrs]
+    return " and ".join(missing) if missing else False
+
+
+def _hotlink(v: "MarkupValidator", name: str, attrs: Attrs) -> Union[bool, str]:
+    urls = [_CSS_URL_RE.findall(attrs.get("style", ""))]
+    if name.lower() in ("img", "source", "video"):
+        urls.append([attrs.get("src", ""), attrs.get("poster", "")])
+        urls.append(part.split()[0] for part in attrs.get("srcset", "").split(",") if part.strip())
+    for group in urls:
+        for url in group:
+            host = _external_host(url)
+            if host:
+                return host
+    return False
+
+
+def _component_name(v: "MarkupValidator", name: str, attrs: Attrs) -> str:
+    return f"<{name}>"
+
+
+def _unbounded_canvas(v: "MarkupValidator", name: str, attrs: Attrs) -> bool:
+    return not has_bounded_height(attrs) and not v.inside_bounded
+
+
+DEFAULT_RULES = RuleSet([
+    # HTML tag names are lowercase by convention; <Button>, <Card>, <Dialog> are React/shadcn components
+    Rule("forbidden-component", "error", "Component markup instead of HTML",
+         tags=("*",), trigger=r"^<[A-Z][a-zA-Z0-9-]*[a-z]", check=_component_name),
+    Rule("jsx-classname", "error", "className attribute (JSX) instead of class",
+         tags=("*",), trigger=r"\sclassName\s*=", check=_jsx_classname),
+    Rule("cn-helper", "error", "cn() class helper from a component library",
+         pattern=r"cn(?<![\w.$]cn)\(", scopes=("script",)),
+    Rule("img-missing-alt", "warning", "Image without alt text", tags=("img",), check=_missing_alt),
+    Rule("img-missing-dimensions", "warning", "Image without intrinsic size (layout shift)",
+         tags=("img",), check=_missing_dimensions),
+    Rule("external-hotlink", "warning", "Image hotlinked from an external host",
+         tags=("*",), trigger=r"//", check=_hotlink),
+    Rule("unbounded-canvas", "warning", "<canvas> without a height-bounded wrapper (Chart.js grows forever)",
+         tags=("canvas",), check=_unbounded_canvas),
+])
+
+
+class MarkupValidator:
+    """
+    Single-pass markup validator over a RuleSet.
+
+    `feed()` returns the findings completed by the chunk, `close()` the rest;
+    findings carry document offsets and are identical however the input is
+    chunked, so it can run on a stream as well as a finished page.
+    """
+
+    def __init__(self, rules: RuleSet = DEFAULT_RULES):
+        self.rules = rules
+        self.buffer = ""
+        self.base = 0                                   # document offset of buffer[0]
+        self.findings: List[Finding] = []
+        self._raw: Optional[str] = None                 # inside <script>/<style>
+        self._names: List[str] = []                     # open elements
+        self._attrs: List[str] = []                     # their raw attributes, parsed only when asked
+
+    @property
+    def inside_bounded(self) -> bool:
+        """Some open element has a height of its own."""
+        return any(has_bounded_height(parse_attrs(raw)) for raw in self._attrs)
+
+    def feed(self, chunk: str) -> List[Finding]:
+        self.buffer += chunk
+        return self._advance(final=False)
+
+    def close(self) -> List[Finding]:
+        found = self._advance(final=True)
+        self.base += len(self.buffer)
+        self.buffer = ""
+        return found
+
+    def _report(self, rule: Rule, detail: Union[bool, str], start: int, end: int, out: List[Finding]) -> None:
+        message = f"{rule.message}: {detail}" if isinstance(detail, str) and detail else rule.message
+        excerpt = self.buffer[start:end]
+        excerpt = excerpt if len(excerpt) <= 80 else excerpt[:77] + "..."
+        out.append(Finding(rule.id, rule.severity, message, self.base + start, self.base + end, excerpt))
+
+    def _pattern(self, m: "re.Match[str]", out: List[Finding]) -> None:
+        self._report(self.rules.by_group[m.lastgroup], True, m.start(), m.end(), out)
+
+    def _pop(self, name: str) -> None:
+        # an unmatched end tag is ignored; a matched one closes anything left open inside it
+        names = self._names
+        if names and names[-1] == name:
+            names.pop()
+            self._attrs.pop()
+            return
+        for i in range(len(names) - 2, -1, -1):
+            if names[i] == name:
+                del names[i:], self._attrs[i:]
+                return
+
+    def _tag(self, m: "re.Match[str]", out: List[Finding]) -> None:
+        name, raw = m.group("name", "attrs")
+        lowered = name.lower()
+        if m.group("closing"):
+            self._pop(lowered)
+            return
+        rules = self.rules.tag_rules(lowered, m.group(0))
+        if rules:
+            attrs: Optional[Attrs] = None
+            for rule, trigger in rules:
+                if trigger is not None and not trigger.search(m.group(0)):
+                    continue
+                if attrs is None:
+                    attrs = parse_attrs(raw)
+                detail = rule.check(self, name, attrs) if rule.check else True
+                if detail:
+                    self._report(rule, detail, m.start(), m.end(), out)
+        if lowered in VOID_TAGS or raw.endswith("/"):
+            return
+        if lowered in RAW_TEXT_TAGS:
+            self._raw = lowered
+        else:
+            self._names.append(lowered)
+            self._attrs.append(raw)
+
+    def _advance(self, final: bool) -> List[Finding]:
+        buf = self.buffer
+        n = len(buf)
+        pos = 0
+        out: List[Finding] = []
+        while pos < n:
+            regex = self.rules.raw_re[self._raw] if self._raw else self.rules.markup_re
+            m = regex.search(buf, pos)
+            if m is None:
+                # nothing complete: keep a tail a pattern match may still start in
+                pos = n if final else max(pos, n - PATTERN_HOLD_BACK)
+                break
+            kind = m.lastgroup
+            if kind == "lt":
+                if not final:
+                    break  # a tag still being streamed
+                pos = m.end()
+            elif kind == "close":
+                self._raw = None
+                pos = m.end()
+            elif kind in ("comment", "decl"):
+                pos = m.end()
+            elif kind == "attrs":
+                self._tag(m, out)
+                pos = m.end()
+            else:
+                # a text-rule match; wait until it cannot grow or be preceded by a longer one
+                if not final and m.end() + PATTERN_HOLD_BACK > n:
+                    pos = m.start()
+                    break
+                self._pattern(m, out)
+                pos = m.end()
+        self.buffer = buf[pos:]
+        self.base += pos
+        self.findings.extend(out)
+        return out
+
+
+def validate_markup(html: str, rules: RuleSet = DEFAULT_RULES) -> List[Finding]:
+    validator = MarkupValidator(rules)
+    validator.feed(html)
+    validator.close()
+    return validator.findings
+
+
+def findings_report(findings: List[Finding]) -> Dict[str, Any]:
+    """Compact per-screen summary: counts by severity and rule, plus the first findings."""
+    by_rule: Dict[str, int] = {}
+    for f in findings:
+        by_rule[f.rule] = by_rule.get(f.rule, 0) + 1
+    return {
+        "errors": sum(1 for f in findings if f.severity == "error"),
+        "warnings": sum(1 for f in findings if f.severity == "warning"),
+        "by_rule": by_rule,
+        "findings": [f.to_dict() for f in findings[:MAX_REPORTED]],
+    }
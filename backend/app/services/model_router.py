@@ -0,0 +1,87 @@
+import logging
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def operation_family(operation_type: str) -> str:
+    """Map tracked operation types ("generation_landing", "streaming_blog") to table keys."""
+    if operation_type.split("_", 1)[0] in ("generation", "streaming"):
+        return "generation"
+    return operation_type
+
+
+def request_model_allowed(model: Optional[str], user_tier: str) -> bool:
+    """Whether users of `user_tier` may pick `model` (REQUEST_MODELS_BY_TIER)."""
+    if not model:
+        return False
+    allowed = settings.REQUEST_MODELS_BY_TIER.get(user_tier) or []
+    return any(model == m or model.startswith(m + "-") for m in allowed)
+
+
+class ModelSelection:
+    """
+    Resolves the model for each LLM operation. Precedence (highest first):
+    per-request per-operation override, per-request model, user-tier override,
+    operation tier from the routing table, settings.OPENAI_MODEL. Requested
+    models count only if the user's tier may choose them.
+    """
+
+    def __init__(
+        self,
+        requested_model: Optional[str] = None,
+        operation_overrides: Optional[Dict[str, str]] = None,
+        user_tier: Optional[str] = None,
+    ):
+        self.user_tier = user_tier or "user"
+        self.requested_model = requested_model if request_model_allowed(requested_model, self.user_tier) else None
+        self.operation_overrides = {
+            op: m for op, m in (operation_overrides or {}).items() if request_model_allowed(m, self.user_tier)
+        }
+        ignored = [
+            m for m in (requested_model, *(operation_overrides or {}).values())
+            if m and not request_model_allowed(m, self.user_tier)
+        ]
+        if ignored:
+            logger.warning(f"Ignoring models not allowed for tier {self.user_tier!r}: {ignored}")
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "ModelSelection":
+        cfg = (config or {}).get("configurable", {}) or {}
+        return cls(
+            requested_model=cfg.get("model"),
+            operation_overrides=cfg.get("model_overrides"),
+            user_tier=cfg.get("user_tier"),
+        )
+
+    def table_tier(self, operation: str) -> str:
+        """The operation's tier in the routing table (OPERATION_MODEL_TIERS)."""
+        return settings.OPERATION_MODEL_TIERS.get(operation_family(operation), "strong")
+
+    def tier_for(self, operation: str) -> str:
+        """
+        Where model_for()'s choice came from, as recorded with usage: "override"
+        (per-operation override), "request" (the request's model), "user_tier"
+        or the routing-table tier (also when that tier falls back to OPENAI_MODEL).
+        """
+        op = operation_family(operation)
+        if op in self.operation_overrides:
+            return "override"
+        if self.requested_model:
+            return "request"
+        if (settings.USER_TIER_MODEL_OVERRIDES.get(self.user_tier) or {}).get(op):
+            return "user_tier"
+        return self.table_tier(op)
+
+    def model_for(self, operation: str) -> str:
+        op = operation_family(operation)
+        if op in self.operation_overrides:
+            return self.operation_overrides[op]
+        if self.requested_model:
+            return self.requested_model
+        tier_overrides = settings.USER_TIER_MODEL_OVERRIDES.get(self.user_tier) or {}
+        if tier_overrides.get(op):
+            return tier_overrides[op]
+        model = settings.MODEL_TIERS.get(self.table_tier(op))
+        return model or settings.OPENAI_MODEL or "gpt-4o-mini"
@@ -0,0 +1,271 @@
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.services.html_tokens import Node, parse_document
+from app.services.markup_validator import Finding, findings_report, has_bounded_height
+
+_HANDLER = r'(?:async\s*)?(?:function\s*[\w$]*\s*\([^()]*\)\s*\{\}|(?:\([^()]*\)|[\w$]+)\s*=>\s*(?:\{\}|[\w$.]+\s*\([^()]*\))|[\w$.]+)'
+# top-level statements that run nothing before the document is parsed
+_DEFERRED_STATEMENT_RE = re.compile(
+    rf'(?:(?:window|document)\s*\.\s*)?addEventListener\s*\(\s*(["\'])(?:DOMContentLoaded|load)\1\s*,\s*{_HANDLER}\s*(?:,[^()]*)?\)'
+    rf'|(?:window\s*\.\s*)?onload\s*=\s*{_HANDLER}'
+    r'|(?:async\s+)?function\s*[\w$]+\s*\([^()]*\)\s*\{\}'
+    r'|(["\'])use strict\2'
+)
+_PACKAGE_RE = re.compile(r'^/(?:npm/)?((?:@[^/@]+/)?[^/@]+)')
+_FILE_RE = re.compile(r'(?:[.-](?:umd|min|prod|production|esm|global))*\.m?js$', re.I)
+_TAG_END_RE = re.compile(r'\s*/?>$')
+
+MAX_DOM_DEPTH = 32        # Lighthouse flags deeper trees
+MAX_DOM_NODES = 1500
+HERO_MIN_WIDTH = 400      # smaller first images (logos, avatars) are not the LCP candidate
+# rule -> (points per finding, cap)
+WEIGHTS: Dict[str, Tuple[int, int]] = {
+    "render-blocking-script": (10, 30),
+    "duplicate-library": (10, 20),
+    "unbounded-canvas": (10, 20),
+    "lazy-hero-image": (10, 10),
+    "hero-without-fetchpriority": (3, 3),
+    "eager-offscreen-image": (3, 15),
+    "img-missing-dimensions": (2, 10),
+    "dom-depth": (10, 10),
+    "dom-size": (10, 10),
+}
+
+
+def _walk(node: Node, depth: int = 0, ancestors: Tuple[Node, ...] = ()) -> Iterator[Tuple[Node, int, Tuple[Node, ...]]]:
+    for child in node.children:
+        yield child, depth + 1, ancestors
+        yield from _walk(child, depth + 1, ancestors + (child,))
+
+
+def _child(node: Optional[Node], tag: str) -> Optional[Node]:
+    return next((c for c in node.children if c.tag == tag), None) if node else None
+
+
+def library_name(src: str) -> str:
+    """Package a script URL loads: /npm/chart.js@4/dist/chart.umd.min.js -> chart.js."""
+    parts = urlsplit(src.strip())
+    if parts.hostname in ("unpkg.com", "cdn.jsdelivr.net"):
+        m = _PACKAGE_RE.match(parts.path)
+        if m:
+            return m.group(1).lower()
+    name = parts.path.rstrip("/").rsplit("/", 1)[-1]
+    return _FILE_RE.sub("", name.split("@")[0]).lower() or parts.hostname or src
+
+
+def _with_attrs(tag: str, updates: Dict[str, Optional[str]]) -> str:
+    """Start tag with attributes set (value None = boolean attribute)."""
+    for name, value in updates.items():
+        rendered = name if value is None else f'{name}="{value}"'
+        pattern = re.compile(rf'(\s){re.escape(name)}(?:\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s"\'>]+))?(?=[\s/>])', re.I)
+        if pattern.search(tag):
+            tag = pattern.sub(lambda m: m.group(1) + rendered, tag, count=1)
+        else:
+            end = _TAG_END_RE.search(tag)
+            tag = tag[:end.start()] + f" {rendered}" + tag[end.start():]
+    return tag
+
+
+class _Audit:
+    def __init__(self, html: str):
+        self.html = html
+        self.findings: List[Finding] = []             # left in the page
+        self.fixed: List[Finding] = []                # resolved by an edit
+        self.edits: List[Tuple[int, int, str]] = []   # (start, end, replacement) in the source
+
+    def finding(self, rule: str, message: str, node: Optional[Node], fixed: bool = False) -> None:
+        start, end = (node.start, node.inner_start) if node else (0, 0)
+        excerpt = self.html[start:end]
+        excerpt = excerpt if len(excerpt) <= 80 else excerpt[:77] + "..."
+        (self.fixed if fixed else self.findings).append(Finding(rule, "warning", message, start, end, excerpt))
+
+    def set_attrs(self, node: Node, updates: Dict[str, Optional[str]]) -> None:
+        self.edits.append((node.start, node.inner_start, _with_attrs(self.html[node.start:node.inner_start], updates)))
+
+    def remove(self, node: Node) -> None:
+        self.edits.append((node.start, node.end, ""))
+
+
+def _top_level(js: str) -> str:
+    """
+    `js` with comments dropped and bracket contents collapsed to "()", "{}",
+    "[]", except that top-level call arguments stay one level deep.
+    Regex literals are not recognised.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    i, n = 0, len(js)
+    while i < n:
+        ch = js[i]
+        keep = not stack or stack == ["("]
+        if js.startswith("//", i):
+            end = js.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        if js.startswith("/*", i):
+            end = js.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            if keep:
+                out.append(" ")
+            continue
+        if ch in "'\"`":
+            end = i + 1
+            while end < n and js[end] != ch and (ch == "`" or js[end] != "\n"):
+                end += 2 if js[end] == "\\" else 1
+            if keep:
+                out.append(js[i:end + 1])
+            i = end + 1
+            continue
+        if ch in "([{":
+            if keep:
+                out.append(ch)
+            stack.append(ch)
+        elif ch in ")]}":
+            if stack:
+                stack.pop()
+            if not stack or stack == ["("]:
+                out.append(ch)
+        elif keep:
+            out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def _waits_for_parse(js: str) -> bool:
+    """Whether an inline script only registers DOMContentLoaded/load handlers (and declares functions)."""
+    return not _DEFERRED_STATEMENT_RE.sub("", _top_level(js)).strip(" \t\r\n;")
+
+
+def _can_defer(scripts: List[Node], later: List[Node]) -> bool:
+    """
+    Deferring moves a script after parsing: only safe if no later classic
+    script runs code before that (a top-level `new Chart(...)` would find
+    the library missing).
+    """
+    for node in later:
+        if node in scripts or "defer" in node.attrs or "async" in node.attrs:
+            continue
+        if node.attrs.get("type", "").lower() in ("module", "application/ld+json", "importmap", "text/template"):
+            continue
+        if "src" in node.attrs or not _waits_for_parse(node.texts[0] if node.texts else ""):
+            return False
+    return True
+
+
+def audit_page(html: str, fix: bool = True) -> Tuple[str, Dict[str, Any]]:
+    """
+    Static performance audit of a generated page; applies the safe fixes
+    when `fix` is set. Returns (html, report) where the report scores the
+    page as shipped (`score`) and as generated (`score_before`).
+    """
+    root = parse_document(html or "")
+    doc = _child(root, "html")
+    if doc is None:
+        return html, {"score": None, "reason": "not a full document"}
+    head, body = _child(doc, "head"), _child(doc, "body")
+    a = _Audit(html)
+
+    nodes = list(_walk(doc))
+    scripts = [n for n, _, _ in nodes if n.tag == "script"]
+
+    # duplicate library loads (identical URLs are dropped, other versions reported)
+    seen: Dict[str, str] = {}
+    removed = set()
+    for n in scripts:
+        src = n.attrs.get("src")
+        if not src:
+            continue
+        name = library_name(src)
+        if name not in seen:
+            seen[name] = src.strip()
+            continue
+        same = fix and seen[name] == src.strip()
+        a.finding("duplicate-library", f"{name} loaded more than once", n, fixed=same)
+        if same:
+            a.remove(n)
+            removed.add(id(n))
+    scripts = [n for n in scripts if id(n) not in removed]
+
+    # render-blocking scripts in <head>
+    blocking = [
+        n for n in scripts
+        if head is not None and n in head.children and "src" in n.attrs
+        and not {"async", "defer"} & set(n.attrs) and n.attrs.get("type", "").lower() != "module"
+    ]
+    deferrable = [n for n in blocking if "cdn.tailwindcss.com" not in n.attrs["src"]]  # the JIT must run first
+    # every classic script after the first deferred one would now run before it
+    first = min((scripts.index(n) for n in deferrable), default=len(scripts))
+    safe = fix and bool(deferrable) and _can_defer(deferrable, scripts[first + 1:])
+    for n in blocking:
+        deferred = safe and n in deferrable
+        a.finding("render-blocking-script", f"Render-blocking script: {library_name(n.attrs['src'])}", n, deferred)
+        if deferred:
+            a.set_attrs(n, {"defer": None})
+
+    # images: hero first, lazy loading below the fold, intrinsic sizes
+    images = [(n, ancestors) for n, _, ancestors in nodes if n.tag == "img"]
+    top = [c for c in (body.children if body else []) if c.tag not in ("script", "style")]
+    first_visual = next((c for c in top if c.tag not in ("nav", "header") and any(
+        n.start >= c.start and n.end <= c.end for n, _ in images)), None)
+    above = [
+        n for n, ancestors in images
+        if any(p.tag in ("nav", "header") for p in ancestors) or (first_visual is not None and first_visual in ancestors)
+    ]
+    hero = next((n for n in above if n.attrs.get("data-ai-img") == "hero"), None) or next(
+        (n for n in above if not n.attrs.get("width", "").isdigit() or int(n.attrs["width"]) >= HERO_MIN_WIDTH), None
+    )
+    for n, _ in images:
+        updates: Dict[str, Optional[str]] = {}
+        if n is hero:
+            if n.attrs.get("loading", "").lower() == "lazy":
+                updates["loading"] = "eager"
+                a.finding("lazy-hero-image", "Hero image is lazy-loaded (delays LCP)", n, fix)
+            if "fetchpriority" not in n.attrs:
+                updates["fetchpriority"] = "high"
+                a.finding("hero-without-fetchpriority", "Hero image without fetchpriority=high", n, fix)
+        else:
+            if n not in above and "loading" not in n.attrs:
+                updates["loading"] = "lazy"
+                a.finding("eager-offscreen-image", "Below-the-fold image loads eagerly", n, fix)
+            if "decoding" not in n.attrs:
+                updates["decoding"] = "async"
+        if updates and fix:
+            a.set_attrs(n, updates)
+        if "width" not in n.attrs or "height" not in n.attrs:
+            a.finding("img-missing-dimensions", "Image without width/height (layout shift)", n)
+
+    # Chart.js canvases need a height-bounded wrapper or they grow forever
+    for n, _, ancestors in nodes:
+        if n.tag == "canvas" and not has_bounded_height(n.attrs) and not any(has_bounded_height(p.attrs) for p in ancestors):
+            a.finding("unbounded-canvas", "<canvas> without a height-bounded wrapper", n)
+
+    depth = max((d for _, d, _ in nodes), default=0)
+    if depth > MAX_DOM_DEPTH:
+        a.finding("dom-depth", f"DOM depth {depth} (> {MAX_DOM_DEPTH})", None)
+    if len(nodes) > MAX_DOM_NODES:
+        a.finding("dom-size", f"{len(nodes)} DOM elements (> {MAX_DOM_NODES})", None)
+
+    before = score(a.findings + a.fixed)
+    if not a.edits:
+        report = findings_report(a.findings)
+        report.update({"score": score(a.findings), "score_before": before, "fixes": 0, "dom_nodes": len(nodes), "dom_depth": depth})
+        return html, report
+
+    out = html
+    for start, end, replacement in sorted(a.edits, reverse=True):
+        out = out[:start] + replacement + out[end:]
+    # re-audit so the remaining findings point into the page as shipped
+    _, report = audit_page(out, fix=False)
+    report.update({"score_before": before, "fixes": len(a.edits)})
+    return out, report
+
+
+def score(findings: List[Finding]) -> int:
+    """100 minus weighted penalties, each rule capped."""
+    penalty: Dict[str, int] = {}
+    for f in findings:
+        points, cap = WEIGHTS.get(f.rule, (1, 5))
+        penalty[f.rule] = min(cap, penalty.get(f.rule, 0) + points)
+    return max(0, 100 - sum(penalty.values()))
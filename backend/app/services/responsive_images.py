@@ -0,0 +1,118 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+from app.core.config import settings
+from app.models.design_state import UnsplashImage
+
+# role -> candidate widths (px) and the `sizes` hint; roles come from data-ai-img / data-ai-bg
+ROLE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "avatar":  {"widths": [64, 128, 192], "sizes": "96px", "display": 96, "aspect": 1.0},
+    "logo":    {"widths": [64, 128, 256], "sizes": "128px", "display": 128, "aspect": 1.0},
+    "card":    {"widths": [320, 480, 640, 960], "sizes": "(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw",
+                "display": 480, "aspect": 0.75},
+    "gallery": {"widths": [320, 640, 960, 1280], "sizes": "(min-width: 768px) 50vw, 100vw",
+                "display": 640, "aspect": 0.75},
+    "hero":    {"widths": [640, 960, 1280, 1600, 1920], "sizes": "100vw", "display": 1280, "aspect": 0.5625},
+    "image":   {"widths": [480, 800, 1200], "sizes": "(min-width: 1024px) 50vw, 100vw",
+                "display": 800, "aspect": 0.5625},
+}
+# background roles: (1x width, 2x width)
+BACKGROUND_WIDTHS: Dict[str, Tuple[int, int]] = {
+    "hero": (1280, 1920),
+    "section": (1280, 1920),
+    "card": (640, 1280),
+    "background": (1280, 1920),
+    "tailwind-bg": (1280, 1920),
+}
+MAX_DENSITY = 2  # never ask for more than 2x the declared width
+# the only widths the proxy renders (and caches); requested widths snap up to the next one
+PROXY_WIDTHS: Tuple[int, ...] = tuple(sorted(
+    {32, 48, 64, 96, 128, 192, 256, 384, 512}
+    | {w for p in ROLE_PROFILES.values() for w in p["widths"]}
+    | {w for pair in BACKGROUND_WIDTHS.values() for w in pair}
+))
+
+_TW_WIDTH_RE = re.compile(r'(?:^|\s)(?:[a-z]+:)*(?:w|size)-(?:(\d+(?:\.5)?)|\[(\d+)px\])(?=\s|$)')
+
+
+def declared_width(attrs: Dict[str, Tuple[str, int, int]]) -> Optional[int]:
+    """Intrinsic width from the width attribute, else a fixed Tailwind w-*/size-* class (smallest breakpoint)."""
+    raw = attrs.get("width", ("",))[0].strip().lower().removesuffix("px")
+    if raw.isdigit():
+        return int(raw)
+    m = _TW_WIDTH_RE.search(attrs.get("class", ("",))[0])
+    if m:
+        return int(float(m.group(1)) * 4) if m.group(1) else int(m.group(2))
+    return None
+
+
+def declared_height(attrs: Dict[str, Tuple[str, int, int]]) -> Optional[int]:
+    raw = attrs.get("height", ("",))[0].strip().lower().removesuffix("px")
+    return int(raw) if raw.isdigit() else None
+
+
+def sized_url(image: UnsplashImage, width: int, height: Optional[int] = None) -> str:
+    """URL of a `width`-wide variant (cropped to `height` when given)."""
+    raw = image.raw_url
+    if not raw:
+        return image.url
+    if "picsum.photos" in raw:
+        return f"{raw}/{width}/{height or width}"
+    params = {"auto": "format", "q": "75", "w": width}
+    if height:
+        params.update({"h": height, "fit": "crop"})
+    return f"{raw}{'&' if '?' in raw else '?'}{urlencode(params)}"
+
+
+def snap_width(width: int) -> int:
+    """The smallest PROXY_WIDTHS entry at least `width` wide (the largest one beyond that)."""
+    return next((w for w in PROXY_WIDTHS if w >= width), PROXY_WIDTHS[-1])
+
+
+def proxied(url: str, width: int) -> str:
+    """Route through the local transcoding proxy when it is enabled."""
+    if not settings.IMAGE_PROXY_ENABLED:
+        return url
+    host = urlparse(url).hostname or ""
+    if host not in settings.IMAGE_PROXY_ALLOWED_HOSTS:
+        return url
+    return f"{settings.IMAGE_PROXY_BASE_URL}?{urlencode({'url': url, 'w': snap_width(width), 'fmt': 'auto'})}"
+
+
+def img_variants(
+    image: UnsplashImage, role: str, width: Optional[int], height: Optional[int]
+) -> Dict[str, Any]:
+    """src / srcset / sizes / intrinsic size for an <img> of the given role."""
+    profile = ROLE_PROFILES.get(role) or ROLE_PROFILES["image"]
+    aspect = (height / width) if width and height else profile["aspect"]
+    widths: List[int] = profile["widths"]
+    sizes = profile["sizes"]
+    if width and (role in ("avatar", "logo") or width <= 256):
+        # a small fixed display width: 1x and 2x of it are all the browser can use
+        widths = [width, width * MAX_DENSITY]
+        sizes = f"{width}px"
+    display = width or profile["display"]
+
+    if not image.raw_url:
+        return {"src": image.url, "srcset": "", "sizes": "", "width": display, "height": round(display * aspect)}
+
+    candidates = [(w, proxied(sized_url(image, w, round(w * aspect)), w)) for w in widths]
+    src_w = min((w for w, _ in candidates if w >= display), default=candidates[-1][0])
+    return {
+        "src": dict(candidates)[src_w],
+        "srcset": ", ".join(f"{url} {w}w" for w, url in candidates),
+        "sizes": sizes,
+        "width": display,
+        "height": round(display * aspect),
+    }
+
+
+def background_css(image: UnsplashImage, role: str) -> str:
+    """background-image declarations: a plain url() fallback plus a 1x/2x image-set()."""
+    one_x, two_x = BACKGROUND_WIDTHS.get(role, BACKGROUND_WIDTHS["background"])
+    if not image.raw_url:
+        return f"background-image:url({image.url})"
+    a = proxied(sized_url(image, one_x, round(one_x * 0.5625)), one_x)
+    b = proxied(sized_url(image, two_x, round(two_x * 0.5625)), two_x)
+    return f"background-image:url({a});background-image:image-set(url({a}) 1x, url({b}) 2x)"
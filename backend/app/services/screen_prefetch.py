@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.services.context_compactor import compact_json
+from app.services.image_resolver import ImageResolver
+
+logger = logging.getLogger(__name__)
+
+
+def screen_fingerprint(screen_config: Dict[str, Any], design_system: Dict[str, Any]) -> str:
+    raw = compact_json([screen_config, design_system])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class ScreenPrefetcher:
+    """
+    Process-local registry of screen generations started while the plan is still
+    streaming. The planner starts a task per closed `screens[i]` object; the
+    generator claims it if the final plan still has an identical screen config,
+    otherwise it is cancelled and the screen is generated from scratch.
+    """
+
+    def __init__(self):
+        # (thread_id, screen_id) -> (fingerprint, task)
+        self._tasks: Dict[Tuple[str, str], Tuple[str, asyncio.Task]] = {}
+        # thread_id -> image resolver shared by prefetched and regular generations
+        self._resolvers: Dict[str, ImageResolver] = {}
+        # thread_id -> the generation limit prefetched and regular generations share
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def start(
+        self,
+        thread_id: str,
+        screen_config: Dict[str, Any],
+        design_system: Dict[str, Any],
+        factory: Callable[[], Awaitable[str]],
+    ) -> None:
+        key = (thread_id, str(screen_config.get("id")))
+        fp = screen_fingerprint(screen_config, design_system)
+        existing = self._tasks.get(key)
+        if existing and existing[0] == fp:
+            return
+        if existing:
+            existing[1].cancel()
+        self._tasks[key] = (fp, asyncio.create_task(factory()))
+        logger.info(f"Prefetching screen {key[1]} for thread {thread_id}")
+
+    def claim(
+        self, thread_id: str, screen_config: Dict[str, Any], design_system: Dict[str, Any]
+    ) -> Optional[asyncio.Task]:
+        """Pop the in-flight task for this screen if its config is unchanged."""
+        entry = self._tasks.pop((thread_id, str(screen_config.get("id"))), None)
+        if not entry:
+            return None
+        fp, task = entry
+        if fp != screen_fingerprint(screen_config, design_system):
+            task.cancel()
+            return None
+        return task
+
+    def image_resolver(self, thread_id: str) -> ImageResolver:
+        """The thread's ImageResolver, so image searches started mid-stream are reused."""
+        resolver = self._resolvers.get(thread_id)
+        if resolver is None:
+            resolver = ImageResolver(max_concurrency=int(os.getenv("IMAGE_MAX_CONCURRENCY", "4")))
+            self._resolvers[thread_id] = resolver
+        return resolver
+
+    def semaphore(self, thread_id: str, limit: int) -> asyncio.Semaphore:
+        """
+        The thread's screen generation semaphore, so prefetched screens count
+        against the same limit as the generator's (created with `limit` on first use).
+        """
+        sem = self._semaphores.get(thread_id)
+        if sem is None:
+            sem = asyncio.Semaphore(limit)
+            self._semaphores[thread_id] = sem
+        return sem
+
+    def discard(self, thread_id: str) -> int:
+        """Cancel every unclaimed prefetch for a thread and forget its image resolver and semaphore."""
+        self._resolvers.pop(thread_id, None)
+        self._semaphores.pop(thread_id, None)
+        stale = [k for k in self._tasks if k[0] == thread_id]
+        for key in stale:
+            self._tasks.pop(key)[1].cancel()
+        return len(stale)
+
+
+# Shared per-process registry (planner starts, generator claims)
+screen_prefetcher = ScreenPrefetcher()
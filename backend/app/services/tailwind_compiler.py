@@ -0,0 +1,1154 @@
+import hashlib
+import logging
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.image_cache import MemoryTier
+
+logger = logging.getLogger(__name__)
+
+Decls = List[Tuple[str, str]]
+
+# ---- theme (Tailwind v3 defaults) ----
+_PALETTE_HEX = {
+    "slate": "f8fafc f1f5f9 e2e8f0 cbd5e1 94a3b8 64748b 475569 334155 1e293b 0f172a 020617",
+    "gray": "f9fafb f3f4f6 e5e7eb d1d5db 9ca3af 6b7280 4b5563 374151 1f2937 111827 030712",
+    "zinc": "fafafa f4f4f5 e4e4e7 d4d4d8 a1a1aa 71717a 52525b 3f3f46 27272a 18181b 09090b",
+    "neutral": "fafafa f5f5f5 e5e5e5 d4d4d4 a3a3a3 737373 525252 404040 262626 171717 0a0a0a",
+    "stone": "fafaf9 f5f5f4 e7e5e4 d6d3d1 a8a29e 78716c 57534e 44403c 292524 1c1917 0c0a09",
+    "red": "fef2f2 fee2e2 fecaca fca5a5 f87171 ef4444 dc2626 b91c1c 991b1b 7f1d1d 450a0a",
+    "orange": "fff7ed ffedd5 fed7aa fdba74 fb923c f97316 ea580c c2410c 9a3412 7c2d12 431407",
+    "amber": "fffbeb fef3c7 fde68a fcd34d fbbf24 f59e0b d97706 b45309 92400e 78350f 451a03",
+    "yellow": "fefce8 fef9c3 fef08a fde047 facc15 eab308 ca8a04 a16207 854d0e 713f12 422006",
+    "lime": "f7fee7 ecfccb d9f99d bef264 a3e635 84cc16 65a30d 4d7c0f 3f6212 365314 1a2e05",
+    "green": "f0fdf4 dcfce7 bbf7d0 86efac 4ade80 22c55e 16a34a 15803d 166534 14532d 052e16",
+    "emerald": "ecfdf5 d1fae5 a7f3d0 6ee7b7 34d399 10b981 059669 047857 065f46 064e3b 022c22",
+    "teal": "f0fdfa ccfbf1 99f6e4 5eead4 2dd4bf 14b8a6 0d9488 0f766e 115e59 134e4a 042f2e",
+    "cyan": "ecfeff cffafe a5f3fc 67e8f9 22d3ee 06b6d4 0891b2 0e7490 155e75 164e63 083344",
+    "sky": "f0f9ff e0f2fe bae6fd 7dd3fc 38bdf8 0ea5e9 0284c7 0369a1 075985 0c4a6e 082f49",
+    "blue": "eff6ff dbeafe bfdbfe 93c5fd 60a5fa 3b82f6 2563eb 1d4ed8 1e40af 1e3a8a 172554",
+    "indigo": "eef2ff e0e7ff c7d2fe a5b4fc 818cf8 6366f1 4f46e5 4338ca 3730a3 312e81 1e1b4b",
+    "violet": "f5f3ff ede9fe ddd6fe c4b5fd a78bfa 8b5cf6 7c3aed 6d28d9 5b21b6 4c1d95 2e1065",
+    "purple": "faf5ff f3e8ff e9d5ff d8b4fe c084fc a855f7 9333ea 7e22ce 6b21a8 581c87 3b0764",
+    "fuchsia": "fdf4ff fae8ff f5d0fe f0abfc e879f9 d946ef c026d3 a21caf 86198f 701a75 4a044e",
+    "pink": "fdf2f8 fce7f3 fbcfe8 f9a8d4 f472b6 ec4899 db2777 be185d 9d174d 831843 500724",
+    "rose": "fff1f2 ffe4e6 fecdd3 fda4af fb7185 f43f5e e11d48 be123c 9f1239 881337 4c0519",
+}
+_SHADES = ["50", "100", "200", "300", "400", "500", "600", "700", "800", "900", "950"]
+PALETTE: Dict[str, str] = {
+    f"{name}-{shade}": f"#{hex_}"
+    for name, row in _PALETTE_HEX.items()
+    for shade, hex_ in zip(_SHADES, row.split())
+}
+PALETTE.update({"black": "#000", "white": "#fff"})
+_KEYWORD_COLORS = {"transparent": "transparent", "current": "currentColor", "inherit": "inherit"}
+
+SCREENS = {"sm": 640, "md": 768, "lg": 1024, "xl": 1280, "2xl": 1536}
+FONT_SIZES = {
+    "xs": (".75rem", "1rem"), "sm": (".875rem", "1.25rem"), "base": ("1rem", "1.5rem"),
+    "lg": ("1.125rem", "1.75rem"), "xl": ("1.25rem", "1.75rem"), "2xl": ("1.5rem", "2rem"),
+    "3xl": ("1.875rem", "2.25rem"), "4xl": ("2.25rem", "2.5rem"), "5xl": ("3rem", "1"),
+    "6xl": ("3.75rem", "1"), "7xl": ("4.5rem", "1"), "8xl": ("6rem", "1"), "9xl": ("8rem", "1"),
+}
+FONT_WEIGHTS = {
+    "thin": "100", "extralight": "200", "light": "300", "normal": "400", "medium": "500",
+    "semibold": "600", "bold": "700", "extrabold": "800", "black": "900",
+}
+FONT_FAMILIES = {
+    "sans": 'ui-sans-serif,system-ui,sans-serif,"Apple Color Emoji","Segoe UI Emoji","Segoe UI Symbol","Noto Color Emoji"',
+    "serif": 'ui-serif,Georgia,Cambria,"Times New Roman",Times,serif',
+    "mono": 'ui-monospace,SFMono-Regular,Menlo,Monaco,Consolas,"Liberation Mono","Courier New",monospace',
+}
+LEADING = {"none": "1", "tight": "1.25", "snug": "1.375", "normal": "1.5", "relaxed": "1.625", "loose": "2"}
+TRACKING = {"tighter": "-.05em", "tight": "-.025em", "normal": "0em", "wide": ".025em", "wider": ".05em", "widest": ".1em"}
+RADII = {"none": "0px", "sm": ".125rem", "": ".25rem", "md": ".375rem", "lg": ".5rem", "xl": ".75rem",
+         "2xl": "1rem", "3xl": "1.5rem", "full": "9999px"}
+SHADOWS = {
+    "sm": "0 1px 2px 0 {c}", "": "0 1px 3px 0 {c}, 0 1px 2px -1px {c}",
+    "md": "0 4px 6px -1px {c}, 0 2px 4px -2px {c}", "lg": "0 10px 15px -3px {c}, 0 4px 6px -4px {c}",
+    "xl": "0 20px 25px -5px {c}, 0 8px 10px -6px {c}", "2xl": "0 25px 50px -12px {c}",
+    "inner": "inset 0 2px 4px 0 {c}",
+}
+_SHADOW_ALPHA = {"sm": ".05", "inner": ".05", "2xl": ".25"}
+DROP_SHADOWS = {
+    "sm": "drop-shadow(0 1px 1px rgb(0 0 0/.05))",
+    "": "drop-shadow(0 1px 2px rgb(0 0 0/.1)) drop-shadow(0 1px 1px rgb(0 0 0/.06))",
+    "md": "drop-shadow(0 4px 3px rgb(0 0 0/.07)) drop-shadow(0 2px 2px rgb(0 0 0/.06))",
+    "lg": "drop-shadow(0 10px 8px rgb(0 0 0/.04)) drop-shadow(0 4px 3px rgb(0 0 0/.1))",
+    "xl": "drop-shadow(0 20px 13px rgb(0 0 0/.03)) drop-shadow(0 8px 5px rgb(0 0 0/.08))",
+    "2xl": "drop-shadow(0 25px 25px rgb(0 0 0/.15))",
+    "none": "drop-shadow(0 0 #0000)",
+}
+BLURS = {"none": "0", "sm": "4px", "": "8px", "md": "12px", "lg": "16px", "xl": "24px", "2xl": "40px", "3xl": "64px"}
+MAX_WIDTHS = {
+    "none": "none", "xs": "20rem", "sm": "24rem", "md": "28rem", "lg": "32rem", "xl": "36rem", "2xl": "42rem",
+    "3xl": "48rem", "4xl": "56rem", "5xl": "64rem", "6xl": "72rem", "7xl": "80rem", "prose": "65ch",
+    **{f"screen-{k}": f"{v}px" for k, v in SCREENS.items()},
+}
+COLUMN_WIDTHS = {"3xs": "16rem", "2xs": "18rem",
+                 **{k: v for k, v in MAX_WIDTHS.items() if k.endswith(("xs", "sm", "md", "lg", "xl"))}}
+EASINGS = {"linear": "linear", "in": "cubic-bezier(.4,0,1,1)", "out": "cubic-bezier(0,0,.2,1)",
+           "in-out": "cubic-bezier(.4,0,.2,1)"}
+TRANSITIONS = {
+    "": "color,background-color,border-color,text-decoration-color,fill,stroke,opacity,box-shadow,transform,filter,backdrop-filter",
+    "all": "all", "colors": "color,background-color,border-color,text-decoration-color,fill,stroke",
+    "opacity": "opacity", "shadow": "box-shadow", "transform": "transform",
+}
+ANIMATIONS = {
+    "spin": ("spin 1s linear infinite", "@keyframes spin{to{transform:rotate(360deg)}}"),
+    "ping": ("ping 1s cubic-bezier(0,0,.2,1) infinite",
+             "@keyframes ping{75%,100%{transform:scale(2);opacity:0}}"),
+    "pulse": ("pulse 2s cubic-bezier(.4,0,.6,1) infinite", "@keyframes pulse{50%{opacity:.5}}"),
+    "bounce": ("bounce 1s infinite",
+               "@keyframes bounce{0%,100%{transform:translateY(-25%);animation-timing-function:cubic-bezier(.8,0,1,1)}"
+               "50%{transform:none;animation-timing-function:cubic-bezier(0,0,.2,1)}}"),
+    "none": ("none", ""),
+}
+_TRANSFORM = ("translate(var(--tw-translate-x,0),var(--tw-translate-y,0)) rotate(var(--tw-rotate,0)) "
+              "skewX(var(--tw-skew-x,0)) skewY(var(--tw-skew-y,0)) scaleX(var(--tw-scale-x,1)) scaleY(var(--tw-scale-y,1))")
+_FILTER = ("var(--tw-blur,) var(--tw-brightness,) var(--tw-contrast,) var(--tw-grayscale,) var(--tw-hue-rotate,) "
+           "var(--tw-invert,) var(--tw-saturate,) var(--tw-sepia,) var(--tw-drop-shadow,)")
+_BACKDROP = ("var(--tw-backdrop-blur,) var(--tw-backdrop-brightness,) var(--tw-backdrop-grayscale,) "
+             "var(--tw-backdrop-opacity,) var(--tw-backdrop-saturate,)")
+_BOX_SHADOW = "var(--tw-ring-offset-shadow,0 0 #0000),var(--tw-ring-shadow,0 0 #0000),var(--tw-shadow)"
+
+# Tailwind's preflight (condensed), plus the defaults ring/shadow utilities compose with
+PREFLIGHT = (
+    "*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb;"
+    "--tw-ring-offset-width:0px;--tw-ring-offset-color:#fff;--tw-ring-color:rgb(59 130 246/.5);"
+    "--tw-ring-offset-shadow:0 0 #0000;--tw-ring-shadow:0 0 #0000;--tw-shadow:0 0 #0000;--tw-shadow-colored:0 0 #0000}"
+    "::before,::after{--tw-content:''}"
+    f"html,:host{{line-height:1.5;-webkit-text-size-adjust:100%;tab-size:4;font-family:{FONT_FAMILIES['sans']};"
+    "font-feature-settings:normal;font-variation-settings:normal;-webkit-tap-highlight-color:transparent}"
+    "body{margin:0;line-height:inherit}hr{height:0;color:inherit;border-top-width:1px}"
+    "abbr:where([title]){text-decoration:underline dotted}h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}"
+    "a{color:inherit;text-decoration:inherit}b,strong{font-weight:bolder}"
+    f"code,kbd,samp,pre{{font-family:{FONT_FAMILIES['mono']};font-size:1em}}small{{font-size:80%}}"
+    "sub,sup{font-size:75%;line-height:0;position:relative;vertical-align:baseline}sub{bottom:-.25em}sup{top:-.5em}"
+    "table{text-indent:0;border-color:inherit;border-collapse:collapse}"
+    "button,input,optgroup,select,textarea{font-family:inherit;font-feature-settings:inherit;"
+    "font-variation-settings:inherit;font-size:100%;font-weight:inherit;line-height:inherit;letter-spacing:inherit;"
+    "color:inherit;margin:0;padding:0}button,select{text-transform:none}"
+    "button,input:where([type='button']),input:where([type='reset']),input:where([type='submit'])"
+    "{-webkit-appearance:button;background-color:transparent;background-image:none}"
+    ":-moz-focusring{outline:auto}:-moz-ui-invalid{box-shadow:none}progress{vertical-align:baseline}"
+    "::-webkit-inner-spin-button,::-webkit-outer-spin-button{height:auto}"
+    "[type='search']{-webkit-appearance:textfield;outline-offset:-2px}::-webkit-search-decoration{-webkit-appearance:none}"
+    "::-webkit-file-upload-button{-webkit-appearance:button;font:inherit}summary{display:list-item}"
+    "blockquote,dl,dd,h1,h2,h3,h4,h5,h6,hr,figure,p,pre{margin:0}fieldset{margin:0;padding:0}legend{padding:0}"
+    "ol,ul,menu{list-style:none;margin:0;padding:0}dialog{padding:0}textarea{resize:vertical}"
+    "input::placeholder,textarea::placeholder{opacity:1;color:#9ca3af}button,[role=\"button\"]{cursor:pointer}"
+    ":disabled{cursor:default}img,svg,video,canvas,audio,iframe,embed,object{display:block;vertical-align:middle}"
+    "img,video{max-width:100%;height:auto}[hidden]:where(:not([hidden=\"until-found\"])){display:none}"
+)
+
+# ---- variants ----
+PSEUDO_VARIANTS = {
+    "first": ":first-child", "last": ":last-child", "only": ":only-child", "odd": ":nth-child(odd)",
+    "even": ":nth-child(even)", "first-of-type": ":first-of-type", "last-of-type": ":last-of-type",
+    "empty": ":empty", "disabled": ":disabled", "enabled": ":enabled", "checked": ":checked",
+    "required": ":required", "invalid": ":invalid", "placeholder-shown": ":placeholder-shown",
+    "open": "[open]", "visited": ":visited", "focus-within": ":focus-within", "hover": ":hover",
+    "focus": ":focus", "focus-visible": ":focus-visible", "active": ":active",
+}
+PSEUDO_ELEMENTS = {
+    "placeholder": "::placeholder", "file": "::file-selector-button", "marker": "::marker",
+    "selection": "::selection", "before": "::before", "after": "::after",
+}
+MEDIA_VARIANTS = {
+    "dark": "(prefers-color-scheme:dark)", "motion-safe": "(prefers-reduced-motion:no-preference)",
+    "motion-reduce": "(prefers-reduced-motion:reduce)", "portrait": "(orientation:portrait)",
+    "landscape": "(orientation:landscape)", "print": "print",
+}
+# .container is emitted ahead of all utilities so max-w-* still wins over it
+CONTAINER_CSS = ".container{width:100%}" + "".join(
+    f"@media (min-width:{px}px){{.container{{max-width:{px}px}}}}" for px in SCREENS.values()
+)
+_VARIANT_ORDER = {name: i for i, name in enumerate(list(PSEUDO_VARIANTS) + list(PSEUDO_ELEMENTS))}
+
+# ---- core plugin order (decides which of two conflicting utilities wins) ----
+PLUGINS = [
+    "sr", "pointer-events", "visibility", "position", "inset", "isolation", "z", "order", "col", "row",
+    "float", "margin", "box", "line-clamp", "display", "aspect", "size", "height", "max-height", "min-height", "width",
+    "min-width", "max-width", "flex", "shrink", "grow", "basis", "origin", "translate", "rotate", "scale", "transform",
+    "animation", "cursor", "touch", "select", "resize", "list", "appearance", "columns", "grid-cols", "grid-rows", "flex-direction",
+    "flex-wrap", "place-content", "place-items", "align-content", "align-items", "justify-content", "justify-items",
+    "gap", "space", "divide", "divide-color", "place-self", "self", "justify-self", "overflow", "overscroll",
+    "scroll", "truncate", "whitespace", "break", "rounded", "border-width", "border-style", "border-color",
+    "bg-color", "bg-image", "gradient-from", "gradient-via", "gradient-to", "bg-size", "bg-attachment", "bg-clip",
+    "bg-position", "bg-repeat", "object-fit", "object-position", "fill", "stroke", "padding", "text-align",
+    "indent", "align", "font-family", "font-size", "font-weight", "text-transform", "font-style", "leading", "tracking",
+    "text-color", "decoration", "decoration-color", "underline-offset", "antialiased", "placeholder-color",
+    "caret", "accent", "opacity", "mix-blend", "shadow", "shadow-color", "outline", "outline-color", "ring",
+    "ring-color", "ring-offset", "ring-offset-color", "filter", "backdrop", "transition", "delay", "duration", "ease",
+    "will-change", "content", "arbitrary",
+]
+_PLUGIN_RANK = {name: i for i, name in enumerate(PLUGINS)}
+# selector suffix for utilities that style children or pseudo-elements
+_PLUGIN_SUFFIX = {
+    "space": " > :not([hidden]) ~ :not([hidden])",
+    "divide": " > :not([hidden]) ~ :not([hidden])",
+    "divide-color": " > :not([hidden]) ~ :not([hidden])",
+    "placeholder-color": "::placeholder",
+}
+
+_FRACTION_RE = re.compile(r"(\d+)/(\d+)")
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+_SPACING_RE = re.compile(r"\d+(?:\.5)?")
+_COLOR_LITERAL_RE = re.compile(r"^(#[0-9a-fA-F]{3,8}|rgba?\(|hsla?\(|color-mix\()")
+_LENGTH_RE = re.compile(r"^-?[\d.]+(px|rem|em|%|vh|vw|svh|dvh|ch|ex)$|^calc\(|^clamp\(|^min\(|^max\(|^var\(")
+_SPLIT_VARIANTS_RE = re.compile(r":(?![^\[]*\])")
+_CLASS_ATTR_RE = re.compile(r'\bclass\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.I)
+_SCRIPT_RE = re.compile(r"<script\b([^>]*)>(.*?)</script\s*>", re.I | re.S)
+_STRING_RE = re.compile(r"""(["'`])((?:(?!\1)[^\\\n]|\\.)*)\1""")
+CDN_SCRIPT_RE = re.compile(
+    r'[ \t]*<script\b[^>]*\bsrc\s*=\s*["\']https?://cdn\.tailwindcss\.com[^"\']*["\'][^>]*>\s*</script\s*>[ \t]*\n?',
+    re.I,
+)
+
+
+# Tailwind v3 utility roots (first dash-separated segment), whether or not this compiler implements them:
+# a class starting with one that does not compile keeps the CDN
+TAILWIND_ROOTS = frozenset("""
+    accent align animate antialiased appearance aspect auto backdrop basis bg blur border bottom box break
+    brightness caret clear col columns container content contrast cursor decoration delay diagonal divide drop
+    duration ease end fill filter flex float font forced from gap grayscale grid grow h hue hyphens indent inline
+    inset invert isolation italic justify leading left line lining list m max mb me min mix ml mr ms mt mx my
+    normal not object oldstyle opacity order ordinal origin outline overflow overscroll p pb pe pl place
+    placeholder pointer pr proportional ps pt px py resize right ring rotate rounded row saturate scale scroll
+    select self sepia shadow shrink size skew slashed snap space sr stacked start stroke subpixel table tabular
+    text to top touch tracking transform transition translate truncate underline via visible w whitespace will
+    z
+""".split())
+# roots that are whole utilities on their own (everything else needs a value: "text" alone is no utility)
+_STANDALONE_UTILITIES = frozenset("""
+    antialiased block collapse container contents fixed flex grid hidden inline invisible isolate italic
+    lowercase overline relative resize rounded shadow static sticky table transform truncate underline
+    uppercase visible
+""".split())
+_CSS_CLASS_RE = re.compile(r"\.((?:\\.|[\w-])+)")
+_STYLE_RE = re.compile(r"<style\b[^>]*>(.*?)</style\s*>", re.I | re.S)
+
+
+def _fmt(n: float) -> str:
+    s = f"{n:.6f}".rstrip("0").rstrip(".")
+    return s[1:] if s.startswith("0.") else ("-" + s[2:] if s.startswith("-0.") else s)
+
+
+_MATH_FN_RE = re.compile(r"(?<![\w-])(?:calc|min|max|clamp)\(")
+_MATH_KEEP = ("var(", "env(", "min-content", "max-content", "fit-content")
+
+
+def _math_spacing(value: str) -> str:
+    """
+    Spaces around + - * / inside calc()/min()/max()/clamp(), as Tailwind adds
+    them: `calc(100vh-4rem)` is invalid CSS, `calc(100vh - 4rem)` is not.
+    var()/env() arguments and *-content keywords are left alone; an operator
+    right after `(`, `,` or another operator is a sign.
+    """
+    m = _MATH_FN_RE.search(value)
+    if m is None:
+        return value
+    out, i = [value[:m.start()]], m.start()
+    while i < len(value):
+        keep = next((k for k in _MATH_KEEP if value.startswith(k, i)), None)
+        if keep:
+            end = i + len(keep)
+            if keep.endswith("("):
+                depth = 1
+                while end < len(value) and depth:
+                    depth += {"(": 1, ")": -1}.get(value[end], 0)
+                    end += 1
+            out.append(value[i:end])
+            i = end
+            continue
+        ch = value[i]
+        last = "".join(out).rstrip()[-1:]
+        if ch in "+-*/" and last and last not in "(+-*/,":
+            out.append(f" {ch} ")
+        else:
+            out.append(ch)
+        i += 1
+    return re.sub(r" {2,}", " ", "".join(out))
+
+
+def _arbitrary(v: str) -> Optional[str]:
+    if len(v) > 2 and v[0] == "[" and v[-1] == "]":
+        # underscores mean spaces, except inside url() where they are part of the path
+        return v[1:-1] if "url(" in v else _math_spacing(v[1:-1].replace("_", " "))
+    return None
+
+
+def _negate(value: str, neg: bool) -> str:
+    if not neg:
+        return value
+    return f"-{value}" if value[:1].isdigit() or value[:1] == "." else f"calc({value} * -1)"
+
+
+def _spacing(v: str) -> Optional[str]:
+    arb = _arbitrary(v)
+    if arb is not None:
+        return arb
+    if v == "px":
+        return "1px"
+    if v == "0":
+        return "0px"
+    if _SPACING_RE.fullmatch(v):
+        return f"{_fmt(float(v) / 4)}rem"
+    return None
+
+
+def _fraction(v: str) -> Optional[str]:
+    m = _FRACTION_RE.fullmatch(v)
+    if m and int(m.group(2)):
+        return f"{_fmt(int(m.group(1)) / int(m.group(2)) * 100)}%"
+    return None
+
+
+def _size(v: str, axis: str) -> Optional[str]:
+    """w-/h-/size- values: spacing scale, fractions and keywords."""
+    keywords = {"auto": "auto", "full": "100%", "min": "min-content", "max": "max-content", "fit": "fit-content",
+                "screen": "100vw" if axis == "w" else "100vh", "svh": "100svh", "dvh": "100dvh", "lvh": "100lvh",
+                "svw": "100svw", "dvw": "100dvw"}
+    return keywords.get(v) or _spacing(v) or _fraction(v)
+
+
+def _hex_rgb(hex_: str) -> Optional[str]:
+    h = hex_.lstrip("#")
+    if len(h) == 3:
+        h = "".join(c * 2 for c in h)
+    if len(h) != 6:
+        return None
+    return " ".join(str(int(h[i:i + 2], 16)) for i in (0, 2, 4))
+
+
+def _color(v: str, alpha_override: Optional[str] = None) -> Optional[str]:
+    """CSS colour for `blue-500`, `white/10`, `[#0ea5e9]`, `black/[.35]`…"""
+    name, _, alpha = v.partition("/")
+    if alpha:
+        arb = _arbitrary(alpha)
+        if arb is not None:
+            alpha = arb
+        elif _NUMBER_RE.fullmatch(alpha):
+            alpha = _fmt(float(alpha) / 100)
+        else:
+            return None
+    alpha = alpha_override or alpha
+    if name in _KEYWORD_COLORS:
+        return _KEYWORD_COLORS[name] if not alpha else None
+    arb = _arbitrary(name)
+    if arb is not None:
+        if not _COLOR_LITERAL_RE.match(arb):
+            return None
+        color = arb
+    else:
+        color = PALETTE.get(name)
+        if color is None:
+            return None
+    if not alpha:
+        return color
+    rgb = _hex_rgb(color) if color.startswith("#") else None
+    return f"rgb({rgb}/{alpha})" if rgb else f"color-mix(in srgb,{color} calc({alpha} * 100%),transparent)"
+
+
+def _transparent(v: str) -> str:
+    color = _color(v.partition("/")[0]) or "transparent"
+    rgb = _hex_rgb(color) if color.startswith("#") else None
+    return f"rgb({rgb}/0)" if rgb else "transparent"
+
+
+# ---- utility handlers: (value, negative) -> declarations ----
+Handler = Callable[[str, bool], Optional[Decls]]
+_HANDLERS: Dict[str, List[Tuple[str, int, Handler]]] = {}
+
+
+def _utility(prefix: str, plugin: str, sub: int = 0):
+    def register(fn: Handler) -> Handler:
+        _HANDLERS.setdefault(prefix, []).append((plugin, sub, fn))
+        return fn
+    return register
+
+
+def _props(prefix: str, plugin: str, props: Tuple[str, ...], value_fn: Callable[[str], Optional[str]],
+           sub: int = 0, negative: bool = False) -> None:
+    def handler(v: str, neg: bool) -> Optional[Decls]:
+        if neg and not negative:
+            return None
+        value = value_fn(v)
+        return [(p, _negate(value, neg)) for p in props] if value is not None else None
+    _HANDLERS.setdefault(prefix, []).append((plugin, sub, handler))
+
+
+_SIDES = {"": ("",), "x": ("-left", "-right"), "y": ("-top", "-bottom"), "t": ("-top",), "r": ("-right",),
+          "b": ("-bottom",), "l": ("-left",), "s": ("-inline-start",), "e": ("-inline-end",)}
+for _short, _suffixes in _SIDES.items():
+    _sub = 0 if not _short else (1 if _short in "xy" else 2)
+    _props(f"m{_short}", "margin", tuple(f"margin{s}" for s in _suffixes),
+           lambda v: "auto" if v == "auto" else _spacing(v), _sub, negative=True)
+    _props(f"p{_short}", "padding", tuple(f"padding{s}" for s in _suffixes), _spacing, _sub)
+    _props(f"scroll-m{_short}", "scroll", tuple(f"scroll-margin{s}" for s in _suffixes), _spacing, _sub)
+    _props(f"scroll-p{_short}", "scroll", tuple(f"scroll-padding{s}" for s in _suffixes), _spacing, _sub)
+
+
+def _inset_value(v: str) -> Optional[str]:
+    return {"auto": "auto", "full": "100%"}.get(v) or _spacing(v) or _fraction(v)
+
+
+_props("inset", "inset", ("inset",), _inset_value, 0, True)
+_props("inset-x", "inset", ("left", "right"), _inset_value, 1, True)
+_props("inset-y", "inset", ("top", "bottom"), _inset_value, 1, True)
+for _side in ("top", "right", "bottom", "left", "start", "end"):
+    _props(_side, "inset", ("inset-inline-" + _side,) if _side in ("start", "end") else (_side,), _inset_value, 2, True)
+
+_props("w", "width", ("width",), lambda v: _size(v, "w"))
+_props("h", "height", ("height",), lambda v: _size(v, "h"))
+_props("size", "size", ("width", "height"), lambda v: _size(v, "w") if v != "screen" else None)
+_props("min-w", "min-width", ("min-width",), lambda v: _size(v, "w"))
+_props("min-h", "min-height", ("min-height",), lambda v: _size(v, "h"))
+_props("max-w", "max-width", ("max-width",),
+       lambda v: MAX_WIDTHS.get(v) or ("100%" if v == "full" else None) or _size(v, "w"))
+_props("max-h", "max-height", ("max-height",), lambda v: "none" if v == "none" else _size(v, "h"))
+_props("basis", "basis", ("flex-basis",), lambda v: _size(v, "w"))
+_props("gap", "gap", ("gap",), _spacing)
+_props("gap-x", "gap", ("column-gap",), _spacing, 1)
+_props("gap-y", "gap", ("row-gap",), _spacing, 1)
+_props("z", "z", ("z-index",), lambda v: v if v == "auto" or v.isdigit() else _arbitrary(v), negative=True)
+_props("order", "order", ("order",),
+       lambda v: {"first": "-9999", "last": "9999", "none": "0"}.get(v) or (v if v.isdigit() else _arbitrary(v)),
+       negative=True)
+_props("opacity", "opacity", ("opacity",), lambda v: _fmt(int(v) / 100) if v.isdigit() else _arbitrary(v))
+_props("duration", "duration", ("transition-duration",), lambda v: f"{v}ms" if v.isdigit() else _arbitrary(v))
+_props("delay", "delay", ("transition-delay",), lambda v: f"{v}ms" if v.isdigit() else _arbitrary(v))
+_props("ease", "ease", ("transition-timing-function",), lambda v: EASINGS.get(v) or _arbitrary(v))
+_props("leading", "leading", ("line-height",),
+       lambda v: LEADING.get(v) or (f"{_fmt(int(v) / 4)}rem" if v.isdigit() else _arbitrary(v)))
+_props("tracking", "tracking", ("letter-spacing",), lambda v: TRACKING.get(v) or _arbitrary(v), negative=True)
+_props("font", "font-weight", ("font-weight",), lambda v: FONT_WEIGHTS.get(v))
+_props("font", "font-family", ("font-family",),
+       lambda v: FONT_FAMILIES.get(v) or (a if (a := _arbitrary(v)) and not a[:1].isdigit() else None))
+_props("indent", "indent", ("text-indent",), _spacing, negative=True)
+_props("columns", "columns", ("columns",),
+       lambda v: "auto" if v == "auto" else v if v.isdigit() else COLUMN_WIDTHS.get(v) or _arbitrary(v))
+_props("aspect", "aspect", ("aspect-ratio",),
+       lambda v: {"auto": "auto", "square": "1/1", "video": "16/9"}.get(v) or _arbitrary(v))
+
+
+@_utility("line-clamp", "line-clamp")
+def _line_clamp(v: str, neg: bool) -> Optional[Decls]:
+    if not v.isdigit():
+        return None
+    return [("overflow", "hidden"), ("display", "-webkit-box"), ("-webkit-box-orient", "vertical"),
+            ("-webkit-line-clamp", v)]
+
+
+_props("underline-offset", "underline-offset", ("text-underline-offset",),
+       lambda v: f"{v}px" if v.isdigit() else ("auto" if v == "auto" else _arbitrary(v)))
+_props("decoration", "decoration", ("text-decoration-thickness",),
+       lambda v: f"{v}px" if v.isdigit() else None)
+_props("origin", "origin", ("transform-origin",),
+       lambda v: v.replace("-", " ") if v in ("center", "top", "top-right", "right", "bottom-right", "bottom",
+                                              "bottom-left", "left", "top-left") else _arbitrary(v))
+_props("object", "object-position", ("object-position",),
+       lambda v: v.replace("-", " ") if v in ("center", "top", "bottom", "left", "right", "left-top", "right-top",
+                                              "left-bottom", "right-bottom") else None)
+_props("bg", "bg-position", ("background-position",),
+       lambda v: v.replace("-", " ") if v in ("center", "top", "bottom", "left", "right", "left-top", "right-top",
+                                              "left-bottom", "right-bottom") else None)
+_props("bg", "bg-size", ("background-size",), lambda v: v if v in ("auto", "cover", "contain") else None)
+_props("will-change", "will-change", ("will-change",),
+       lambda v: {"auto": "auto", "scroll": "scroll-position", "contents": "contents", "transform": "transform"}.get(v))
+_props("ring-offset", "ring-offset", ("--tw-ring-offset-width",),
+       lambda v: f"{v}px" if v.isdigit() else _arbitrary(v))
+_props("ring-offset", "ring-offset-color", ("--tw-ring-offset-color",), _color)
+_props("outline-offset", "outline", ("outline-offset",), lambda v: f"{v}px" if v.isdigit() else _arbitrary(v))
+
+
+def _color_props(prefix: str, plugin: str, props: Tuple[str, ...]) -> None:
+    _props(prefix, plugin, props, _color)
+
+
+_color_props("bg", "bg-color", ("background-color",))
+_color_props("text", "text-color", ("color",))
+_color_props("border", "border-color", ("border-color",))
+_color_props("border-x", "border-color", ("border-left-color", "border-right-color"))
+_color_props("border-y", "border-color", ("border-top-color", "border-bottom-color"))
+for _side in ("t", "r", "b", "l"):
+    _color_props(f"border-{_side}", "border-color", (f"border{_SIDES[_side][0]}-color",))
+_color_props("divide", "divide-color", ("border-color",))
+_color_props("placeholder", "placeholder-color", ("color",))
+_color_props("ring", "ring-color", ("--tw-ring-color",))
+_color_props("outline", "outline-color", ("outline-color",))
+_color_props("decoration", "decoration-color", ("text-decoration-color",))
+_color_props("caret", "caret", ("caret-color",))
+_color_props("accent", "accent", ("accent-color",))
+_color_props("fill", "fill", ("fill",))
+_color_props("stroke", "stroke", ("stroke",))
+
+
+@_utility("text", "font-size")
+def _text_size(v: str, neg: bool) -> Optional[Decls]:
+    if v in FONT_SIZES:
+        size, line = FONT_SIZES[v]
+        return [("font-size", size), ("line-height", line)]
+    size, _, line = v.partition("/")
+    if size in FONT_SIZES and line:
+        line_value = LEADING.get(line) or (f"{_fmt(int(line) / 4)}rem" if line.isdigit() else _arbitrary(line))
+        return [("font-size", FONT_SIZES[size][0]), ("line-height", line_value)] if line_value else None
+    arb = _arbitrary(v)
+    if arb and _LENGTH_RE.match(arb):
+        return [("font-size", arb)]
+    return None
+
+
+def _width_value(v: str) -> Optional[str]:
+    if v == "":
+        return "1px"
+    if v.isdigit():
+        return f"{v}px"
+    arb = _arbitrary(v)
+    return arb if arb and _LENGTH_RE.match(arb) else None
+
+
+for _short, _suffixes in _SIDES.items():
+    if _short in ("s", "e"):
+        continue
+    _props("border" + (f"-{_short}" if _short else ""), "border-width",
+           tuple(f"border{s}-width" for s in _suffixes), _width_value, 0 if not _short else (1 if _short in "xy" else 2))
+
+_RADIUS_SIDES = {"": ("",), "t": ("-top-left", "-top-right"), "r": ("-top-right", "-bottom-right"),
+                 "b": ("-bottom-right", "-bottom-left"), "l": ("-top-left", "-bottom-left"),
+                 "tl": ("-top-left",), "tr": ("-top-right",), "br": ("-bottom-right",), "bl": ("-bottom-left",)}
+for _short, _corners in _RADIUS_SIDES.items():
+    _props("rounded" + (f"-{_short}" if _short else ""), "rounded",
+           tuple(f"border{c}-radius" for c in _corners),
+           lambda v: RADII.get(v) if v in RADII else _arbitrary(v), len(_short))
+
+
+@_utility("space-x", "space")
+def _space_x(v: str, neg: bool) -> Optional[Decls]:
+    value = _spacing(v)
+    return [("margin-left", _negate(value, neg))] if value else None
+
+
+@_utility("space-y", "space")
+def _space_y(v: str, neg: bool) -> Optional[Decls]:
+    value = _spacing(v)
+    return [("margin-top", _negate(value, neg))] if value else None
+
+
+@_utility("divide-x", "divide")
+def _divide_x(v: str, neg: bool) -> Optional[Decls]:
+    width = _width_value(v)
+    return [("border-left-width", width), ("border-right-width", "0")] if width and not neg else None
+
+
+@_utility("divide-y", "divide")
+def _divide_y(v: str, neg: bool) -> Optional[Decls]:
+    width = _width_value(v)
+    return [("border-top-width", width), ("border-bottom-width", "0")] if width and not neg else None
+
+
+@_utility("grid-cols", "grid-cols")
+def _grid_cols(v: str, neg: bool) -> Optional[Decls]:
+    if v.isdigit():
+        return [("grid-template-columns", f"repeat({v},minmax(0,1fr))")]
+    value = "none" if v == "none" else ("subgrid" if v == "subgrid" else _arbitrary(v))
+    return [("grid-template-columns", value)] if value else None
+
+
+@_utility("grid-rows", "grid-rows")
+def _grid_rows(v: str, neg: bool) -> Optional[Decls]:
+    if v.isdigit():
+        return [("grid-template-rows", f"repeat({v},minmax(0,1fr))")]
+    value = "none" if v == "none" else ("subgrid" if v == "subgrid" else _arbitrary(v))
+    return [("grid-template-rows", value)] if value else None
+
+
+def _span(prop: str):
+    def handler(v: str, neg: bool) -> Optional[Decls]:
+        if v == "full":
+            return [(prop, "1 / -1")]
+        if v.isdigit():
+            return [(prop, f"span {v} / span {v}")]
+        return None
+    return handler
+
+
+_utility("col-span", "col")(_span("grid-column"))
+_utility("row-span", "row")(_span("grid-row"))
+for _edge in ("start", "end"):
+    _props(f"col-{_edge}", "col", (f"grid-column-{_edge}",), lambda v: v if v.isdigit() or v == "auto" else None, 1)
+    _props(f"row-{_edge}", "row", (f"grid-row-{_edge}",), lambda v: v if v.isdigit() or v == "auto" else None, 1)
+
+
+@_utility("flex", "flex")
+def _flex(v: str, neg: bool) -> Optional[Decls]:
+    value = {"1": "1 1 0%", "auto": "1 1 auto", "initial": "0 1 auto", "none": "none"}.get(v) or _arbitrary(v)
+    return [("flex", value)] if value else None
+
+
+@_utility("grow", "grow")
+def _grow(v: str, neg: bool) -> Optional[Decls]:
+    return [("flex-grow", v or "1")] if v in ("", "0") else None
+
+
+@_utility("shrink", "shrink")
+def _shrink(v: str, neg: bool) -> Optional[Decls]:
+    return [("flex-shrink", v or "1")] if v in ("", "0") else None
+
+
+def _transform_var(name: str, value_fn: Callable[[str], Optional[str]]) -> Handler:
+    def handler(v: str, neg: bool) -> Optional[Decls]:
+        value = value_fn(v)
+        if value is None:
+            return None
+        return [(name, _negate(value, neg)), ("transform", _TRANSFORM)]
+    return handler
+
+
+def _translate_value(v: str) -> Optional[str]:
+    return "100%" if v == "full" else (_spacing(v) or _fraction(v))
+
+
+def _scale_value(v: str) -> Optional[str]:
+    return _fmt(int(v) / 100) if v.isdigit() else _arbitrary(v)
+
+
+def _deg_value(v: str) -> Optional[str]:
+    return f"{v}deg" if v.isdigit() else _arbitrary(v)
+
+
+_utility("translate-x", "translate")(_transform_var("--tw-translate-x", _translate_value))
+_utility("translate-y", "translate")(_transform_var("--tw-translate-y", _translate_value))
+_utility("rotate", "rotate")(_transform_var("--tw-rotate", _deg_value))
+_utility("skew-x", "rotate")(_transform_var("--tw-skew-x", _deg_value))
+_utility("skew-y", "rotate")(_transform_var("--tw-skew-y", _deg_value))
+
+
+@_utility("scale", "scale")
+def _scale(v: str, neg: bool) -> Optional[Decls]:
+    value = _scale_value(v)
+    if value is None:
+        return None
+    value = _negate(value, neg)
+    return [("--tw-scale-x", value), ("--tw-scale-y", value), ("transform", _TRANSFORM)]
+
+
+_utility("scale-x", "scale", 1)(_transform_var("--tw-scale-x", _scale_value))
+_utility("scale-y", "scale", 1)(_transform_var("--tw-scale-y", _scale_value))
+
+
+@_utility("shadow", "shadow")
+def _shadow(v: str, neg: bool) -> Optional[Decls]:
+    if v == "none":
+        return [("--tw-shadow", "0 0 #0000"), ("--tw-shadow-colored", "0 0 #0000"), ("box-shadow", _BOX_SHADOW)]
+    if v not in SHADOWS:
+        arb = _arbitrary(v)
+        if arb is None or _COLOR_LITERAL_RE.match(arb):
+            return None
+        return [("--tw-shadow", arb), ("--tw-shadow-colored", arb), ("box-shadow", _BOX_SHADOW)]
+    alpha = _SHADOW_ALPHA.get(v, ".1")
+    return [
+        ("--tw-shadow", SHADOWS[v].format(c=f"rgb(0 0 0/{alpha})")),
+        ("--tw-shadow-colored", SHADOWS[v].format(c="var(--tw-shadow-color)")),
+        ("box-shadow", _BOX_SHADOW),
+    ]
+
+
+@_utility("shadow", "shadow-color")
+def _shadow_color(v: str, neg: bool) -> Optional[Decls]:
+    color = _color(v)
+    return [("--tw-shadow-color", color), ("--tw-shadow", "var(--tw-shadow-colored)")] if color else None
+
+
+@_utility("ring", "ring")
+def _ring(v: str, neg: bool) -> Optional[Decls]:
+    if v == "inset":
+        return [("--tw-ring-inset", "inset")]
+    width = "3px" if v == "" else (f"{v}px" if v.isdigit() else None)
+    if width is None:
+        return None
+    return [
+        ("--tw-ring-offset-shadow",
+         "var(--tw-ring-inset,) 0 0 0 var(--tw-ring-offset-width) var(--tw-ring-offset-color)"),
+        ("--tw-ring-shadow",
+         f"var(--tw-ring-inset,) 0 0 0 calc({width} + var(--tw-ring-offset-width)) var(--tw-ring-color)"),
+        ("box-shadow", _BOX_SHADOW),
+    ]
+
+
+@_utility("outline", "outline")
+def _outline(v: str, neg: bool) -> Optional[Decls]:
+    if v == "none":
+        return [("outline", "2px solid transparent"), ("outline-offset", "2px")]
+    if v in ("", "dashed", "dotted", "double"):
+        return [("outline-style", v or "solid")]
+    if v.isdigit():
+        return [("outline-width", f"{v}px")]
+    return None
+
+
+def _filter_var(name: str, prop: str, fn: Callable[[str], Optional[str]], plugin: str = "filter") -> Handler:
+    composed = _FILTER if prop == "filter" else _BACKDROP
+
+    def handler(v: str, neg: bool) -> Optional[Decls]:
+        value = fn(v)
+        if value is None:
+            return None
+        decls = [(name, value), (prop, composed)]
+        if prop == "backdrop-filter":
+            decls.insert(1, ("-webkit-backdrop-filter", composed))
+        return decls
+    return handler
+
+
+def _blur(v: str) -> Optional[str]:
+    if v in BLURS:
+        return f"blur({BLURS[v]})"
+    arb = _arbitrary(v)
+    return f"blur({arb})" if arb else None
+
+
+def _percent_fn(fn: str) -> Callable[[str], Optional[str]]:
+    return lambda v: f"{fn}({_fmt(int(v) / 100)})" if v.isdigit() else None
+
+
+_utility("blur", "filter")(_filter_var("--tw-blur", "filter", _blur))
+_utility("brightness", "filter")(_filter_var("--tw-brightness", "filter", _percent_fn("brightness")))
+_utility("contrast", "filter")(_filter_var("--tw-contrast", "filter", _percent_fn("contrast")))
+_utility("saturate", "filter")(_filter_var("--tw-saturate", "filter", _percent_fn("saturate")))
+_utility("grayscale", "filter")(_filter_var("--tw-grayscale", "filter",
+                                             lambda v: {"": "grayscale(100%)", "0": "grayscale(0)"}.get(v)))
+_utility("invert", "filter")(_filter_var("--tw-invert", "filter",
+                                          lambda v: {"": "invert(100%)", "0": "invert(0)"}.get(v)))
+_utility("sepia", "filter")(_filter_var("--tw-sepia", "filter", lambda v: {"": "sepia(100%)", "0": "sepia(0)"}.get(v)))
+_utility("drop-shadow", "filter")(_filter_var("--tw-drop-shadow", "filter",
+                                               lambda v: DROP_SHADOWS.get(v) or _arbitrary(v)))
+
+
+@_utility("hue-rotate", "filter")
+def _hue_rotate(v: str, neg: bool) -> Optional[Decls]:
+    value = _deg_value(v)
+    if value is None:
+        return None
+    return [("--tw-hue-rotate", f"hue-rotate({_negate(value, neg)})"), ("filter", _FILTER)]
+
+
+_utility("backdrop-blur", "backdrop")(_filter_var("--tw-backdrop-blur", "backdrop-filter", _blur))
+_utility("backdrop-brightness", "backdrop")(
+    _filter_var("--tw-backdrop-brightness", "backdrop-filter", _percent_fn("brightness")))
+_utility("backdrop-saturate", "backdrop")(
+    _filter_var("--tw-backdrop-saturate", "backdrop-filter", _percent_fn("saturate")))
+_utility("backdrop-opacity", "backdrop")(
+    _filter_var("--tw-backdrop-opacity", "backdrop-filter", _percent_fn("opacity")))
+_utility("backdrop-grayscale", "backdrop")(
+    _filter_var("--tw-backdrop-grayscale", "backdrop-filter",
+                lambda v: {"": "grayscale(100%)", "0": "grayscale(0)"}.get(v)))
+
+
+@_utility("transition", "transition")
+def _transition(v: str, neg: bool) -> Optional[Decls]:
+    if v == "none":
+        return [("transition-property", "none")]
+    props = TRANSITIONS.get(v) or _arbitrary(v)
+    if props is None:
+        return None
+    return [("transition-property", props), ("transition-timing-function", EASINGS["in-out"]),
+            ("transition-duration", "150ms")]
+
+
+@_utility("animate", "animation")
+def _animate(v: str, neg: bool) -> Optional[Decls]:
+    if v in ANIMATIONS:
+        return [("animation", ANIMATIONS[v][0])]
+    arb = _arbitrary(v)
+    return [("animation", arb)] if arb else None
+
+
+@_utility("bg-gradient-to", "bg-image")
+def _gradient(v: str, neg: bool) -> Optional[Decls]:
+    directions = {"t": "top", "tr": "top right", "r": "right", "br": "bottom right", "b": "bottom",
+                  "bl": "bottom left", "l": "left", "tl": "top left"}
+    if v not in directions:
+        return None
+    return [("background-image", f"linear-gradient(to {directions[v]},var(--tw-gradient-stops))")]
+
+
+@_utility("bg", "bg-image")
+def _bg_image(v: str, neg: bool) -> Optional[Decls]:
+    if v == "none":
+        return [("background-image", "none")]
+    arb = _arbitrary(v)
+    if arb and arb.startswith(("url(", "linear-gradient(", "radial-gradient(", "conic-gradient(")):
+        return [("background-image", arb)]
+    return None
+
+
+@_utility("from", "gradient-from")
+def _from(v: str, neg: bool) -> Optional[Decls]:
+    color = _color(v)
+    if color is None:
+        return None
+    return [("--tw-gradient-from", color), ("--tw-gradient-to", _transparent(v)),
+            ("--tw-gradient-stops", "var(--tw-gradient-from),var(--tw-gradient-to)")]
+
+
+@_utility("via", "gradient-via")
+def _via(v: str, neg: bool) -> Optional[Decls]:
+    color = _color(v)
+    if color is None:
+        return None
+    return [("--tw-gradient-to", _transparent(v)),
+            ("--tw-gradient-stops", f"var(--tw-gradient-from),{color},var(--tw-gradient-to)")]
+
+
+@_utility("to", "gradient-to")
+def _to(v: str, neg: bool) -> Optional[Decls]:
+    color = _color(v)
+    return [("--tw-gradient-to", color)] if color else None
+
+
+@_utility("content", "content")
+def _content(v: str, neg: bool) -> Optional[Decls]:
+    arb = _arbitrary(v)
+    if v == "none":
+        return [("--tw-content", "none"), ("content", "none")]
+    return [("--tw-content", arb), ("content", "var(--tw-content)")] if arb is not None else None
+
+
+def _static(plugin: str, table: Dict[str, Decls]) -> None:
+    for cls, decls in table.items():
+        _STATICS[cls] = (plugin, decls)
+
+
+_STATICS: Dict[str, Tuple[str, Decls]] = {}
+_static("display", {name: [("display", value)] for name, value in {
+    "block": "block", "inline-block": "inline-block", "inline": "inline", "flex": "flex", "inline-flex": "inline-flex",
+    "grid": "grid", "inline-grid": "inline-grid", "table": "table", "table-row": "table-row",
+    "table-cell": "table-cell", "contents": "contents", "flow-root": "flow-root", "list-item": "list-item",
+    "hidden": "none",
+}.items()})
+_static("position", {p: [("position", p)] for p in ("static", "fixed", "absolute", "relative", "sticky")})
+_static("visibility", {"visible": [("visibility", "visible")], "invisible": [("visibility", "hidden")],
+                       "collapse": [("visibility", "collapse")]})
+_static("isolation", {"isolate": [("isolation", "isolate")], "isolation-auto": [("isolation", "auto")]})
+_static("sr", {
+    "sr-only": [("position", "absolute"), ("width", "1px"), ("height", "1px"), ("padding", "0"), ("margin", "-1px"),
+                ("overflow", "hidden"), ("clip", "rect(0,0,0,0)"), ("white-space", "nowrap"), ("border-width", "0")],
+    "not-sr-only": [("position", "static"), ("width", "auto"), ("height", "auto"), ("padding", "0"),
+                    ("margin", "0"), ("overflow", "visible"), ("clip", "auto"), ("white-space", "normal")],
+})
+_static("pointer-events", {"pointer-events-none": [("pointer-events", "none")],
+                           "pointer-events-auto": [("pointer-events", "auto")]})
+_static("box", {"box-border": [("box-sizing", "border-box")], "box-content": [("box-sizing", "content-box")]})
+_static("float", {"float-left": [("float", "left")], "float-right": [("float", "right")],
+                  "float-none": [("float", "none")], "clear-both": [("clear", "both")]})
+_static("line-clamp", {"line-clamp-none": [("overflow", "visible"), ("display", "block"),
+                                          ("-webkit-box-orient", "horizontal"), ("-webkit-line-clamp", "none")]})
+_static("flex-direction", {f"flex-{k}": [("flex-direction", v)] for k, v in {
+    "row": "row", "row-reverse": "row-reverse", "col": "column", "col-reverse": "column-reverse"}.items()})
+_static("flex-wrap", {"flex-wrap": [("flex-wrap", "wrap")], "flex-wrap-reverse": [("flex-wrap", "wrap-reverse")],
+                      "flex-nowrap": [("flex-wrap", "nowrap")]})
+_static("grid-cols", {f"grid-flow-{k}": [("grid-auto-flow", v)] for k, v in {
+    "row": "row", "col": "column", "dense": "dense", "row-dense": "row dense", "col-dense": "column dense"}.items()})
+_static("grid-rows", {"auto-rows-auto": [("grid-auto-rows", "auto")], "auto-rows-fr": [("grid-auto-rows", "minmax(0,1fr)")],
+                      "auto-cols-auto": [("grid-auto-columns", "auto")],
+                      "auto-cols-fr": [("grid-auto-columns", "minmax(0,1fr)")]})
+_ALIGN = {"start": "flex-start", "end": "flex-end", "center": "center", "between": "space-between",
+          "around": "space-around", "evenly": "space-evenly", "stretch": "stretch", "baseline": "baseline",
+          "normal": "normal"}
+_static("justify-content", {f"justify-{k}": [("justify-content", v)] for k, v in _ALIGN.items() if k != "baseline"})
+_static("align-items", {f"items-{k}": [("align-items", v)]
+                        for k, v in _ALIGN.items() if k in ("start", "end", "center", "baseline", "stretch")})
+_static("align-content", {f"content-{k}": [("align-content", v)] for k, v in _ALIGN.items()})
+_static("self", {f"self-{k}": [("align-self", "auto" if k == "auto" else _ALIGN[k])]
+                 for k in ("auto", "start", "end", "center", "stretch", "baseline")})
+_static("justify-items", {f"justify-items-{k}": [("justify-items", k)] for k in ("start", "end", "center", "stretch")})
+_static("justify-self", {f"justify-self-{k}": [("justify-self", k)] for k in ("auto", "start", "end", "center", "stretch")})
+_static("place-content", {f"place-content-{k}": [("place-content", v)] for k, v in {
+    "center": "center", "start": "start", "end": "end", "between": "space-between", "around": "space-around",
+    "evenly": "space-evenly", "stretch": "stretch"}.items()})
+_static("place-items", {f"place-items-{k}": [("place-items", k)] for k in ("start", "end", "center", "stretch")})
+_static("place-self", {f"place-self-{k}": [("place-self", k)] for k in ("auto", "start", "end", "center", "stretch")})
+_static("overflow", {
+    **{f"overflow-{k}": [("overflow", k)] for k in ("auto", "hidden", "clip", "visible", "scroll")},
+    **{f"overflow-{a}-{k}": [(f"overflow-{a}", k)] for a in ("x", "y") for k in ("auto", "hidden", "clip", "visible", "scroll")},
+})
+_static("overscroll", {f"overscroll-{k}": [("overscroll-behavior", k)] for k in ("auto", "contain", "none")})
+_static("scroll", {"scroll-smooth": [("scroll-behavior", "smooth")], "scroll-auto": [("scroll-behavior", "auto")],
+                   "snap-x": [("scroll-snap-type", "x mandatory")], "snap-y": [("scroll-snap-type", "y mandatory")],
+                   "snap-start": [("scroll-snap-align", "start")], "snap-center": [("scroll-snap-align", "center")]})
+_static("truncate", {"truncate": [("overflow", "hidden"), ("text-overflow", "ellipsis"), ("white-space", "nowrap")],
+                     "text-ellipsis": [("text-overflow", "ellipsis")], "text-clip": [("text-overflow", "clip")]})
+_static("whitespace", {f"whitespace-{k}": [("white-space", k)]
+                       for k in ("normal", "nowrap", "pre", "pre-line", "pre-wrap", "break-spaces")})
+_static("break", {"break-words": [("overflow-wrap", "break-word")], "break-all": [("word-break", "break-all")],
+                  "break-normal": [("overflow-wrap", "normal"), ("word-break", "normal")],
+                  "break-keep": [("word-break", "keep-all")]})
+_static("border-style", {f"border-{k}": [("border-style", k)]
+                         for k in ("solid", "dashed", "dotted", "double", "hidden", "none")})
+_static("bg-attachment", {f"bg-{k}": [("background-attachment", k)] for k in ("fixed", "local", "scroll")})
+_static("bg-clip", {"bg-clip-text": [("-webkit-background-clip", "text"), ("background-clip", "text")],
+                    **{f"bg-clip-{k}": [("background-clip", f"{k}-box")] for k in ("border", "padding", "content")}})
+_static("bg-repeat", {"bg-repeat": [("background-repeat", "repeat")], "bg-no-repeat": [("background-repeat", "no-repeat")],
+                      "bg-repeat-x": [("background-repeat", "repeat-x")], "bg-repeat-y": [("background-repeat", "repeat-y")]})
+_static("object-fit", {f"object-{k}": [("object-fit", k)] for k in ("contain", "cover", "fill", "none", "scale-down")})
+_static("text-align", {f"text-{k}": [("text-align", k)] for k in ("left", "center", "right", "justify", "start", "end")})
+_static("align", {f"align-{k}": [("vertical-align", k)]
+                  for k in ("baseline", "top", "middle", "bottom", "text-top", "text-bottom", "sub", "super")})
+_static("text-transform", {"uppercase": [("text-transform", "uppercase")], "lowercase": [("text-transform", "lowercase")],
+                           "capitalize": [("text-transform", "capitalize")], "normal-case": [("text-transform", "none")]})
+_static("font-style", {"italic": [("font-style", "italic")], "not-italic": [("font-style", "normal")],
+                       "tabular-nums": [("font-variant-numeric", "tabular-nums")]})
+_static("decoration", {"underline": [("text-decoration-line", "underline")],
+                       "overline": [("text-decoration-line", "overline")],
+                       "line-through": [("text-decoration-line", "line-through")],
+                       "no-underline": [("text-decoration-line", "none")],
+                       "text-wrap": [("text-wrap", "wrap")], "text-nowrap": [("text-wrap", "nowrap")],
+                       "text-balance": [("text-wrap", "balance")], "text-pretty": [("text-wrap", "pretty")]})
+_static("antialiased", {"antialiased": [("-webkit-font-smoothing", "antialiased"), ("-moz-osx-font-smoothing", "grayscale")],
+                        "subpixel-antialiased": [("-webkit-font-smoothing", "auto"), ("-moz-osx-font-smoothing", "auto")]})
+_static("list", {"list-none": [("list-style-type", "none")], "list-disc": [("list-style-type", "disc")],
+                 "list-decimal": [("list-style-type", "decimal")], "list-inside": [("list-style-position", "inside")],
+                 "list-outside": [("list-style-position", "outside")]})
+_static("appearance", {"appearance-none": [("-webkit-appearance", "none"), ("appearance", "none")]})
+_static("cursor", {f"cursor-{k}": [("cursor", k)] for k in (
+    "auto", "default", "pointer", "wait", "text", "move", "help", "not-allowed", "none", "grab", "grabbing",
+    "zoom-in", "zoom-out")})
+_static("touch", {f"touch-{k}": [("touch-action", k)] for k in (
+    "auto", "none", "pan-x", "pan-left", "pan-right", "pan-y", "pan-up", "pan-down", "pinch-zoom", "manipulation")})
+_static("select", {f"select-{k}": [("-webkit-user-select", k), ("user-select", k)] for k in ("none", "text", "all", "auto")})
+_static("resize", {"resize-none": [("resize", "none")], "resize": [("resize", "both")],
+                   "resize-x": [("resize", "horizontal")], "resize-y": [("resize", "vertical")]})
+_static("mix-blend", {f"mix-blend-{k}": [("mix-blend-mode", k)] for k in (
+    "normal", "multiply", "screen", "overlay", "darken", "lighten", "soft-light", "hard-light", "difference",
+    "luminosity")})
+_static("transform", {"transform": [("transform", _TRANSFORM)], "transform-none": [("transform", "none")],
+                      "transform-gpu": [("transform", _TRANSFORM.replace("translate(", "translate3d(")
+                                         .replace("var(--tw-translate-y,0))", "var(--tw-translate-y,0),0)"))]})
+_static("filter", {"filter": [("filter", _FILTER)], "filter-none": [("filter", "none")]})
+_static("backdrop", {"backdrop-filter": [("-webkit-backdrop-filter", _BACKDROP), ("backdrop-filter", _BACKDROP)]})
+_static("outline", {"outline-0": [("outline-width", "0px")]})
+
+_UTILITY_PREFIXES = frozenset(p.split("-")[0] for p in list(_HANDLERS) + list(_STATICS))
+
+
+def _escape(cls: str) -> str:
+    out = []
+    for i, ch in enumerate(cls):
+        if ch.isalnum() and ch.isascii() or ch in "-_":
+            if i == 0 and ch.isdigit():
+                out.append(f"\\3{ch} ")
+            else:
+                out.append(ch)
+        else:
+            out.append("\\" + ch)
+    return "".join(out)
+
+
+class _Rule:
+    __slots__ = ("sort_key", "media", "css", "keyframes")
+
+    def __init__(self, sort_key: Tuple, media: str, css: str, keyframes: str):
+        self.sort_key = sort_key
+        self.media = media
+        self.css = css
+        self.keyframes = keyframes
+
+
+def _resolve(base: str, neg: bool) -> Optional[Tuple[str, int, Decls]]:
+    static = _STATICS.get(base)
+    if static is not None and not neg:
+        return static[0], 0, static[1]
+    if base.startswith("[") and base.endswith("]") and ":" in base:
+        prop, _, value = base[1:-1].partition(":")
+        if re.fullmatch(r"-?-?[a-z][a-z0-9-]*", prop) and value:
+            return "arbitrary", 0, [(prop, _math_spacing(value.replace("_", " ")))]
+        return None
+    head = base.split("[", 1)[0]
+    cuts = [i for i, ch in enumerate(head) if ch == "-"]
+    # longest prefix first, so min-w-0 tries "min-w" before "min"; a bare prefix has value ""
+    for cut in [len(base)] + cuts[::-1]:
+        prefix, value = base[:cut], base[cut + 1:]
+        for plugin, sub, handler in _HANDLERS.get(prefix, ()):
+            decls = handler(value, neg)
+            if decls:
+                return plugin, sub, decls
+    return None
+
+
+def compile_class(cls: str) -> Optional[_Rule]:
+    """CSS rule for one class (None if it is not a utility this compiler knows)."""
+    *variants, utility = _SPLIT_VARIANTS_RE.split(cls)
+    important = utility.startswith("!")
+    base = utility[1:] if important else utility
+    neg = base.startswith("-")
+    if neg:
+        base = base[1:]
+    if not base:
+        return None
+    resolved = _resolve(base, neg)
+    if resolved is None:
+        return None
+    plugin, sub, decls = resolved
+
+    selector_suffix, prefix_selector, media, screen, state_rank = "", "", [], 0, 0
+    pseudo_element = ""
+    for variant in variants:
+        if variant in SCREENS:
+            screen = max(screen, list(SCREENS).index(variant) + 1)
+            media.append(f"(min-width:{SCREENS[variant]}px)")
+        elif variant in MEDIA_VARIANTS:
+            media.append(MEDIA_VARIANTS[variant])
+        elif variant in PSEUDO_VARIANTS:
+            selector_suffix += PSEUDO_VARIANTS[variant]
+            state_rank = max(state_rank, _VARIANT_ORDER[variant] + 1)
+        elif variant in PSEUDO_ELEMENTS:
+            pseudo_element = PSEUDO_ELEMENTS[variant]
+            state_rank = max(state_rank, _VARIANT_ORDER[variant] + 1)
+        elif variant.startswith(("group-", "peer-")) and variant.split("-", 1)[1] in PSEUDO_VARIANTS:
+            kind, state = variant.split("-", 1)
+            joiner = " " if kind == "group" else " ~ "
+            prefix_selector = f".{kind}{PSEUDO_VARIANTS[state]}{joiner}" + prefix_selector
+            state_rank = max(state_rank, _VARIANT_ORDER[state] + 1)
+        else:
+            return None  # arbitrary / unsupported variant: leave it to the CDN
+    if pseudo_element in ("::before", "::after") and plugin != "content":
+        decls = [("content", "var(--tw-content)")] + decls
+
+    media.sort(key=lambda m: (m != "print", m))
+    suffix = _PLUGIN_SUFFIX.get(plugin, "")
+    selector = f"{prefix_selector}.{_escape(cls)}{selector_suffix}{pseudo_element}{suffix}"
+    bang = "!important" if important else ""
+    body = ";".join(f"{prop}:{value}{bang}" for prop, value in decls)
+    keyframes = ""
+    if plugin == "animation":
+        name = base.split("-", 1)[1] if "-" in base else ""
+        keyframes = ANIMATIONS.get(name, ("", ""))[1]
+    sort_key = (screen, len(media), state_rank, _PLUGIN_RANK[plugin], sub)
+    return _Rule(sort_key, " and ".join(media), f"{selector}{{{body}}}", keyframes)
+
+
+def looks_like_utility(cls: str) -> bool:
+    """True for class names a Tailwind build would treat as utilities (used to decide on the CDN fallback)."""
+    *variants, utility = _SPLIT_VARIANTS_RE.split(cls)
+    base = utility.lstrip("!").lstrip("-")
+    if variants or base.startswith("["):
+        return True
+    if base in _STATICS or base in _STANDALONE_UTILITIES:
+        return True
+    root = base.split("-", 1)[0]
+    return "-" in base and (root in TAILWIND_ROOTS or root in _UTILITY_PREFIXES)
+
+
+def page_css_classes(html: str) -> Set[str]:
+    """Class names the page's own <style> blocks define (those need no utility)."""
+    classes: Set[str] = set()
+    for m in _STYLE_RE.finditer(html):
+        classes.update(re.sub(r"\\(.)", r"\1", c.group(1)) for c in _CSS_CLASS_RE.finditer(m.group(1)))
+    return classes
+
+
+def extract_classes(html: str) -> Tuple[Set[str], Set[str]]:
+    """(classes from class attributes, candidate tokens from inline-script string literals)."""
+    attr: Set[str] = set()
+    for m in _CLASS_ATTR_RE.finditer(html):
+        attr.update((m.group(1) if m.group(1) is not None else m.group(2)).split())
+    scripted: Set[str] = set()
+    for m in _SCRIPT_RE.finditer(html):
+        if "src=" in m.group(1):
+            continue
+        for s in _STRING_RE.finditer(m.group(2)):
+            scripted.update(tok for tok in s.group(2).split() if len(tok) < 80)
+    return attr, scripted - attr
+
+
+class TailwindCompiler:
+    """
+    Compiles the Tailwind utilities a page actually uses into one inline
+    <style> block, replacing the in-browser CDN JIT. Compiled CSS is cached by
+    class set. Pages the compiler cannot fully cover (custom tailwind.config,
+    arbitrary variants, unknown utilities) keep the CDN script.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self._css_cache = MemoryTier(max_entries)
+        self._rule_cache: Dict[str, Optional[_Rule]] = {}
+
+    def _rule(self, cls: str) -> Optional[_Rule]:
+        if cls not in self._rule_cache:
+            if len(self._rule_cache) > 20000:
+                self._rule_cache.clear()
+            self._rule_cache[cls] = compile_class(cls)
+        return self._rule_cache[cls]
+
+    def compile(self, classes: Iterable[str], preflight: bool = True) -> Tuple[str, List[str]]:
+        """(stylesheet, classes that look like utilities but could not be compiled)."""
+        unique = sorted(set(classes))
+        key = hashlib.sha1(("1" if preflight else "0").encode() + "\n".join(unique).encode("utf-8")).hexdigest()
+        cached = self._css_cache.get(key)
+        if cached is not None:
+            return cached
+
+        rules, missed = [], []
+        for i, cls in enumerate(unique):
+            if cls == "container":  # CONTAINER_CSS below
+                continue
+            rule = self._rule(cls)
+            if rule is None:
+                if looks_like_utility(cls):
+                    missed.append(cls)
+                continue
+            rules.append((rule.sort_key, i, rule))
+        rules.sort(key=lambda r: (r[0], r[1]))
+
+        parts = [PREFLIGHT] if preflight else []
+        if "container" in unique:
+            parts.append(CONTAINER_CSS)
+        keyframes: List[str] = []
+        current_media, block = "", []
+        for _, _, rule in rules:
+            if rule.keyframes and rule.keyframes not in keyframes:
+                keyframes.append(rule.keyframes)
+            if rule.media != current_media:
+                if block:
+                    parts.append(f"@media {current_media}{{{''.join(block)}}}" if current_media else "".join(block))
+                current_media, block = rule.media, []
+            block.append(rule.css)
+        if block:
+            parts.append(f"@media {current_media}{{{''.join(block)}}}" if current_media else "".join(block))
+        parts.extend(keyframes)
+
+        result = ("".join(parts), missed)
+        self._css_cache.set(key, result)
+        return result
+
+    def process(self, html: str) -> Tuple[str, Dict[str, object]]:
+        """Swap the Tailwind CDN script for compiled CSS; returns (html, stats)."""
+        match = CDN_SCRIPT_RE.search(html or "")
+        if match is None or settings.TAILWIND_MODE != "compile":
+            return html, {"mode": "cdn" if match else "none"}
+        if "tailwind.config" in html or "plugins=" in match.group(0):
+            return html, {"mode": "cdn", "reason": "custom config or plugins"}
+
+        attr_classes, script_classes = extract_classes(html)
+        css, missed = self.compile(attr_classes | script_classes, preflight=False)
+        # anything utility-shaped (in markup or added by scripts) that neither compiled nor is styled
+        # by the page itself would silently lose its styles without the CDN
+        if missed:
+            own = page_css_classes(html)
+            missed = [cls for cls in missed if cls not in own]
+        if missed:
+            logger.info(f"Keeping Tailwind CDN, unsupported utilities: {missed[:10]}")
+            return html, {"mode": "cdn", "reason": "unsupported utilities", "missed": missed[:20]}
+
+        indent = re.match(r"[ \t]*", match.group(0)).group(0)
+        # preflight in a block of its own: identical on every page, so it can be shared (asset_bundle)
+        style = f"{indent}<style>{PREFLIGHT}</style>\n{indent}<style>{css}</style>\n"
+        return html[:match.start()] + style + html[match.end():], {
+            "mode": "compiled", "classes": len(attr_classes), "css_bytes": len(css),
+        }
+
+
+tailwind_compiler = TailwindCompiler()
@@ -3,6 +3,8 @@ from typing import Dict, List, Any
 from datetime import datetime, timedelta
 import logging
 
+from app.services.model_router import operation_family
+
 logger = logging.getLogger(__name__)
 
 class TokenTracker:
@@ -18,20 +20,37 @@ class TokenTracker:
             "models_used": set()
         }
         
-        # Cost per 1K tokens (approximate GPT-4o-mini pricing)
+        # Cost per 1K tokens (approximate list pricing); dated snapshots such as
+        # "gpt-5-mini-2025-08-07" resolve to their family via longest-prefix match
         self.cost_per_1k = {
             "gpt-4o-mini": {"input": 0.00015, "output": 0.0006},
-            "gpt-4o": {"input": 0.005, "output": 0.015},
+            "gpt-4o": {"input": 0.0025, "output": 0.01},
+            "gpt-4.1-nano": {"input": 0.0001, "output": 0.0004},
+            "gpt-4.1-mini": {"input": 0.0004, "output": 0.0016},
+            "gpt-4.1": {"input": 0.002, "output": 0.008},
+            "gpt-5-nano": {"input": 0.00005, "output": 0.0004},
+            "gpt-5-mini": {"input": 0.00025, "output": 0.002},
+            "gpt-5": {"input": 0.00125, "output": 0.01},
+            "o4-mini": {"input": 0.0011, "output": 0.0044},
             "gpt-4": {"input": 0.03, "output": 0.06}
         }
     
+    def costs_for(self, model: str) -> Dict[str, float]:
+        """Per-1K pricing for a model id, falling back to gpt-4o-mini"""
+        if model in self.cost_per_1k:
+            return self.cost_per_1k[model]
+        matches = [k for k in self.cost_per_1k if model.startswith(k + "-")]
+        if matches:
+            return self.cost_per_1k[max(matches, key=len)]
+        return self.cost_per_1k["gpt-4o-mini"]
+    
     async def track_usage(self, prompt_tokens: int, completion_tokens: int, 
                          model: str, operation_type: str, duration_ms: int,
-                         metadata: Dict[str, Any] = None):
+                         metadata: Dict[str, Any] = None, tier: str = None):
         """Track detailed token usage with cost calculation"""
         
         # Calculate costs
-        model_costs = self.cost_per_1k.get(model, self.cost_per_1k["gpt-4o-mini"])
+        model_costs = self.costs_for(model)
         prompt_cost = (prompt_tokens / 1000) * model_costs["input"]
         completion_cost = (completion_tokens / 1000) * model_costs["output"]
         total_cost = prompt_cost + completion_cost
@@ -47,6 +66,7 @@ class TokenTracker:
             "timestamp": datetime.utcnow().isoformat(),
             "operation_type": operation_type,
             "model": model,
+            "tier": tier,
             "prompt_tokens": prompt_tokens,
             "completion_tokens": completion_tokens,
             "total_tokens": prompt_tokens + completion_tokens,
@@ -79,13 +99,21 @@ class TokenTracker:
                     "count": 0,
                     "total_tokens": 0,
                     "total_cost": 0.0,
-                    "avg_duration": 0
+                    "avg_duration": 0,
+                    "context_tokens_raw": 0,
+                    "context_tokens_compact": 0,
+                    "context_tokens_saved": 0
                 }
             
             operation_breakdown[op_type]["count"] += 1
             operation_breakdown[op_type]["total_tokens"] += op["total_tokens"]
             operation_breakdown[op_type]["total_cost"] += op["cost"]
             operation_breakdown[op_type]["avg_duration"] += op["duration_ms"]
+            
+            # Context compaction savings (see context_compactor.compaction_stats)
+            meta = op.get("metadata") or {}
+            for key in ("context_tokens_raw", "context_tokens_compact", "context_tokens_saved"):
+                operation_breakdown[op_type][key] += int(meta.get(key, 0) or 0)
         
         # Calculate averages
         for op_type in operation_breakdown:
@@ -94,9 +122,14 @@ class TokenTracker:
                 operation_breakdown[op_type]["avg_duration"] = int(
                     operation_breakdown[op_type]["avg_duration"] / count
                 )
+            raw = operation_breakdown[op_type]["context_tokens_raw"]
+            operation_breakdown[op_type]["context_reduction_pct"] = round(
+                100 * operation_breakdown[op_type]["context_tokens_saved"] / raw, 1
+            ) if raw else 0.0
         
         return {
             "session_duration_minutes": duration.total_seconds() / 60,
+            "model_breakdown": self.get_model_comparison(),
             "total_operations": len(self.session_usage["operations"]),
             "total_tokens": self.session_usage["total_prompt_tokens"] + self.session_usage["total_completion_tokens"],
             "prompt_tokens": self.session_usage["total_prompt_tokens"],
@@ -108,6 +141,34 @@ class TokenTracker:
             "tokens_per_minute": (self.session_usage["total_prompt_tokens"] + self.session_usage["total_completion_tokens"]) / max(1, duration.total_seconds() / 60)
         }
     
+    def get_model_comparison(self) -> Dict[str, Dict[str, Any]]:
+        """Per operation family and model: count, cost and latency, to compare tiers"""
+        groups: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for op in self.session_usage["operations"]:
+            family = operation_family(op["operation_type"])
+            groups.setdefault(family, {}).setdefault(op["model"], []).append(op)
+        
+        comparison: Dict[str, Dict[str, Any]] = {}
+        for family, by_model in groups.items():
+            comparison[family] = {}
+            for model, ops in by_model.items():
+                latencies = sorted(o["duration_ms"] for o in ops)
+                count = len(ops)
+                # "request"/"override"/"user_tier" when the routing table was not what picked the model
+                tiers: Dict[str, int] = {}
+                for o in ops:
+                    tiers[o.get("tier") or "unknown"] = tiers.get(o.get("tier") or "unknown", 0) + 1
+                comparison[family][model] = {
+                    "tier": max(tiers, key=tiers.get),
+                    "tiers": tiers,
+                    "count": count,
+                    "avg_cost": sum(o["cost"] for o in ops) / count,
+                    "avg_tokens": int(sum(o["total_tokens"] for o in ops) / count),
+                    "avg_duration_ms": int(sum(latencies) / count),
+                    "p95_duration_ms": latencies[min(count - 1, int(count * 0.95))],
+                }
+        return comparison
+    
     def get_recent_operations(self, minutes: int = 5) -> List[Dict[str, Any]]:
         """Get operations from the last N minutes"""
         cutoff = datetime.utcnow() - timedelta(minutes=minutes)
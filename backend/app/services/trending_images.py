@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.models.design_state import UnsplashImage
+from app.services.unsplash_service import UnsplashService
+
+logger = logging.getLogger(__name__)
+
+TRENDING_QUERIES = [
+    "abstract", "technology", "business", "nature", "minimal",
+    "architecture", "design", "lifestyle", "workspace", "creative",
+]
+PER_QUERY = 3  # 10 queries x 3 covers the endpoint's max count of 30
+
+_images_json = TypeAdapter(List[UnsplashImage])
+
+
+@dataclass
+class TrendingSnapshot:
+    images: List[UnsplashImage]
+    built_at: float
+    # count -> (JSON body, ETag); filled lazily, a snapshot is immutable otherwise
+    _bodies: Dict[int, Tuple[bytes, str]] = field(default_factory=dict)
+
+    def body(self, count: int) -> Tuple[bytes, str]:
+        count = min(count, len(self.images))
+        cached = self._bodies.get(count)
+        if cached is None:
+            body = _images_json.dump_json(self.images[:count])
+            # content hash, so an unchanged refresh keeps the ETag (and 304s) valid
+            cached = (body, f'"{hashlib.sha1(body).hexdigest()[:20]}"')
+            self._bodies[count] = cached
+        return cached
+
+
+class TrendingImages:
+    """
+    Trending images as a snapshot rebuilt in the background: all queries are
+    searched concurrently (through the image search cache) and interleaved so
+    any prefix mixes categories. Requests only slice the current snapshot.
+    """
+
+    def __init__(self, refresh_seconds: int, unsplash: Optional[UnsplashService] = None):
+        self.refresh_seconds = refresh_seconds
+        self.unsplash = unsplash or UnsplashService()
+        self._snapshot: Optional[TrendingSnapshot] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _build(self) -> List[UnsplashImage]:
+        results = await asyncio.gather(
+            *(
+                self.unsplash.search_images(query=q, count=PER_QUERY, orientation="landscape", background=True)
+                for q in TRENDING_QUERIES
+            ),
+            return_exceptions=True,
+        )
+        per_query = []
+        for query, result in zip(TRENDING_QUERIES, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Trending search failed for '{query}': {result}")
+                continue
+            per_query.append(result)
+        seen, images = set(), []
+        for rank in range(PER_QUERY):
+            for imgs in per_query:
+                if rank < len(imgs) and imgs[rank].id not in seen:
+                    seen.add(imgs[rank].id)
+                    images.append(imgs[rank])
+        return images
+
+    async def refresh(self) -> TrendingSnapshot:
+        images = await self._build()
+        # placeholders (no quota left) never replace a snapshot of real images
+        placeholders_only = all(img.id.startswith("picsum-") for img in images)
+        if self._snapshot is None or (images and not placeholders_only):
+            self._snapshot = TrendingSnapshot(images, time.time())
+        return self._snapshot
+
+    async def snapshot(self) -> TrendingSnapshot:
+        if self._snapshot is None:
+            async with self._lock:  # one cold build, however many requests arrive
+                if self._snapshot is None:
+                    await self.refresh()
+        return self._snapshot
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Trending refresh failed: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+trending_images = TrendingImages(settings.IMAGE_TRENDING_REFRESH_SECONDS)
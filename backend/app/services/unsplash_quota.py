@@ -0,0 +1,94 @@
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600.0
+
+
+class UnsplashQuota:
+    """
+    Per-hour token bucket for Unsplash API calls, corrected by the
+    X-Ratelimit-Limit / X-Ratelimit-Remaining headers of every response.
+
+    Callers ask before a request; when no token is left the search goes
+    straight to picsum instead of waiting on a call that would fail.
+    Background work (pool warmer, trending) must leave `reserve` tokens for
+    interactive searches.
+    """
+
+    def __init__(self, hourly_limit: int, reserve: int):
+        self.limit = hourly_limit
+        self.reserve = reserve
+        self.tokens = float(hourly_limit)
+        self.remaining: Optional[int] = None  # last value reported by Unsplash
+        self._updated = time.monotonic()
+        self._calls: Deque[float] = deque()  # wall-clock times of calls in the last hour
+        self.routed = {"unsplash": 0, "placeholder": 0, "background_deferred": 0, "rate_limited": 0}
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(float(self.limit), self.tokens + (now - self._updated) * self.limit / HOUR)
+        self._updated = now
+
+    def try_acquire(self, background: bool = False) -> bool:
+        """Take a token for one API call, or say no (serve a placeholder instead)."""
+        self._refill()
+        floor = self.reserve if background else 0
+        if self.tokens - 1 < floor:
+            self.routed["background_deferred" if background and self.tokens >= 1 else "placeholder"] += 1
+            return False
+        self.tokens -= 1
+        self.routed["unsplash"] += 1
+        self._calls.append(time.time())
+        return True
+
+    def record(self, status_code: int, headers: Any) -> None:
+        """Sync the bucket with the server's view after a response."""
+        limit = _int_header(headers, "x-ratelimit-limit")
+        remaining = _int_header(headers, "x-ratelimit-remaining")
+        self._refill()
+        if limit:
+            self.limit = limit
+        if remaining is not None:
+            self.remaining = remaining
+            self.tokens = min(self.tokens, float(remaining))
+        if status_code in (403, 429) and (remaining == 0 or remaining is None):
+            # quota exhausted: the bucket refills from zero, so the next call is a single probe
+            self.tokens = 0.0
+            self.routed["rate_limited"] += 1
+            logger.warning("Unsplash rate limit reached; serving placeholders until quota refills")
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        now = time.time()
+        while self._calls and self._calls[0] < now - HOUR:
+            self._calls.popleft()
+        # calls per 5-minute slot over the last hour, oldest first
+        slots = [0] * 12
+        for t in self._calls:
+            slots[min(11, int((now - t) // 300))] += 1
+        return {
+            "hourly_limit": self.limit,
+            "reserve": self.reserve,
+            "tokens": round(self.tokens, 2),
+            "server_remaining": self.remaining,
+            "calls_last_hour": len(self._calls),
+            "calls_per_5min": slots[::-1],
+            "routed": dict(self.routed),
+        }
+
+
+def _int_header(headers: Any, name: str) -> Optional[int]:
+    try:
+        value = headers.get(name)
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+unsplash_quota = UnsplashQuota(settings.UNSPLASH_HOURLY_QUOTA, settings.UNSPLASH_QUOTA_RESERVE)
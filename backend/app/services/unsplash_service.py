@@ -1,7 +1,14 @@
-import httpx, random
+import asyncio
+import logging
+import random
 from typing import List, Optional
 from app.models.design_state import UnsplashImage
 from app.core.config import settings
+from app.services.http_clients import http_clients
+from app.services.image_cache import image_search_cache, search_cache_key
+from app.services.unsplash_quota import unsplash_quota
+
+logger = logging.getLogger(__name__)
 
 APP_NAME = "llm-designer"
 
@@ -17,34 +24,57 @@ class UnsplashService:
 
     async def search_images(
         self, query: str, count: int = 3, width: Optional[int] = None,
-        height: Optional[int] = None, orientation: str = "landscape"
+        height: Optional[int] = None, orientation: str = "landscape", background: bool = False,
+        page: int = 1, order_by: str = "relevant", cached: bool = True,
     ) -> List[UnsplashImage]:
+        """`cached=False` always asks Unsplash (the pool warmer rotating through `page` / `order_by`)."""
         # If we have no key, give high-quality placeholders that actually load.
         if not self.access_key:
             return self._get_placeholder_images(count, width, height, query)
 
+        # cache hit -> cached images; miss -> Unsplash if quota is left, else picsum right away
+        if image_search_cache is None or not cached:
+            return await self._fetch_images(query, count, width, height, orientation, background, page, order_by)
+        return await image_search_cache.get_or_fetch(
+            search_cache_key(query, count, width, height, orientation),
+            lambda: self._fetch_images(query, count, width, height, orientation, background),
+            # never cache the picsum fallback used when the API call failed
+            cacheable=lambda imgs: any(not img.id.startswith("picsum-") for img in imgs),
+        )
+
+    async def _fetch_images(
+        self, query: str, count: int, width: Optional[int], height: Optional[int], orientation: str,
+        background: bool = False, page: int = 1, order_by: str = "relevant",
+    ) -> List[UnsplashImage]:
+        if not unsplash_quota.try_acquire(background):
+            return self._get_placeholder_images(count, width, height, query)
+
         headers = {"Authorization": f"Client-ID {self.access_key}"}
         params = {
             "query": query or "modern ui hero",
             "per_page": max(1, min(count, 10)),
+            "page": max(1, page),
             "orientation": orientation,
             "content_filter": "high",
-            "order_by": "relevant"
+            "order_by": order_by,
         }
 
         results = []
-        async with httpx.AsyncClient(timeout=20) as client:
-            for attempt in range(2):  # simple retry
-                try:
-                    r = await client.get(f"{self.base_url}/search/photos", headers=headers, params=params)
-                    if r.status_code == 200:
-                        data = r.json().get("results", [])
-                        results = data if data else []
-                        break
-                except Exception:
-                    if attempt == 1:
-                        results = []
-                    continue
+        client = http_clients.get("unsplash")
+        for attempt in range(2):  # simple retry
+            try:
+                r = await client.get(f"{self.base_url}/search/photos", headers=headers, params=params)
+                unsplash_quota.record(r.status_code, r.headers)
+                if r.status_code == 200:
+                    data = r.json().get("results", [])
+                    results = data if data else []
+                    break
+                if r.status_code < 500:
+                    break  # 4xx (auth, rate limit) will not succeed on retry
+            except Exception:
+                if attempt == 1:
+                    results = []
+                continue
 
         if not results:
             return self._get_placeholder_images(count, width, height, query)
@@ -73,7 +103,9 @@ class UnsplashService:
                 author_username=p["user"]["username"],
                 author_profile=f"https://unsplash.com/@{p['user']['username']}?utm_source={APP_NAME}&utm_medium=referral",
                 unsplash_link=f"https://unsplash.com/photos/{p['id']}?utm_source={APP_NAME}&utm_medium=referral",
-                download_location=p["links"].get("download_location", "")
+                download_location=p["links"].get("download_location", ""),
+                raw_url=urls.get("raw") or "",
+                color=p.get("color") or "",
             ))
         return imgs
 
@@ -82,8 +114,8 @@ class UnsplashService:
             return
         headers = {"Authorization": f"Client-ID {self.access_key}"}
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                await client.get(download_location, headers=headers)
+            r = await http_clients.get("unsplash").get(download_location, headers=headers, timeout=10)
+            unsplash_quota.record(r.status_code, r.headers)
         except Exception:
             pass
 
@@ -97,7 +129,8 @@ class UnsplashService:
         imgs: List[UnsplashImage] = []
         for i in range(max(1, count)):
             seed = (query or random.choice(PICSUM_SEEDS)).replace(" ", "-")[:40]
-            url = f"https://picsum.photos/seed/{seed}-{i}/{w}/{h}"
+            raw_url = f"https://picsum.photos/seed/{seed}-{i}"
+            url = f"{raw_url}/{w}/{h}"
             imgs.append(UnsplashImage(
                 id=f"picsum-{seed}-{i}",
                 url=url,
@@ -107,6 +140,54 @@ class UnsplashService:
                 author_username="picsum",
                 author_profile="https://picsum.photos/",
                 unsplash_link="",
-                download_location=""
+                download_location="",
+                raw_url=raw_url,
             ))
         return imgs
+
+
+class DownloadTracker:
+    """
+    Background queue for Unsplash download tracking (required by their API guidelines
+    but never on the critical path). The worker starts lazily on first enqueue.
+    """
+
+    def __init__(self, unsplash: Optional[UnsplashService] = None):
+        self.unsplash = unsplash
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.tracked = 0
+
+    def enqueue(self, download_location: str) -> None:
+        if not download_location:
+            return
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        self._queue.put_nowait(download_location)
+
+    async def _run(self) -> None:
+        unsplash = self.unsplash or UnsplashService()
+        while True:
+            location = await self._queue.get()
+            try:
+                await unsplash.track_download(location)
+                self.tracked += 1
+            except Exception as e:
+                logger.debug(f"Download tracking failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """Flush pending tracking calls and stop the worker (shutdown / batch end)."""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self._queue.qsize()} pending download-tracking calls")
+        self._worker.cancel()
+        self._worker = None
+
+
+download_tracker = DownloadTracker()
@@ -1,26 +1,27 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 import uuid
 
 class UserService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def get_user_by_id(self, user_id: uuid.UUID) -> Optional[User]:
+    async def get_user_by_id(self, user_id: uuid.UUID) -> Optional[User]:
         """Get user by ID"""
-        return self.db.query(User).filter(User.id == user_id).first()
+        return await self.db.scalar(select(User).where(User.id == user_id).limit(1))
     
-    def get_user_by_clerk_id(self, clerk_id: str) -> Optional[User]:
+    async def get_user_by_clerk_id(self, clerk_id: str) -> Optional[User]:
         """Get user by Clerk ID"""
-        return self.db.query(User).filter(User.clerk_id == clerk_id).first()
+        return await self.db.scalar(select(User).where(User.clerk_id == clerk_id).limit(1))
     
-    def get_user_by_email(self, email: str) -> Optional[User]:
+    async def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
-        return self.db.query(User).filter(User.email == email).first()
+        return await self.db.scalar(select(User).where(User.email == email).limit(1))
     
-    def create_user(self, user_create: UserCreate) -> User:
+    async def create_user(self, user_create: UserCreate) -> User:
         """Create a new user"""
         db_user = User(
             clerk_id=user_create.clerk_id,
@@ -30,11 +31,11 @@ class UserService:
             image_url=user_create.image_url
         )
         self.db.add(db_user)
-        self.db.commit()
-        self.db.refresh(db_user)
+        await self.db.commit()
+        await self.db.refresh(db_user)
         return db_user
     
-    def get_or_create_user(
+    async def get_or_create_user(
         self, 
         clerk_id: str, 
         email: str, 
@@ -43,7 +44,7 @@ class UserService:
         image_url: Optional[str] = None
     ) -> User:
         """Get existing user or create new one"""
-        user = self.get_user_by_clerk_id(clerk_id)
+        user = await self.get_user_by_clerk_id(clerk_id)
         if user:
             # Update user info if changed
             updated = False
@@ -61,8 +62,8 @@ class UserService:
                 updated = True
             
             if updated:
-                self.db.commit()
-                self.db.refresh(user)
+                await self.db.commit()
+                await self.db.refresh(user)
             
             return user
         
@@ -74,11 +75,11 @@ class UserService:
             last_name=last_name,
             image_url=image_url
         )
-        return self.create_user(user_create)
+        return await self.create_user(user_create)
     
-    def update_user(self, user_id: uuid.UUID, user_update: UserUpdate) -> User:
+    async def update_user(self, user_id: uuid.UUID, user_update: UserUpdate) -> User:
         """Update user"""
-        user = self.get_user_by_id(user_id)
+        user = await self.get_user_by_id(user_id)
         if not user:
             raise ValueError("User not found")
         
@@ -86,16 +87,16 @@ class UserService:
         for field, value in update_data.items():
             setattr(user, field, value)
         
-        self.db.commit()
-        self.db.refresh(user)
+        await self.db.commit()
+        await self.db.refresh(user)
         return user
     
-    def delete_user(self, user_id: uuid.UUID) -> bool:
+    async def delete_user(self, user_id: uuid.UUID) -> bool:
         """Delete user (soft delete)"""
-        user = self.get_user_by_id(user_id)
+        user = await self.get_user_by_id(user_id)
         if not user:
             return False
         
         user.is_active = False
-        self.db.commit()
+        await self.db.commit()
         return True
\ No newline at end of file
@@ -2,12 +2,12 @@ from typing import Dict, Any
 from datetime import datetime
 import asyncio
 import redis.asyncio as redis
-import asyncpg
 import boto3
 from botocore.client import BaseClient
 from botocore.exceptions import ClientError
 from openai import AsyncOpenAI
 from app.core.config import settings
+from app.core.database import postgres
 
 class HealthStatus:
     def __init__(self):
@@ -27,15 +27,9 @@ health_status = HealthStatus()
 async def check_postgres_connection() -> Dict[str, Any]:
     """Check PostgreSQL database connection"""
     try:
-        # Extract connection parameters from the URL
-        db_url = settings.DATABASE_URL
-        if db_url.startswith('postgresql+asyncpg://'):
-            db_url = db_url.replace('postgresql+asyncpg://', 'postgresql://')
-        
-        # Connect using the standard PostgreSQL URL format
-        conn = await asyncpg.connect(dsn=db_url)
-        await conn.close()
-        status = {"status": "connected", "error": None}
+        # through the shared pool: checks what requests use, without a connection per probe
+        await postgres.ping()
+        status = {"status": "connected", "pool": postgres.stats()["async"], "error": None}
         health_status.postgres_status = status
         return status
     except Exception as e:
@@ -91,7 +85,7 @@ async def check_openai_connection() -> Dict[str, Any]:
         return status
     
     try:
-        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL or None)
         await client.models.list()
         status = {"status": "connected", "error": None}
         health_status.openai_status = status
@@ -0,0 +1,149 @@
+"""
+Event-loop lag during concurrent design listing: blocking Session vs AsyncSession.
+
+    cd backend && python -m benchmarks.db_event_loop_lag_bench                 # uses DATABASE_URL
+    python -m benchmarks.db_event_loop_lag_bench --concurrency 50 --designs 200 --cleanup
+
+A ticker task sleeps in short intervals and records how late it wakes up:
+that is the delay every other coroutine on the loop (SSE generation streams,
+other requests) sees while the listing runs.
+
+  blocking   the previous DesignService path: sync SessionLocal queries called from async endpoints
+  async      DesignService on AsyncSession (what /api/v1/designs does now)
+
+Seeds a benchmark user (clerk id "bench-event-loop-lag") with --designs designs if it has fewer.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List
+
+from sqlalchemy import delete
+
+from app.core.database import AsyncSessionLocal, SessionLocal, async_engine, sync_engine
+from app.models.design import Design
+from app.schemas.design import DesignCreate
+from app.services.design_service import DesignService
+from app.services.user_service import UserService
+
+BENCH_CLERK_ID = "bench-event-loop-lag"
+TICK_SECONDS = 0.005
+
+
+class LagMonitor:
+    """Wakes up every TICK_SECONDS and records how late each wake-up was."""
+
+    def __init__(self, interval: float = TICK_SECONDS):
+        self.interval = interval
+        self.lags_ms: List[float] = []
+        self._stopped = asyncio.Event()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stopped.is_set():
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags_ms.append(max(0.0, (loop.time() - started - self.interval) * 1000))
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+def blocking_list(user_id: uuid.UUID, limit: int) -> List[Design]:
+    """The pre-AsyncSession DesignService.get_user_designs, as the endpoints ran it (verbatim query)."""
+    db = SessionLocal()
+    try:
+        return db.query(Design).filter(Design.user_id == user_id).offset(0).limit(limit).all()
+    finally:
+        db.close()
+
+
+async def blocking_worker(user_id: uuid.UUID, limit: int) -> int:
+    return len(blocking_list(user_id, limit))
+
+
+async def async_worker(user_id: uuid.UUID, limit: int) -> int:
+    async with AsyncSessionLocal() as db:
+        return len(await DesignService(db).get_user_designs(user_id, limit=limit))
+
+
+async def seed(designs: int) -> uuid.UUID:
+    async with AsyncSessionLocal() as db:
+        user = await UserService(db).get_or_create_user(clerk_id=BENCH_CLERK_ID, email=f"{BENCH_CLERK_ID}@example.com")
+        service = DesignService(db)
+        for i in range(await service.count_user_designs(user.id), designs):
+            await service.create_design(user.id, DesignCreate(
+                title=f"Benchmark design {i}",
+                description="Seeded by benchmarks.db_event_loop_lag_bench " * 8,
+                prompt_config={"source": "benchmark", "screens": [{"title": f"Screen {j}"} for j in range(5)]},
+                tags=["benchmark"],
+            ))
+        return user.id
+
+
+async def cleanup(user_id: uuid.UUID) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Design).where(Design.user_id == user_id))
+        await db.commit()
+
+
+async def run_mode(
+    worker: Callable[[uuid.UUID, int], Awaitable[int]], user_id: uuid.UUID, concurrency: int, requests: int, limit: int
+) -> Dict[str, Any]:
+    monitor = LagMonitor()
+    ticker = asyncio.create_task(monitor.run())
+    await asyncio.sleep(TICK_SECONDS * 2)
+
+    async def client() -> None:
+        for _ in range(requests):
+            await worker(user_id, limit)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    monitor.stop()
+    await ticker
+
+    lags = sorted(monitor.lags_ms) or [0.0]
+    return {
+        "wall_ms": round(wall * 1000, 1),
+        "req_per_s": round(concurrency * requests / wall, 1),
+        "lag_p50_ms": round(statistics.median(lags), 2),
+        "lag_p99_ms": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))], 2),
+        "lag_max_ms": round(lags[-1], 2),
+        "ticks": len(monitor.lags_ms),
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    user_id = await seed(args.designs)
+    print(f"📄 listing {args.limit} of {args.designs}+ designs, {args.concurrency} clients x {args.requests} requests")
+    try:
+        for name, worker in (("blocking", blocking_worker), ("async", async_worker)):
+            await worker(user_id, args.limit)  # warm the pool
+            r = await run_mode(worker, user_id, args.concurrency, args.requests, args.limit)
+            print(
+                f"  {name:>8}: wall {r['wall_ms']:>8.1f} ms  {r['req_per_s']:>7.1f} req/s  "
+                f"loop lag p50 {r['lag_p50_ms']:>7.2f} ms  p99 {r['lag_p99_ms']:>7.2f} ms  max {r['lag_max_ms']:>7.2f} ms"
+            )
+    finally:
+        if args.cleanup:
+            await cleanup(user_id)
+        await async_engine.dispose()
+        sync_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients listing designs")
+    parser.add_argument("--requests", type=int, default=10, help="Listings per client")
+    parser.add_argument("--designs", type=int, default=100, help="Designs seeded for the benchmark user")
+    parser.add_argument("--limit", type=int, default=100, help="Page size of each listing")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the seeded designs afterwards")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Microbenchmark: single-pass ImageProcessor vs the previous regex cascade.
+
+    cd backend && python -m benchmarks.image_processor_bench
+    python -m benchmarks.image_processor_bench --corpus ./batch-out   # *.html or app.batch --out-dir JSON
+
+Without --corpus a synthetic corpus of generated-looking pages (8-80 KB) is used.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import statistics
+import time
+from html import escape
+from typing import Any, Dict, List
+
+from app.models.design_state import UnsplashImage
+from app.services.image_processor import IMG_PLACEHOLDER, ImageProcessor
+
+AI_IMG_SELECTOR = r'\bdata-ai-img\s*=\s*["\']([^"\']+)["\']'
+AI_BG_SELECTOR  = r'\bdata-ai-bg\s*=\s*["\']([^"\']+)["\']'
+
+
+class LegacyImageProcessor:
+    """The regex-cascade implementation this benchmark compares against (verbatim)."""
+
+    def extract_image_requirements(self, html: str) -> List[Dict[str, Any]]:
+        """
+        Extract what images we need to fetch. We look for:
+        - <img ... src|data-src=PLACEHOLDER ...> (+ alt | nearest heading)
+        - style="background-image:url(PLACEHOLDER)"
+        - Tailwind arbitrary background class bg-[url(PLACEHOLDER)]
+        - Explicit hints via data-ai-img / data-ai-bg to craft better queries
+        """
+        reqs: List[Dict[str, Any]] = []
+
+        # <img src="placeholder|data:" ... alt="...">  (also supports data-ai-img)
+        for m in re.finditer(
+            rf'<img[^>]+(?:src|data-src)=["\']{IMG_PLACEHOLDER}[^"\']*["\'][^>]*>',
+            html, re.I
+        ):
+            tag = m.group(0)
+            kind = self._match_attr(tag, AI_IMG_SELECTOR) or "image"
+            alt  = self._attr(tag, "alt") or self._guess_context_label(html, m.start())
+            q    = self._query(alt or kind)
+            reqs.append({"query": q, "type": "img", "kind": kind})
+
+        # inline style background-image (also supports data-ai-bg on same element)
+        for m in re.finditer(
+            rf'(<[^>]+(?:{AI_BG_SELECTOR})?[^>]*style=["\'][^"\']*background-image\s*:\s*url\(\s*["\']?{IMG_PLACEHOLDER}[^)\'"]*["\']?\s*\)[^"\']*["\'][^>]*>)',
+            html, re.I
+        ):
+            tag = m.group(1)
+            kind = self._match_attr(tag, AI_BG_SELECTOR) or "background"
+            label = self._guess_context_label(html, m.start()) or kind
+            q = self._query(label)
+            reqs.append({"query": q, "type": "background", "kind": kind, "width": 1600, "height": 900})
+
+        # Tailwind arbitrary bg: bg-[url('#'|data:image:...)]
+        # We can’t easily set inline style here without parsing, so we still fetch an image
+        # and later replace the class AND (optionally) add/patch a style attribute via regex.
+        if re.search(r'bg-\[url\(\s*["\']?'+IMG_PLACEHOLDER+r'[^)\']*["\']?\s*\)\]', html, re.I):
+            reqs.append({"query": "modern ui hero", "type": "background", "kind": "tailwind-bg", "width": 1600, "height": 900})
+
+        # Cap to a sane max
+        return reqs[:8]
+
+    def inject_images(self, html: str, images: List[UnsplashImage]) -> str:
+        if not images:
+            return html
+
+        pool = images[:]  # copy so we can pop
+
+        # Replace <img ... src=placeholder> (ALL matches)
+        def repl_img(m):
+            nonlocal pool
+            tag = m.group(0)
+            if not pool:
+                return tag
+            img = pool.pop(0)
+            tag = re.sub(r'(?:src|data-src)=["\'].*?["\']', f'src="{img.url}"', tag, flags=re.I)
+            # add perf + alt if missing
+            if re.search(r'\bloading=', tag, re.I) is None:
+                tag = tag[:-1] + ' loading="lazy" decoding="async">'
+            if re.search(r'\balt=', tag, re.I) is None:
+                tag = tag[:-1] + f' alt="{escape(img.alt_description or "Image")}">'
+            # widths/heights are optional; we leave user-provided values intact
+            return tag
+
+        html = re.sub(
+            rf'<img[^>]+(?:src|data-src)=["\']{IMG_PLACEHOLDER}[^"\']*["\'][^>]*>',
+            repl_img, html, flags=re.I
+        )
+
+        # Replace ALL inline style background placeholders, cycling through pool
+        def repl_bg_inline(m):
+            nonlocal pool
+            prefix = m.group(1)  # captures `(style="... background-image: `
+            if not pool:
+                return m.group(0)
+            bg = pool.pop(0)
+            return re.sub(
+                rf'url\(\s*["\']?{IMG_PLACEHOLDER}[^)\'"]*["\']?\s*\)',
+                f'url({bg.url})',
+                m.group(0),
+                flags=re.I
+            )
+
+        html = re.sub(
+            rf'((?:style)=["\'][^"\']*background-image\s*:\s*)url\(\s*["\']?{IMG_PLACEHOLDER}[^)\'"]*["\']?\s*\)',
+            repl_bg_inline, html, flags=re.I
+        )
+
+        # Tailwind arbitrary bg: replace class and add inline style if possible
+        # 1) Replace class token with sane defaults
+        html = re.sub(
+            r'(class=["\'][^"\']*)\b(bg-\[url\([^\]]+\)\])',
+            r'\1 bg-cover bg-center',
+            html, flags=re.I
+        )
+        # 2) If pool still has images, add a style="background-image:url(...)" next to class
+        #    For safety, do a light-weight approach: when we see a class=..., if the tag has no style= with background,
+        #    inject one (single best-effort per tag).
+        def add_inline_style(m):
+            nonlocal pool
+            before = m.group(1)
+            rest   = m.group(2)
+            if not pool:
+                return m.group(0)
+            if re.search(r'style=["\'][^"\']*background-image\s*:', rest, re.I):
+                return m.group(0)
+            bg = pool.pop(0)
+            # inject a style attr before closing '>'
+            if 'style=' in rest:
+                return m.group(0)  # already has a style (even if not background); avoid risking breakage
+            return before + ' style="background-image:url(' + bg.url + ')"' + rest
+
+        html = re.sub(
+            r'(<[^>]*class=["\'][^"\']*bg-cover[^"\']*bg-center[^"\']*["\'])([^>]*>)',
+            add_inline_style,
+            html, flags=re.I
+        )
+
+        return html
+
+    # helpers
+    def _attr(self, tag: str, name: str) -> str:
+        m = re.search(rf'\b{name}\s*=\s*["\']([^"\']+)["\']', tag, re.I)
+        return m.group(1).strip() if m else ""
+
+    def _match_attr(self, tag: str, pattern: str) -> str:
+        m = re.search(pattern, tag, re.I)
+        return m.group(1).strip() if m else ""
+
+    def _query(self, alt: str) -> str:
+        if not alt:
+            return "modern ui hero"
+        stop = {"image", "photo", "picture", "of", "the", "a", "an", "for", "and"}
+        words = [w for w in re.split(r'\s+', alt.lower()) if w and w not in stop]
+        return " ".join(words[:5]) or "modern ui hero"
+
+    def _guess_context_label(self, html: str, idx: int) -> str:
+        # look ~200 chars back for a heading or CTA
+        window = html[max(0, idx-300):idx]
+        m = re.search(r'<h[1-3][^>]*>([^<]{3,120})</h[1-3]>', window, re.I)
+        if m:
+            return m.group(1).strip()
+        c = re.search(r'<a[^>]*>([^<]{3,120})</a>', window, re.I)
+        return (c.group(1).strip() if c else "website hero")
+
+
+
+# ---- corpus ----
+_SECTION = """
+<section class="py-20 bg-gradient-to-br from-slate-900 to-indigo-900 text-white" data-ai-bg="section"
+         style="background-image:url('#'); background-size:cover">
+  <div class="max-w-7xl mx-auto px-6 grid md:grid-cols-3 gap-8">
+    <h2 class="text-3xl font-bold tracking-tight">{title}</h2>
+    {cards}
+  </div>
+</section>
+"""
+_CARD = """
+    <article class="rounded-2xl bg-white/10 p-6 shadow-xl hover:-translate-y-1 transition">
+      <img src="{src}" data-ai-img="card" alt="{alt}" class="w-full h-48 object-cover rounded-xl">
+      <h3 class="mt-4 text-xl font-semibold">{alt}</h3>
+      <p class="mt-2 text-slate-300">{text}</p>
+      <a href="#" class="inline-flex items-center gap-2 mt-4 text-indigo-300">Learn more <i data-lucide="arrow-right"></i></a>
+    </article>
+"""
+_WORDS = ("coffee team product growth analytics travel design studio cloud secure fast "
+          "modern portfolio launch pricing support community mobile workflow").split()
+
+
+def synthetic_page(rng: random.Random, sections: int) -> str:
+    parts = ['<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+             '<script src="https://cdn.tailwindcss.com"></script>'
+             '<script>document.addEventListener("DOMContentLoaded",()=>{if(1<2){lucide.createIcons()}})</script>'
+             '</head><body class="font-sans antialiased">',
+             '<header class="h-[80vh] bg-[url(\'#\')] bg-cover" data-ai-bg="hero"><h1 class="text-6xl">Welcome</h1></header>']
+    for _ in range(sections):
+        cards = "".join(
+            _CARD.format(
+                src=rng.choice(["#", "placeholder.jpg", "data:image/png;base64,iVBORw0KGgo=", "https://example.com/a.jpg"]),
+                alt=" ".join(rng.sample(_WORDS, 3)),
+                text=" ".join(rng.choices(_WORDS, k=40)),
+            )
+            for _ in range(3)
+        )
+        parts.append(_SECTION.format(title=" ".join(rng.sample(_WORDS, 2)).title(), cards=cards))
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def load_corpus(path: str) -> List[str]:
+    pages: List[str] = []
+    for file in sorted(glob.glob(os.path.join(path, "*.html"))):
+        with open(file, encoding="utf-8") as f:
+            pages.append(f.read())
+    for file in sorted(glob.glob(os.path.join(path, "*.json"))):
+        with open(file, encoding="utf-8") as f:
+            data = json.load(f)
+        pages.extend(s.get("html") or "" for s in data.get("screens", []))
+    return [p for p in pages if p]
+
+
+def fake_images(n: int) -> List[UnsplashImage]:
+    return [UnsplashImage(
+        id=f"bench-{i}", url=f"https://images.unsplash.com/photo-{i}?auto=format&q=80&w=1600",
+        alt_description="bench image", width=1600, height=900, author="Bench",
+        author_username="bench", author_profile="", unsplash_link="", download_location="",
+    ) for i in range(n)]
+
+
+def run_once(processor_cls, html: str) -> float:
+    started = time.perf_counter()
+    processor = processor_cls()
+    reqs = processor.extract_image_requirements(html)
+    processor.inject_images(html, fake_images(len(reqs)))
+    return (time.perf_counter() - started) * 1000
+
+
+def bench(pages: List[str], repeat: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, cls in (("legacy", LegacyImageProcessor), ("scanner", ImageProcessor)):
+        per_page = []
+        for html in pages:
+            per_page.append(min(run_once(cls, html) for _ in range(repeat)))
+        results[name] = {
+            "total_ms": round(sum(per_page), 2),
+            "median_ms": round(statistics.median(per_page), 3),
+            "max_ms": round(max(per_page), 3),
+        }
+    results["speedup"] = round(results["legacy"]["total_ms"] / max(results["scanner"]["total_ms"], 1e-9), 2)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of *.html pages or app.batch --out-dir JSON files")
+    parser.add_argument("--pages", type=int, default=30, help="Synthetic pages to generate")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per page (best is kept)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.corpus:
+        pages = load_corpus(args.corpus)
+    else:
+        rng = random.Random(args.seed)
+        pages = [synthetic_page(rng, sections=rng.randint(2, 25)) for _ in range(args.pages)]
+    sizes = [len(p) for p in pages]
+    print(f"📄 {len(pages)} pages, {min(sizes) // 1024}-{max(sizes) // 1024} KB (median {statistics.median(sizes) // 1024} KB)")
+
+    results = bench(pages, args.repeat)
+    for name in ("legacy", "scanner"):
+        r = results[name]
+        print(f"  {name:>8}: total {r['total_ms']:>9.2f} ms  median {r['median_ms']:>7.3f} ms  max {r['max_ms']:>7.3f} ms")
+    print(f"  speedup: {results['speedup']}x")
+
+
+if __name__ == "__main__":
+    main()
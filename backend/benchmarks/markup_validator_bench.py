@@ -0,0 +1,129 @@
+"""
+Microbenchmark: compiled single-pass MarkupValidator vs per-rule regexes.
+
+    cd backend && python -m benchmarks.markup_validator_bench
+    python -m benchmarks.markup_validator_bench --corpus ./batch-out   # *.html or app.batch --out-dir JSON
+
+Compared per page:
+  legacy     the seven IGNORECASE regexes of the old validate_tailwind_classes (bool only)
+  per-rule   the same checks as the rule engine, one regex pass per rule (structured findings)
+  compiled   MarkupValidator over the whole page
+  streamed   MarkupValidator fed in 64-char chunks, as during generation
+"""
+import argparse
+import random
+import re
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from app.services.markup_validator import MarkupValidator, validate_markup
+from benchmarks.image_processor_bench import load_corpus, synthetic_page
+
+STREAM_CHUNK = 64
+
+
+def legacy_validate(html: str) -> bool:
+    """The old CodeParser.validate_tailwind_classes (verbatim)."""
+    shadcn_patterns = [
+        r'cn\(',
+        r'className.*=.*{',
+        r'Button(?!.*[a-z])',  # Button component (not button element)
+        r'Card(?!.*[a-z])',
+        r'Input(?!.*[a-z])',
+        r'Dialog(?!.*[a-z])',
+        r'Sheet(?!.*[a-z])'
+    ]
+
+    for pattern in shadcn_patterns:
+        if re.search(pattern, html, re.IGNORECASE):
+            return False
+
+    return True
+
+
+_IMG_RE = r'<img\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*>'
+PER_RULE = [
+    ("forbidden-component", r'<(?:Button|Card|Input|Dialog|Sheet|[A-Z][a-z]+[A-Z]\w*)\b', 0),
+    ("jsx-classname", r'<[a-zA-Z][^>]*\bclassName\s*=', 0),
+    ("cn-helper", r'(?<![\w.$])cn\(', 0),
+    ("img-missing-alt", rf'(?!{_IMG_RE[:4]}[^>]*\balt\b){_IMG_RE}', re.I),
+    ("img-missing-width", rf'(?!<img\b[^>]*\bwidth\s*=){_IMG_RE}', re.I),
+    ("img-missing-height", rf'(?!<img\b[^>]*\bheight\s*=){_IMG_RE}', re.I),
+    ("external-hotlink", r'<(?:img|source)\b[^>]*\bsrcs?e?t?\s*=\s*["\']?(?:https?:)?//(?!images\.unsplash\.com|picsum\.photos)', re.I),
+    ("external-hotlink-css", r'url\(\s*["\']?(?:https?:)?//(?!images\.unsplash\.com|picsum\.photos)', re.I),
+    ("unbounded-canvas", r'<canvas\b(?![^>]*\bheight)[^>]*>', re.I),
+]
+_PER_RULE_COMPILED = [(name, re.compile(pattern, flags)) for name, pattern, flags in PER_RULE]
+
+
+def per_rule_validate(html: str) -> List[Dict[str, Any]]:
+    findings = []
+    for name, regex in _PER_RULE_COMPILED:
+        findings.extend({"rule": name, "start": m.start(), "end": m.end()} for m in regex.finditer(html))
+    return findings
+
+
+def streamed_validate(html: str) -> List[Any]:
+    validator = MarkupValidator()
+    for i in range(0, len(html), STREAM_CHUNK):
+        validator.feed(html[i:i + STREAM_CHUNK])
+    validator.close()
+    return validator.findings
+
+
+def run_once(fn: Callable[[str], Any], html: str) -> float:
+    started = time.perf_counter()
+    fn(html)
+    return (time.perf_counter() - started) * 1000
+
+
+def bench(pages: List[str], repeat: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, fn in (
+        ("legacy", legacy_validate),
+        ("per-rule", per_rule_validate),
+        ("compiled", validate_markup),
+        ("streamed", streamed_validate),
+    ):
+        per_page = [min(run_once(fn, html) for _ in range(repeat)) for html in pages]
+        results[name] = {
+            "total_ms": round(sum(per_page), 2),
+            "median_ms": round(statistics.median(per_page), 3),
+            "max_ms": round(max(per_page), 3),
+        }
+    results["speedup_vs_per_rule"] = round(
+        results["per-rule"]["total_ms"] / max(results["compiled"]["total_ms"], 1e-9), 2
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of *.html pages or app.batch --out-dir JSON files")
+    parser.add_argument("--pages", type=int, default=30, help="Synthetic pages to generate")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per page (best is kept)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.corpus:
+        pages = load_corpus(args.corpus)
+    else:
+        rng = random.Random(args.seed)
+        pages = [synthetic_page(rng, sections=rng.randint(2, 25)) for _ in range(args.pages)]
+    sizes = [len(p) for p in pages]
+    print(f"📄 {len(pages)} pages, {min(sizes) // 1024}-{max(sizes) // 1024} KB (median {statistics.median(sizes) // 1024} KB)")
+
+    flagged = sum(1 for p in pages if not legacy_validate(p))
+    findings = sum(len(validate_markup(p)) for p in pages)
+    print(f"  legacy rejects {flagged}/{len(pages)} pages; rule engine reports {findings} findings")
+
+    results = bench(pages, args.repeat)
+    for name in ("legacy", "per-rule", "compiled", "streamed"):
+        r = results[name]
+        print(f"  {name:>8}: total {r['total_ms']:>9.2f} ms  median {r['median_ms']:>7.3f} ms  max {r['max_ms']:>7.3f} ms")
+    print(f"  compiled vs per-rule: {results['speedup_vs_per_rule']}x")
+
+
+if __name__ == "__main__":
+    main()
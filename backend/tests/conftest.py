@@ -0,0 +1,25 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(UUID, "sqlite")
+def _uuid_on_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@pytest_asyncio.fixture
+async def sqlite_sessions(tmp_path):
+    """async_sessionmaker over a throwaway SQLite file holding the users and designs tables."""
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app.models.design import Design
+    from app.models.user import User
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'designs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda c: User.metadata.create_all(c, tables=[User.__table__, Design.__table__]))
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
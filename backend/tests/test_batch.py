@@ -0,0 +1,35 @@
+import argparse
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app import batch
+from app.core import database
+from app.models.design import Design
+from app.models.user import User
+
+
+def screens(html: str):
+    return [{"id": "home", "title": "Home", "screen_type": "landing", "html": html, "credits": [{"alt": "hero"}]}]
+
+
+@pytest.mark.asyncio
+async def test_saving_a_brief_again_replaces_its_design(sqlite_sessions, monkeypatch):
+    monkeypatch.setattr(database, "AsyncSessionLocal", sqlite_sessions)
+    runner = batch.BatchRunner(argparse.Namespace(user_clerk_id="batch-generator", public=False))
+    runner.user_id = uuid.uuid4()
+    async with sqlite_sessions() as db:
+        db.add(User(id=runner.user_id, clerk_id="batch-generator", email="batch@example.com", user_metadata={}))
+        await db.commit()
+    item = {"id": "brief-1", "brief": "A landing page for a bakery"}
+
+    first = await runner._save_design(item, {"screens": []}, screens("<p>first</p>"))
+    again = await runner._save_design(item, {"screens": []}, screens("<p>retried</p>"))
+
+    assert first == again
+    async with sqlite_sessions() as db:
+        assert await db.scalar(select(func.count()).select_from(Design)) == 1
+        design = await db.get(Design, uuid.UUID(again))
+    assert (design.html_code, design.status, design.images) == ("<p>retried</p>", "completed", [{"alt": "hero"}])
+    assert design.prompt_config["brief_id"] == "brief-1"
@@ -0,0 +1,62 @@
+from app.services.code_parser import CodeParser, FencedCodeStreamParser
+
+DOC = (
+    "<!DOCTYPE html>\n<html><body>\n<script>var s = '</html>'; if (a < b) {}</script>\n"
+    "<p>after</p>\n</body></html>"
+)
+
+
+def stream(text: str, size: int) -> FencedCodeStreamParser:
+    parser = FencedCodeStreamParser()
+    fed = "".join(parser.feed(text[i:i + size]) for i in range(0, len(text), size)) + parser.close()
+    assert fed.strip() == parser.html
+    return parser
+
+
+def test_fenced_block_ends_at_the_closing_fence():
+    text = f"Here you go:\n```html\n{DOC}\n```\nLet me know if you want changes."
+    for size in (1, 5, 64, len(text)):
+        parser = stream(text, size)
+        assert parser.html == DOC
+        assert parser.lead == "Here you go:"
+        assert parser.trail == "Let me know if you want changes."
+        assert parser.done
+
+
+def test_closing_fence_line_split_across_chunks():
+    text = "```html\n<html></html>\n```js\ncode\n\nbye"
+    trails = {stream(text, size).trail for size in (1, 2, 3, 5, len(text))}
+    assert trails == {"code\n\nbye"}
+
+
+def test_unfenced_document_ignores_html_end_inside_scripts():
+    text = f"Sure.\n{DOC}\nHope this helps!"
+    for size in (1, 3, 7, 64, len(text)):
+        parser = stream(text, size)
+        assert parser.html == DOC
+        assert parser.trail == "Hope this helps!"
+
+
+def test_script_tag_split_across_chunks():
+    doc = '<html><body><script src="x.js" data-note="a long attribute value"></script><script>"</html>"</script><p>x</p></body></html>'
+    for size in (2, 9, 13):
+        assert stream(doc, size).html == doc
+
+
+def test_done_before_the_closing_prose_arrives():
+    parser = FencedCodeStreamParser()
+    parser.feed("```html\n<html><body>hi</body></html>\n")
+    assert not parser.done
+    parser.feed("```\n")
+    assert parser.done
+
+
+def test_extra_blocks_are_kept():
+    result = CodeParser().parse_generated_code(
+        "```html\n<html></html>\n```\n```css\n.a{color:red}\n```\n```js\nconsole.log(1)\n```"
+    )
+    assert result == {"html": "<html></html>", "css": ".a{color:red}", "js": "console.log(1)"}
+
+
+def test_no_code_block_falls_back_to_the_whole_text():
+    assert CodeParser().parse_generated_code("<div>just markup</div>")["html"] == "<div>just markup</div>"
@@ -0,0 +1,56 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+from app.schemas.design import DesignCreate
+from app.services.design_service import DesignService
+
+CLIENTS = 20
+LISTINGS_PER_CLIENT = 5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_design_listing_keeps_the_event_loop_responsive(sqlite_sessions):
+    user_id = uuid.uuid4()
+    async with sqlite_sessions() as db:
+        db.add(User(id=user_id, clerk_id="lag-test", email="lag-test@example.com", user_metadata={}))
+        await db.commit()
+        service = DesignService(db)
+        for i in range(100):
+            await service.create_design(user_id, DesignCreate(
+                title=f"Design {i}", description="Seeded for the loop lag test " * 8,
+                prompt_config={"screens": [{"title": f"Screen {j}"} for j in range(5)]},
+            ))
+
+    ticks = 0
+    listing = asyncio.Event()
+
+    async def ticker() -> None:
+        # one turn per pass of the event loop: it only advances while the listings are suspended
+        nonlocal ticks
+        while not listing.is_set():
+            await asyncio.sleep(0)
+            ticks += 1
+
+    async def client() -> int:
+        listed = 0
+        for _ in range(LISTINGS_PER_CLIENT):
+            async with sqlite_sessions() as db:
+                service = DesignService(db)
+                assert isinstance(service.db, AsyncSession)
+                listed += len(await service.get_user_designs(user_id, limit=20))
+        return listed
+
+    ticking = asyncio.create_task(ticker())
+    try:
+        listed = await asyncio.gather(*(client() for _ in range(CLIENTS)))
+    finally:
+        listing.set()
+        await ticking
+
+    assert listed == [20 * LISTINGS_PER_CLIENT] * CLIENTS
+    # every query hands the loop back while it waits; a blocking Session would run them all in one pass
+    assert ticks >= CLIENTS * LISTINGS_PER_CLIENT, f"event loop ran {ticks} times during the listings"
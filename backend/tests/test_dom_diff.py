@@ -0,0 +1,81 @@
+from app.services.dom_diff import apply_patch, diff_documents
+
+FILLER = "".join(f'<section id="s{i}"><h2>Section {i}</h2><p>Unchanged copy for section {i}.</p></section>' for i in range(12))
+
+
+def page(body: str, head: str = "<title>Demo</title>") -> str:
+    return f"<!DOCTYPE html><html><head>{head}</head><body>{body}{FILLER}</body></html>"
+
+
+def round_trip(old: str, new: str) -> dict:
+    patch = diff_documents(old, new)
+    assert patch["mode"] == "patch", patch
+    assert patch["ops"]
+    assert apply_patch(old, patch) == new
+    return patch
+
+
+def test_identical_documents():
+    doc = page("<p>Hi</p>")
+    assert diff_documents(doc, doc)["mode"] == "same"
+    assert apply_patch(doc, diff_documents(doc, doc)) == doc
+
+
+def test_text_moved_around_an_element():
+    patch = round_trip(page("<p>Hello <b>x</b></p>"), page("<p><b>x</b> Hello</p>"))
+    assert [op["op"] for op in patch["ops"]] == ["html"]
+
+
+def test_whitespace_inside_pre_and_textarea():
+    round_trip(page("<pre>a\n  b</pre>"), page("<pre>a\n    b</pre>"))
+    round_trip(page("<textarea>x  y</textarea>"), page("<textarea>x y</textarea>"))
+
+
+def test_changed_text_next_to_elements():
+    round_trip(page("<p>Price: <b>$5</b> per month</p>"), page("<p>Price: <b>$5</b> per year</p>"))
+
+
+def test_inserted_and_removed_elements():
+    old = page('<ul id="list"><li>a</li><li>b</li></ul>')
+    patch = round_trip(old, page('<ul id="list"><li>a</li><li>new</li><li>b</li></ul>'))
+    assert [op["op"] for op in patch["ops"]] == ["insert"]
+    patch = round_trip(old, page('<ul id="list"><li>b</li></ul>'))
+    assert [op["op"] for op in patch["ops"]] == ["remove"]
+    round_trip(old, page('<ul id="list"><li>b</li><li>c</li><li>d</li></ul>'))
+
+
+def test_insert_between_indented_siblings():
+    old = page('<div id="grid">\n  <a>1</a>\n  <a>3</a>\n</div>')
+    round_trip(old, page('<div id="grid">\n  <a>1</a>\n  <a>2</a>\n  <a>3</a>\n</div>'))
+    round_trip(old, page('<div id="grid">\n  <a>3</a>\n</div>'))
+
+
+def test_attribute_changes():
+    old = page('<a class="btn" href="/a" data-x=1>Go</a><img src="a.png" alt="">')
+    patch = round_trip(old, page('<a class="btn primary" href="/a">Go</a><img src="a.png" alt="" loading="lazy">'))
+    assert {op["op"] for op in patch["ops"]} == {"attrs"}
+    round_trip(old, page("<a class='btn' href=\"/b\" data-x=2>Go</a><img src=\"a.png\" alt=\"\">"))
+
+
+def test_reordered_attributes_replace_the_element():
+    patch = round_trip(page('<a class="btn" href="/a">Go</a>'), page('<a href="/a" class="btn">Go</a>'))
+    assert [op["op"] for op in patch["ops"]] == ["replace"]
+
+
+def test_full_when_not_a_document():
+    patch = diff_documents("<div>a</div>", "<div>b</div>")
+    assert patch["mode"] == "full" and patch["reason"] == "not a full document"
+
+
+def test_full_when_scripts_change():
+    patch = diff_documents(page("<script>a()</script>"), page("<script>b()</script>"))
+    assert patch["mode"] == "full" and patch["reason"] == "scripts changed"
+    patch = diff_documents(page("<p>x</p>"), page('<p>x</p><div><script src="/c.js"></script></div>'))
+    assert patch["mode"] == "full" and patch["reason"] == "scripts changed"
+
+
+def test_full_when_the_patch_is_too_large():
+    old = "<!DOCTYPE html><html><head></head><body><main>Old</main></body></html>"
+    new = "<!DOCTYPE html><html><head></head><body><main>Entirely new content, rewritten from the first line to the last</main></body></html>"
+    patch = diff_documents(old, new)
+    assert patch["mode"] == "full" and patch["reason"] == "patch too large"
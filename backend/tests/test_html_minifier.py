@@ -0,0 +1,63 @@
+from app.services.html_minifier import HTMLMinifier, minify_css, minify_html
+
+
+def chunked(html: str, size: int) -> str:
+    minifier = HTMLMinifier()
+    return "".join(minifier.feed(html[i:i + size]) for i in range(0, len(html), size)) + minifier.close()
+
+
+def test_whitespace_between_blocks_goes():
+    assert minify_html("<div>\n  <p> a </p>\n  <p>b</p>\n</div>") == "<div><p>a</p><p>b</p></div>"
+
+
+def test_whitespace_around_inline_and_replaced_elements_stays():
+    assert minify_html("<p>Watch <video></video> now</p>") == "<p>Watch <video></video> now</p>"
+    assert minify_html("<p>a <canvas></canvas> <iframe></iframe> b</p>") == "<p>a <canvas></canvas> <iframe></iframe> b</p>"
+
+
+def test_script_and_style_leave_whitespace_to_their_neighbours():
+    out = minify_html("<span>a</span> <script>x()</script> <span>b</span>")
+    assert out == "<span>a</span><script>x()</script> <span>b</span>"
+    assert minify_html("<div>\n  <script>x()</script>\n  <p>a</p>\n</div>") == "<div><script>x()</script><p>a</p></div>"
+
+
+def test_verbatim_elements_keep_whitespace():
+    html = "<pre>  a\n    b</pre><textarea>\n x  y\n</textarea>"
+    assert minify_html(html) == html
+
+
+def test_only_adjacent_identical_styles_merge():
+    cascade = "<style>.a{color:red}</style><style>.a{color:blue}</style><style>.a{color:red}</style>"
+    assert minify_html(cascade) == cascade
+    assert minify_html("<style>.a{color:red}</style>\n<style>.a {color: red}</style>") == "<style>.a{color:red}</style>"
+    assert minify_html('<style>.a{}</style><style media="print">.a{}</style>').count("<style") == 2
+
+
+def test_css_strings_are_untouched():
+    css = ".a::before { content : '  x  ' ; } /* don't */ .b { font-family: \"Open  Sans\" , serif }"
+    assert minify_css(css) == ".a::before{content:'  x  '}.b{font-family:\"Open  Sans\",serif}"
+
+
+def test_js_template_literals_keep_indentation():
+    js = "<script>\n  const t = `a\n     b ${ {x: 1}.x }\n   c`;\n\n  g()\n</script>"
+    assert minify_html(js) == "<script>const t = `a\n     b ${ {x: 1}.x }\n   c`;\ng()</script>"
+
+
+def test_js_continued_strings_and_comments():
+    js = "<script>\n  var s = 'x\\\n   y';\n  // it's\n  f('//')\n</script>"
+    assert minify_html(js) == "<script>var s = 'x\\\n   y';\n// it's\nf('//')</script>"
+
+
+def test_overridden_style_declarations_drop():
+    assert minify_html('<p style="color: red; margin:0; color: blue">x</p>') == '<p style="margin:0;color:blue">x</p>'
+
+
+def test_output_does_not_depend_on_chunking():
+    html = (
+        "<!DOCTYPE html>\n<html><head>\n<style>\n.a { color: red }\n</style>\n<script>\n  let t = `x\n  y`;\n"
+        "</script></head>\n<body>\n  <p>Hello <b>world</b> <video></video> !</p>\n  <pre> keep\n  this</pre>\n"
+        "<!-- note --></body></html>"
+    )
+    whole = minify_html(html)
+    for size in (1, 2, 3, 7, 16):
+        assert chunked(html, size) == whole
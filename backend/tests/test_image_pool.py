@@ -0,0 +1,44 @@
+import pytest
+
+from app.models.design_state import UnsplashImage
+from app.services.image_pool import IMAGE_CATEGORIES, POOL_PAGES, ImagePool
+
+
+def image(image_id: str) -> UnsplashImage:
+    return UnsplashImage(
+        id=image_id, url=f"https://images.unsplash.com/{image_id}", alt_description="", width=1600, height=900,
+        author="A", author_username="a", author_profile="", unsplash_link="", download_location="",
+    )
+
+
+class RecordingUnsplash:
+    def __init__(self):
+        self.calls = []
+
+    async def search_images(self, query, count=3, **kwargs):
+        self.calls.append({"query": query, **kwargs})
+        return [image(f"{query}-{kwargs['page']}-{kwargs['order_by']}-{i}") for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_each_refresh_fetches_new_images_past_the_search_cache():
+    unsplash = RecordingUnsplash()
+    pool = ImagePool(size=3, refresh_seconds=60, unsplash=unsplash)
+
+    drawn = []
+    for _ in range(POOL_PAGES + 1):
+        await pool.refresh()
+        drawn.append(pool.draw("abstract", 3)[0].id)
+
+    assert all(call["cached"] is False for call in unsplash.calls)
+    assert len(unsplash.calls) == len(IMAGE_CATEGORIES) * (POOL_PAGES + 1)
+    assert len(set(drawn)) == len(drawn)
+
+
+@pytest.mark.asyncio
+async def test_draw_only_serves_the_orientation_the_pool_was_warmed_with():
+    pool = ImagePool(size=3, refresh_seconds=60, unsplash=RecordingUnsplash())
+    await pool.refresh()
+
+    assert pool.draw("abstract", 2, orientation="landscape")
+    assert pool.draw("abstract", 2, orientation="portrait") is None
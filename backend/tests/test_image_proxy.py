@@ -0,0 +1,51 @@
+import httpx
+import pytest
+
+from app.services import image_proxy as proxy_module
+from app.services.image_proxy import ImageProxyError, ImageProxyService
+
+SOURCE = "https://images.unsplash.com/photo-1"
+
+
+def serve(monkeypatch, handler) -> None:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(proxy_module.http_clients, "get", lambda name: client)
+    monkeypatch.setattr(proxy_module, "MAX_SOURCE_BYTES", 1000)
+
+
+@pytest.mark.asyncio
+async def test_rejects_a_declared_oversized_source_without_reading_it(monkeypatch, tmp_path):
+    sent = []
+
+    async def body():
+        for _ in range(10):
+            sent.append(1)
+            yield b"x" * 500
+
+    serve(monkeypatch, lambda request: httpx.Response(
+        200, headers={"content-type": "image/jpeg", "content-length": "5000"}, content=body()
+    ))
+    with pytest.raises(ImageProxyError, match="too large"):
+        await ImageProxyService(cache_dir=str(tmp_path))._fetch(SOURCE)
+    assert not sent
+
+
+@pytest.mark.asyncio
+async def test_stops_reading_once_an_undeclared_source_passes_the_limit(monkeypatch, tmp_path):
+    sent = []
+
+    async def body():
+        for _ in range(100):
+            sent.append(1)
+            yield b"x" * 500
+
+    serve(monkeypatch, lambda request: httpx.Response(200, headers={"content-type": "image/jpeg"}, content=body()))
+    with pytest.raises(ImageProxyError, match="too large"):
+        await ImageProxyService(cache_dir=str(tmp_path))._fetch(SOURCE)
+    assert len(sent) == 3
+
+
+@pytest.mark.asyncio
+async def test_returns_a_source_within_the_limit(monkeypatch, tmp_path):
+    serve(monkeypatch, lambda request: httpx.Response(200, headers={"content-type": "image/png"}, content=b"png"))
+    assert await ImageProxyService(cache_dir=str(tmp_path))._fetch(SOURCE) == (b"png", "image/png")
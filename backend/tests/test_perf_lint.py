@@ -0,0 +1,43 @@
+from app.services.perf_lint import audit_page
+
+CHART = '<script src="https://cdn.jsdelivr.net/npm/chart.js@4/dist/chart.umd.min.js"></script>'
+
+
+def page(body_script: str) -> str:
+    return (
+        f"<!DOCTYPE html><html><head>{CHART}</head><body>"
+        f'<div style="height:300px"><canvas id="c"></canvas></div><script>{body_script}</script></body></html>'
+    )
+
+
+def deferred(html: str) -> bool:
+    out, _ = audit_page(html)
+    return "chart.umd.min.js\" defer>" in out
+
+
+def test_defers_when_later_scripts_wait_for_the_document():
+    assert deferred(page("document.addEventListener('DOMContentLoaded', () => { new Chart(c, {}); });"))
+    assert deferred(page("window.addEventListener('load', init);\nfunction init() { new Chart(c, {}); }"))
+    assert deferred(page("window.onload = function () { new Chart(c, {}); };"))
+
+
+def test_keeps_blocking_when_a_later_script_runs_at_top_level():
+    assert not deferred(page("new Chart(c, {});\ndocument.addEventListener('DOMContentLoaded', () => {});"))
+    assert not deferred(page("Chart.defaults.font.size = 14; window.onload = () => draw();"))
+    assert not deferred(page("// wait for DOMContentLoaded\nconst chart = new Chart(c, {});"))
+    assert not deferred(page("window.addEventListener('load', init());"))
+
+
+def test_keeps_blocking_before_later_external_scripts():
+    html = page("").replace("</body>", '<script src="/app.js"></script></body>')
+    assert not deferred(html)
+
+
+def test_keeps_blocking_when_an_inline_script_sits_between_libraries():
+    html = page("").replace(
+        "</head>",
+        "<script>Chart.defaults.font.family='Inter'</script>"
+        '<script src="https://unpkg.com/lucide@latest"></script></head>',
+    )
+    out, _ = audit_page(html)
+    assert " defer" not in out
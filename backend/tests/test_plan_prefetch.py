@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from app.agents import planner
+from app.core.config import settings
+from app.services.screen_prefetch import screen_prefetcher
+
+
+class StallingPlanService:
+    """Streams a design system and one screen, then never finishes (like a hung upstream)."""
+
+    def __init__(self):
+        self.screen_started = asyncio.Event()
+
+    async def generate_design_plan_streaming(self, requirements, context=None):
+        yield {"type": "design_system", "design_system": {"primary_color": "blue-500"}}
+        yield {"type": "screen", "index": 0, "screen": {"id": "home", "title": "Home"}}
+        await asyncio.Event().wait()
+
+    async def generate_screen_streaming(self, screen_config, design_system):
+        self.screen_started.set()
+        await asyncio.Event().wait()
+        yield {}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_planning_cancels_its_prefetched_generations(monkeypatch):
+    monkeypatch.setattr(settings, "PLAN_PIPELINING", True)
+    service = StallingPlanService()
+    config = {"configurable": {"thread_id": "cancelled-plan"}}
+
+    planning = asyncio.create_task(planner._stream_plan(service, "a landing page", {}, "cancelled-plan", config))
+    await asyncio.wait_for(service.screen_started.wait(), timeout=5)
+    prefetch = screen_prefetcher._tasks[("cancelled-plan", "home")][1]
+
+    planning.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await planning
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(prefetch, timeout=5)
+
+    assert not [k for k in screen_prefetcher._tasks if k[0] == "cancelled-plan"]
+    assert "cancelled-plan" not in screen_prefetcher._resolvers
+    assert "cancelled-plan" not in screen_prefetcher._semaphores
@@ -0,0 +1,39 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents import generator
+from app.services import llm_service as llm_module
+from app.services.llm_service import LLMService
+
+
+class FailingCompletions:
+    async def create(self, **kwargs):
+        raise RuntimeError("429 rate limited")
+
+
+@pytest.fixture
+def failing_service(monkeypatch):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FailingCompletions()))
+    monkeypatch.setattr(llm_module, "_shared_client", client)
+    return LLMService()
+
+
+@pytest.mark.asyncio
+async def test_failed_generation_raises_instead_of_returning_the_placeholder(failing_service):
+    with pytest.raises(RuntimeError, match="429 rate limited"):
+        await generator.render_screen_html(failing_service, {"id": "home", "title": "Home"}, {})
+
+
+@pytest.mark.asyncio
+async def test_failed_generation_is_counted_as_a_fallback_screen(failing_service, monkeypatch):
+    monkeypatch.setattr(generator.LLMService, "for_config", classmethod(lambda cls, config: failing_service))
+    state = {"design_plan": {"screens": [{"id": "home", "title": "Home"}], "design_system": {}}}
+    config = {"configurable": {"thread_id": "render-failure"}}
+
+    result = await asyncio.wait_for(generator.generator(state, config, store=None), timeout=5)
+
+    screen = result["generated_screens"][0]
+    assert screen["fallback"] is True and "429 rate limited" in screen["error"]
+    assert result["generation_summary"]["fallback_screens"] == 1
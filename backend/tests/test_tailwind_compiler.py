@@ -0,0 +1,77 @@
+from app.services.tailwind_compiler import PREFLIGHT, compile_class, looks_like_utility, tailwind_compiler
+
+CDN = '<script src="https://cdn.tailwindcss.com"></script>'
+
+
+def page(body: str, head: str = "") -> str:
+    return f"<!DOCTYPE html><html><head>\n  {CDN}\n{head}</head><body>{body}</body></html>"
+
+
+def css(cls: str) -> str:
+    rule = compile_class(cls)
+    assert rule is not None, cls
+    return rule.css
+
+
+def test_math_functions_get_operator_spacing():
+    assert css("h-[calc(100vh-4rem)]").endswith("{height:calc(100vh - 4rem)}")
+    assert css("w-[calc(100%-var(--side-w))]").endswith("{width:calc(100% - var(--side-w))}")
+    assert css("h-[min(50vh,calc(100%-2rem))]").endswith("{height:min(50vh,calc(100% - 2rem))}")
+    assert css("w-[clamp(10rem,50%-2rem,40rem)]").endswith("{width:clamp(10rem,50% - 2rem,40rem)}")
+
+
+def test_math_spacing_leaves_signs_and_var_names_alone():
+    assert css("[margin:calc(-1*2rem)]").endswith("{margin:calc(-1 * 2rem)}")
+    assert css("top-[calc(env(safe-area-inset-top)+1rem)]").endswith("{top:calc(env(safe-area-inset-top) + 1rem)}")
+    assert css("w-[var(--w-main)]").endswith("{width:var(--w-main)}")
+
+
+def test_filter_text_and_touch_families():
+    assert "--tw-drop-shadow:drop-shadow(0 10px 8px" in css("drop-shadow-lg")
+    assert "--tw-hue-rotate:hue-rotate(-15deg)" in css("-hue-rotate-15")
+    assert "var(--tw-hue-rotate,)" in css("blur-sm")
+    assert css("columns-3").endswith("{columns:3}")
+    assert css("indent-4").endswith("{text-indent:1rem}")
+    assert css("touch-none").endswith("{touch-action:none}")
+
+
+def test_utility_shape():
+    for cls in ("break-after-page", "hidden", "md:foo", "[mask:none]", "-z-10"):
+        assert looks_like_utility(cls), cls
+    for cls in ("card", "nav-link", "is-open", "fade-in", "active"):
+        assert not looks_like_utility(cls), cls
+
+
+def test_compiles_and_drops_cdn():
+    html, stats = tailwind_compiler.process(page('<div class="p-4 text-gray-900 drop-shadow-md"></div>'))
+    assert stats["mode"] == "compiled"
+    assert CDN not in html
+    assert f"<style>{PREFLIGHT}</style>" in html
+    assert ".drop-shadow-md{" in html
+
+
+def test_container_compiles():
+    html, stats = tailwind_compiler.process(page('<div class="container mx-auto"></div>'))
+    assert stats["mode"] == "compiled"
+    assert ".container{width:100%}" in html
+
+
+def test_unknown_utility_keeps_cdn():
+    html, stats = tailwind_compiler.process(page('<div class="p-4 break-after-page"></div>'))
+    assert stats["mode"] == "cdn"
+    assert stats["missed"] == ["break-after-page"]
+    assert CDN in html
+
+
+def test_unknown_utility_added_by_script_keeps_cdn():
+    html, stats = tailwind_compiler.process(
+        page('<div id="x" class="p-4"></div><script>x.classList.add("break-after-page")</script>')
+    )
+    assert stats["mode"] == "cdn"
+    assert CDN in html
+
+
+def test_classes_defined_by_the_page_need_no_utility():
+    head = "<style>.text-gradient{background:linear-gradient(red,blue)}.hover\\:glow:hover{color:red}</style>"
+    html, stats = tailwind_compiler.process(page('<h1 class="text-gradient hover:glow p-2"></h1>', head))
+    assert stats["mode"] == "compiled", stats
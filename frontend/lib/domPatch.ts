@@ -0,0 +1,60 @@
+// Applies screen patches from the backend (app/services/dom_diff.py) to a live preview document.
+// Paths index element children below <html>; every op names the tag it expects, so a DOM that
+// drifted from the patch base is detected and the caller reloads the full document instead.
+// Not wired into the chat preview yet: useChat does not request screen_patches, and
+// composeSrcDoc (AiPhaseRenderers) rewrites <head>, so its documents are not the patch base.
+
+export type ScreenPatchOp =
+  | { op: 'replace' | 'html'; path: number[]; tag: string; html: string }
+  | { op: 'attrs'; path: number[]; tag: string; set: Record<string, string>; remove: string[] }
+  | { op: 'remove'; path: number[]; tag: string }
+  | { op: 'insert'; path: number[]; tag: string; index: number; html: string }
+
+export interface ScreenPatch {
+  mode: 'same' | 'patch' | 'full'
+  base: string
+  target: string
+  ops?: ScreenPatchOp[]
+}
+
+function resolve(doc: Document, path: number[]): Element | null {
+  let el: Element | null = doc.documentElement
+  for (const index of path) {
+    el = el?.children[index] ?? null
+  }
+  return el
+}
+
+/** Returns false when the patch cannot be applied (reload the full document then). */
+export function applyScreenPatch(doc: Document, patch: ScreenPatch): boolean {
+  if (patch.mode === 'same') return true
+  if (patch.mode !== 'patch' || !patch.ops) return false
+
+  for (const op of patch.ops) {
+    const el = resolve(doc, op.path)
+    if (!el || el.tagName.toLowerCase() !== op.tag) return false
+
+    switch (op.op) {
+      case 'replace':
+        el.outerHTML = op.html
+        break
+      case 'html':
+        el.innerHTML = op.html
+        break
+      case 'attrs':
+        op.remove.forEach((name) => el.removeAttribute(name))
+        Object.entries(op.set).forEach(([name, value]) => el.setAttribute(name, value))
+        break
+      case 'remove':
+        el.remove()
+        break
+      case 'insert': {
+        const next = el.children[op.index]
+        if (next) next.insertAdjacentHTML('beforebegin', op.html)
+        else el.insertAdjacentHTML('beforeend', op.html)
+        break
+      }
+    }
+  }
+  return true
+}